@@ -19,12 +19,11 @@ import argparse
 import logging
 import sys
 import os
-import io
 import time
 import hashlib
 import boto3
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any
 from pathlib import Path
 from dataclasses import dataclass
 
@@ -35,6 +34,9 @@ from config import config
 from s3_client import S3Client
 from opensearch_client import OpenSearchClient
 from preview_generator import PreviewGenerator, PreviewConfig
+from converted_pdf_index import ConvertedPdfIndex
+from upload_pool import S3UploadPool, UploadRequest
+from bulk_update_writer import BulkUpdateWriter
 
 # Configure logging
 logging.basicConfig(
@@ -120,6 +122,15 @@ class DocuWorksPreviewBatchProcessor:
         self.s3_client = S3Client()
         self.opensearch_client = OpenSearchClient()
 
+        # Partial updates are sent in _bulk requests; failures are reported per
+        # document through _on_update_result once the batch is flushed
+        self.update_writer = BulkUpdateWriter(
+            self.opensearch_client.client,
+            self.opensearch_client.index_name,
+            max_docs=int(os.getenv('BULK_UPDATE_MAX_DOCS', '200')),
+            retry_on_conflict=3
+        )
+
         # Initialize preview generator with default config
         preview_config = PreviewConfig(
             dpi=config.preview.dpi,
@@ -130,11 +141,21 @@ class DocuWorksPreviewBatchProcessor:
         )
         self.preview_generator = PreviewGenerator(preview_config)
 
+        # Pooled uploader: pages upload concurrently while later pages render
+        self.upload_pool = S3UploadPool(
+            region=config.aws.region,
+            max_workers=int(os.getenv('PREVIEW_UPLOAD_WORKERS', '8'))
+        )
+
         # Statistics
         self.stats = BatchStats(start_time=time.time())
 
-        # Cache for converted PDFs in S3 (base_filename -> s3_key mapping)
-        self._pdf_cache: Optional[Dict[str, str]] = None
+        # Index of converted PDFs in S3 (persisted locally, refreshed incrementally)
+        self._pdf_index = ConvertedPdfIndex(
+            boto3.client('s3', **config.get_boto3_config()),
+            config.s3.landing_bucket,
+            prefix=self.CONVERTED_PDF_PREFIX
+        )
 
         logger.info("Initialization complete")
 
@@ -217,63 +238,13 @@ class DocuWorksPreviewBatchProcessor:
             logger.error(f"Failed to query OpenSearch: {e}")
             return []
 
-    def _build_pdf_cache(self) -> Dict[str, str]:
-        """
-        Build a cache of all converted PDFs in S3.
-
-        This fetches all objects from docuworks-converted/ and builds a mapping
-        from base filename to S3 key for efficient lookups.
-
-        Returns:
-            Dictionary mapping base filenames to S3 keys
-        """
-        logger.info("Building PDF cache from S3...")
-        pdf_cache: Dict[str, str] = {}
-
-        try:
-            # Use paginator to get all objects (beyond 1000 limit)
-            s3 = boto3.client('s3', **config.get_boto3_config())
-            paginator = s3.get_paginator('list_objects_v2')
-
-            page_iterator = paginator.paginate(
-                Bucket=config.s3.landing_bucket,
-                Prefix=self.CONVERTED_PDF_PREFIX
-            )
-
-            total_objects = 0
-            pdf_count = 0
-
-            for page in page_iterator:
-                if 'Contents' not in page:
-                    continue
-
-                for obj in page['Contents']:
-                    total_objects += 1
-                    key = obj['Key']
-
-                    if key.endswith('.pdf'):
-                        pdf_count += 1
-                        # Extract the filename from the key
-                        # e.g., "docuworks-converted/road/.../200428_ts-server5_filename.pdf"
-                        filename = Path(key).stem  # "200428_ts-server5_filename"
-
-                        # Store the full key, using filename as part of the lookup
-                        # We'll search for base_filename in this filename during lookup
-                        pdf_cache[filename] = key
-
-            logger.info(f"PDF cache built: {pdf_count} PDFs found (scanned {total_objects} objects)")
-            return pdf_cache
-
-        except Exception as e:
-            logger.error(f"Failed to build PDF cache: {e}")
-            return {}
-
     def find_converted_pdf(self, base_filename: str) -> Optional[str]:
         """
         Find the converted PDF in S3's docuworks-converted/ folder.
 
-        Uses a cached lookup for efficient batch processing.
-        The PDF filename pattern is: timestamp_server_originalfilename.pdf
+        Uses the converted PDF index (exact match on the original filename,
+        then substring match). The PDF filename pattern is:
+        timestamp_server_originalfilename.pdf
 
         Args:
             base_filename: The base filename (without extension)
@@ -281,31 +252,26 @@ class DocuWorksPreviewBatchProcessor:
         Returns:
             S3 key of the converted PDF, or None if not found
         """
-        # Build cache on first call
-        if self._pdf_cache is None:
-            self._pdf_cache = self._build_pdf_cache()
-
-        # Search for base_filename in cached PDF filenames
-        for pdf_filename, s3_key in self._pdf_cache.items():
-            if base_filename in pdf_filename:
-                logger.debug(f"Found matching PDF: {s3_key} for {base_filename}")
-                return s3_key
-
-        logger.debug(f"No converted PDF found for {base_filename}")
-        return None
+        s3_key = self._pdf_index.find(base_filename)
+        if s3_key:
+            logger.debug(f"Found matching PDF: {s3_key} for {base_filename}")
+        return s3_key
 
-    def generate_previews_from_pdf(
+    def generate_and_upload_previews(
         self,
-        pdf_s3_key: str
+        pdf_s3_key: str,
+        file_id: str
     ) -> List[Dict[str, Any]]:
         """
-        Download PDF from S3 and generate preview images.
+        Download PDF from S3, render preview pages one at a time and
+        upload each page as soon as it is encoded.
 
         Args:
             pdf_s3_key: S3 key of the PDF file
+            file_id: Unique file identifier for S3 path
 
         Returns:
-            List of preview data dictionaries
+            List of uploaded preview info with S3 keys
         """
         temp_pdf_path = None
 
@@ -321,12 +287,13 @@ class DocuWorksPreviewBatchProcessor:
                 logger.error(f"Failed to download PDF: {pdf_s3_key}")
                 return []
 
-            # Generate previews using existing method
+            # Stream pages straight into the uploader (the PDF must outlive the iterator)
             logger.debug(f"Generating previews from: {temp_pdf_path}")
-            previews = self.preview_generator._generate_from_pdf(Path(temp_pdf_path))
+            previews = self.preview_generator.iter_pdf_previews(Path(temp_pdf_path))
+            uploaded = self.upload_previews_to_s3(previews, file_id)
 
-            logger.info(f"Generated {len(previews)} preview pages from PDF")
-            return previews
+            logger.info(f"Generated and uploaded {len(uploaded)} preview pages from PDF")
+            return uploaded
 
         except Exception as e:
             logger.error(f"Failed to generate previews from PDF {pdf_s3_key}: {e}")
@@ -339,20 +306,21 @@ class DocuWorksPreviewBatchProcessor:
 
     def upload_previews_to_s3(
         self,
-        previews: List[Dict[str, Any]],
+        previews: Iterable[Dict[str, Any]],
         file_id: str
     ) -> List[Dict[str, Any]]:
         """
-        Upload preview images to S3 thumbnail bucket.
+        Upload preview images to S3 thumbnail bucket as they are produced.
 
         Args:
-            previews: List of preview data from generate_previews_from_pdf
+            previews: Preview data (list or iterator from iter_pdf_previews)
             file_id: Unique file identifier for S3 path
 
         Returns:
             List of uploaded preview info with S3 keys
         """
         if self.dry_run:
+            previews = list(previews)
             logger.info(f"[DRY RUN] Would upload {len(previews)} previews for file_id: {file_id}")
             return [
                 {
@@ -365,39 +333,31 @@ class DocuWorksPreviewBatchProcessor:
                 for p in previews
             ]
 
+        requests = (
+            UploadRequest(
+                bucket=config.s3.thumbnail_bucket,
+                key=f"previews/{file_id}/page_{preview['page']}.jpg",
+                data=preview['data'],
+                content_type='image/jpeg',
+                context={
+                    "page": preview['page'],
+                    "s3_key": f"previews/{file_id}/page_{preview['page']}.jpg",
+                    "width": preview['width'],
+                    "height": preview['height'],
+                    "size": preview['size']
+                }
+            )
+            for preview in previews
+        )
+
         uploaded = []
+        for result in self.upload_pool.upload_all(requests):
+            if result.success:
+                uploaded.append(result.context)
+                logger.debug(f"Uploaded preview page {result.context['page']} to {result.key}")
+            else:
+                logger.warning(f"Failed to upload preview page {result.context['page']}: {result.error}")
 
-        for preview in previews:
-            try:
-                preview_key = f"previews/{file_id}/page_{preview['page']}.jpg"
-
-                # Create BytesIO from preview data
-                preview_io = io.BytesIO(preview['data'])
-
-                # Upload to S3
-                preview_url = self.s3_client.upload_fileobj(
-                    preview_io,
-                    config.s3.thumbnail_bucket,
-                    preview_key,
-                    content_type='image/jpeg'
-                )
-
-                if preview_url:
-                    uploaded.append({
-                        "page": preview['page'],
-                        "s3_key": preview_key,
-                        "width": preview['width'],
-                        "height": preview['height'],
-                        "size": preview['size']
-                    })
-                    logger.debug(f"Uploaded preview page {preview['page']} to {preview_key}")
-                else:
-                    logger.warning(f"Failed to upload preview page {preview['page']}")
-
-            except Exception as e:
-                logger.error(f"Failed to upload preview page {preview['page']}: {e}")
-
-        logger.info(f"Uploaded {len(uploaded)}/{len(previews)} preview images")
         return uploaded
 
     def update_opensearch_document(
@@ -406,38 +366,42 @@ class DocuWorksPreviewBatchProcessor:
         preview_images: List[Dict[str, Any]]
     ) -> bool:
         """
-        Update the OpenSearch document with preview_images array.
+        Queue a partial update of the OpenSearch document with preview_images array.
 
         Args:
             doc_id: OpenSearch document ID
             preview_images: List of preview image info
 
         Returns:
-            True if update was successful
+            True if the update was queued (bulk failures are reported by _on_update_result)
         """
         if self.dry_run:
             logger.info(f"[DRY RUN] Would update document {doc_id} with {len(preview_images)} preview images")
             return True
 
-        try:
-            updates = {
-                "preview_images": preview_images,
-                "total_pages": len(preview_images),
-                "preview_generated_at": datetime.utcnow().isoformat()
-            }
-
-            success = self.opensearch_client.update_document(doc_id, updates)
+        updates = {
+            "preview_images": preview_images,
+            "total_pages": len(preview_images),
+            "preview_generated_at": datetime.utcnow().isoformat()
+        }
 
-            if success:
-                logger.debug(f"Updated OpenSearch document: {doc_id}")
-            else:
-                logger.error(f"Failed to update OpenSearch document: {doc_id}")
+        self.update_writer.add(
+            doc_id,
+            updates,
+            callback=lambda success, error: self._on_update_result(doc_id, success, error)
+        )
+        logger.debug(f"Queued OpenSearch update: {doc_id}")
+        return True
 
-            return success
+    def _on_update_result(self, doc_id: str, success: bool, error: Optional[str]):
+        """Bulk update acknowledgement: move failed documents from success to failed."""
+        if success:
+            logger.debug(f"Updated OpenSearch document: {doc_id}")
+            return
 
-        except Exception as e:
-            logger.error(f"Failed to update OpenSearch document {doc_id}: {e}")
-            return False
+        logger.error(f"Failed to update OpenSearch document {doc_id}: {error}")
+        self.stats.success -= 1
+        self.stats.failed += 1
 
     def process_single_file(self, document: Dict[str, Any]) -> bool:
         """
@@ -469,18 +433,11 @@ class DocuWorksPreviewBatchProcessor:
 
             logger.info(f"Found converted PDF: {pdf_key}")
 
-            # Step 2: Generate previews from PDF
-            previews = self.generate_previews_from_pdf(pdf_key)
-
-            if not previews:
-                logger.warning(f"No previews generated for: {file_name}")
-                return False
-
-            # Step 3: Upload previews to S3
-            uploaded = self.upload_previews_to_s3(previews, file_id)
+            # Step 2-3: Generate previews page by page and upload each to S3
+            uploaded = self.generate_and_upload_previews(pdf_key, file_id)
 
             if not uploaded:
-                logger.error(f"Failed to upload previews for: {file_name}")
+                logger.error(f"No previews generated or uploaded for: {file_name}")
                 return False
 
             # Step 4: Update OpenSearch document
@@ -513,42 +470,49 @@ class DocuWorksPreviewBatchProcessor:
         logger.info(f"  Limit: {limit or 'None (all files)'}")
         logger.info("=" * 60)
 
-        # Query for files to process
-        documents = self.query_docuworks_without_previews(limit=limit)
-        self.stats.total_found = len(documents)
+        try:
+            # Query for files to process
+            documents = self.query_docuworks_without_previews(limit=limit)
+            self.stats.total_found = len(documents)
+
+            if not documents:
+                logger.info("No DocuWorks files without previews found")
+                return self.stats
 
-        if not documents:
-            logger.info("No DocuWorks files without previews found")
-            return self.stats
+            logger.info(f"Processing {len(documents)} files...")
 
-        logger.info(f"Processing {len(documents)} files...")
+            for i, doc in enumerate(documents, 1):
+                file_name = doc.get('file_name', 'unknown')
+                logger.info(f"[{i}/{len(documents)}] Processing: {file_name}")
 
-        for i, doc in enumerate(documents, 1):
-            file_name = doc.get('file_name', 'unknown')
-            logger.info(f"[{i}/{len(documents)}] Processing: {file_name}")
+                try:
+                    success = self.process_single_file(doc)
+                    self.stats.processed += 1
 
-            try:
-                success = self.process_single_file(doc)
-                self.stats.processed += 1
+                    if success:
+                        self.stats.success += 1
+                    else:
+                        self.stats.failed += 1
 
-                if success:
-                    self.stats.success += 1
-                else:
+                except Exception as e:
+                    logger.error(f"Failed to process {file_name}: {e}")
+                    self.stats.processed += 1
                     self.stats.failed += 1
 
-            except Exception as e:
-                logger.error(f"Failed to process {file_name}: {e}")
-                self.stats.processed += 1
-                self.stats.failed += 1
-
-            # Progress logging every 10 files
-            if i % 10 == 0:
-                logger.info(f"Progress: {self.stats}")
+                # Progress logging every 10 files
+                if i % 10 == 0:
+                    logger.info(f"Progress: {self.stats}")
+        finally:
+            # Send remaining partial updates (failures adjust the stats)
+            self.update_writer.close()
+            self.upload_pool.close()
 
         # Final summary
         logger.info("=" * 60)
         logger.info("Batch Processing Complete")
         logger.info(f"  {self.stats}")
+        logger.info(f"  PDF Index: {self._pdf_index.stats}")
+        logger.info(f"  Uploads: {self.upload_pool.stats}")
         logger.info("=" * 60)
 
         return self.stats
@@ -35,6 +35,7 @@ from config import config
 from s3_client import S3Client
 from opensearch_client import OpenSearchClient
 from office_converter import OfficeConverter
+from bulk_update_writer import BulkUpdateWriter
 
 # Configure logging
 logging.basicConfig(
@@ -122,6 +123,15 @@ class OfficePreviewBatchProcessor:
         self.s3_client = S3Client()
         self.opensearch_client = OpenSearchClient()
 
+        # Partial updates are sent in _bulk requests; failures are reported per
+        # document through _on_update_result once the batch is flushed
+        self.update_writer = BulkUpdateWriter(
+            self.opensearch_client.client,
+            self.opensearch_client.index_name,
+            max_docs=int(os.getenv('BULK_UPDATE_MAX_DOCS', '200')),
+            retry_on_conflict=3
+        )
+
         # Initialize office converter
         self.office_converter = OfficeConverter()
         if not self.office_converter.is_available():
@@ -435,7 +445,7 @@ class OfficePreviewBatchProcessor:
         page_count: int
     ) -> bool:
         """
-        Update the OpenSearch document with converted_pdf_url.
+        Queue a partial update of the OpenSearch document with converted_pdf_url.
 
         Args:
             doc_id: OpenSearch document ID
@@ -443,32 +453,36 @@ class OfficePreviewBatchProcessor:
             page_count: Number of pages in the PDF
 
         Returns:
-            True if update was successful
+            True if the update was queued (bulk failures are reported by _on_update_result)
         """
         if self.dry_run:
             logger.info(f"[DRY RUN] Would update document {doc_id} with converted_pdf_url: {pdf_s3_key}")
             return True
 
-        try:
-            updates = {
-                "converted_pdf_url": f"s3://{config.s3.landing_bucket}/{pdf_s3_key}",
-                "converted_pdf_key": pdf_s3_key,
-                "total_pages": page_count,
-                "pdf_converted_at": datetime.utcnow().isoformat()
-            }
-
-            success = self.opensearch_client.update_document(doc_id, updates)
-
-            if success:
-                logger.debug(f"Updated OpenSearch document: {doc_id}")
-            else:
-                logger.error(f"Failed to update OpenSearch document: {doc_id}")
+        updates = {
+            "converted_pdf_url": f"s3://{config.s3.landing_bucket}/{pdf_s3_key}",
+            "converted_pdf_key": pdf_s3_key,
+            "total_pages": page_count,
+            "pdf_converted_at": datetime.utcnow().isoformat()
+        }
+
+        self.update_writer.add(
+            doc_id,
+            updates,
+            callback=lambda success, error: self._on_update_result(doc_id, success, error)
+        )
+        logger.debug(f"Queued OpenSearch update: {doc_id}")
+        return True
 
-            return success
+    def _on_update_result(self, doc_id: str, success: bool, error: Optional[str]):
+        """Bulk update acknowledgement: move failed documents from success to failed."""
+        if success:
+            logger.debug(f"Updated OpenSearch document: {doc_id}")
+            return
 
-        except Exception as e:
-            logger.error(f"Failed to update OpenSearch document {doc_id}: {e}")
-            return False
+        logger.error(f"Failed to update OpenSearch document {doc_id}: {error}")
+        self.stats.success -= 1
+        self.stats.failed += 1
 
     def cleanup_temp_files(self, *paths):
         """
@@ -609,6 +623,9 @@ class OfficePreviewBatchProcessor:
             if i % 10 == 0:
                 logger.info(f"Progress: {self.stats}")
 
+        # Send remaining partial updates (failures adjust the stats)
+        self.update_writer.close()
+
         # Final summary
         logger.info("=" * 60)
         logger.info("Batch Processing Complete")
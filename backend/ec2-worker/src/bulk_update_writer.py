@@ -0,0 +1,322 @@
+"""
+Bulk Update Writer
+部分更新（update + doc）をバッファし、OpenSearchの_bulkでまとめて送信する
+
+プレビュー/ベクトルのバックフィルは1ドキュメント1リクエストだとリクエスト数が
+ボトルネックになるため、件数・サイズ・待機時間のいずれかでまとめてフラッシュする。
+（python-workerのStreamingBulkIndexerと同じ構成の部分更新版）
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# アイテム単位でリトライするステータス（キュー溢れ・一時的な障害）
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+
+@dataclass
+class _PendingUpdate:
+    """バッファ内の部分更新"""
+    document_id: str
+    doc: Dict[str, Any]
+    callback: Optional[Callable[[bool, Optional[str]], None]]
+    size_bytes: int
+    added_at: float
+    attempts: int = 0
+
+
+class BulkUpdateWriter:
+    """
+    スレッドセーフな部分更新バルクライター
+
+    - ドキュメント数・ペイロードサイズ・最大待機時間のいずれかでフラッシュ
+    - アイテム単位の結果をコールバックで通知（失敗分のみ再処理・記録できる）
+    - 429/503等のアイテムは指数バックオフで再送
+    - retry_on_conflictを指定すると同時更新時のバージョン競合をOpenSearch側で再試行
+    """
+
+    def __init__(
+        self,
+        client,
+        index_name: str,
+        max_docs: int = 500,
+        max_bytes: int = 5 * 1024 * 1024,
+        max_latency_seconds: float = 2.0,
+        retry_on_conflict: Optional[int] = None,
+        max_retries: int = 3,
+        backoff_seconds: float = 0.5,
+        refresh: bool = False
+    ):
+        """
+        初期化
+
+        Args:
+            client: opensearchpy.OpenSearchクライアント
+            index_name: 更新対象のインデックス名
+            max_docs: フラッシュするドキュメント数
+            max_bytes: フラッシュするペイロードサイズ（バイト）
+            max_latency_seconds: 最古の更新の最大待機秒数（start()時のみ有効）
+            retry_on_conflict: バージョン競合時のOpenSearch側再試行回数
+            max_retries: 429/503等のアイテムを再送する最大回数
+            backoff_seconds: 再送の初期待機秒数（2倍ずつ増加）
+            refresh: バルクリクエストごとにrefreshするか
+        """
+        self.client = client
+        self.index_name = index_name
+        self.max_docs = max(1, max_docs)
+        self.max_bytes = max_bytes
+        self.max_latency_seconds = max_latency_seconds
+        self.retry_on_conflict = retry_on_conflict
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.refresh = refresh
+
+        self._buffer: List[_PendingUpdate] = []
+        self._buffer_bytes = 0
+        self._lock = threading.Lock()
+        # 同時に複数のバルクリクエストを投げない
+        self._flush_lock = threading.Lock()
+
+        self._stop_event = threading.Event()
+        self._timer_thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'requests': 0,
+            'updated': 0,
+            'failed': 0,
+            'retried': 0,
+        }
+
+        logger.info(
+            f"BulkUpdateWriter initialized: index={index_name}, max_docs={self.max_docs}, "
+            f"max_bytes={self.max_bytes}, max_latency={self.max_latency_seconds}s"
+        )
+
+    def start(self):
+        """最大待機時間ベースのフラッシュスレッドを起動"""
+        if self._timer_thread and self._timer_thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._timer_thread = threading.Thread(
+            target=self._timer_loop,
+            name='bulk-update-timer',
+            daemon=True
+        )
+        self._timer_thread.start()
+
+    def add(
+        self,
+        document_id: str,
+        doc: Dict[str, Any],
+        callback: Optional[Callable[[bool, Optional[str]], None]] = None
+    ):
+        """
+        部分更新をバッファに追加（閾値に達した場合は呼び出しスレッドでフラッシュ）
+
+        Args:
+            document_id: ドキュメントID
+            doc: 更新するフィールド
+            callback: 結果通知 (success, error_message)
+        """
+        size = self._estimate_size(doc)
+        should_flush = False
+
+        with self._lock:
+            self._buffer.append(_PendingUpdate(
+                document_id=document_id,
+                doc=doc,
+                callback=callback,
+                size_bytes=size,
+                added_at=time.time()
+            ))
+            self._buffer_bytes += size
+
+            if len(self._buffer) >= self.max_docs or self._buffer_bytes >= self.max_bytes:
+                should_flush = True
+
+        if should_flush:
+            self.flush()
+
+    def update_and_wait(
+        self,
+        document_id: str,
+        doc: Dict[str, Any],
+        timeout: Optional[float] = None
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        部分更新を追加し、バルク応答を受け取るまで待機
+
+        Args:
+            document_id: ドキュメントID
+            doc: 更新するフィールド
+            timeout: 最大待機秒数
+
+        Returns:
+            (success, error_message)
+        """
+        done = threading.Event()
+        outcome: Dict[str, Any] = {}
+
+        def _ack(success: bool, error: Optional[str]):
+            outcome['success'] = success
+            outcome['error'] = error
+            done.set()
+
+        self.add(document_id, doc, _ack)
+
+        if not done.wait(timeout):
+            return (False, f"Bulk update acknowledgement timed out after {timeout}s")
+
+        return (outcome['success'], outcome['error'])
+
+    def flush(self) -> int:
+        """
+        バッファ内の部分更新を送信し、各コールバックを呼び出す
+
+        Returns:
+            失敗したドキュメント数
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return 0
+                items = self._buffer
+                self._buffer = []
+                self._buffer_bytes = 0
+
+            logger.info(f"Flushing {len(items)} partial updates to OpenSearch (bulk)...")
+
+            failed = 0
+            attempt = 0
+            while items:
+                results = self._send(items)
+                retry: List[_PendingUpdate] = []
+
+                for item, (status, error) in zip(items, results):
+                    if error and status in RETRYABLE_STATUSES and attempt < self.max_retries:
+                        retry.append(item)
+                        continue
+                    if error:
+                        failed += 1
+                        logger.warning(f"Bulk update failed for {item.document_id}: {error}")
+                    self._notify(item, error)
+
+                if retry:
+                    delay = self.backoff_seconds * (2 ** attempt)
+                    logger.warning(f"Retrying {len(retry)} rejected updates in {delay:.1f}s")
+                    with self._lock:
+                        self.stats['retried'] += len(retry)
+                    time.sleep(delay)
+                    attempt += 1
+                items = retry
+
+            logger.info(f"Bulk update flush complete ({failed} failed)")
+            return failed
+
+    def pending(self) -> int:
+        """バッファ内の件数"""
+        with self._lock:
+            return len(self._buffer)
+
+    def close(self):
+        """タイマーを停止し残りの更新をフラッシュ"""
+        self._stop_event.set()
+        if self._timer_thread:
+            self._timer_thread.join(timeout=5)
+            self._timer_thread = None
+        self.flush()
+
+    def _send(self, items: List[_PendingUpdate]) -> List[Tuple[int, Optional[str]]]:
+        """
+        1回の_bulkリクエストを送信
+
+        Returns:
+            アイテムごとの (status, error_message)（成功時はerror_message=None）
+        """
+        body: List[Dict[str, Any]] = []
+        for item in items:
+            action: Dict[str, Any] = {'_index': self.index_name, '_id': item.document_id}
+            if self.retry_on_conflict:
+                action['retry_on_conflict'] = self.retry_on_conflict
+            body.append({'update': action})
+            body.append({'doc': item.doc})
+
+        with self._lock:
+            self.stats['requests'] += 1
+
+        try:
+            response = self.client.bulk(body=body, refresh=self.refresh)
+        except Exception as e:
+            logger.error(f"Bulk update request failed: {e}", exc_info=True)
+            status = getattr(e, 'status_code', None)
+            return [(status if isinstance(status, int) else 0, f"Bulk request failed: {e}")] * len(items)
+
+        results: List[Tuple[int, Optional[str]]] = []
+        for entry in response.get('items', []):
+            result = entry.get('update', {})
+            status = result.get('status', 0)
+            error = result.get('error')
+            if error:
+                if isinstance(error, dict):
+                    error = f"{error.get('type')}: {error.get('reason')}"
+                results.append((status, str(error)))
+            else:
+                results.append((status, None))
+
+        if len(results) != len(items):
+            return [(0, "Bulk response item count mismatch")] * len(items)
+        return results
+
+    def _notify(self, item: _PendingUpdate, error: Optional[str]):
+        """統計を更新しコールバックを呼び出す"""
+        with self._lock:
+            if error:
+                self.stats['failed'] += 1
+            else:
+                self.stats['updated'] += 1
+
+        if item.callback is None:
+            return
+        try:
+            item.callback(error is None, error)
+        except Exception as e:
+            logger.error(f"Bulk update callback failed: {e}", exc_info=True)
+
+    def _timer_loop(self):
+        """最古の更新が最大待機時間を超えたらフラッシュ"""
+        interval = max(0.05, self.max_latency_seconds / 4)
+
+        while not self._stop_event.wait(interval):
+            with self._lock:
+                oldest = self._buffer[0].added_at if self._buffer else None
+
+            if oldest is not None and time.time() - oldest >= self.max_latency_seconds:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"Timed bulk update flush failed: {e}", exc_info=True)
+
+    @staticmethod
+    def _estimate_size(doc: Dict[str, Any]) -> int:
+        """バルクペイロードのサイズを見積もる（バイト）"""
+        try:
+            return len(json.dumps(doc, ensure_ascii=False, default=str).encode('utf-8'))
+        except Exception:
+            return len(str(doc))
+
+    def __enter__(self):
+        """コンテキストマネージャー開始"""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """コンテキストマネージャー終了時にフラッシュ"""
+        self.close()
@@ -110,6 +110,12 @@ class SQSConfig:
     queue_url: str
     visibility_timeout: int
     max_messages: int
+    max_in_flight: int = 0            # 同時処理メッセージ数上限（0でワーカースレッド数）
+    heartbeat_interval: int = 30      # 可視性タイムアウト延長の確認間隔（秒）
+    visibility_extension: int = 0     # 1回の延長幅（秒, 0でvisibility_timeout）
+    max_processing_time: int = 3600   # これを超えた処理は延長を止めて再配信に任せる（秒）
+    ack_max_delay: float = 0.5        # 削除を10件にまとめるために待つ最大秒数
+    ack_urgent_seconds: float = 30.0  # 可視性期限までこの秒数以内の削除は待たずに送る
 
 
 @dataclass
@@ -159,6 +165,13 @@ class PreviewConfig:
     max_pages: int = 50               # 最大ページ数
     enabled: bool = True              # プレビュー機能有効化
 
+@dataclass
+class OfficeConfig:
+    """LibreOffice変換設定"""
+    pool_size: int = 2                # 常駐sofficeインスタンス数（0で文書ごとに起動）
+    max_conversions: int = 200        # インスタンスを再起動するまでの変換数
+
+
 @dataclass
 class OCRConfig:
     """OCR設定"""
@@ -207,7 +220,13 @@ class Config:
         self.sqs = SQSConfig(
             queue_url=os.getenv('SQS_QUEUE_URL', ''),
             visibility_timeout=int(os.getenv('SQS_VISIBILITY_TIMEOUT', '300')),
-            max_messages=int(os.getenv('SQS_MAX_MESSAGES', '10'))
+            max_messages=int(os.getenv('SQS_MAX_MESSAGES', '10')),
+            max_in_flight=int(os.getenv('SQS_MAX_IN_FLIGHT', '0')),
+            heartbeat_interval=int(os.getenv('SQS_HEARTBEAT_INTERVAL', '30')),
+            visibility_extension=int(os.getenv('SQS_VISIBILITY_EXTENSION', '0')),
+            max_processing_time=int(os.getenv('SQS_MAX_PROCESSING_TIME', '3600')),
+            ack_max_delay=float(os.getenv('SQS_ACK_MAX_DELAY', '0.5')),
+            ack_urgent_seconds=float(os.getenv('SQS_ACK_URGENT_SECONDS', '30'))
         )
 
         # OpenSearch設定
@@ -249,6 +268,12 @@ class Config:
             enabled=os.getenv("ENABLE_PREVIEW", "true").lower() == "true"
         )
 
+        # LibreOffice変換設定（pyunoが無い環境では文書ごとに起動）
+        self.office = OfficeConfig(
+            pool_size=int(os.getenv('OFFICE_POOL_SIZE', '2')),
+            max_conversions=int(os.getenv('OFFICE_POOL_MAX_CONVERSIONS', '200'))
+        )
+
         # OCR設定
         self.ocr = OCRConfig(
             languages=os.getenv('TESSERACT_LANG', 'jpn+eng'),
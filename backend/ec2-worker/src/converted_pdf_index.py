@@ -0,0 +1,471 @@
+"""
+Converted PDF Index
+docuworks-converted/ 配下の変換済みPDFを元ファイル名で検索するためのローカル索引
+
+キー形式:
+    docuworks-converted/{category}/{server}/{YYYY}/{MM}/{DD}/{timestamp}_{server}_{filename}[_{datetime}].pdf
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 索引ファイルはバケット・プレフィックスごとに converted_pdf_index_{bucket}_{prefix}.json
+DEFAULT_INDEX_DIR = os.getenv('CONVERTED_PDF_INDEX_DIR', '/var/tmp/cis-filesearch')
+
+# {timestamp}_{server}_{filename}[_{datetime}]
+_STEM_PATTERN = re.compile(
+    r'^(?P<timestamp>\d+)_(?P<server>[^_]+)_(?P<name>.+?)(?:_(?P<converted_at>\d{14}))?$'
+)
+
+
+def parse_converted_stem(stem: str) -> str:
+    """
+    変換済みPDFのファイル名（拡張子なし）から元ファイル名を取り出す
+
+    Args:
+        stem: 例 "084228_ts-server7_001 平面図001-2_20260114115628"
+
+    Returns:
+        元ファイル名（例 "001 平面図001-2"）、形式に合わない場合はstemそのもの
+    """
+    match = _STEM_PATTERN.match(stem)
+    return match.group('name') if match else stem
+
+
+def default_index_path(index_dir: str, bucket: str, prefix: str) -> Path:
+    """
+    バケット・プレフィックスごとの索引ファイルパス
+
+    Args:
+        index_dir: 索引ディレクトリ
+        bucket: バケット名
+        prefix: プレフィックス
+
+    Returns:
+        索引JSONのパス（複数バケットの索引が互いに上書きしない）
+    """
+    name = re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{bucket}_{prefix.strip('/')}")
+    return Path(index_dir) / f"converted_pdf_index_{name}.json"
+
+
+def _trigrams(text: str) -> Set[str]:
+    """文字トライグラムの集合"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ConvertedPdfIndex:
+    """
+    変換済みPDFの検索索引
+
+    - 元ファイル名の完全一致ハッシュマップ
+    - ファイル名の部分一致用トライグラム索引（従来の `base in stem` と同じ判定）
+    - ローカルJSONに永続化し、起動時はパーティション単位のStartAfterで差分のみ取得
+      （パーティション = {category}/{server}/、配下は日付フォルダ順に並ぶため
+      新しい変換結果は既知の最終キーより後ろに追加される）
+    - full_refresh_hoursごとにバックグラウンドで全件再取得し、削除・LastModifiedの変化を反映
+    - S3の取得中も検索は既存の索引で続行（取得結果はロック外で構築してから差し替え）
+    """
+
+    INDEX_VERSION = 1
+    # プレフィックス配下でパーティションとみなす階層数（{category}/{server}/）
+    PARTITION_DEPTH = 2
+
+    def __init__(
+        self,
+        s3_client,
+        bucket: str,
+        prefix: str = 'docuworks-converted/',
+        index_dir: Optional[str] = DEFAULT_INDEX_DIR,
+        full_refresh_hours: float = 24.0,
+        miss_refresh_seconds: float = 300.0
+    ):
+        """
+        初期化（S3へのアクセスは最初の検索時）
+
+        Args:
+            s3_client: boto3 S3クライアント
+            bucket: 変換済みPDFのバケット
+            prefix: 変換済みPDFのプレフィックス
+            index_dir: 永続化先のディレクトリ（Noneの場合は永続化しない）
+            full_refresh_hours: 全件再取得の間隔（時間）
+            miss_refresh_seconds: 検索ミス時に差分取得を行う最小間隔（秒）
+        """
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.index_path = default_index_path(index_dir, bucket, prefix) if index_dir else None
+        self.full_refresh_seconds = full_refresh_hours * 3600
+        self.miss_refresh_seconds = miss_refresh_seconds
+
+        # _lockは索引の参照・差し替えのみ、_refresh_lockはS3からの取得（同時に1つ）
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.RLock()
+        self._loaded = False
+        self._full_refresh_thread: Optional[threading.Thread] = None
+        self._full_refresh_attempted_at = 0.0
+
+        # key -> LastModified (ISO8601)
+        self._entries: Dict[str, str] = {}
+        # パーティションプレフィックス -> 既知の最終キー
+        self._partitions: Dict[str, str] = {}
+        self._full_refreshed_at = 0.0
+        self._refreshed_at = 0.0
+
+        # 検索用索引（_entriesから再構築）
+        self._keys: List[str] = []
+        self._stems: List[str] = []
+        self._by_name: Dict[str, List[int]] = {}
+        self._by_stem: Dict[str, List[int]] = {}
+        self._trigram_index: Dict[str, array] = {}
+
+        self.stats = {
+            'lookups': 0,
+            'exact_hits': 0,
+            'fuzzy_hits': 0,
+            'misses': 0,
+            'listed_objects': 0,
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def find(self, base_filename: str) -> Optional[str]:
+        """
+        元ファイル名（拡張子なし）から変換済みPDFのキーを検索
+
+        完全一致（元ファイル名 → ファイル名全体）を優先し、なければ部分一致。
+        複数見つかった場合はLastModifiedが最新のもの。
+
+        Args:
+            base_filename: 元ファイル名（拡張子なし）
+
+        Returns:
+            S3キー、見つからない場合None
+        """
+        self._ensure_loaded()
+
+        with self._lock:
+            self.stats['lookups'] += 1
+            key = self._lookup(base_filename)
+            refresh_due = key is None and time.time() - self._refreshed_at >= self.miss_refresh_seconds
+
+        if refresh_due:
+            # 索引作成後に変換されたPDFかもしれない（取得中も他スレッドの検索は止めない）
+            self.refresh()
+            with self._lock:
+                key = self._lookup(base_filename)
+
+        self._schedule_full_refresh()
+
+        if key is None:
+            with self._lock:
+                self.stats['misses'] += 1
+            logger.debug(f"No converted PDF found for {base_filename}")
+        return key
+
+    def refresh(self, full: bool = False):
+        """
+        S3から索引を更新
+
+        Args:
+            full: Trueの場合は全件再取得（削除されたキーも反映）
+        """
+        with self._refresh_lock:
+            start_time = time.time()
+            with self._lock:
+                entries = dict(self._entries)
+                partitions = dict(self._partitions)
+            before = len(entries)
+
+            try:
+                if full:
+                    entries, partitions = self._refresh_full()
+                else:
+                    self._refresh_incremental(entries, partitions)
+            except Exception as e:
+                logger.error(f"Failed to refresh converted PDF index: {e}")
+                return
+
+            index = self._build_index(entries)
+
+            with self._lock:
+                self._entries = entries
+                self._partitions = partitions
+                self._set_index(index)
+                if full:
+                    self._full_refreshed_at = start_time
+                self._refreshed_at = time.time()
+
+            self._save(entries, partitions)
+
+            logger.info(
+                f"Converted PDF index {'rebuilt' if full else 'refreshed'}: "
+                f"{len(entries)} PDFs ({len(entries) - before:+d}) "
+                f"in {time.time() - start_time:.1f}s"
+            )
+
+    def _schedule_full_refresh(self):
+        """全件再取得の時期ならバックグラウンドで開始（検索は既存の索引で続行）"""
+        now = time.time()
+        with self._lock:
+            if now - self._full_refreshed_at < self.full_refresh_seconds:
+                return
+            # 失敗時に検索のたびに再試行しない
+            if now - self._full_refresh_attempted_at < self.miss_refresh_seconds:
+                return
+            if self._full_refresh_thread is not None and self._full_refresh_thread.is_alive():
+                return
+            self._full_refresh_attempted_at = now
+            self._full_refresh_thread = threading.Thread(
+                target=self.refresh,
+                kwargs={'full': True},
+                name='converted-pdf-index-rebuild',
+                daemon=True
+            )
+            self._full_refresh_thread.start()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def _lookup(self, base_filename: str) -> Optional[str]:
+        """索引から検索（ロック保持中に呼ぶこと）"""
+        if not base_filename:
+            return None
+
+        ids = self._by_name.get(base_filename) or self._by_stem.get(base_filename)
+        if ids:
+            self.stats['exact_hits'] += 1
+            return self._newest(ids)
+
+        ids = self._substring_candidates(base_filename)
+        if ids:
+            self.stats['fuzzy_hits'] += 1
+            return self._newest(ids)
+
+        return None
+
+    def _substring_candidates(self, text: str) -> List[int]:
+        """ファイル名にtextを含むエントリ（トライグラムで候補を絞ってから確認）"""
+        grams = _trigrams(text)
+
+        if not grams:
+            # 3文字未満は索引を使えないため全件確認
+            return [i for i, stem in enumerate(self._stems) if text in stem]
+
+        postings = []
+        for gram in grams:
+            posting = self._trigram_index.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+
+        return [i for i in candidates if text in self._stems[i]]
+
+    def _newest(self, ids: List[int]) -> str:
+        """LastModifiedが最新のキー（同時刻はキー順）"""
+        return max(
+            (self._keys[i] for i in ids),
+            key=lambda key: (self._entries.get(key, ''), key)
+        )
+
+    @staticmethod
+    def _build_index(entries: Dict[str, str]) -> Dict[str, Any]:
+        """エントリから検索用索引を構築（ロック不要）"""
+        keys = sorted(entries)
+        stems: List[str] = []
+        by_name: Dict[str, List[int]] = {}
+        by_stem: Dict[str, List[int]] = {}
+        trigram_index: Dict[str, array] = {}
+
+        for i, key in enumerate(keys):
+            stem = Path(key).stem
+            stems.append(stem)
+            by_name.setdefault(parse_converted_stem(stem), []).append(i)
+            by_stem.setdefault(stem, []).append(i)
+            for gram in _trigrams(stem):
+                posting = trigram_index.get(gram)
+                if posting is None:
+                    posting = trigram_index[gram] = array('I')
+                posting.append(i)
+
+        return {
+            'keys': keys,
+            'stems': stems,
+            'by_name': by_name,
+            'by_stem': by_stem,
+            'trigram_index': trigram_index,
+        }
+
+    def _set_index(self, index: Dict[str, Any]):
+        """構築済みの索引に差し替え（ロック保持中に呼ぶこと）"""
+        self._keys = index['keys']
+        self._stems = index['stems']
+        self._by_name = index['by_name']
+        self._by_stem = index['by_stem']
+        self._trigram_index = index['trigram_index']
+
+    # ------------------------------------------------------------------
+    # S3 listing
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self):
+        """初回検索時に永続化された索引を読み込み、差分または全件を取得"""
+        if self._loaded:
+            return
+
+        with self._refresh_lock:
+            if self._loaded:
+                return
+
+            if self._load() and time.time() - self._full_refreshed_at < self.full_refresh_seconds:
+                index = self._build_index(self._entries)
+                with self._lock:
+                    self._set_index(index)
+                self.refresh()
+            else:
+                self.refresh(full=True)
+            self._loaded = True
+
+    def _refresh_full(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        プレフィックス配下を全件取得
+
+        Returns:
+            (エントリ, パーティション → 最終キー)
+        """
+        entries: Dict[str, str] = {}
+        partitions: Dict[str, str] = {}
+
+        for obj in self._list(self.prefix):
+            entries[obj['Key']] = self._format_time(obj.get('LastModified'))
+            partition = self._partition_of(obj['Key'])
+            if partition:
+                partitions[partition] = max(partitions.get(partition, ''), obj['Key'])
+
+        return entries, partitions
+
+    def _refresh_incremental(self, entries: Dict[str, str], partitions: Dict[str, str]):
+        """パーティションごとに既知の最終キー以降のみ取得（entries/partitionsを更新）"""
+        for partition in self._discover_partitions(entries):
+            last_key = partitions.get(partition)
+            for obj in self._list(partition, start_after=last_key):
+                entries[obj['Key']] = self._format_time(obj.get('LastModified'))
+                if obj['Key'] > partitions.get(partition, ''):
+                    partitions[partition] = obj['Key']
+
+    def _discover_partitions(self, entries: Dict[str, str]) -> List[str]:
+        """区切り文字付きリストでパーティションを列挙（浅い階層のPDFは直接登録）"""
+        level = [self.prefix]
+
+        for _ in range(self.PARTITION_DEPTH):
+            next_level = []
+            for prefix in level:
+                paginator = self.s3.get_paginator('list_objects_v2')
+                for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, Delimiter='/'):
+                    for common in page.get('CommonPrefixes', []):
+                        next_level.append(common['Prefix'])
+                    for obj in page.get('Contents', []):
+                        if obj['Key'].endswith('.pdf'):
+                            entries[obj['Key']] = self._format_time(obj.get('LastModified'))
+            level = next_level
+
+        return level
+
+    def _list(self, prefix: str, start_after: Optional[str] = None):
+        """プレフィックス配下のPDFを列挙"""
+        params = {'Bucket': self.bucket, 'Prefix': prefix}
+        if start_after:
+            params['StartAfter'] = start_after
+
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(**params):
+            contents = page.get('Contents', [])
+            with self._lock:
+                self.stats['listed_objects'] += len(contents)
+            for obj in contents:
+                if obj['Key'].endswith('.pdf'):
+                    yield obj
+
+    def _partition_of(self, key: str) -> Optional[str]:
+        """キーが属するパーティションプレフィックス（浅すぎる場合None）"""
+        parts = key[len(self.prefix):].split('/')
+        if len(parts) <= self.PARTITION_DEPTH:
+            return None
+        return self.prefix + '/'.join(parts[:self.PARTITION_DEPTH]) + '/'
+
+    @staticmethod
+    def _format_time(value) -> str:
+        """LastModifiedをISO8601文字列に変換"""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value or '')
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load(self) -> bool:
+        """永続化された索引を読み込む（対象バケット/プレフィックスが一致する場合のみ）"""
+        if not self.index_path or not self.index_path.exists():
+            return False
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load converted PDF index: {e}")
+            return False
+
+        if (data.get('version') != self.INDEX_VERSION or
+                data.get('bucket') != self.bucket or
+                data.get('prefix') != self.prefix):
+            return False
+
+        self._entries = data.get('entries', {})
+        self._partitions = data.get('partitions', {})
+        self._full_refreshed_at = data.get('full_refreshed_at', 0.0)
+        logger.info(f"Loaded converted PDF index: {len(self._entries)} PDFs from {self.index_path}")
+        return True
+
+    def _save(self, entries: Dict[str, str], partitions: Dict[str, str]):
+        """索引をアトミックに書き出す（_refresh_lock保持中に呼ぶこと）"""
+        if not self.index_path:
+            return
+
+        data = {
+            'version': self.INDEX_VERSION,
+            'bucket': self.bucket,
+            'prefix': self.prefix,
+            'full_refreshed_at': self._full_refreshed_at,
+            'partitions': partitions,
+            'entries': entries,
+        }
+
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.index_path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Failed to save converted PDF index: {e}")
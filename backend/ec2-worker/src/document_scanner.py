@@ -0,0 +1,259 @@
+"""
+Document Scanner
+point-in-time (PIT) + search_after によるOpenSearchドキュメントのストリーミング走査
+
+scroll APIの代わりに使用する。ページごとに遅延yieldするため、全件をリストに
+溜めずに処理を開始でき、メモリ使用量は一定に保たれる。slices > 1 の場合は
+PITをスライスに分割し、スライスごとのスレッドが並列に読み出す。
+PITが使えないクラスタ（OpenSearch 2.4未満）ではPITなしのsearch_afterで走査する。
+
+同順位の決定にはPIT内で_shard_docを使う（_idのソートはfielddataを読み込むため使わない）。
+PITなしで走査する場合や、search_afterで別のPITから再開する場合は、一意なkeyword
+フィールド（doc values）をtiebreakerに指定する。
+（backend/scripts/document_scanner.pyと同一実装）
+"""
+
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# スライス間で共有するページキューの深さ（スライスあたり）
+PAGES_PER_SLICE = 2
+
+_DONE = object()
+
+
+class DocumentScanner:
+    """
+    PIT + search_after によるドキュメント走査
+
+    Usage:
+        scanner = DocumentScanner(client, 'cis-files', query={...}, source=['file_path'])
+        for hit in scanner:
+            hit['_id'], hit['_source']
+    """
+
+    def __init__(
+        self,
+        client,
+        index: str,
+        query: Optional[Dict[str, Any]] = None,
+        source: Optional[List[str]] = None,
+        sort: Optional[List[Dict[str, Any]]] = None,
+        page_size: int = 1000,
+        slices: int = 1,
+        keep_alive: str = '5m',
+        limit: Optional[int] = None,
+        tiebreaker: Optional[str] = None,
+        slice_id: Optional[int] = None,
+        search_after: Optional[List[Any]] = None
+    ):
+        """
+        初期化
+
+        Args:
+            client: opensearchpy.OpenSearchクライアント、または
+                    perform_request(method, path, params=None, body=None) 互換の呼び出し可能オブジェクト
+            index: インデックス名
+            query: 検索クエリ（Noneの場合はmatch_all）
+            source: 取得する_sourceフィールド（Noneの場合は全体）
+            sort: ソート順（tiebreakerまたは_shard_docが末尾に追加される）
+            page_size: 1リクエストあたりの件数
+            slices: 並列に読み出すスライス数（PIT使用時のみ有効）
+            keep_alive: PITの保持期間（ページ間の最大間隔）
+            limit: 最大取得件数
+            tiebreaker: search_afterの一意性を保証する一意なkeywordフィールド
+                        （Noneの場合はPIT内の_shard_doc。PITなしの走査と再開時は必須）
+            slice_id: 指定した場合はslicesのうちこのスライスのみを走査（呼び出し側で並列化する場合）
+            search_after: 走査の開始位置（前回最後のヒットのsort値、再開用）
+        """
+        if search_after is not None and slices > 1 and slice_id is None:
+            raise ValueError("search_after with multiple slices requires slice_id")
+        if search_after is not None and tiebreaker is None:
+            # _shard_docの値は走査ごとのPITにしか対応しない
+            raise ValueError("search_after requires a tiebreaker field")
+
+        self._perform = _resolve_perform_request(client)
+        self.index = index
+        self.query = query or {"match_all": {}}
+        self.source = source
+        self.sort = list(sort or [])
+        self.tiebreaker = tiebreaker
+        self.page_size = page_size
+        self.slices = max(1, slices)
+        self.keep_alive = keep_alive
+        self.limit = limit
+        self.slice_id = slice_id
+        self.search_after = search_after
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'pages': 0,
+            'documents': 0,
+            'pit': False,
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """ヒット（_id, _source, sortを含むdict）を順に返す"""
+        pit_id = self._open_pit()
+        self.stats['pit'] = pit_id is not None
+        yielded = 0
+
+        try:
+            if pit_id is None and self.tiebreaker is None:
+                raise RuntimeError(
+                    "Scanning without a point in time requires a tiebreaker keyword field"
+                )
+            if self.slices > 1 and pit_id is None:
+                logger.warning("Slicing requires a point in time; scanning with a single reader")
+                if self.slice_id:
+                    # スライス0の読み出しがインデックス全体を走査する
+                    return
+                pages = self._iter_pages(None, slice_id=None)
+            elif self.slices > 1 and self.slice_id is not None:
+                pages = self._iter_pages(pit_id, slice_id=self.slice_id)
+            elif self.slices > 1:
+                pages = self._iter_sliced_pages(pit_id)
+            else:
+                pages = self._iter_pages(pit_id, slice_id=None)
+
+            try:
+                for hits in pages:
+                    for hit in hits:
+                        if self.limit is not None and yielded >= self.limit:
+                            return
+                        yielded += 1
+                        yield hit
+            finally:
+                close = getattr(pages, 'close', None)
+                if close:
+                    close()
+        finally:
+            self.stats['documents'] = yielded
+            self._close_pit(pit_id)
+
+    def _iter_pages(self, pit_id: Optional[str], slice_id: Optional[int]) -> Iterator[List[Dict[str, Any]]]:
+        """1つのスライス（またはインデックス全体）をページ単位で走査"""
+        search_after = self.search_after
+        tiebreaker = self.tiebreaker or '_shard_doc'
+        sort = self.sort + [{tiebreaker: "asc"}]
+
+        while True:
+            body: Dict[str, Any] = {
+                "size": self.page_size,
+                "query": self.query,
+                "sort": sort,
+                "track_total_hits": False,
+            }
+            if self.source is not None:
+                body["_source"] = self.source
+            if search_after is not None:
+                body["search_after"] = search_after
+
+            if pit_id is not None:
+                body["pit"] = {"id": pit_id, "keep_alive": self.keep_alive}
+                if slice_id is not None:
+                    body["slice"] = {"id": slice_id, "max": self.slices}
+                response = self._perform('POST', '/_search', body=body)
+                # PIT IDはレスポンスごとに更新される場合がある
+                pit_id = response.get('pit_id', pit_id)
+            else:
+                response = self._perform('POST', f'/{self.index}/_search', body=body)
+
+            hits = response.get('hits', {}).get('hits', [])
+            if not hits:
+                return
+
+            with self._stats_lock:
+                self.stats['pages'] += 1
+            yield hits
+
+            if len(hits) < self.page_size:
+                return
+            search_after = hits[-1]['sort']
+
+    def _iter_sliced_pages(self, pit_id: str) -> Iterator[List[Dict[str, Any]]]:
+        """スライスごとのスレッドで並列に読み出し、到着順にページを返す"""
+        pages: queue.Queue = queue.Queue(maxsize=self.slices * PAGES_PER_SLICE)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def reader(slice_id: int):
+            try:
+                for hits in self._iter_pages(pit_id, slice_id):
+                    if not put(hits):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(_DONE)
+
+        threads = [
+            threading.Thread(target=reader, args=(i,), name=f'scan-slice-{i}', daemon=True)
+            for i in range(self.slices)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            remaining = self.slices
+            while remaining:
+                item = pages.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join(timeout=5)
+
+    def _open_pit(self) -> Optional[str]:
+        """PITを作成（未対応の場合はNone）"""
+        try:
+            response = self._perform(
+                'POST', f'/{self.index}/_search/point_in_time',
+                params={'keep_alive': self.keep_alive}
+            )
+            return response['pit_id']
+        except Exception as e:
+            logger.warning(f"Point in time not available, falling back to search_after without PIT: {e}")
+            return None
+
+    def _close_pit(self, pit_id: Optional[str]):
+        """PITを削除（失敗してもkeep_alive経過で自動削除される）"""
+        if pit_id is None:
+            return
+        try:
+            self._perform('DELETE', '/_search/point_in_time', body={'pit_id': [pit_id]})
+        except Exception as e:
+            logger.debug(f"Failed to delete point in time: {e}")
+
+
+def scan_documents(client, index: str, **kwargs) -> Iterator[Dict[str, Any]]:
+    """DocumentScannerのショートカット（引数はDocumentScannerと同じ）"""
+    return iter(DocumentScanner(client, index, **kwargs))
+
+
+def _resolve_perform_request(client) -> Callable[..., Dict[str, Any]]:
+    """opensearchpyクライアントからperform_requestを取り出す"""
+    transport = getattr(client, 'transport', None)
+    if transport is not None:
+        return lambda method, path, params=None, body=None: transport.perform_request(
+            method, path, params=params, body=body
+        )
+    return client
@@ -0,0 +1,185 @@
+"""
+Adaptive JPEG Encoder
+プレビュー画像をサイズ上限内に収めるJPEGエンコーダ
+
+フル解像度から切り出したタイルのモザイク（プロキシ）で品質を二分探索し、
+フル解像度のエンコードは原則1回で済ませる
+（従来は品質85→70→60→50と最大4回エンコードしていた）。
+"""
+
+import io
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+# プロキシ画像のタイル構成（128px × 4×4 = 512x512）
+# 縮小すると細線や文字が平均化されbytes/pixelを過小評価するため、
+# 等倍のタイルを格子状に切り出して並べる（JPEGのMCU 16px境界に揃える）
+PROXY_TILE_SIZE = 128
+PROXY_GRID = 4
+
+# JPEG（4:2:0, 品質85前後）の1ピクセルあたりバイト数の上限見積もり
+# ランダムノイズでも約0.72 B/px。これで上限に収まる画像は探索せず直接エンコード
+WORST_CASE_BYTES_PER_PIXEL = 0.8
+
+# 予測サイズに対する安全マージン（プロキシとフル解像度の誤差吸収）
+SIZE_MARGIN = 0.9
+
+
+class AdaptiveJpegEncoder:
+    """サイズ上限付きの単一パスJPEGエンコーダ"""
+
+    def __init__(
+        self,
+        quality: int = 85,
+        min_quality: int = 50,
+        max_bytes: int = 2 * 1024 * 1024,
+        format: str = 'JPEG'
+    ):
+        """
+        Args:
+            quality: 目標（最大）品質
+            min_quality: サイズ超過時に下げる品質の下限
+            max_bytes: 1画像あたりの最大バイト数
+            format: 出力形式（JPEG以外は品質探索を行わない）
+        """
+        self.quality = quality
+        self.min_quality = min(min_quality, quality)
+        self.max_bytes = max_bytes
+        self.format = format
+
+        self._lock = threading.Lock()
+        self.stats = {
+            'images': 0,
+            'full_encodes': 0,
+            'proxy_encodes': 0,
+            'oversized': 0,
+            'encode_seconds': 0.0,
+            'bytes': 0,
+            'pixels': 0,
+        }
+
+    def encode(self, image: Image.Image) -> Dict:
+        """
+        画像をエンコード
+
+        Returns:
+            {'data': bytes, 'quality': int, 'encode_seconds': float, 'bytes_per_pixel': float}
+        """
+        start_time = time.perf_counter()
+        pixels = image.width * image.height
+        proxy_encodes = 0
+
+        quality = self.quality
+        searchable = self.format.upper() in ('JPEG', 'JPG') and quality > self.min_quality
+        predicted = searchable and pixels * WORST_CASE_BYTES_PER_PIXEL > self.max_bytes
+        if predicted:
+            quality, proxy_encodes = self._predict_quality(image)
+
+        data = self._save(image, quality)
+        full_encodes = 1
+
+        if len(data) > self.max_bytes and searchable and not (predicted and quality <= self.min_quality):
+            if not predicted:
+                # 上限見積もりを超えた画像のみプロキシで品質を予測
+                quality, proxy_encodes = self._predict_quality(image)
+            else:
+                # 予測が外れた場合は下限品質
+                quality = self.min_quality
+            logger.debug(f"Encoded {len(data)} bytes over limit, retrying at quality {quality}")
+            data = self._save(image, quality)
+            full_encodes += 1
+
+        encode_seconds = time.perf_counter() - start_time
+        bytes_per_pixel = len(data) / pixels if pixels else 0.0
+
+        with self._lock:
+            self.stats['images'] += 1
+            self.stats['full_encodes'] += full_encodes
+            self.stats['proxy_encodes'] += proxy_encodes
+            self.stats['oversized'] += int(len(data) > self.max_bytes)
+            self.stats['encode_seconds'] += encode_seconds
+            self.stats['bytes'] += len(data)
+            self.stats['pixels'] += pixels
+
+        return {
+            'data': data,
+            'quality': quality,
+            'encode_seconds': round(encode_seconds, 4),
+            'bytes_per_pixel': round(bytes_per_pixel, 4),
+        }
+
+    def summary(self) -> Dict:
+        """累計統計（平均エンコード時間・bytes/pixelを含む）"""
+        with self._lock:
+            stats = dict(self.stats)
+        images = stats['images']
+        stats['avg_encode_ms'] = round(stats['encode_seconds'] * 1000 / images, 2) if images else 0.0
+        stats['bytes_per_pixel'] = round(stats['bytes'] / stats['pixels'], 4) if stats['pixels'] else 0.0
+        stats['encode_seconds'] = round(stats['encode_seconds'], 3)
+        return stats
+
+    def _predict_quality(self, image: Image.Image) -> Tuple[int, int]:
+        """
+        プロキシ画像で品質を二分探索し、サイズ上限に収まる最大品質を予測
+
+        プロキシのbytes/pixel × 全ピクセル数を予測サイズとする。
+
+        Returns:
+            (品質, プロキシエンコード回数)
+        """
+        proxy = self._make_proxy(image)
+        proxy_pixels = proxy.width * proxy.height
+        pixels = image.width * image.height
+        budget = self.max_bytes * SIZE_MARGIN
+        encodes = 0
+
+        def fits(quality: int) -> bool:
+            nonlocal encodes
+            encodes += 1
+            predicted = len(self._save(proxy, quality)) / proxy_pixels * pixels
+            return predicted <= budget
+
+        if fits(self.quality):
+            return self.quality, encodes
+
+        low, high = self.min_quality, self.quality - 1
+        best: Optional[int] = None
+        while low <= high:
+            mid = (low + high) // 2
+            if fits(mid):
+                best = mid
+                low = mid + 1
+            else:
+                high = mid - 1
+
+        return (best if best is not None else self.min_quality), encodes
+
+    @staticmethod
+    def _make_proxy(image: Image.Image) -> Image.Image:
+        """探索用のタイルモザイクを作成（元画像が小さければそのまま）"""
+        tile = PROXY_TILE_SIZE
+        grid = PROXY_GRID
+        if image.width <= tile * grid or image.height <= tile * grid:
+            return image
+
+        mosaic = Image.new(image.mode, (tile * grid, tile * grid))
+        x_step = (image.width - tile) / (grid - 1)
+        y_step = (image.height - tile) / (grid - 1)
+        for row in range(grid):
+            for col in range(grid):
+                left = int(col * x_step) // 16 * 16
+                top = int(row * y_step) // 16 * 16
+                mosaic.paste(image.crop((left, top, left + tile, top + tile)), (col * tile, row * tile))
+        return mosaic
+
+    def _save(self, image: Image.Image, quality: int) -> bytes:
+        output = io.BytesIO()
+        image.save(output, format=self.format, quality=quality, optimize=True)
+        return output.getvalue()
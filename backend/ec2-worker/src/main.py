@@ -24,6 +24,7 @@ from s3_client import S3Client
 from ocr_processor import OCRProcessor
 from thumbnail_generator import ThumbnailGenerator
 from preview_generator import PreviewGenerator
+from page_raster_cache import PageRasterCache
 from bedrock_client import BedrockClient
 from opensearch_client import OpenSearchClient
 from sqs_handler import SQSHandler
@@ -95,6 +96,7 @@ class FileProcessor:
         start_time = time.time()
         temp_file = None
         temp_files_to_cleanup = []  # ✅ Track all temporary files
+        raster_cache = None
 
         try:
             # ✅ SECURITY: Sanitize file path in logs
@@ -122,21 +124,25 @@ class FileProcessor:
             # ファイルをダウンロード
             temp_file = self.s3_client.download_file(bucket, key)
 
+            # PDFはOCR・サムネイル・プレビューで各ページを1回だけレンダリングして共有
+            if document['file_extension'] == '.pdf':
+                raster_cache = self._create_raster_cache(temp_file)
+
             # OCR処理（有効な場合）
             if config.features.enable_ocr:
-                ocr_result = self._perform_ocr(temp_file, document)
+                ocr_result = self._perform_ocr(temp_file, document, raster_cache)
                 if ocr_result:
                     document.update(ocr_result)
 
             # サムネイル生成（有効な場合）
             if config.features.enable_thumbnail:
-                thumbnail_result = self._generate_thumbnail(temp_file, key, document)
+                thumbnail_result = self._generate_thumbnail(temp_file, key, document, raster_cache)
                 if thumbnail_result:
                     document.update(thumbnail_result)
 
             # プレビュー生成（有効な場合）
             if config.preview.enabled:
-                preview_result = self._generate_previews(temp_file, key, document)
+                preview_result = self._generate_previews(temp_file, key, document, raster_cache)
                 if preview_result:
                     document.update(preview_result)
 
@@ -191,6 +197,9 @@ class FileProcessor:
             return False
 
         finally:
+            if raster_cache is not None:
+                raster_cache.close()
+
             # ✅ SECURITY FIX: Cleanup all temporary files
             if temp_file:
                 self.s3_client.cleanup_temp_file(temp_file)
@@ -203,20 +212,42 @@ class FileProcessor:
                 except Exception as cleanup_error:
                     logger.warning(f"Failed to cleanup temp file {file_to_cleanup}: {cleanup_error}")
 
-    def _perform_ocr(self, file_path: str, document: Dict) -> Dict:
+    def _create_raster_cache(self, file_path: str) -> PageRasterCache:
+        """
+        PDFページの共有ラスタキャッシュを作成
+
+        OCRは最初に実行され、スキャンPDFの場合のみOCR解像度でレンダリングを
+        開始する。テキストPDFではサムネイル・プレビューの解像度のうち高い方で
+        レンダリングされる（reserveで事前に宣言）。
+
+        Args:
+            file_path: PDFファイルパス
+
+        Returns:
+            PageRasterCache（呼び出し側でclose()すること）
+        """
+        cache = PageRasterCache(file_path)
+        if config.features.enable_thumbnail:
+            cache.reserve(ThumbnailGenerator.PDF_DPI)
+        if config.preview.enabled:
+            cache.reserve(self.preview_generator.config.dpi)
+        return cache
+
+    def _perform_ocr(self, file_path: str, document: Dict, raster_cache: Optional[PageRasterCache] = None) -> Dict:
         """
         OCR処理を実行
 
         Args:
             file_path: ファイルパス
             document: ドキュメント辞書
+            raster_cache: PDFページの共有ラスタキャッシュ
 
         Returns:
             OCR結果
         """
         try:
             logger.debug(f"Performing OCR on {file_path}")
-            ocr_result = self.ocr_processor.process_file(file_path)
+            ocr_result = self.ocr_processor.process_file(file_path, raster_cache)
 
             if ocr_result['success']:
                 return {
@@ -233,7 +264,13 @@ class FileProcessor:
             logger.error(f"OCR processing error: {str(e)}")
             return {}
 
-    def _generate_thumbnail(self, file_path: str, key: str, document: Dict) -> Dict:
+    def _generate_thumbnail(
+        self,
+        file_path: str,
+        key: str,
+        document: Dict,
+        raster_cache: Optional[PageRasterCache] = None
+    ) -> Dict:
         """
         サムネイルを生成
 
@@ -241,6 +278,7 @@ class FileProcessor:
             file_path: ファイルパス
             key: S3キー
             document: ドキュメント辞書
+            raster_cache: PDFページの共有ラスタキャッシュ
 
         Returns:
             サムネイル結果
@@ -249,7 +287,7 @@ class FileProcessor:
             logger.debug(f"Generating thumbnail for {file_path}")
 
             # サムネイル生成
-            thumbnail_data = self.thumbnail_generator.generate_with_metadata(file_path)
+            thumbnail_data = self.thumbnail_generator.generate_with_metadata(file_path, raster_cache)
 
             if thumbnail_data['thumbnail']:
                 # S3にアップロード
@@ -279,7 +317,13 @@ class FileProcessor:
             logger.error(f"Thumbnail generation error: {str(e)}")
             return {}
 
-    def _generate_previews(self, file_path: str, key: str, document: Dict) -> Dict:
+    def _generate_previews(
+        self,
+        file_path: str,
+        key: str,
+        document: Dict,
+        raster_cache: Optional[PageRasterCache] = None
+    ) -> Dict:
         """
         プレビュー画像を生成（全ページ対応）
 
@@ -287,6 +331,7 @@ class FileProcessor:
             file_path: ファイルパス
             key: S3オブジェクトキー
             document: ドキュメント情報
+            raster_cache: PDFページの共有ラスタキャッシュ
 
         Returns:
             プレビュー結果
@@ -301,7 +346,8 @@ class FileProcessor:
                 file_path,
                 s3_client=self.s3_client,
                 s3_bucket=config.s3.landing_bucket,
-                converted_pdf_prefix='converted-pdf/'
+                converted_pdf_prefix='converted-pdf/',
+                raster_cache=raster_cache
             )
 
             if not previews:
@@ -0,0 +1,344 @@
+"""
+Message Acknowledger
+処理完了したSQSメッセージの削除をまとめて送るサービス（python-workerのservices/message_acknowledgerと同一実装）
+
+- 複数の処理完了にまたがって削除を10件単位のDeleteMessageBatchにまとめる（最大max_delay秒待機）
+- 受信時刻からReceiptHandleの可視性期限を追跡し、期限が近いものは待たずに優先して送る
+  （処理済みのファイルが期限切れで再配信されるのを防ぐ）
+- サーバー側の一時的な失敗（部分的な失敗を含む）は指数バックオフでリトライ
+
+使い方:
+    acknowledger = MessageAcknowledger(sqs, queue_url, visibility_timeout=600)
+    acknowledger.start()
+    acknowledger.received(messages)   # 受信直後
+    acknowledger.extended(messages, 600)  # 可視性タイムアウトを延長した場合
+    acknowledger.ack(message)         # 処理成功時（失敗時はforget()）
+    acknowledger.close()              # 終了時に残りを送信
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# DeleteMessageBatchの1リクエストあたりの最大件数
+SQS_BATCH_SIZE = 10
+
+# 可視性期限の記録がこの件数を超えたら古いものを捨てる（forget()漏れ対策）
+MAX_TRACKED_RECEIPTS = 10000
+
+
+@dataclass
+class _PendingAck:
+    """送信待ちの削除"""
+    receipt_handle: str
+    deadline: float      # 可視性期限（time.monotonic()基準）
+    added_at: float
+    attempts: int = 0
+
+
+class MessageAcknowledger:
+    """
+    スレッドセーフなSQS削除コアレッサー
+
+    - 10件たまるか、最古の削除がmax_delay秒待つか、可視性期限までurgent_seconds以内の
+      削除があればDeleteMessageBatchを送る（期限の近い順）
+    - start()しない場合はack()の呼び出しスレッドで同じ条件で送る
+    """
+
+    def __init__(
+        self,
+        sqs_client,
+        queue_url: str,
+        visibility_timeout: int,
+        max_delay: float = 0.5,
+        urgent_seconds: float = 30.0,
+        max_retries: int = 3,
+        backoff_seconds: float = 0.2,
+        on_failure: Optional[Callable[[int], None]] = None
+    ):
+        """
+        初期化
+
+        Args:
+            sqs_client: boto3 SQSクライアント
+            queue_url: キューURL
+            visibility_timeout: 受信時の可視性タイムアウト（秒）
+            max_delay: バッチを埋めるために待つ最大秒数
+            urgent_seconds: 可視性期限までこの秒数以内なら待たずに送る
+            max_retries: 一時的な失敗をリトライする最大回数
+            backoff_seconds: リトライの初期待機秒数（2倍ずつ増加）
+            on_failure: 削除できなかった件数を通知するコールバック（メトリクス用）
+        """
+        self.sqs = sqs_client
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+        self.max_delay = max_delay
+        self.urgent_seconds = urgent_seconds
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.on_failure = on_failure
+
+        self._pending: List[_PendingAck] = []
+        self._deadlines: Dict[str, float] = {}  # ReceiptHandle -> 可視性期限
+        self._lock = threading.Lock()
+
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._timer_thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'acked': 0,
+            'requests': 0,
+            'deleted': 0,
+            'failed': 0,
+            'retried': 0,
+            'urgent_batches': 0,
+            'late': 0,
+        }
+
+        logger.info(
+            f"MessageAcknowledger initialized: max_delay={max_delay}s, "
+            f"urgent={urgent_seconds}s, visibility_timeout={visibility_timeout}s"
+        )
+
+    def start(self):
+        """送信スレッドを起動"""
+        if self._timer_thread and self._timer_thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._timer_thread = threading.Thread(
+            target=self._timer_loop,
+            name='sqs-acknowledger',
+            daemon=True
+        )
+        self._timer_thread.start()
+
+    def received(self, messages: Iterable[Dict[str, Any]], received_at: Optional[float] = None):
+        """
+        受信時刻を記録（可視性期限の計算に使う）
+
+        Args:
+            messages: 受信したSQSメッセージ
+            received_at: 受信リクエストの送信時刻（time.monotonic()、省略時は現在）
+        """
+        received_at = time.monotonic() if received_at is None else received_at
+        with self._lock:
+            for message in messages:
+                self._deadlines[message['ReceiptHandle']] = received_at + self.visibility_timeout
+            if len(self._deadlines) > MAX_TRACKED_RECEIPTS:
+                self._prune_deadlines()
+
+    def extended(
+        self,
+        messages: Iterable[Dict[str, Any]],
+        visibility_timeout: int,
+        extended_at: Optional[float] = None
+    ):
+        """
+        可視性タイムアウトを延長したメッセージの期限を更新（記録済みのものだけ）
+
+        Args:
+            messages: 延長したSQSメッセージ（ReceiptHandleを含む）
+            visibility_timeout: 延長後の可視性タイムアウト（秒）
+            extended_at: 延長リクエストの送信時刻（time.monotonic()、省略時は現在）
+        """
+        extended_at = time.monotonic() if extended_at is None else extended_at
+        with self._lock:
+            for message in messages:
+                if message['ReceiptHandle'] in self._deadlines:
+                    self._deadlines[message['ReceiptHandle']] = extended_at + visibility_timeout
+
+    def forget(self, message: Dict[str, Any]):
+        """削除しないメッセージの期限の記録を破棄（処理失敗・延期時）"""
+        with self._lock:
+            self._deadlines.pop(message['ReceiptHandle'], None)
+
+    def ack(self, message: Dict[str, Any]):
+        """
+        処理完了したメッセージの削除を予約
+
+        Args:
+            message: SQSメッセージ（ReceiptHandleを含む）
+        """
+        handle = message['ReceiptHandle']
+        now = time.monotonic()
+
+        with self._lock:
+            # 受信時刻が不明な場合は現在から可視性タイムアウト分あるとみなす
+            deadline = self._deadlines.pop(handle, now + self.visibility_timeout)
+            self._pending.append(_PendingAck(
+                receipt_handle=handle,
+                deadline=deadline,
+                added_at=now
+            ))
+            self.stats['acked'] += 1
+            ready = self._ready(now)
+
+        if not ready:
+            return
+        if self._timer_thread is not None and self._timer_thread.is_alive():
+            self._wakeup.set()
+        else:
+            self._flush_ready()
+
+    def flush(self):
+        """送信待ちの削除を全て送信（期限の近い順）"""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                self._pending.sort(key=lambda ack: ack.deadline)
+                batch = self._pending[:SQS_BATCH_SIZE]
+                del self._pending[:SQS_BATCH_SIZE]
+            self._send_with_retry(batch)
+
+    def close(self):
+        """送信スレッドを止め、残りの削除を送信"""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._timer_thread:
+            self._timer_thread.join(timeout=10)
+        self.flush()
+
+        if self.stats['requests']:
+            logger.info(f"MessageAcknowledger closed: {self.get_stats()}")
+
+    def pending(self) -> int:
+        """送信待ちの削除数"""
+        with self._lock:
+            return len(self._pending)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計（1リクエストあたりの平均削除数を含む）"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._pending)
+        stats['avg_batch_size'] = round(stats['deleted'] / stats['requests'], 2) if stats['requests'] else 0.0
+        return stats
+
+    def _timer_loop(self):
+        """次の送信条件（max_delay経過・期限接近）まで待ち、条件を満たしたバッチを送信"""
+        while not self._stop_event.is_set():
+            self._wakeup.wait(timeout=self._next_wait())
+            self._wakeup.clear()
+            try:
+                self._flush_ready()
+            except Exception as e:
+                logger.error(f"Acknowledger flush failed: {e}", exc_info=True)
+
+    def _next_wait(self) -> float:
+        """次に送信条件を満たすまでの秒数"""
+        with self._lock:
+            if not self._pending:
+                return self.max_delay
+            now = time.monotonic()
+            oldest = min(ack.added_at for ack in self._pending)
+            earliest = min(ack.deadline for ack in self._pending)
+        wait = min(oldest + self.max_delay - now, earliest - self.urgent_seconds - now)
+        return max(0.01, wait)
+
+    def _ready(self, now: float) -> bool:
+        """送信条件を満たしているか（ロック保持中に呼ぶ）"""
+        if not self._pending:
+            return False
+        if len(self._pending) >= SQS_BATCH_SIZE:
+            return True
+        if min(ack.deadline for ack in self._pending) - now <= self.urgent_seconds:
+            return True
+        return now - min(ack.added_at for ack in self._pending) >= self.max_delay
+
+    def _flush_ready(self):
+        """送信条件を満たす間、期限の近い順に最大10件ずつ送信"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if not self._ready(now):
+                    return
+                self._pending.sort(key=lambda ack: ack.deadline)
+                urgent = self._pending[0].deadline - now <= self.urgent_seconds
+                batch = self._pending[:SQS_BATCH_SIZE]
+                del self._pending[:SQS_BATCH_SIZE]
+                if urgent:
+                    self.stats['urgent_batches'] += 1
+            self._send_with_retry(batch)
+
+    def _send_with_retry(self, batch: List[_PendingAck]):
+        """バッチを送信し、一時的に失敗したエントリを指数バックオフでリトライ"""
+        attempt = 0
+        while batch:
+            retryable = self._send(batch)
+            if not retryable:
+                return
+
+            attempt += 1
+            if attempt > self.max_retries:
+                logger.error(f"Giving up deleting {len(retryable)} message(s) after {self.max_retries} retries")
+                self._record_failures(len(retryable))
+                return
+
+            with self._lock:
+                self.stats['retried'] += len(retryable)
+            time.sleep(self.backoff_seconds * (2 ** (attempt - 1)))
+            batch = retryable
+
+    def _send(self, batch: List[_PendingAck]) -> List[_PendingAck]:
+        """
+        DeleteMessageBatchを1回送信
+
+        Returns:
+            リトライすべきエントリ（SenderFaultの失敗は含めない）
+        """
+        now = time.monotonic()
+        late = sum(1 for ack in batch if ack.deadline <= now)
+        entries = [{'Id': str(i), 'ReceiptHandle': ack.receipt_handle} for i, ack in enumerate(batch)]
+
+        try:
+            response = self.sqs.delete_message_batch(QueueUrl=self.queue_url, Entries=entries)
+        except Exception as e:
+            logger.warning(f"DeleteMessageBatch failed ({len(batch)} entries): {e}")
+            with self._lock:
+                self.stats['requests'] += 1
+            return list(batch)
+
+        retryable = []
+        permanent = 0
+        for failure in response.get('Failed', []):
+            if failure.get('SenderFault', False):
+                # 期限切れ・無効なReceiptHandle等はリトライしても成功しない
+                permanent += 1
+                logger.error(f"Failed to delete message: {failure}")
+            else:
+                retryable.append(batch[int(failure['Id'])])
+
+        deleted = len(response.get('Successful', []))
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['deleted'] += deleted
+            self.stats['late'] += late
+
+        if late:
+            logger.warning(f"{late} delete(s) sent after the visibility timeout, message(s) may be redelivered")
+        if permanent:
+            self._record_failures(permanent)
+        return retryable
+
+    def _record_failures(self, count: int):
+        with self._lock:
+            self.stats['failed'] += count
+        if self.on_failure is not None:
+            try:
+                self.on_failure(count)
+            except Exception as e:
+                logger.warning(f"Acknowledger failure callback failed: {e}")
+
+    def _prune_deadlines(self):
+        """可視性期限を大きく過ぎた記録を破棄（ロック保持中に呼ぶ）"""
+        cutoff = time.monotonic() - self.visibility_timeout
+        for handle in [h for h, deadline in self._deadlines.items() if deadline < cutoff]:
+            del self._deadlines[handle]
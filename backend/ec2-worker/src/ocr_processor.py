@@ -19,6 +19,9 @@ logger = logging.getLogger(__name__)
 class OCRProcessor:
     """OCR処理クラス"""
 
+    # スキャンPDFをOCRする際のレンダリング解像度
+    PDF_DPI = 200
+
     def __init__(self):
         """初期化"""
         self.languages = config.ocr.languages
@@ -32,12 +35,13 @@ class OCRProcessor:
             logger.error(f"Tesseract not found: {str(e)}")
             raise RuntimeError("Tesseract is not installed or not in PATH")
 
-    def process_file(self, file_path: str) -> Dict[str, any]:
+    def process_file(self, file_path: str, raster_cache=None) -> Dict[str, any]:
         """
         ファイルからテキストを抽出
 
         Args:
             file_path: ファイルパス
+            raster_cache: PDFページの共有ラスタキャッシュ（PageRasterCache、省略可）
 
         Returns:
             抽出結果の辞書
@@ -61,7 +65,7 @@ class OCRProcessor:
 
             elif file_type == '.pdf':
                 # PDFファイルの処理
-                result.update(self._process_pdf(file_path))
+                result.update(self._process_pdf(file_path, raster_cache))
 
             elif file_type == '.xdw':
                 # DocuWorksファイルの処理
@@ -125,8 +129,8 @@ class OCRProcessor:
             logger.error(f"Image OCR failed: {str(e)}")
             return {'error': str(e)}
 
-    def _process_pdf(self, file_path: Path) -> Dict:
-        """PDFファイルの処理"""
+    def _process_pdf(self, file_path: Path, raster_cache=None) -> Dict:
+        """PDFファイルの処理（raster_cacheがあればページ画像をサムネイル・プレビューと共有）"""
         try:
             logger.info(f"Processing PDF: {file_path}")
             texts = []
@@ -150,25 +154,23 @@ class OCRProcessor:
             if not texts or all(not t.strip() for t in texts):
                 logger.info("No text found in PDF, performing OCR...")
 
-                # PDFを画像に変換
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    images = convert_from_path(
-                        file_path,
-                        dpi=200,
-                        output_folder=temp_dir
-                    )
-                    total_pages = len(images)
-
-                    for i, image in enumerate(images):
-                        # 各ページでOCR実行
-                        image = self._preprocess_image(image)
-                        text = pytesseract.image_to_string(
-                            image,
-                            lang=self.languages,
-                            timeout=self.timeout
+                if raster_cache is not None:
+                    total_pages = 0
+                    for page_num, image in raster_cache.iter_pages(self.PDF_DPI):
+                        total_pages = page_num
+                        self._ocr_page(image, page_num, texts)
+                else:
+                    # PDFを画像に変換
+                    with tempfile.TemporaryDirectory() as temp_dir:
+                        images = convert_from_path(
+                            file_path,
+                            dpi=self.PDF_DPI,
+                            output_folder=temp_dir
                         )
-                        if text.strip():
-                            texts.append(f"[Page {i + 1}]\n{text}")
+                        total_pages = len(images)
+
+                        for i, image in enumerate(images):
+                            self._ocr_page(image, i + 1, texts)
 
             combined_text = '\n\n'.join(texts)
 
@@ -182,6 +184,17 @@ class OCRProcessor:
             logger.error(f"PDF processing failed: {str(e)}")
             return {'error': str(e)}
 
+    def _ocr_page(self, image: Image.Image, page_num: int, texts: List[str]):
+        """1ページ分のOCRを実行し、テキストがあればtextsに追加"""
+        image = self._preprocess_image(image)
+        text = pytesseract.image_to_string(
+            image,
+            lang=self.languages,
+            timeout=self.timeout
+        )
+        if text.strip():
+            texts.append(f"[Page {page_num}]\n{text}")
+
     def _process_docuworks(self, file_path: Path) -> Dict:
         """DocuWorksファイルの処理"""
         try:
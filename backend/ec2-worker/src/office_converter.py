@@ -11,6 +11,9 @@ import shutil
 from pathlib import Path
 from typing import Optional
 
+from config import config
+from office_pool import OfficePoolUnavailable, get_shared_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,17 +35,28 @@ class OfficeConverter:
         '.odt', '.ods', '.odp'  # OpenDocument
     }
 
-    def __init__(self, libreoffice_path: Optional[str] = None):
+    def __init__(self, libreoffice_path: Optional[str] = None, pool=None):
         """
         初期化
 
         Args:
             libreoffice_path: LibreOfficeの実行ファイルパス（Noneの場合は自動検出）
+            pool: 常駐sofficeプール（Noneの場合はプロセス共有プール、pyuno未導入なら使用しない）
         """
         self.libreoffice_path = libreoffice_path or self._find_libreoffice()
+        self.pool = pool
 
         if self.libreoffice_path:
-            logger.info(f"OfficeConverter initialized with LibreOffice: {self.libreoffice_path}")
+            if self.pool is None:
+                self.pool = get_shared_pool(
+                    self.libreoffice_path,
+                    config.office.pool_size,
+                    max_conversions=config.office.max_conversions
+                )
+            logger.info(
+                f"OfficeConverter initialized with LibreOffice: {self.libreoffice_path} "
+                f"({'pooled' if self.pool is not None else 'one process per document'})"
+            )
         else:
             logger.warning("LibreOffice not found. Office file conversion will not be available.")
 
@@ -125,6 +139,17 @@ class OfficeConverter:
         else:
             os.makedirs(output_dir, exist_ok=True)
 
+        # 常駐sofficeで変換（起動済みプロセスを再利用）
+        if self.pool is not None:
+            try:
+                pdf_path = self.pool.convert(str(input_path), output_dir, timeout)
+            except OfficePoolUnavailable as e:
+                logger.warning(f"LibreOffice pool unavailable ({e}), converting with a new process")
+            else:
+                if pdf_path is None and cleanup_output_dir:
+                    shutil.rmtree(output_dir, ignore_errors=True)
+                return pdf_path
+
         try:
             # LibreOfficeコマンドを構築
             cmd = [
@@ -0,0 +1,228 @@
+"""
+Page Raster Cache
+1ファイル分のPDFページラスタキャッシュ（OCR・サムネイル・プレビューで共有）
+
+各ページは必要なDPIの最大値で一度だけpdftoppmでレンダリングし、
+より低いDPIの要求（サムネイル・プレビュー）はメモリ上で縮小して返す。
+レンダリング結果は一時ディレクトリ（ディスク）に書き出し、デコード済み画像は
+直近memory_pages枚だけメモリに保持するため、ページ数の多い文書でも
+メモリ使用量はページ数に比例しない。
+
+使い方:
+    with PageRasterCache(pdf_path) as cache:
+        cache.reserve(preview_dpi)            # 後から使うDPIを事前に宣言
+        image = cache.get_page(1, dpi=200)    # 最初のレンダリングでDPIが確定
+"""
+
+import logging
+import shutil
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from PIL import Image
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+logger = logging.getLogger(__name__)
+
+
+# pdftoppmを1回起動するたびにレンダリングするページ数（起動・PDF解析コストの償却）
+DEFAULT_RENDER_WINDOW = 4
+
+# メモリに保持するデコード済みページ数
+DEFAULT_MEMORY_PAGES = 2
+
+# ディスクに書き出す形式（OCR用に非可逆圧縮を避けつつ、無圧縮ppmの
+# 約11MB/ページ@200DPIに対してディスク使用量を抑えるためPNG）
+SPILL_FORMAT = 'png'
+
+
+class PageRasterCache:
+    """PDFページのラスタ画像を1回だけレンダリングして共有するキャッシュ"""
+
+    def __init__(
+        self,
+        pdf_path: str,
+        max_pages: Optional[int] = None,
+        render_window: int = DEFAULT_RENDER_WINDOW,
+        memory_pages: int = DEFAULT_MEMORY_PAGES
+    ):
+        """
+        初期化（レンダリングは最初のget_page()まで行わない）
+
+        Args:
+            pdf_path: PDFファイルパス
+            max_pages: レンダリングする最大ページ数（Noneの場合は全ページ）
+            render_window: pdftoppm 1回あたりのページ数
+            memory_pages: メモリに保持するデコード済みページ数
+        """
+        self.pdf_path = str(pdf_path)
+        self.max_pages = max_pages
+        self.render_window = max(1, render_window)
+        self.memory_pages = max(1, memory_pages)
+
+        # 最初のレンダリングで確定するDPI（reserve()とget_page()の要求の最大値）
+        self.dpi: Optional[int] = None
+        self._reserved_dpi = 0
+
+        self._page_count: Optional[int] = None
+        self._spill_dir: Optional[str] = None
+        self._page_paths: Dict[int, str] = {}
+        self._memory: 'OrderedDict[int, Image.Image]' = OrderedDict()
+
+        self.stats = {
+            'rendered_pages': 0,
+            'render_calls': 0,
+            'hits': 0,
+            'disk_loads': 0,
+            'downsampled': 0,
+            'uncached_renders': 0,
+        }
+
+    def __enter__(self) -> 'PageRasterCache':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def reserve(self, dpi: int):
+        """
+        後で使用するDPIを宣言（最初のレンダリング前に呼び出すこと）
+
+        Args:
+            dpi: 必要な解像度
+        """
+        if self.dpi is not None and dpi > self.dpi:
+            logger.debug(f"Raster cache already rendering at {self.dpi} DPI, cannot reserve {dpi}")
+        self._reserved_dpi = max(self._reserved_dpi, dpi)
+
+    def page_count(self) -> int:
+        """
+        レンダリング対象のページ数（max_pagesで制限）
+
+        pdfinfoが失敗した場合は例外をそのまま送出する（pdf2imageのレンダリングも
+        pdfinfoに依存するため、ページ数を推測して続行しても結果は得られない）
+        """
+        if self._page_count is None:
+            total = int(pdfinfo_from_path(self.pdf_path)['Pages'])
+            self._page_count = min(total, self.max_pages) if self.max_pages else total
+        return self._page_count
+
+    def get_page(self, page_num: int, dpi: int) -> Optional[Image.Image]:
+        """
+        指定ページの画像を取得（呼び出し側で変更してよいコピーを返す）
+
+        Args:
+            page_num: ページ番号（1始まり）
+            dpi: 必要な解像度（キャッシュより低い場合は縮小）
+
+        Returns:
+            RGB画像（ページが存在しない場合はNone）
+        """
+        if page_num < 1 or page_num > self.page_count():
+            return None
+
+        if self.dpi is None:
+            self.dpi = max(self._reserved_dpi, dpi)
+            logger.debug(f"Raster cache for {Path(self.pdf_path).name} renders at {self.dpi} DPI")
+
+        if dpi > self.dpi:
+            # キャッシュより高解像度が必要な場合はキャッシュせず個別にレンダリング
+            self.stats['uncached_renders'] += 1
+            images = convert_from_path(self.pdf_path, dpi=dpi, first_page=page_num, last_page=page_num)
+            return images[0].convert('RGB') if images else None
+
+        image = self._load(page_num)
+        if image is None:
+            return None
+
+        if dpi < self.dpi:
+            self.stats['downsampled'] += 1
+            scale = dpi / self.dpi
+            size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            return image.resize(size, Image.Resampling.LANCZOS)
+
+        return image.copy()
+
+    def iter_pages(self, dpi: int) -> Iterator[Tuple[int, Image.Image]]:
+        """
+        全ページを順に取得
+
+        Args:
+            dpi: 必要な解像度
+
+        Yields:
+            (ページ番号, 画像)
+        """
+        for page_num in range(1, self.page_count() + 1):
+            image = self.get_page(page_num, dpi)
+            if image is None:
+                break
+            yield page_num, image
+
+    def close(self):
+        """メモリ上の画像とディスク上のレンダリング結果を破棄"""
+        for image in self._memory.values():
+            image.close()
+        self._memory.clear()
+        self._page_paths.clear()
+
+        if self._spill_dir:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+        if self.stats['render_calls']:
+            logger.debug(f"Raster cache stats for {Path(self.pdf_path).name}: {self.stats}")
+
+    def _load(self, page_num: int) -> Optional[Image.Image]:
+        """キャッシュDPIのページ画像（メモリ → ディスク → レンダリングの順）"""
+        image = self._memory.get(page_num)
+        if image is not None:
+            self._memory.move_to_end(page_num)
+            self.stats['hits'] += 1
+            return image
+
+        if page_num not in self._page_paths:
+            self._render(page_num)
+        else:
+            self.stats['disk_loads'] += 1
+
+        path = self._page_paths.get(page_num)
+        if path is None:
+            return None
+
+        with Image.open(path) as raw:
+            image = raw.convert('RGB')
+
+        self._memory[page_num] = image
+        while len(self._memory) > self.memory_pages:
+            _, evicted = self._memory.popitem(last=False)
+            evicted.close()
+        return image
+
+    def _render(self, first_page: int):
+        """first_pageからrender_windowページ分をディスクにレンダリング"""
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix='page-raster-')
+
+        last_page = min(first_page + self.render_window - 1, self.page_count())
+        paths = convert_from_path(
+            self.pdf_path,
+            dpi=self.dpi,
+            first_page=first_page,
+            last_page=last_page,
+            fmt=SPILL_FORMAT,
+            output_folder=self._spill_dir,
+            output_file=f"p{first_page:05d}",
+            paths_only=True,
+            thread_count=1,
+        )
+        self.stats['render_calls'] += 1
+
+        for page_num, path in zip(range(first_page, last_page + 1), sorted(paths)):
+            self._page_paths[page_num] = path
+            self.stats['rendered_pages'] += 1
+
+        if not paths:
+            logger.warning(f"No pages rendered for {first_page}-{last_page}: {Path(self.pdf_path).name}")
@@ -10,16 +10,21 @@ Preview Generation Module
 """
 
 import logging
-import io
 import os
 import shutil
-from typing import Optional, List, Dict, Tuple
+import tempfile
+import time
+from typing import Optional, List, Dict, Tuple, Iterator
 from pathlib import Path
 from PIL import Image
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from dataclasses import dataclass
 
+import psutil
+
 from office_converter import OfficeConverter
+from converted_pdf_index import ConvertedPdfIndex
+from jpeg_encoder import AdaptiveJpegEncoder
 
 logger = logging.getLogger(__name__)
 
@@ -31,9 +36,11 @@ class PreviewConfig:
     max_width: int = 1240             # 最大幅（A4横幅相当）
     max_height: int = 1754            # 最大高さ（A4縦幅相当）
     quality: int = 85                 # JPEG品質
+    min_quality: int = 50             # サイズ超過時の最低JPEG品質
     format: str = 'JPEG'              # 出力形式
     max_pages: int = 50               # 最大ページ数
     max_file_size_mb: int = 2         # 1ページあたりの最大サイズ(MB)
+    render_window: int = 1            # 一度にレンダリングするページ数（メモリ上限）
 
 
 class PreviewGenerator:
@@ -43,6 +50,17 @@ class PreviewGenerator:
         """初期化"""
         self.config = config or PreviewConfig()
         self.office_converter = OfficeConverter()
+        # サイズ上限付きJPEGエンコーダ（フル解像度エンコードは原則1回）
+        self.jpeg_encoder = AdaptiveJpegEncoder(
+            quality=self.config.quality,
+            min_quality=self.config.min_quality,
+            max_bytes=self.config.max_file_size_mb * 1024 * 1024,
+            format=self.config.format,
+        )
+        # バケットごとの変換済みPDF索引（DocuWorks用、初回検索時に作成）
+        self._converted_pdf_indexes: Dict[str, ConvertedPdfIndex] = {}
+        # 直近のPDFレンダリング統計（ページ数・時間・エンコード時間・ピークRSS）
+        self.last_render_stats: Dict[str, float] = {}
         logger.info(f"PreviewGenerator initialized with DPI={self.config.dpi}, "
                    f"max_size={self.config.max_width}x{self.config.max_height}")
         if self.office_converter.is_available():
@@ -53,7 +71,8 @@ class PreviewGenerator:
         file_path: str,
         s3_client=None,
         s3_bucket: str = None,
-        converted_pdf_prefix: str = 'converted-pdf/'
+        converted_pdf_prefix: str = 'converted-pdf/',
+        raster_cache=None
     ) -> List[Dict]:
         """
         ファイルから全ページのプレビュー画像を生成
@@ -63,6 +82,7 @@ class PreviewGenerator:
             s3_client: S3クライアント（DocuWorks用、オプション）
             s3_bucket: S3バケット名（DocuWorks用、オプション）
             converted_pdf_prefix: 変換済みPDFのS3プレフィックス
+            raster_cache: PDFページの共有ラスタキャッシュ（PageRasterCache、PDFのみ使用）
 
         Returns:
             プレビュー画像のリスト [{'page': 1, 'data': bytes, 'width': int, 'height': int}, ...]
@@ -72,7 +92,7 @@ class PreviewGenerator:
 
         try:
             if file_type == '.pdf':
-                return self._generate_from_pdf(file_path)
+                return self._generate_from_pdf(file_path, raster_cache)
 
             elif file_type in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif']:
                 return self._generate_from_image(file_path)
@@ -98,73 +118,194 @@ class PreviewGenerator:
             logger.error(f"Preview generation failed for {file_path}: {str(e)}")
             return []
 
-    def _generate_from_pdf(self, file_path: Path) -> List[Dict]:
+    def _generate_from_pdf(self, file_path: Path, raster_cache=None) -> List[Dict]:
         """PDFから全ページのプレビュー画像を生成"""
-        previews = []
-        
         try:
             logger.info(f"Generating PDF previews: {file_path}")
+            previews = list(self.iter_pdf_previews(file_path, raster_cache))
+            logger.info(f"Generated {len(previews)} preview images from PDF")
+            return previews
 
-            # まずページ数を確認
-            from PyPDF2 import PdfReader
-            try:
-                reader = PdfReader(str(file_path))
-                total_pages = len(reader.pages)
-                logger.info(f"PDF has {total_pages} pages")
-            except Exception as e:
-                logger.warning(f"Could not read PDF page count: {e}")
-                total_pages = self.config.max_pages
+        except Exception as e:
+            logger.error(f"PDF preview generation failed: {str(e)}")
+            return []
 
-            # 最大ページ数を制限
-            pages_to_process = min(total_pages, self.config.max_pages)
+    def iter_pdf_previews(self, file_path: Path, raster_cache=None) -> Iterator[Dict]:
+        """
+        PDFのプレビューを1ページ（render_windowページ）ずつ生成
 
-            # PDFを画像に変換（全ページ）
-            # grayscale=False: カラー画像を維持
-            # use_cropbox=True: CropBoxを使用してより正確なレンダリング
-            try:
-                images = convert_from_path(
-                    file_path,
-                    dpi=self.config.dpi,
-                    first_page=1,
-                    last_page=pages_to_process,
-                    fmt='jpeg',
-                    thread_count=2,
-                    grayscale=False,
-                    use_cropbox=True,
-                )
-            except Exception as convert_error:
-                # 最初の変換が失敗した場合、オプションを減らして再試行
-                logger.warning(f"PDF conversion with options failed: {convert_error}, retrying with basic options")
-                images = convert_from_path(
-                    file_path,
-                    dpi=self.config.dpi,
-                    first_page=1,
-                    last_page=pages_to_process,
-                    fmt='jpeg',
-                    thread_count=1,
-                )
+        pdftoppmの出力を一時ディレクトリに書き出し（paths_only）、1ページずつ
+        読み込んでエンコードするため、フル解像度の画像は同時にrender_window枚
+        までしかメモリに載らない。各ページは生成され次第yieldされるので、
+        呼び出し側はそのままアップロードできる。
+        raster_cacheを渡した場合はOCR・サムネイルと共有するレンダリング結果を使う。
 
-            for page_num, image in enumerate(images, 1):
-                try:
-                    preview_data = self._process_image(image)
-                    if preview_data:
-                        previews.append({
-                            'page': page_num,
-                            'data': preview_data['data'],
-                            'width': preview_data['width'],
-                            'height': preview_data['height'],
-                            'size': len(preview_data['data'])
-                        })
-                        logger.debug(f"Generated preview for page {page_num}/{pages_to_process}")
-                except Exception as e:
-                    logger.error(f"Failed to process page {page_num}: {e}")
+        Args:
+            file_path: PDFファイルパス
+            raster_cache: PDFページの共有ラスタキャッシュ（PageRasterCache、省略可）
 
-            logger.info(f"Generated {len(previews)} preview images from PDF")
-            return previews
+        Yields:
+            {'page': int, 'data': bytes, 'width': int, 'height': int, 'size': int}
+        """
+        start_time = time.time()
+        process = psutil.Process()
+        peak_rss = process.memory_info().rss
+        generated = 0
+        encode_seconds = 0.0
+        encoded_bytes = 0
+        encoded_pixels = 0
+
+        if raster_cache is not None:
+            pages_to_process = min(raster_cache.page_count(), self.config.max_pages)
+            pages = self._iter_cached_pdf_pages(raster_cache, pages_to_process)
+        else:
+            pages_to_process = self._pdf_pages_to_render(file_path)
+            pages = self._iter_rendered_pdf_pages(file_path, pages_to_process)
 
+        for page_num, image in pages:
+            try:
+                preview_data = self._process_image(image)
+            except Exception as e:
+                logger.error(f"Failed to process page {page_num}: {e}")
+                preview_data = None
+            finally:
+                image.close()
+
+            peak_rss = max(peak_rss, process.memory_info().rss)
+
+            if preview_data:
+                generated += 1
+                encode_seconds += preview_data['encode_seconds']
+                encoded_bytes += len(preview_data['data'])
+                encoded_pixels += preview_data['width'] * preview_data['height']
+                logger.debug(f"Generated preview for page {page_num}/{pages_to_process}")
+                yield {
+                    'page': page_num,
+                    'data': preview_data['data'],
+                    'width': preview_data['width'],
+                    'height': preview_data['height'],
+                    'size': len(preview_data['data'])
+                }
+
+        self.last_render_stats = {
+            'pages': generated,
+            'render_seconds': round(time.time() - start_time, 2),
+            'peak_rss_mb': round(peak_rss / (1024 * 1024), 1),
+            'encode_seconds': round(encode_seconds, 3),
+            'bytes_per_pixel': round(encoded_bytes / encoded_pixels, 4) if encoded_pixels else 0.0,
+        }
+        logger.info(
+            f"Rendered {generated} PDF page(s) in {self.last_render_stats['render_seconds']}s "
+            f"(encode {self.last_render_stats['encode_seconds']}s, "
+            f"{self.last_render_stats['bytes_per_pixel']} B/px, "
+            f"peak RSS {self.last_render_stats['peak_rss_mb']} MB)"
+        )
+
+    def _iter_rendered_pdf_pages(
+        self,
+        file_path: Path,
+        pages_to_process: int
+    ) -> Iterator[Tuple[int, Image.Image]]:
+        """render_windowページずつpdftoppmでレンダリングし (ページ番号, 画像) をyield"""
+        window = max(1, self.config.render_window)
+
+        with tempfile.TemporaryDirectory(prefix='preview-render-') as output_dir:
+            first_page = 1
+            while first_page <= pages_to_process:
+                last_page = min(first_page + window - 1, pages_to_process)
+
+                page_paths = self._render_pdf_pages(file_path, first_page, last_page, output_dir)
+                if not page_paths:
+                    # ページ数が取得できなかった場合の終端
+                    break
+
+                for page_num, page_path in enumerate(page_paths, first_page):
+                    try:
+                        with Image.open(page_path) as raw:
+                            image = raw.copy()
+                    except Exception as e:
+                        logger.error(f"Failed to load page {page_num}: {e}")
+                        continue
+                    finally:
+                        os.remove(page_path)
+                    yield page_num, image
+
+                first_page = last_page + 1
+
+    def _iter_cached_pdf_pages(
+        self,
+        raster_cache,
+        pages_to_process: int
+    ) -> Iterator[Tuple[int, Image.Image]]:
+        """共有ラスタキャッシュからプレビュー解像度の (ページ番号, 画像) をyield"""
+        for page_num in range(1, pages_to_process + 1):
+            try:
+                image = raster_cache.get_page(page_num, self.config.dpi)
+            except Exception as e:
+                logger.error(f"Failed to render page {page_num}: {e}")
+                continue
+            if image is None:
+                break
+            yield page_num, image
+
+    def _pdf_pages_to_render(self, file_path: Path) -> int:
+        """レンダリングするページ数（pdfinfoでページ数を取得しmax_pagesで制限）"""
+        try:
+            total_pages = int(pdfinfo_from_path(str(file_path))['Pages'])
+            logger.info(f"PDF has {total_pages} pages")
         except Exception as e:
-            logger.error(f"PDF preview generation failed: {str(e)}")
-            return []
+            logger.warning(f"Could not read PDF page count: {e}")
+            total_pages = self.config.max_pages
+
+        return min(total_pages, self.config.max_pages)
+
+    def _render_pdf_pages(
+        self,
+        file_path: Path,
+        first_page: int,
+        last_page: int,
+        output_dir: str
+    ) -> List[str]:
+        """
+        指定範囲のページを無圧縮PPMファイルとしてレンダリング
+
+        中間ファイルは_process_imageで設定品質のJPEGに再エンコードするため、
+        ここで非可逆形式を使うと画質が二重に劣化する（ファイルは読み込み後すぐ削除）
+
+        Returns:
+            ページ順のファイルパスリスト
+        """
+        # grayscale=False: カラー画像を維持
+        # use_cropbox=True: CropBoxを使用してより正確なレンダリング
+        try:
+            return convert_from_path(
+                file_path,
+                dpi=self.config.dpi,
+                first_page=first_page,
+                last_page=last_page,
+                fmt='ppm',
+                output_folder=output_dir,
+                paths_only=True,
+                thread_count=1,
+                grayscale=False,
+                use_cropbox=True,
+            )
+        except Exception as convert_error:
+            # 最初の変換が失敗した場合、オプションを減らして再試行
+            logger.warning(
+                f"PDF conversion of pages {first_page}-{last_page} failed: {convert_error}, "
+                f"retrying with basic options"
+            )
+            return convert_from_path(
+                file_path,
+                dpi=self.config.dpi,
+                first_page=first_page,
+                last_page=last_page,
+                fmt='ppm',
+                output_folder=output_dir,
+                paths_only=True,
+                thread_count=1,
+            )
 
     def _generate_from_image(self, file_path: Path) -> List[Dict]:
         """画像ファイルからプレビュー生成（1ページとして扱う）"""
@@ -353,22 +494,18 @@ class PreviewGenerator:
             見つかったPDFのS3キー、見つからない場合はNone
         """
         try:
-            # docuworks-converted/ フォルダをリスト
-            objects = s3_client.list_objects(bucket, prefix='docuworks-converted/', max_keys=5000)
-
-            # ファイル名を含むPDFを検索
-            for obj in objects:
-                key = obj['Key']
-                if key.endswith('.pdf'):
-                    # S3キーからファイル名部分を取得
-                    s3_filename = Path(key).stem  # timestamp_server_filename
-                    # 元のファイル名が含まれているか確認
-                    if base_filename in s3_filename:
-                        logger.debug(f"Found matching PDF: {key} for {base_filename}")
-                        return key
-
-            logger.debug(f"No converted PDF found for {base_filename} in docuworks-converted/")
-            return None
+            # バケットごとの索引を初回に作成し、以降は差分更新のみ
+            index = self._converted_pdf_indexes.get(bucket)
+            if index is None:
+                index = ConvertedPdfIndex(s3_client.s3, bucket, prefix='docuworks-converted/')
+                self._converted_pdf_indexes[bucket] = index
+
+            key = index.find(base_filename)
+            if key:
+                logger.debug(f"Found matching PDF: {key} for {base_filename}")
+            else:
+                logger.debug(f"No converted PDF found for {base_filename} in docuworks-converted/")
+            return key
 
         except Exception as e:
             logger.warning(f"Error searching for converted PDF: {e}")
@@ -444,24 +581,16 @@ class PreviewGenerator:
                 image = self._resize_image(image)
                 width, height = image.size
 
-            # JPEG形式でバイトデータに変換
-            output = io.BytesIO()
-            image.save(output, format=self.config.format, quality=self.config.quality, optimize=True)
-            data = output.getvalue()
-
-            # ファイルサイズが大きすぎる場合は品質を下げる
-            if len(data) > self.config.max_file_size_mb * 1024 * 1024:
-                for quality in [70, 60, 50]:
-                    output = io.BytesIO()
-                    image.save(output, format=self.config.format, quality=quality, optimize=True)
-                    data = output.getvalue()
-                    if len(data) <= self.config.max_file_size_mb * 1024 * 1024:
-                        break
+            # JPEG形式でバイトデータに変換（サイズ上限に収まる品質を予測して1回でエンコード）
+            encoded = self.jpeg_encoder.encode(image)
 
             return {
-                'data': data,
+                'data': encoded['data'],
                 'width': width,
-                'height': height
+                'height': height,
+                'quality': encoded['quality'],
+                'encode_seconds': encoded['encode_seconds'],
+                'bytes_per_pixel': encoded['bytes_per_pixel']
             }
 
         except Exception as e:
@@ -15,7 +15,7 @@ import json
 import sys
 import os
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 from dataclasses import dataclass, field
 import uuid
 import time
@@ -27,6 +27,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from config import get_config
 config = get_config()
 from opensearch_client import OpenSearchClient
+from document_scanner import DocumentScanner
 
 logging.basicConfig(
     level=logging.INFO,
@@ -154,23 +155,28 @@ class PreviewTaskEnqueuer:
         self,
         file_type: str = 'all',
         limit: Optional[int] = None,
-        scroll_size: int = 1000
-    ) -> List[Dict[str, Any]]:
+        page_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
         """
-        Query OpenSearch for files without preview images using scroll API.
+        Stream files without preview images (point in time + search_after).
+
+        Documents are yielded page by page, so enqueueing starts with the
+        first page and memory does not grow with the result set.
 
         Args:
             file_type: 'office', 'docuworks', or 'all'
             limit: Maximum number of files to return
-            scroll_size: Number of documents per scroll page
+            page_size: Number of documents per search page
 
-        Returns:
-            List of file documents
+        Yields:
+            File documents (with '_id')
         """
         extensions = self._get_extensions(file_type)
 
-        query = {
-            "query": {
+        scanner = DocumentScanner(
+            self.opensearch_client.client,
+            config.aws.opensearch_index,
+            query={
                 "bool": {
                     "must": [
                         {"terms": {"file_extension": extensions}}
@@ -180,58 +186,23 @@ class PreviewTaskEnqueuer:
                     ]
                 }
             },
-            "size": min(scroll_size, limit or scroll_size),
-            "sort": [{"indexed_at": {"order": "asc"}}],
-            "_source": [
-                "file_id", "file_name", "file_path", "file_extension"
-            ]
-        }
-
-        documents = []
+            source=["file_id", "file_name", "file_path", "file_extension"],
+            sort=[{"indexed_at": {"order": "asc"}}],
+            page_size=min(page_size, limit or page_size),
+            limit=limit
+        )
 
         try:
-            # Initial search with scroll
-            response = self.opensearch_client.client.search(
-                index=config.aws.opensearch_index,
-                body=query,
-                scroll='5m'
-            )
-
-            scroll_id = response.get('_scroll_id')
-            hits = response.get('hits', {}).get('hits', [])
-
-            while hits:
-                for hit in hits:
-                    if limit and len(documents) >= limit:
-                        break
-                    doc = hit['_source']
-                    doc['_id'] = hit['_id']
-                    documents.append(doc)
-
-                if limit and len(documents) >= limit:
-                    break
-
-                # Get next page
-                response = self.opensearch_client.client.scroll(
-                    scroll_id=scroll_id,
-                    scroll='5m'
-                )
-                scroll_id = response.get('_scroll_id')
-                hits = response.get('hits', {}).get('hits', [])
-
-            # Clear scroll
-            if scroll_id:
-                try:
-                    self.opensearch_client.client.clear_scroll(scroll_id=scroll_id)
-                except:
-                    pass
-
-            logger.info(f"Retrieved {len(documents)} files without previews")
-            return documents
-
+            for hit in scanner:
+                doc = hit['_source']
+                doc['_id'] = hit['_id']
+                yield doc
         except Exception as e:
-            logger.error(f"Failed to query OpenSearch: {e}")
-            return []
+            # A partial scan must not look like a completed run
+            logger.error(f"Failed to query OpenSearch after {scanner.stats['documents']} files: {e}")
+            raise
+
+        logger.info(f"Retrieved {scanner.stats['documents']} files without previews")
 
     def _determine_file_type(self, extension: str) -> str:
         """Determine file type from extension."""
@@ -363,19 +334,12 @@ class PreviewTaskEnqueuer:
         total_available = self.get_total_count(file_type)
         logger.info(f"Total files without previews: {total_available}")
 
-        # Query for files
-        documents = self.query_files_without_previews(file_type, limit)
-        self.stats.total_found = len(documents)
-
-        if not documents:
-            logger.info("No files to enqueue")
-            return self.stats
-
-        # Create messages and send in batches
+        # Stream files and send messages in batches as pages arrive
         batch = []
         processed = 0
 
-        for doc in documents:
+        for doc in self.query_files_without_previews(file_type, limit):
+            self.stats.total_found += 1
             message = self._create_task_message(doc)
 
             if message['file_type'] == 'unknown':
@@ -393,7 +357,7 @@ class PreviewTaskEnqueuer:
 
                 processed += self.batch_size
                 if processed % 1000 == 0:
-                    logger.info(f"Progress: {processed}/{self.stats.total_found} - {self.stats}")
+                    logger.info(f"Progress: {processed}/{total_available} - {self.stats}")
 
         # Send remaining messages
         if batch:
@@ -401,6 +365,9 @@ class PreviewTaskEnqueuer:
             self.stats.enqueued += sent
             self.stats.failed += len(batch) - sent
 
+        if not self.stats.total_found:
+            logger.info("No files to enqueue")
+
         logger.info("=" * 60)
         logger.info("Enqueue Complete")
         logger.info(f"  {self.stats}")
@@ -18,16 +18,14 @@ import signal
 import argparse
 import sys
 import os
-import io
 import tempfile
 import shutil
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Iterable
 from dataclasses import dataclass, field
 import boto3
-from botocore.exceptions import ClientError
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -37,6 +35,11 @@ from s3_client import S3Client
 from opensearch_client import OpenSearchClient
 from preview_generator import PreviewGenerator, PreviewConfig
 from office_converter import OfficeConverter
+from converted_pdf_index import ConvertedPdfIndex
+from upload_pool import S3UploadPool, UploadRequest
+from bulk_update_writer import BulkUpdateWriter
+from queue_consumer import AsyncQueueConsumer
+from message_acknowledger import MessageAcknowledger
 
 logging.basicConfig(
     level=logging.INFO,
@@ -124,11 +127,38 @@ class PreviewWorker:
         )
         self.preview_generator = PreviewGenerator(preview_config)
 
+        # Shared pooled uploader: pages of all in-flight tasks upload concurrently
+        self.upload_pool = S3UploadPool(
+            region=config.aws.region,
+            max_workers=int(os.getenv('PREVIEW_UPLOAD_WORKERS', '8'))
+        )
+
+        # Partial updates from concurrent tasks are coalesced into _bulk requests
+        self.update_writer = BulkUpdateWriter(
+            self.opensearch_client.client,
+            config.aws.opensearch_index,
+            max_docs=int(os.getenv('PREVIEW_BULK_UPDATE_MAX_DOCS', '50')),
+            max_latency_seconds=float(os.getenv('PREVIEW_BULK_UPDATE_MAX_LATENCY', '0.5')),
+            retry_on_conflict=3
+        )
+        self.update_writer.start()
+
         # Office converter (lazy init)
         self._office_converter: Optional[OfficeConverter] = None
 
-        # Thread pool
-        self.executor = ThreadPoolExecutor(max_workers=max_threads)
+        # Deletes from concurrent tasks are coalesced into DeleteMessageBatch calls,
+        # sending those closest to their visibility deadline first
+        self.acknowledger = MessageAcknowledger(
+            self.sqs,
+            self.queue_url,
+            visibility_timeout=visibility_timeout,
+            max_delay=config.sqs.ack_max_delay,
+            urgent_seconds=config.sqs.ack_urgent_seconds
+        )
+
+        # Shared asyncio receive loop (created in start())
+        self._consumer: Optional[AsyncQueueConsumer] = None
+        self._stats_lock = threading.Lock()
 
         # Shutdown handling
         self.shutdown_requested = False
@@ -138,11 +168,12 @@ class PreviewWorker:
         # Statistics
         self.stats = WorkerStats()
 
-        # PDF cache for DocuWorks
-        self._pdf_cache: Optional[Dict[str, str]] = None
-
-        # Idle tracking
-        self._last_message_time = time.time()
+        # Converted PDF index for DocuWorks (persisted locally, refreshed incrementally)
+        self._pdf_index = ConvertedPdfIndex(
+            boto3.client('s3', **{'region_name': config.aws.region}),
+            config.aws.s3_bucket,
+            prefix=self.CONVERTED_PDF_PREFIX
+        )
 
         logger.info("=" * 60)
         logger.info("Preview Worker Initialized")
@@ -164,80 +195,47 @@ class PreviewWorker:
         return self._office_converter
 
     def start(self):
-        """Start the worker polling loop."""
-        logger.info("Starting preview worker polling...")
-
-        while not self.shutdown_requested:
-            try:
-                messages = self._receive_messages()
-
-                if messages:
-                    self._last_message_time = time.time()
-                    logger.info(f"Received {len(messages)} preview tasks")
-                    self._process_messages(messages)
-                else:
-                    # Check idle timeout for Auto Scaling
-                    idle_time = time.time() - self._last_message_time
-                    if idle_time > self.idle_timeout:
-                        logger.info(f"Queue empty for {idle_time:.0f}s, shutting down for Auto Scaling")
-                        break
-
-                    # Wait before next poll
-                    time.sleep(5)
+        """
+        Start the worker polling loop.
 
-            except KeyboardInterrupt:
-                logger.info("Keyboard interrupt received")
-                break
+        Runs the shared asyncio consumer: tasks are handled as they complete,
+        deletes are batched and the visibility of long conversions is extended.
+        The consumer stops after idle_timeout without messages, for Auto Scaling.
+        """
+        logger.info("Starting preview worker polling...")
 
-            except Exception as e:
-                logger.error(f"Error in polling loop: {e}")
-                time.sleep(10)
+        self._consumer = AsyncQueueConsumer(
+            self.sqs,
+            self.queue_url,
+            self.acknowledger,
+            handler=self._handle_message,
+            max_in_flight=self.max_threads,
+            visibility_timeout=self.visibility_timeout,
+            heartbeat_interval=config.sqs.heartbeat_interval,
+            max_processing_time=config.sqs.max_processing_time,
+            idle_timeout=self.idle_timeout
+        )
+        if self.shutdown_requested:
+            self._consumer.stop()
+        self._consumer.run()
 
         self._shutdown()
 
-    def _receive_messages(self) -> List[Dict]:
-        """Receive messages from SQS."""
-        try:
-            response = self.sqs.receive_message(
-                QueueUrl=self.queue_url,
-                MaxNumberOfMessages=min(self.max_threads, 10),
-                VisibilityTimeout=self.visibility_timeout,
-                WaitTimeSeconds=20,
-                MessageAttributeNames=['All']
-            )
-            return response.get('Messages', [])
-        except ClientError as e:
-            logger.error(f"Failed to receive messages: {e}")
-            return []
-
-    def _process_messages(self, messages: List[Dict]):
-        """Process messages in parallel."""
-        futures = []
-
-        for message in messages:
-            future = self.executor.submit(self._process_single_message, message)
-            futures.append((future, message))
+    def _handle_message(self, message: Dict) -> bool:
+        """Process one task for the consumer and record statistics."""
+        success = self._process_single_message(message)
 
-        for future, message in futures:
-            try:
-                success = future.result(timeout=self.visibility_timeout - 60)
-
-                if success:
-                    self._delete_message(message)
-                    self.stats.success += 1
-                else:
-                    self.stats.failed += 1
-
-                self.stats.processed += 1
+        with self._stats_lock:
+            if success:
+                self.stats.success += 1
+            else:
+                self.stats.failed += 1
+            self.stats.processed += 1
 
-                # Log progress periodically
-                if self.stats.processed % 10 == 0:
-                    logger.info(f"Progress: {self.stats}")
+            if self.stats.processed % 10 == 0:
+                logger.info(f"Progress: {self.stats}")
 
-            except Exception as e:
-                logger.error(f"Error processing message: {e}")
-                self.stats.failed += 1
-                self.stats.processed += 1
+        return success
 
     def _process_single_message(self, message: Dict) -> bool:
         """Process a single preview task message."""
@@ -323,18 +321,12 @@ class PreviewWorker:
                 logger.error(f"PDF conversion failed for {file_name}")
                 return False
 
-            # Generate previews
-            previews = self.preview_generator._generate_from_pdf(Path(pdf_path))
-
-            if not previews:
-                logger.error(f"No previews generated for {file_name}")
-                return False
-
-            # Upload to S3
+            # Render, encode and upload one page at a time (bounded memory)
+            previews = self.preview_generator.iter_pdf_previews(Path(pdf_path))
             uploaded = self._upload_previews(previews, file_id)
 
             if not uploaded:
-                logger.error(f"Failed to upload previews for {file_name}")
+                logger.error(f"No previews generated or uploaded for {file_name}")
                 return False
 
             # Update OpenSearch
@@ -382,18 +374,12 @@ class PreviewWorker:
                 logger.error(f"Failed to download PDF: {pdf_key}")
                 return False
 
-            # Generate previews
-            previews = self.preview_generator._generate_from_pdf(Path(temp_pdf_path))
-
-            if not previews:
-                logger.error(f"No previews generated for {file_name}")
-                return False
-
-            # Upload to S3
+            # Render, encode and upload one page at a time (bounded memory)
+            previews = self.preview_generator.iter_pdf_previews(Path(temp_pdf_path))
             uploaded = self._upload_previews(previews, file_id)
 
             if not uploaded:
-                logger.error(f"Failed to upload previews for {file_name}")
+                logger.error(f"No previews generated or uploaded for {file_name}")
                 return False
 
             # Update OpenSearch
@@ -432,18 +418,12 @@ class PreviewWorker:
                 logger.error(f"Failed to download PDF: {s3_key}")
                 return False
 
-            # Generate previews directly from PDF
-            previews = self.preview_generator._generate_from_pdf(Path(temp_pdf_path))
-
-            if not previews:
-                logger.error(f"No previews generated for {file_name}")
-                return False
-
-            # Upload to S3
+            # Render, encode and upload one page at a time (bounded memory)
+            previews = self.preview_generator.iter_pdf_previews(Path(temp_pdf_path))
             uploaded = self._upload_previews(previews, file_id)
 
             if not uploaded:
-                logger.error(f"Failed to upload previews for {file_name}")
+                logger.error(f"No previews generated or uploaded for {file_name}")
                 return False
 
             # Update OpenSearch
@@ -464,115 +444,64 @@ class PreviewWorker:
 
     def _find_converted_pdf(self, base_name: str) -> Optional[str]:
         """Find converted PDF in S3."""
-        if self._pdf_cache is None:
-            self._build_pdf_cache()
-
-        for pdf_name, s3_key in self._pdf_cache.items():
-            if base_name in pdf_name:
-                return s3_key
-
-        return None
-
-    def _build_pdf_cache(self):
-        """Build cache of converted PDFs."""
-        logger.info("Building PDF cache from S3...")
-        self._pdf_cache = {}
-
-        try:
-            s3 = boto3.client('s3', **{'region_name': config.aws.region})
-            paginator = s3.get_paginator('list_objects_v2')
-
-            page_iterator = paginator.paginate(
-                Bucket=config.aws.s3_bucket,
-                Prefix=self.CONVERTED_PDF_PREFIX
+        return self._pdf_index.find(base_name)
+
+    def _upload_previews(self, previews: Iterable[Dict], file_id: str) -> List[Dict]:
+        """Upload preview images to S3 concurrently as they are produced (page order kept)."""
+        requests = (
+            UploadRequest(
+                bucket=config.aws.s3_thumbnail_bucket,
+                key=f"previews/{file_id}/page_{preview['page']}.jpg",
+                data=preview['data'],
+                content_type='image/jpeg',
+                context={
+                    "page": preview['page'],
+                    "s3_key": f"previews/{file_id}/page_{preview['page']}.jpg",
+                    "width": preview['width'],
+                    "height": preview['height'],
+                    "size": preview['size']
+                }
             )
+            for preview in previews
+        )
 
-            for page in page_iterator:
-                if 'Contents' not in page:
-                    continue
-                for obj in page['Contents']:
-                    key = obj['Key']
-                    if key.endswith('.pdf'):
-                        filename = Path(key).stem
-                        self._pdf_cache[filename] = key
-
-            logger.info(f"PDF cache built: {len(self._pdf_cache)} PDFs found")
+        results = self.upload_pool.upload_all(requests)
+        for result in results:
+            if not result.success:
+                logger.error(f"Failed to upload preview page {result.context['page']}: {result.error}")
 
-        except Exception as e:
-            logger.error(f"Failed to build PDF cache: {e}")
-
-    def _upload_previews(self, previews: List[Dict], file_id: str) -> List[Dict]:
-        """Upload preview images to S3."""
-        uploaded = []
-
-        for preview in previews:
-            try:
-                preview_key = f"previews/{file_id}/page_{preview['page']}.jpg"
-                preview_io = io.BytesIO(preview['data'])
-
-                preview_url = self.s3_client.upload_fileobj(
-                    preview_io,
-                    config.aws.s3_thumbnail_bucket,
-                    preview_key,
-                    content_type='image/jpeg'
-                )
-
-                if preview_url:
-                    uploaded.append({
-                        "page": preview['page'],
-                        "s3_key": preview_key,
-                        "width": preview['width'],
-                        "height": preview['height'],
-                        "size": preview['size']
-                    })
-
-            except Exception as e:
-                logger.error(f"Failed to upload preview page {preview['page']}: {e}")
-
-        return uploaded
+        return [result.context for result in results if result.success]
 
     def _update_opensearch(self, doc_id: str, preview_images: List[Dict]) -> bool:
-        """Update OpenSearch document with preview images."""
-        try:
-            updates = {
-                "preview_images": preview_images,
-                "total_pages": len(preview_images),
-                "preview_generated_at": datetime.utcnow().isoformat()
-            }
-            # Use OpenSearch client's update API directly
-            self.opensearch_client.client.update(
-                index=config.aws.opensearch_index,
-                id=doc_id,
-                body={"doc": updates}
-            )
-            return True
-        except Exception as e:
-            logger.error(f"Failed to update OpenSearch: {e}")
-            return False
-
-    def _delete_message(self, message: Dict):
-        """Delete processed message from SQS."""
-        try:
-            self.sqs.delete_message(
-                QueueUrl=self.queue_url,
-                ReceiptHandle=message['ReceiptHandle']
-            )
-        except ClientError as e:
-            logger.error(f"Failed to delete message: {e}")
+        """Update OpenSearch document with preview images (acknowledged via bulk)."""
+        updates = {
+            "preview_images": preview_images,
+            "total_pages": len(preview_images),
+            "preview_generated_at": datetime.utcnow().isoformat()
+        }
+        success, error = self.update_writer.update_and_wait(doc_id, updates, timeout=60)
+        if not success:
+            logger.error(f"Failed to update OpenSearch: {error}")
+        return success
 
     def _handle_shutdown(self, signum, frame):
         """Handle shutdown signal."""
         logger.info(f"Received signal {signum}, initiating shutdown...")
         self.shutdown_requested = True
+        if self._consumer is not None:
+            self._consumer.stop()
 
     def _shutdown(self):
         """Graceful shutdown."""
         logger.info("Shutting down preview worker...")
-        self.executor.shutdown(wait=True)
+        self.upload_pool.close()
+        self.update_writer.close()
+        self.acknowledger.close()
 
         logger.info("=" * 60)
         logger.info("Preview Worker Final Statistics")
         logger.info(f"  {self.stats}")
+        logger.info(f"  SQS deletes: {self.acknowledger.get_stats()}")
         logger.info("=" * 60)
 
 
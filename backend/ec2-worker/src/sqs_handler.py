@@ -4,13 +4,13 @@ SQS Message Handler for File Processing
 
 import logging
 import json
-import time
 import signal
-from typing import Optional, List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict
 import boto3
 from botocore.exceptions import ClientError
 from config import config
+from queue_consumer import AsyncQueueConsumer
+from message_acknowledger import MessageAcknowledger
 
 logger = logging.getLogger(__name__)
 
@@ -28,11 +28,19 @@ class SQSHandler:
         self.sqs = boto3.client('sqs', **config.get_boto3_config())
         self.queue_url = config.sqs.queue_url
         self.visibility_timeout = config.sqs.visibility_timeout
-        self.max_messages = config.sqs.max_messages
         self.message_processor = message_processor
 
-        # スレッドプール設定
-        self.executor = ThreadPoolExecutor(max_workers=config.worker.threads)
+        # 処理完了したメッセージの削除をDeleteMessageBatchにまとめる（期限の近いものを優先）
+        self.acknowledger = MessageAcknowledger(
+            self.sqs,
+            self.queue_url,
+            visibility_timeout=self.visibility_timeout,
+            max_delay=config.sqs.ack_max_delay,
+            urgent_seconds=config.sqs.ack_urgent_seconds
+        )
+
+        # 共通のasyncio受信ループ（start_polling()で生成）
+        self._consumer: Optional[AsyncQueueConsumer] = None
 
         # シャットダウンフラグ
         self.shutdown_requested = False
@@ -45,86 +53,34 @@ class SQSHandler:
 
     def start_polling(self):
         """
-        SQSポーリングを開始（メインループ）
+        SQSポーリングを開始（stop()まで、またはシャットダウンシグナルまでブロック）
+
+        受信・削除・可視性延長は共通のasyncioコンシューマーで行い、処理はスレッドプールで
+        完了順に扱う（バッチ単位で先頭の処理完了を待たない）
         """
         logger.info("Starting SQS polling...")
 
-        while not self.shutdown_requested:
-            try:
-                # メッセージを取得
-                messages = self._receive_messages()
-
-                if messages:
-                    logger.info(f"Received {len(messages)} messages from SQS")
-                    self._process_messages(messages)
-                else:
-                    # メッセージがない場合は少し待機
-                    time.sleep(config.worker.poll_interval)
-
-            except KeyboardInterrupt:
-                logger.info("Received keyboard interrupt")
-                self.shutdown()
-                break
-
-            except Exception as e:
-                logger.error(f"Error in polling loop: {str(e)}")
-                time.sleep(10)  # エラー時は少し待機
+        self._consumer = AsyncQueueConsumer(
+            self.sqs,
+            self.queue_url,
+            self.acknowledger,
+            handler=self._process_single_message,
+            max_in_flight=config.worker.threads,
+            visibility_timeout=self.visibility_timeout,
+            heartbeat_interval=config.sqs.heartbeat_interval,
+            visibility_extension=config.sqs.visibility_extension or None,
+            max_processing_time=config.sqs.max_processing_time,
+            drain_timeout=config.worker.shutdown_timeout
+        )
+        if self.shutdown_requested:
+            self._consumer.stop()
+        self._consumer.run()
+
+        # 送信待ちの削除を送信
+        self.acknowledger.close()
 
         logger.info("SQS polling stopped")
 
-    def _receive_messages(self) -> List[Dict]:
-        """
-        SQSからメッセージを受信
-
-        Returns:
-            メッセージのリスト
-        """
-        try:
-            response = self.sqs.receive_message(
-                QueueUrl=self.queue_url,
-                MaxNumberOfMessages=self.max_messages,
-                VisibilityTimeout=self.visibility_timeout,
-                WaitTimeSeconds=20,  # Long Polling（20秒待機）
-                MessageAttributeNames=['All']
-            )
-
-            messages = response.get('Messages', [])
-            return messages
-
-        except ClientError as e:
-            logger.error(f"Failed to receive messages from SQS: {str(e)}")
-            return []
-
-    def _process_messages(self, messages: List[Dict]):
-        """
-        メッセージを並列処理
-
-        Args:
-            messages: SQSメッセージのリスト
-        """
-        futures = []
-
-        # 各メッセージを並列処理
-        for message in messages:
-            future = self.executor.submit(self._process_single_message, message)
-            futures.append((future, message))
-
-        # 処理完了を待機
-        for future, message in futures:
-            try:
-                # 処理結果を取得
-                success = future.result(timeout=self.visibility_timeout - 10)
-
-                if success:
-                    # 処理成功：メッセージを削除
-                    self._delete_message(message)
-                else:
-                    # 処理失敗：メッセージは自動的に再表示される
-                    logger.warning(f"Message processing failed, will be retried")
-
-            except Exception as e:
-                logger.error(f"Error processing message: {str(e)}")
-
     def _process_single_message(self, message: Dict) -> bool:
         """
         単一メッセージを処理
@@ -286,23 +242,6 @@ class SQSHandler:
             logger.error(f"Reindex failed: {str(e)}")
             return False
 
-    def _delete_message(self, message: Dict):
-        """
-        処理済みメッセージを削除
-
-        Args:
-            message: SQSメッセージ
-        """
-        try:
-            self.sqs.delete_message(
-                QueueUrl=self.queue_url,
-                ReceiptHandle=message['ReceiptHandle']
-            )
-            logger.debug(f"Deleted message: {message['MessageId']}")
-
-        except ClientError as e:
-            logger.error(f"Failed to delete message: {str(e)}")
-
     def _handle_shutdown_signal(self, signum, frame):
         """
         シャットダウンシグナルを処理（Spot中断対応）
@@ -321,8 +260,13 @@ class SQSHandler:
         logger.info("Initiating graceful shutdown...")
         self.shutdown_requested = True
 
-        # スレッドプールをシャットダウン
-        self.executor.shutdown(wait=True, timeout=config.worker.shutdown_timeout)
+        if self._consumer is not None:
+            # 処理中メッセージの完了待ちと削除はコンシューマー側で行う
+            self._consumer.stop()
+            return
+
+        # ポーリング開始前: 送信待ちの削除を送信
+        self.acknowledger.close()
 
         logger.info("Shutdown complete")
 
@@ -4,26 +4,31 @@ Performance Target: 500-1000 messages/minute
 
 最適化ポイント:
 1. マルチプロセス + マルチスレッドのハイブリッド処理
-2. バッチ処理の効率化（複数SQS呼び出しの並列化）
+2. 受信は共通のasyncioコンシューマー（queue_consumer）で複数のLong Pollingを多重化
 3. メモリ効率の改善（処理完了後の即時クリーンアップ）
-4. 動的なVisibilityTimeout調整
+4. 処理中メッセージの可視性タイムアウトをハートビートで延長
 5. 処理速度メトリクスの可視化
+6. 同時処理数をmax_in_flightに保ち、完了した分だけ補充（先頭メッセージの処理待ちで止まらない）
 """
 
 import logging
 import json
 import time
 import signal
-import os
-from typing import Optional, List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import threading
+from typing import Optional, Dict
 from multiprocessing import cpu_count
 import boto3
 from botocore.exceptions import ClientError
 from config import config
+from queue_consumer import AsyncQueueConsumer
+from message_acknowledger import MessageAcknowledger
 
 logger = logging.getLogger(__name__)
 
+# 受信用に同時発行するLong Polling数
+PARALLEL_FETCH_COUNT = 3
+
 
 class OptimizedSQSHandler:
     """最適化されたSQSメッセージハンドラー"""
@@ -52,11 +57,23 @@ class OptimizedSQSHandler:
 
         logger.info(f"Using {self.thread_count} worker threads (CPU cores: {cpu_cores})")
 
-        # ✅ 最適化2: スレッドプール設定（複数バッチの並列処理用）
-        self.executor = ThreadPoolExecutor(max_workers=self.thread_count)
-
-        # ✅ 最適化3: 並列SQS受信用の追加スレッドプール
-        self.sqs_fetch_executor = ThreadPoolExecutor(max_workers=3)
+        # ✅ 最適化2: 同時処理数（完了した分だけ補充）と可視性タイムアウトの延長
+        self.max_in_flight = config.sqs.max_in_flight or self.thread_count
+        self.visibility_extension = config.sqs.visibility_extension or self.visibility_timeout
+        # 次の確認までに期限切れにならないよう、延長幅の1/3以下の間隔で確認する
+        self.heartbeat_interval = max(1, min(config.sqs.heartbeat_interval, self.visibility_extension // 3))
+        self.max_processing_time = config.sqs.max_processing_time
+
+        # ✅ 最適化3: 削除はDeleteMessageBatchにまとめる（期限の近いものを優先）
+        self.acknowledger = MessageAcknowledger(
+            self.sqs,
+            self.queue_url,
+            visibility_timeout=self.visibility_timeout,
+            max_delay=config.sqs.ack_max_delay,
+            urgent_seconds=config.sqs.ack_urgent_seconds
+        )
+        self._consumer: Optional[AsyncQueueConsumer] = None
+        self._stats_lock = threading.Lock()
 
         # シャットダウンフラグ
         self.shutdown_requested = False
@@ -66,8 +83,7 @@ class OptimizedSQSHandler:
             'total_processed': 0,
             'total_failed': 0,
             'start_time': time.time(),
-            'batch_times': [],
-            'messages_per_minute': []
+            'messages_per_minute': [],
         }
 
         # シグナルハンドラー設定（Spot中断対応）
@@ -75,178 +91,82 @@ class OptimizedSQSHandler:
         signal.signal(signal.SIGINT, self._handle_shutdown_signal)
 
         logger.info(f"Initialized OPTIMIZED SQS handler for queue: {self.queue_url}")
+        logger.info(
+            f"Max in flight={self.max_in_flight}, "
+            f"heartbeat={self.heartbeat_interval}s, extension={self.visibility_extension}s"
+        )
 
     def start_polling(self):
         """
-        SQSポーリングを開始（最適化版メインループ）
+        SQSポーリングを開始（最適化版メインループ、シャットダウンまでブロック）
 
         ✅ 最適化戦略:
-        - 複数のSQS受信リクエストを並列実行
-        - メッセージがある限り待機時間なしで連続処理
+        - 共通のasyncioコンシューマーで複数のLong Pollingを多重化し、空き枠の分だけ受信
+        - 処理完了順に削除・補充（バッチ単位で先頭の処理完了を待たない）
+        - 処理中メッセージの可視性タイムアウトをハートビートで延長
+          （大きなファイルが固定のSQS_VISIBILITY_TIMEOUTを超えても再配信されない）
         - 処理速度のリアルタイムモニタリング
         """
-        logger.info("Starting OPTIMIZED SQS polling...")
+        logger.info(
+            f"Starting OPTIMIZED SQS polling (max in flight: {self.max_in_flight}, "
+            f"heartbeat: {self.heartbeat_interval}s)"
+        )
         logger.info(f"Target: 500-1000 messages/minute")
 
-        consecutive_empty_batches = 0
+        self._consumer = AsyncQueueConsumer(
+            self.sqs,
+            self.queue_url,
+            self.acknowledger,
+            handler=self._handle_message,
+            max_in_flight=self.max_in_flight,
+            pollers=PARALLEL_FETCH_COUNT,
+            visibility_timeout=self.visibility_timeout,
+            heartbeat_interval=self.heartbeat_interval,
+            visibility_extension=self.visibility_extension,
+            max_processing_time=self.max_processing_time,
+            drain_timeout=config.worker.shutdown_timeout
+        )
+        if self.shutdown_requested:
+            self._consumer.stop()
+
+        consumer_thread = threading.Thread(target=self._consumer.run, name='queue-consumer', daemon=True)
+        consumer_thread.start()
         last_stats_time = time.time()
 
-        while not self.shutdown_requested:
-            try:
-                batch_start = time.time()
-
-                # ✅ 最適化5: 複数のSQS受信リクエストを並列実行
-                # 3つの受信リクエストを同時に送信し、より多くのメッセージを取得
-                message_batches = self._receive_messages_parallel(num_batches=3)
-
-                total_messages = sum(len(batch) for batch in message_batches)
-
-                if total_messages > 0:
-                    logger.info(f"📥 Received {total_messages} messages (from {len(message_batches)} parallel requests)")
-                    consecutive_empty_batches = 0
-
-                    # ✅ 最適化6: 全メッセージを一括並列処理
-                    all_messages = []
-                    for batch in message_batches:
-                        all_messages.extend(batch)
-
-                    self._process_messages_optimized(all_messages)
+        # ✅ 最適化5: 30秒ごとにパフォーマンス統計を表示
+        while consumer_thread.is_alive():
+            consumer_thread.join(timeout=1.0)
+            if time.time() - last_stats_time >= 30:
+                self._log_performance_stats()
+                last_stats_time = time.time()
 
-                    # バッチ処理時間を記録
-                    batch_duration = time.time() - batch_start
-                    self.performance_stats['batch_times'].append(batch_duration)
-
-                    # ✅ 最適化7: メッセージがある限り待機なしで次の処理へ
-                    # キューが空になるまで高速処理を継続
-                    continue
-
-                else:
-                    consecutive_empty_batches += 1
-
-                    # ✅ 最適化8: 動的待機時間
-                    # 空バッチが連続する場合のみ待機時間を増やす
-                    if consecutive_empty_batches >= 3:
-                        # キューが空の場合は長めに待機（リソース節約）
-                        wait_time = min(20, consecutive_empty_batches * 5)
-                        logger.debug(f"Queue empty, waiting {wait_time}s...")
-                        time.sleep(wait_time)
-                    else:
-                        # まだメッセージがある可能性があるので短時間待機
-                        time.sleep(1)
-
-                # ✅ 最適化9: 30秒ごとにパフォーマンス統計を表示
-                if time.time() - last_stats_time >= 30:
-                    self._log_performance_stats()
-                    last_stats_time = time.time()
-
-            except KeyboardInterrupt:
-                logger.info("Received keyboard interrupt")
-                self.shutdown()
-                break
-
-            except Exception as e:
-                logger.error(f"Error in polling loop: {str(e)}")
-                time.sleep(5)  # エラー時は短めの待機
+        # 送信待ちの削除を送信
+        self.acknowledger.close()
+        self._log_performance_stats()
 
         logger.info("SQS polling stopped")
 
-    def _receive_messages_parallel(self, num_batches: int = 3) -> List[List[Dict]]:
+    def _handle_message(self, message: Dict) -> bool:
         """
-        複数のSQS受信リクエストを並列実行
-
-        ✅ 最適化: Long Pollingを使いつつ、複数リクエストで最大30メッセージ取得
-        （1リクエストあたり最大10メッセージ x 3リクエスト = 30メッセージ）
+        コンシューマーから呼ばれる1メッセージの処理（統計を記録）
 
         Args:
-            num_batches: 並列実行するリクエスト数
-
-        Returns:
-            メッセージバッチのリスト
-        """
-        futures = []
-
-        # 複数の受信リクエストを並列送信
-        for _ in range(num_batches):
-            future = self.sqs_fetch_executor.submit(self._receive_messages)
-            futures.append(future)
-
-        # 全リクエストの結果を収集
-        message_batches = []
-        for future in as_completed(futures):
-            try:
-                messages = future.result(timeout=25)  # Long Polling timeout + バッファ
-                if messages:
-                    message_batches.append(messages)
-            except Exception as e:
-                logger.error(f"Failed to receive messages: {str(e)}")
-
-        return message_batches
-
-    def _receive_messages(self) -> List[Dict]:
-        """
-        SQSからメッセージを受信（単一リクエスト）
+            message: SQSメッセージ
 
         Returns:
-            メッセージのリスト
-        """
-        try:
-            response = self.sqs.receive_message(
-                QueueUrl=self.queue_url,
-                MaxNumberOfMessages=self.max_messages,
-                VisibilityTimeout=self.visibility_timeout,
-                WaitTimeSeconds=20,  # Long Polling（20秒待機）
-                MessageAttributeNames=['All']
-            )
-
-            messages = response.get('Messages', [])
-            return messages
-
-        except ClientError as e:
-            logger.error(f"Failed to receive messages from SQS: {str(e)}")
-            return []
-
-    def _process_messages_optimized(self, messages: List[Dict]):
+            処理成功の場合True（削除）。失敗時は再配信に任せる
         """
-        メッセージを最適化された方法で並列処理
-
-        ✅ 最適化:
-        - 全メッセージを即座にスレッドプールに投入
-        - 処理完了を待たず次のバッチ取得へ（非同期的な処理）
-        - メモリ効率を考慮した動的な同時実行数制御
+        success = self._process_single_message(message)
 
-        Args:
-            messages: SQSメッセージのリスト
-        """
-        futures = []
-
-        # ✅ 最適化10: 全メッセージを一括でスレッドプールに投入
-        for message in messages:
-            future = self.executor.submit(self._process_single_message, message)
-            futures.append((future, message))
-
-        # ✅ 最適化11: 非同期的な結果処理
-        # タイムアウトを短く設定し、処理完了次第次の処理へ
-        for future, message in futures:
-            try:
-                # 動的タイムアウト（平均処理時間の2倍まで待機）
-                avg_processing_time = self._get_average_processing_time()
-                timeout = min(avg_processing_time * 2, self.visibility_timeout - 10)
-
-                success = future.result(timeout=timeout)
-
-                if success:
-                    # 処理成功：メッセージを即座に削除
-                    self._delete_message(message)
-                    self.performance_stats['total_processed'] += 1
-                else:
-                    # 処理失敗：メッセージは自動的に再表示される
-                    logger.warning(f"Message processing failed, will be retried")
-                    self.performance_stats['total_failed'] += 1
-
-            except Exception as e:
-                logger.error(f"Error processing message: {str(e)}")
+        with self._stats_lock:
+            if success:
+                self.performance_stats['total_processed'] += 1
+            else:
+                logger.warning("Message processing failed, will be retried")
                 self.performance_stats['total_failed'] += 1
 
+        return success
+
     def _process_single_message(self, message: Dict) -> bool:
         """
         単一メッセージを処理
@@ -366,40 +286,6 @@ class OptimizedSQSHandler:
             logger.error(f"Failed to process custom message: {str(e)}")
             return False
 
-    def _delete_message(self, message: Dict):
-        """
-        処理済みメッセージを削除
-
-        Args:
-            message: SQSメッセージ
-        """
-        try:
-            self.sqs.delete_message(
-                QueueUrl=self.queue_url,
-                ReceiptHandle=message['ReceiptHandle']
-            )
-
-        except ClientError as e:
-            logger.error(f"Failed to delete message: {str(e)}")
-
-    def _get_average_processing_time(self) -> float:
-        """
-        平均処理時間を取得
-
-        Returns:
-            平均処理時間（秒）
-        """
-        if not self.performance_stats['batch_times']:
-            return 60.0  # デフォルト値
-
-        # 直近10バッチの平均を計算
-        recent_batches = self.performance_stats['batch_times'][-10:]
-        avg_batch_time = sum(recent_batches) / len(recent_batches)
-
-        # バッチあたりの平均メッセージ数で割る
-        avg_messages_per_batch = 10  # 仮定
-        return avg_batch_time / avg_messages_per_batch
-
     def _log_performance_stats(self):
         """
         パフォーマンス統計をログ出力
@@ -428,6 +314,16 @@ class OptimizedSQSHandler:
         logger.info(f"📈 Success Rate: {success_rate:.1f}%")
         logger.info(f"🚀 Speed: {messages_per_minute:.1f} msg/min ({messages_per_hour:.0f} msg/hour)")
 
+        if self._consumer is not None:
+            consumer_stats = self._consumer.get_stats()
+            logger.info(
+                f"🔄 In flight: {consumer_stats['in_flight']}/{self.max_in_flight}, "
+                f"visibility extensions: {consumer_stats['extended']} "
+                f"(failed: {consumer_stats['visibility_failures']}, "
+                f"abandoned: {consumer_stats['abandoned']})"
+            )
+            logger.info(f"🗑️  Deletes: {self.acknowledger.get_stats()}")
+
         # 目標達成状況
         if messages_per_minute >= 500:
             logger.info(f"🎯 TARGET ACHIEVED! Current: {messages_per_minute:.0f} msg/min >= 500 msg/min")
@@ -465,13 +361,13 @@ class OptimizedSQSHandler:
         logger.info("Initiating graceful shutdown...")
         self.shutdown_requested = True
 
-        # 最終統計を表示
-        self._log_performance_stats()
+        if self._consumer is not None:
+            # 処理中メッセージの完了待ちと削除はコンシューマー側で行う
+            self._consumer.stop()
+            return
 
-        # スレッドプールをシャットダウン
-        logger.info("Shutting down thread pools...")
-        self.executor.shutdown(wait=True)
-        self.sqs_fetch_executor.shutdown(wait=True)
+        # ポーリング開始前: 送信待ちの削除を送信
+        self.acknowledger.close()
 
         logger.info("Shutdown complete")
 
@@ -17,6 +17,9 @@ logger = logging.getLogger(__name__)
 class ThumbnailGenerator:
     """サムネイル生成クラス"""
 
+    # PDFの1ページ目をレンダリングする解像度（サムネイル用なので低解像度）
+    PDF_DPI = 150
+
     def __init__(self):
         """初期化"""
         self.max_width = config.thumbnail.max_width
@@ -24,12 +27,13 @@ class ThumbnailGenerator:
         self.quality = config.thumbnail.quality
         self.format = config.thumbnail.format
 
-    def generate(self, file_path: str) -> Optional[bytes]:
+    def generate(self, file_path: str, raster_cache=None) -> Optional[bytes]:
         """
         ファイルからサムネイルを生成
 
         Args:
             file_path: ファイルパス
+            raster_cache: PDFページの共有ラスタキャッシュ（PageRasterCache、省略可）
 
         Returns:
             サムネイル画像のバイトデータ
@@ -42,7 +46,7 @@ class ThumbnailGenerator:
                 return self._generate_from_image(file_path)
 
             elif file_type == '.pdf':
-                return self._generate_from_pdf(file_path)
+                return self._generate_from_pdf(file_path, raster_cache)
 
             elif file_type == '.xdw':
                 return self._generate_from_docuworks(file_path)
@@ -92,25 +96,27 @@ class ThumbnailGenerator:
             logger.error(f"Image thumbnail generation failed: {str(e)}")
             raise
 
-    def _generate_from_pdf(self, file_path: Path) -> bytes:
+    def _generate_from_pdf(self, file_path: Path, raster_cache=None) -> bytes:
         """PDFファイルからサムネイル生成"""
         try:
             logger.info(f"Generating thumbnail from PDF: {file_path}")
 
-            # PDFの最初のページを画像に変換
-            images = convert_from_path(
-                file_path,
-                dpi=150,  # サムネイル用なので低解像度
-                first_page=1,
-                last_page=1
-            )
-
-            if not images:
+            if raster_cache is not None:
+                # OCR・プレビューと共有するレンダリング結果の1ページ目
+                image = raster_cache.get_page(1, self.PDF_DPI)
+            else:
+                # PDFの最初のページを画像に変換
+                images = convert_from_path(
+                    file_path,
+                    dpi=self.PDF_DPI,
+                    first_page=1,
+                    last_page=1
+                )
+                image = images[0] if images else None
+
+            if image is None:
                 return self._generate_placeholder('.pdf')
 
-            # 最初のページからサムネイル生成
-            image = images[0]
-
             # サムネイルサイズを計算
             thumbnail_size = self._calculate_thumbnail_size(image.size)
 
@@ -273,12 +279,13 @@ class ThumbnailGenerator:
 
         return image
 
-    def generate_with_metadata(self, file_path: str) -> dict:
+    def generate_with_metadata(self, file_path: str, raster_cache=None) -> dict:
         """
         サムネイル生成とメタデータ取得
 
         Args:
             file_path: ファイルパス
+            raster_cache: PDFページの共有ラスタキャッシュ（PageRasterCache、省略可）
 
         Returns:
             サムネイルとメタデータの辞書
@@ -292,7 +299,7 @@ class ThumbnailGenerator:
         }
 
         try:
-            thumbnail_bytes = self.generate(file_path)
+            thumbnail_bytes = self.generate(file_path, raster_cache)
 
             if thumbnail_bytes:
                 result['thumbnail'] = thumbnail_bytes
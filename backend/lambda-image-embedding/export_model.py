@@ -0,0 +1,151 @@
+"""
+Startup-Optimized CLIP Export
+Builds the TorchScript int8 vision tower used by MODEL_VARIANT=quantized
+and checks its embeddings against the full-precision CLIPModel
+
+Usage:
+    python export_model.py                      # export + parity check
+    python export_model.py --images ./samples   # parity check on real images
+    python export_model.py --check-only         # parity check of an existing export
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import torch
+from PIL import Image
+from transformers import CLIPImageProcessor, CLIPModel, CLIPVisionModelWithProjection
+
+MODEL_NAME = os.environ.get('MODEL_NAME', 'openai/clip-vit-base-patch32')
+DEFAULT_OUTPUT = os.path.join('models', 'clip_vision_int8.pt')
+
+# Minimum cosine similarity between full-precision and exported embeddings
+PARITY_THRESHOLD = float(os.environ.get('PARITY_THRESHOLD', '0.98'))
+
+
+class VisionEncoder(torch.nn.Module):
+    """Vision tower + projection returning image embeddings only"""
+
+    def __init__(self, vision_model: CLIPVisionModelWithProjection):
+        super().__init__()
+        self.vision_model = vision_model
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self.vision_model(pixel_values=pixel_values).image_embeds
+
+
+def export_quantized(output_path: str) -> float:
+    """
+    Export the dynamically int8-quantized vision tower as TorchScript
+    Returns: export time in seconds
+    """
+    start_time = time.time()
+
+    vision_model = CLIPVisionModelWithProjection.from_pretrained(MODEL_NAME)
+    vision_model.eval()
+
+    # Linear layers dominate ViT compute; quantize their weights to int8
+    quantized = torch.ao.quantization.quantize_dynamic(
+        VisionEncoder(vision_model),
+        {torch.nn.Linear},
+        dtype=torch.qint8
+    )
+
+    example = torch.zeros(1, 3, 224, 224)
+    with torch.inference_mode():
+        traced = torch.jit.trace(quantized, example, check_trace=False)
+    traced = torch.jit.freeze(traced.eval())
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    torch.jit.save(traced, output_path)
+
+    export_time = time.time() - start_time
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"Exported {output_path} ({size_mb:.1f} MB) in {export_time:.1f}s")
+    return export_time
+
+
+def load_parity_images(image_dir: str = None, count: int = 8) -> List[Image.Image]:
+    """Load sample images from a directory, or generate deterministic synthetic ones"""
+    if image_dir:
+        paths = sorted(
+            p for p in Path(image_dir).iterdir()
+            if p.suffix.lower() in {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp', '.tif', '.tiff'}
+        )
+        return [Image.open(p).convert('RGB') for p in paths]
+
+    rng = np.random.default_rng(0)
+    images = []
+    for i in range(count):
+        # Mix of smooth gradients and noise so the check is not degenerate
+        x = np.linspace(0, 1, 256)
+        gradient = np.outer(x, x[::-1]) * 255
+        noise = rng.integers(0, 256, size=(256, 256, 3))
+        weight = i / max(1, count - 1)
+        pixels = (gradient[..., None] * (1 - weight) + noise * weight).astype(np.uint8)
+        images.append(Image.fromarray(pixels, mode='RGB'))
+    return images
+
+
+def normalized(features: torch.Tensor) -> torch.Tensor:
+    """L2-normalize embeddings (as the handler does)"""
+    return features / features.norm(dim=-1, keepdim=True)
+
+
+def check_parity(output_path: str, images: List[Image.Image]) -> float:
+    """
+    Compare exported and vision-only embeddings against the full CLIPModel
+    Returns: minimum cosine similarity of the exported model
+    """
+    processor = CLIPImageProcessor.from_pretrained(MODEL_NAME)
+    pixel_values = processor(images=images, return_tensors='pt')['pixel_values']
+
+    full_model = CLIPModel.from_pretrained(MODEL_NAME).eval()
+    vision_model = CLIPVisionModelWithProjection.from_pretrained(MODEL_NAME).eval()
+    exported = torch.jit.load(output_path, map_location='cpu')
+
+    with torch.inference_mode():
+        reference = normalized(full_model.get_image_features(pixel_values=pixel_values))
+        vision = normalized(vision_model(pixel_values=pixel_values).image_embeds)
+        quantized = normalized(exported(pixel_values))
+
+    vision_cos = (reference * vision).sum(dim=-1)
+    quantized_cos = (reference * quantized).sum(dim=-1)
+
+    print(f"Parity on {len(images)} image(s) against {MODEL_NAME}:")
+    print(f"  vision:    min cosine {vision_cos.min().item():.5f}")
+    print(f"  quantized: min cosine {quantized_cos.min().item():.5f} "
+          f"(mean {quantized_cos.mean().item():.5f}, threshold {PARITY_THRESHOLD})")
+
+    if vision_cos.min().item() < 0.9999:
+        raise SystemExit("Vision-only embeddings differ from the full model")
+
+    return quantized_cos.min().item()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Export the quantized CLIP vision tower')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='TorchScript output path')
+    parser.add_argument('--images', help='Directory of sample images for the parity check')
+    parser.add_argument('--check-only', action='store_true', help='Skip export, only check parity')
+    args = parser.parse_args()
+
+    if not args.check_only:
+        export_quantized(args.output)
+
+    min_cosine = check_parity(args.output, load_parity_images(args.images))
+    if min_cosine < PARITY_THRESHOLD:
+        print(f"FAILED: quantized embeddings below parity threshold ({min_cosine:.5f})")
+        return 1
+
+    print("Parity check passed")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,7 +8,11 @@ import base64
 import io
 import os
 import hashlib
+import resource
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
@@ -16,7 +20,7 @@ import boto3
 import torch
 import numpy as np
 from PIL import Image
-from transformers import CLIPProcessor, CLIPModel
+from transformers import CLIPImageProcessor, CLIPModel, CLIPVisionModelWithProjection
 
 # AWS Clients
 s3_client = boto3.client('s3')
@@ -28,38 +32,115 @@ MODEL_NAME = os.environ.get('MODEL_NAME', 'openai/clip-vit-base-patch32')
 VECTOR_DIMENSION = int(os.environ.get('VECTOR_DIMENSION', '512'))
 MAX_IMAGE_SIZE = int(os.environ.get('MAX_IMAGE_SIZE', '2048'))
 
-# Global model instances (reused across invocations)
+# Model variant: 'full' (CLIPModel), 'vision' (vision tower + projection only)
+# or 'quantized' (TorchScript int8 vision tower built by export_model.py)
+MODEL_VARIANT = os.environ.get('MODEL_VARIANT', 'full')
+QUANTIZED_MODEL_PATH = os.environ.get(
+    'QUANTIZED_MODEL_PATH',
+    os.path.join(os.environ.get('LAMBDA_TASK_ROOT', '.'), 'models', 'clip_vision_int8.pt')
+)
+
+# Embedding cache (in-memory LRU per warm container + DynamoDB)
+LOCAL_CACHE_SIZE = int(os.environ.get('LOCAL_CACHE_SIZE', '2048'))
+CACHE_DTYPE = os.environ.get('EMBEDDING_CACHE_DTYPE', 'float16')  # 'float16' or 'float32'
+CACHE_TTL_DAYS = 30
+DYNAMODB_BATCH_GET_LIMIT = 100
+
+# Batch inference
+DECODE_WORKERS = int(os.environ.get('DECODE_WORKERS', '4'))
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '0'))  # 0 = autotune by available memory
+BATCH_MEMORY_PER_IMAGE_MB = float(os.environ.get('BATCH_MEMORY_PER_IMAGE_MB', '40'))
+BATCH_MEMORY_HEADROOM_MB = 256
+BATCH_SIZE_LIMIT = 64
+LAMBDA_MEMORY_MB = int(os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE', '3008'))
+
+# Global model instances (reused across invocations, loaded on first use)
 model = None
+image_encoder = None
+device = None
 processor = None
+model_lock = threading.RLock()
 cache_table = None
+decode_pool = None
+local_cache: 'OrderedDict[str, List[float]]' = OrderedDict()
 
 class EmbeddingError(Exception):
     """Custom exception for embedding generation errors"""
     pass
 
 
+def load_image_encoder(variant: str):
+    """
+    Load the image encoder for a model variant
+    Returns: (module, function mapping a pixel_values batch to image embeddings)
+    """
+    if variant == 'quantized':
+        # Dynamic int8 quantized ops run on CPU only
+        module = torch.jit.load(QUANTIZED_MODEL_PATH, map_location='cpu')
+        return module, module
+
+    if variant == 'vision':
+        # Skips the text tower; safetensors weights are memory-mapped
+        module = CLIPVisionModelWithProjection.from_pretrained(MODEL_NAME)
+        return module, lambda pixel_values: module(pixel_values=pixel_values).image_embeds
+
+    if variant != 'full':
+        raise EmbeddingError(f"Unknown MODEL_VARIANT: {variant}")
+
+    module = CLIPModel.from_pretrained(MODEL_NAME)
+    return module, lambda pixel_values: module.get_image_features(pixel_values=pixel_values)
+
+
+def initialize_processor():
+    """Load the CLIP image processor (no tokenizer) on first use"""
+    global processor
+
+    if processor is None:
+        with model_lock:
+            if processor is None:
+                processor = CLIPImageProcessor.from_pretrained(MODEL_NAME)
+
+
 def initialize_model():
-    """Initialize CLIP model and processor (called once per container)"""
-    global model, processor, cache_table
+    """
+    Load the image encoder on first use (called once per container)
+    Invocations answered entirely from the cache never load the model
+    """
+    global model, image_encoder, device
+
+    if model is not None:
+        return
+
+    with model_lock:
+        if model is not None:
+            return
 
-    if model is None:
-        print(f"Loading model: {MODEL_NAME}")
+        print(f"Loading model: {MODEL_NAME} (variant: {MODEL_VARIANT})")
         start_time = time.time()
 
-        # Load model with optimizations
-        model = CLIPModel.from_pretrained(MODEL_NAME)
-        processor = CLIPProcessor.from_pretrained(MODEL_NAME)
+        module, encoder = load_image_encoder(MODEL_VARIANT)
 
         # Move to GPU if available (for container with GPU)
-        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        model.to(device)
+        if MODEL_VARIANT != 'quantized' and torch.cuda.is_available():
+            device = torch.device('cuda')
+        else:
+            device = torch.device('cpu')
+        module.to(device)
 
         # Set to evaluation mode
-        model.eval()
+        module.eval()
+
+        image_encoder = encoder
+        model = module
 
         load_time = time.time() - start_time
         print(f"Model loaded in {load_time:.2f}s on device: {device}")
 
+
+def initialize_cache():
+    """Connect to the DynamoDB cache table (called once per container)"""
+    global cache_table
+
     if cache_table is None:
         cache_table = dynamodb.Table(CACHE_TABLE_NAME)
         print(f"Connected to cache table: {CACHE_TABLE_NAME}")
@@ -70,14 +151,97 @@ def get_image_hash(image_data: bytes) -> str:
     return hashlib.md5(image_data).hexdigest()
 
 
+def get_cache_key(image_hash: str) -> str:
+    """
+    Cache key for an image hash under the current model variant
+    'full' keeps the bare hash so items written before variants existed stay valid
+    """
+    if MODEL_VARIANT == 'full':
+        return image_hash
+    return f"{MODEL_VARIANT}:{image_hash}"
+
+
+def is_current_model_item(item: Dict) -> bool:
+    """Whether a cache item was produced by the loaded model (legacy items are 'full')"""
+    return (
+        item.get('model', MODEL_NAME) == MODEL_NAME
+        and item.get('model_variant', 'full') == MODEL_VARIANT
+    )
+
+
+def local_cache_get(image_hash: str) -> Optional[List[float]]:
+    """Look up an embedding in the in-memory LRU"""
+    embedding = local_cache.get(image_hash)
+    if embedding is not None:
+        local_cache.move_to_end(image_hash)
+    return embedding
+
+
+def local_cache_put(image_hash: str, embedding: List[float]):
+    """Store an embedding in the in-memory LRU, evicting the oldest entries"""
+    if LOCAL_CACHE_SIZE <= 0:
+        return
+    local_cache[image_hash] = embedding
+    local_cache.move_to_end(image_hash)
+    while len(local_cache) > LOCAL_CACHE_SIZE:
+        local_cache.popitem(last=False)
+
+
+def encode_embedding(embedding: List[float]) -> bytes:
+    """Pack an embedding into little-endian CACHE_DTYPE bytes"""
+    return np.asarray(embedding, dtype=np.dtype(CACHE_DTYPE).newbyteorder('<')).tobytes()
+
+
+def decode_embedding(item: Dict) -> Optional[List[float]]:
+    """
+    Read the embedding from a cache item
+    Supports the binary format and the legacy list-of-Decimal format
+    """
+    packed = item.get('embedding_bin')
+    if packed is not None:
+        data = packed.value if hasattr(packed, 'value') else bytes(packed)
+        dtype = np.dtype(item.get('embedding_dtype', 'float16')).newbyteorder('<')
+        return np.frombuffer(data, dtype=dtype).astype(np.float32).tolist()
+
+    embedding = item.get('embedding')
+    if embedding:
+        return [float(value) for value in embedding]
+
+    return None
+
+
+def build_cache_item(image_hash: str, embedding: List[float]) -> Dict:
+    """DynamoDB item for an embedding in the compact binary format"""
+    now = int(time.time())
+    return {
+        'image_hash': get_cache_key(image_hash),
+        'embedding_bin': encode_embedding(embedding),
+        'embedding_dtype': CACHE_DTYPE,
+        'dimension': len(embedding),
+        'model': MODEL_NAME,
+        'model_variant': MODEL_VARIANT,
+        'created_at': now,
+        'ttl': now + CACHE_TTL_DAYS * 24 * 60 * 60
+    }
+
+
 def check_cache(image_hash: str) -> Optional[List[float]]:
-    """Check if embedding exists in DynamoDB cache"""
+    """Check if embedding exists in the local LRU or DynamoDB cache"""
+    cache_key = get_cache_key(image_hash)
+    embedding = local_cache_get(cache_key)
+    if embedding is not None:
+        print(f"Local cache HIT for hash: {image_hash}")
+        return embedding
+
     try:
-        response = cache_table.get_item(Key={'image_hash': image_hash})
+        response = cache_table.get_item(Key={'image_hash': cache_key})
 
-        if 'Item' in response:
-            print(f"Cache HIT for hash: {image_hash}")
-            return response['Item']['embedding']
+        if 'Item' in response and is_current_model_item(response['Item']):
+            embedding = decode_embedding(response['Item'])
+            if embedding:
+                print(f"Cache HIT for hash: {image_hash}")
+                local_cache_put(cache_key, embedding)
+                return embedding
 
         print(f"Cache MISS for hash: {image_hash}")
         return None
@@ -87,27 +251,90 @@ def check_cache(image_hash: str) -> Optional[List[float]]:
         return None
 
 
-def save_to_cache(image_hash: str, embedding: List[float], ttl_days: int = 30):
-    """Save embedding to DynamoDB cache"""
-    try:
-        ttl = int(time.time()) + (ttl_days * 24 * 60 * 60)
+def check_cache_batch(image_hashes: List[str]) -> Dict[str, List[float]]:
+    """
+    Look up several embeddings: local LRU first, then DynamoDB batch_get_item
+    Returns a mapping of hash to embedding for the hits
+    """
+    found: Dict[str, List[float]] = {}
+    remote: Dict[str, str] = {}  # cache key -> image hash
+
+    for image_hash in dict.fromkeys(image_hashes):
+        cache_key = get_cache_key(image_hash)
+        embedding = local_cache_get(cache_key)
+        if embedding is not None:
+            found[image_hash] = embedding
+        else:
+            remote[cache_key] = image_hash
 
-        cache_table.put_item(
-            Item={
-                'image_hash': image_hash,
-                'embedding': embedding,
-                'dimension': VECTOR_DIMENSION,
-                'model': MODEL_NAME,
-                'created_at': int(time.time()),
-                'ttl': ttl
+    local_hits = len(found)
+
+    try:
+        remote_keys = list(remote)
+        for offset in range(0, len(remote_keys), DYNAMODB_BATCH_GET_LIMIT):
+            request = {
+                CACHE_TABLE_NAME: {
+                    'Keys': [{'image_hash': k} for k in remote_keys[offset:offset + DYNAMODB_BATCH_GET_LIMIT]]
+                }
             }
-        )
+
+            # Retry unprocessed keys (throttling) a few times before giving up
+            for attempt in range(3):
+                response = dynamodb.batch_get_item(RequestItems=request)
+
+                for item in response.get('Responses', {}).get(CACHE_TABLE_NAME, []):
+                    if not is_current_model_item(item):
+                        continue
+                    embedding = decode_embedding(item)
+                    if embedding:
+                        found[remote[item['image_hash']]] = embedding
+                        local_cache_put(item['image_hash'], embedding)
+
+                request = response.get('UnprocessedKeys') or {}
+                if not request:
+                    break
+                time.sleep(0.05 * (2 ** attempt))
+
+    except Exception as e:
+        print(f"Batch cache check error: {str(e)}")
+
+    print(
+        f"Cache lookup: {len(image_hashes)} requested, {local_hits} local hits, "
+        f"{len(found) - local_hits} DynamoDB hits"
+    )
+    return found
+
+
+def save_to_cache(image_hash: str, embedding: List[float]):
+    """Save embedding to the local LRU and DynamoDB cache"""
+    local_cache_put(get_cache_key(image_hash), embedding)
+
+    try:
+        cache_table.put_item(Item=build_cache_item(image_hash, embedding))
         print(f"Saved embedding to cache: {image_hash}")
 
     except Exception as e:
         print(f"Cache save error: {str(e)}")
 
 
+def save_to_cache_batch(embeddings: Dict[str, List[float]]):
+    """Save several embeddings to the local LRU and DynamoDB (batch_writer)"""
+    if not embeddings:
+        return
+
+    for image_hash, embedding in embeddings.items():
+        local_cache_put(get_cache_key(image_hash), embedding)
+
+    try:
+        with cache_table.batch_writer(overwrite_by_pkeys=['image_hash']) as writer:
+            for image_hash, embedding in embeddings.items():
+                writer.put_item(Item=build_cache_item(image_hash, embedding))
+        print(f"Saved {len(embeddings)} embedding(s) to cache")
+
+    except Exception as e:
+        print(f"Batch cache save error: {str(e)}")
+
+
 def load_image_from_s3(s3_url: str) -> bytes:
     """Load image from S3 bucket"""
     try:
@@ -175,47 +402,239 @@ def preprocess_image(image_data: bytes) -> Image.Image:
         raise EmbeddingError(f"Failed to preprocess image: {str(e)}")
 
 
-def generate_embedding(image: Image.Image) -> Tuple[List[float], float]:
+def get_decode_pool() -> ThreadPoolExecutor:
+    """Thread pool for S3 loads, decoding and preprocessing (reused across invocations)"""
+    global decode_pool
+
+    if decode_pool is None:
+        decode_pool = ThreadPoolExecutor(max_workers=max(1, DECODE_WORKERS))
+
+    return decode_pool
+
+
+def map_concurrently(fn, items: List) -> List:
     """
-    Generate embedding vector from image using CLIP model
-    Returns: (embedding vector, inference time in seconds)
+    Apply fn to each item on the decode pool
+    Returns results in input order; an item that raised is returned as its exception
     """
+    if len(items) <= 1 or DECODE_WORKERS <= 1:
+        results = []
+        for item in items:
+            try:
+                results.append(fn(item))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    futures = [get_decode_pool().submit(fn, item) for item in items]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def get_rss_mb() -> float:
+    """Current resident memory of this process in MB"""
     try:
-        start_time = time.time()
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Peak RSS (KB on Linux) is a conservative fallback
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
 
-        # Preprocess image
-        inputs = processor(images=image, return_tensors="pt", padding=True)
+def autotune_batch_size() -> int:
+    """
+    Largest forward-pass batch that fits in the memory left in this container
+    MAX_BATCH_SIZE overrides the estimate when set
+    """
+    if MAX_BATCH_SIZE > 0:
+        return MAX_BATCH_SIZE
+
+    available_mb = LAMBDA_MEMORY_MB - get_rss_mb() - BATCH_MEMORY_HEADROOM_MB
+    return max(1, min(BATCH_SIZE_LIMIT, int(available_mb // BATCH_MEMORY_PER_IMAGE_MB)))
+
+
+def image_to_pixel_values(image: Image.Image) -> torch.Tensor:
+    """Run the CLIP image processor on one image, returning a (3, H, W) tensor"""
+    initialize_processor()
+    return processor(images=image, return_tensors="pt")['pixel_values'][0]
 
-        # Move to same device as model
-        device = next(model.parameters()).device
-        inputs = {k: v.to(device) for k, v in inputs.items()}
 
-        # Generate embedding (no gradient computation for inference)
-        with torch.no_grad():
-            image_features = model.get_image_features(**inputs)
+def embed_pixel_values(pixel_values: List[torch.Tensor]) -> Tuple[List[List[float]], float]:
+    """
+    Generate normalized embeddings for preprocessed images
+    Tensors are stacked into batches of autotune_batch_size() and each batch
+    runs as a single forward pass
+    Returns: (embedding vectors in input order, inference time in seconds)
+    """
+    try:
+        start_time = time.time()
+
+        initialize_model()
+        batch_size = autotune_batch_size()
+        embeddings: List[List[float]] = []
 
-            # Normalize embedding (for cosine similarity)
-            image_features = image_features / image_features.norm(dim=-1, keepdim=True)
+        with torch.inference_mode():
+            for offset in range(0, len(pixel_values), batch_size):
+                batch = torch.stack(pixel_values[offset:offset + batch_size]).to(device)
+                image_features = image_encoder(batch)
 
-        # Convert to numpy and then to list
-        embedding = image_features.cpu().numpy()[0].tolist()
+                # Normalize embeddings (for cosine similarity)
+                image_features = image_features / image_features.norm(dim=-1, keepdim=True)
+                embeddings.extend(image_features.cpu().numpy().tolist())
 
         inference_time = time.time() - start_time
 
-        print(f"Generated embedding: dimension={len(embedding)}, time={inference_time:.3f}s")
+        print(
+            f"Generated {len(embeddings)} embedding(s): batch_size={batch_size}, "
+            f"time={inference_time:.3f}s"
+        )
 
         # Verify dimension
-        if len(embedding) != VECTOR_DIMENSION:
-            raise EmbeddingError(
-                f"Unexpected embedding dimension: {len(embedding)} (expected {VECTOR_DIMENSION})"
-            )
+        for embedding in embeddings:
+            if len(embedding) != VECTOR_DIMENSION:
+                raise EmbeddingError(
+                    f"Unexpected embedding dimension: {len(embedding)} (expected {VECTOR_DIMENSION})"
+                )
 
-        return embedding, inference_time
+        return embeddings, inference_time
 
+    except EmbeddingError:
+        raise
     except Exception as e:
         raise EmbeddingError(f"Failed to generate embedding: {str(e)}")
 
 
+def generate_embeddings(images: List[Image.Image]) -> Tuple[List[List[float]], float]:
+    """
+    Generate embedding vectors for several images
+    Images are preprocessed concurrently and embedded with batched forward passes
+    Returns: (embedding vectors in input order, inference time in seconds)
+    """
+    pixel_values = map_concurrently(image_to_pixel_values, images)
+    for value in pixel_values:
+        if isinstance(value, Exception):
+            raise EmbeddingError(f"Failed to preprocess image: {str(value)}")
+
+    return embed_pixel_values(pixel_values)
+
+
+def generate_embedding(image: Image.Image) -> Tuple[List[float], float]:
+    """
+    Generate embedding vector from image using CLIP model
+    Returns: (embedding vector, inference time in seconds)
+    """
+    embeddings, inference_time = generate_embeddings([image])
+    return embeddings[0], inference_time
+
+
+def load_image_data(item: Dict) -> bytes:
+    """Load image bytes from an item with imageUrl or imageBase64"""
+    if item.get('imageUrl'):
+        return load_image_from_s3(item['imageUrl'])
+    if item.get('imageBase64'):
+        return load_image_from_base64(item['imageBase64'])
+    raise EmbeddingError('Either imageUrl or imageBase64 is required')
+
+
+def load_and_hash(item: Dict) -> Tuple[bytes, str]:
+    """Load image bytes for a batch item and compute its cache hash"""
+    image_data = load_image_data(item)
+    return image_data, get_image_hash(image_data)
+
+
+def prepare_pixel_values(image_data: bytes) -> torch.Tensor:
+    """Decode, resize and run the CLIP processor on raw image bytes"""
+    return image_to_pixel_values(preprocess_image(image_data))
+
+
+def batch_error(error: Exception) -> Dict:
+    """Per-image error entry for batch responses"""
+    return {
+        'success': False,
+        'error': {'code': 'EMBEDDING_ERROR', 'message': str(error)}
+    }
+
+
+def handle_batch(items: List[Dict], use_cache: bool) -> Dict:
+    """
+    Generate embeddings for a list of images
+    Images are loaded and preprocessed concurrently; cache hits are returned
+    directly and misses share batched forward passes.
+    Per-image failures are reported in place without failing the batch.
+    """
+    results: List[Dict] = [None] * len(items)
+    misses: List[Tuple[int, str, bytes]] = []
+
+    loaded_items = map_concurrently(load_and_hash, items)
+
+    cached: Dict[str, List[float]] = {}
+    if use_cache:
+        cached = check_cache_batch([
+            loaded[1] for loaded in loaded_items if not isinstance(loaded, Exception)
+        ])
+
+    for i, loaded in enumerate(loaded_items):
+        if isinstance(loaded, Exception):
+            results[i] = batch_error(loaded)
+            continue
+
+        image_data, image_hash = loaded
+
+        if use_cache:
+            cached_embedding = cached.get(image_hash)
+            if cached_embedding:
+                results[i] = {
+                    'success': True,
+                    'embedding': cached_embedding,
+                    'dimension': len(cached_embedding),
+                    'cached': True,
+                    'imageHash': image_hash
+                }
+                continue
+
+        misses.append((i, image_hash, image_data))
+
+    pending: List[Tuple[int, str]] = []
+    pixel_values: List[torch.Tensor] = []
+    prepared = map_concurrently(prepare_pixel_values, [data for _, _, data in misses])
+    for (i, image_hash, _), value in zip(misses, prepared):
+        if isinstance(value, Exception):
+            results[i] = batch_error(value)
+            continue
+        pending.append((i, image_hash))
+        pixel_values.append(value)
+
+    inference_time = 0.0
+    if pending:
+        embeddings, inference_time = embed_pixel_values(pixel_values)
+
+        if use_cache:
+            save_to_cache_batch({
+                image_hash: embedding for (_, image_hash), embedding in zip(pending, embeddings)
+            })
+
+        for (i, image_hash), embedding in zip(pending, embeddings):
+            results[i] = {
+                'success': True,
+                'embedding': embedding,
+                'dimension': len(embedding),
+                'cached': False,
+                'imageHash': image_hash
+            }
+
+    return {
+        'results': results,
+        'model': MODEL_NAME,
+        'inferenceTime': round(inference_time, 3)
+    }
+
+
 def lambda_handler(event, context):
     """
     Lambda handler for image embedding generation
@@ -224,21 +643,53 @@ def lambda_handler(event, context):
     {
         "imageUrl": "s3://bucket/path/to/image.jpg",  // S3 URL
         "imageBase64": "data:image/jpeg;base64,...",  // Base64 encoded image
+        "images": [{"imageUrl": "..."}, ...],         // Batch of images (instead of the above)
         "useCache": true,                             // Use DynamoDB cache (default: true)
         "operation": "generate"                       // Operation type
     }
+
+    Batch requests return data.results, one entry per image in input order.
     """
-    print(f"Event: {json.dumps(event, default=str)}")
+    if 'images' in event:
+        print(f"Event: batch of {len(event.get('images') or [])} image(s)")
+    else:
+        print(f"Event: {json.dumps(event, default=str)}")
 
     try:
-        # Initialize model (once per container)
-        initialize_model()
+        # Connect to the cache (the model is loaded on the first cache miss)
+        initialize_cache()
 
         # Parse input
         image_url = event.get('imageUrl')
         image_base64 = event.get('imageBase64')
+        images = event.get('images')
         use_cache = event.get('useCache', True)
 
+        if images is not None:
+            if not isinstance(images, list) or not images:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({
+                        'success': False,
+                        'error': {
+                            'code': 'INVALID_INPUT',
+                            'message': 'images must be a non-empty list'
+                        }
+                    })
+                }
+
+            return {
+                'statusCode': 200,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'success': True,
+                    'data': handle_batch(images, use_cache)
+                })
+            }
+
         if not image_url and not image_base64:
             return {
                 'statusCode': 400,
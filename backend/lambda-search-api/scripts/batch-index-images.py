@@ -17,7 +17,8 @@ import json
 import time
 import argparse
 import logging
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import Iterator, List, Dict, Optional
 from pathlib import Path
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -27,6 +28,11 @@ from botocore.exceptions import ClientError
 from opensearchpy import OpenSearch, RequestsHttpConnection, helpers
 from requests_aws4auth import AWS4Auth
 
+# Shared bulk partial-update writer (backend/scripts/bulk_update_writer.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
+from bulk_update_writer import BulkUpdateWriter
+from document_scanner import DocumentScanner
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -53,7 +59,8 @@ class BatchImageIndexer:
         aws_region: str = 'ap-northeast-1',
         concurrency: int = 10,
         batch_size: int = 100,
-        state_file: str = 'batch-progress.json'
+        state_file: str = 'batch-progress.json',
+        bulk_size: int = 200
     ):
         """
         Initialize batch indexer
@@ -66,6 +73,7 @@ class BatchImageIndexer:
             concurrency: Number of parallel Lambda invocations
             batch_size: Files per batch
             state_file: Progress state file path
+            bulk_size: Vector updates per OpenSearch _bulk request
         """
         self.opensearch_index = opensearch_index
         self.lambda_function_name = lambda_function_name
@@ -99,6 +107,16 @@ class BatchImageIndexer:
             retry_on_timeout=True
         )
 
+        # Vector updates are sent as _bulk partial updates; items rejected by
+        # OpenSearch are collected per batch via _on_update_result
+        self.update_writer = BulkUpdateWriter(
+            self.opensearch,
+            opensearch_index,
+            max_docs=bulk_size,
+            retry_on_conflict=3
+        )
+        self._failed_updates: List[str] = []
+
         # Statistics
         self.stats = {
             'total_files': 0,
@@ -115,55 +133,71 @@ class BatchImageIndexer:
         logger.info(f"  Lambda: {lambda_function_name}")
         logger.info(f"  Concurrency: {concurrency}, Batch Size: {batch_size}")
 
-    def get_images_without_vector(self, max_files: Optional[int] = None) -> List[Dict]:
+    def _without_vector_query(self) -> Dict:
+        """Image extensions AND no image_vector field"""
+        return {
+            "bool": {
+                "must": [
+                    {
+                        "terms": {
+                            "file_extension.keyword": list(self.IMAGE_EXTENSIONS)
+                        }
+                    }
+                ],
+                "must_not": [
+                    {
+                        "exists": {
+                            "field": "image_vector"
+                        }
+                    }
+                ]
+            }
+        }
+
+    def count_images_without_vector(self) -> int:
+        """Count image files without vectors"""
+        try:
+            response = self.opensearch.count(
+                index=self.opensearch_index,
+                body={"query": self._without_vector_query()}
+            )
+            return response['count']
+        except Exception as e:
+            logger.error(f"Failed to count files in OpenSearch: {e}")
+            return 0
+
+    def get_images_without_vector(self, max_files: Optional[int] = None) -> Iterator[Dict]:
         """
-        Query OpenSearch for image files without vectors
+        Stream image files without vectors (point in time + search_after)
+
+        Pages are fetched lazily, so there is no 10,000 document cap and
+        processing starts with the first page.
 
         Args:
             max_files: Maximum number of files to retrieve
 
-        Returns:
-            List of file information dictionaries
+        Yields:
+            File information dictionaries
         """
         logger.info("Fetching images without vectors from OpenSearch...")
 
-        try:
-            query = {
-                "query": {
-                    "bool": {
-                        "must": [
-                            {
-                                "terms": {
-                                    "file_extension.keyword": list(self.IMAGE_EXTENSIONS)
-                                }
-                            }
-                        ],
-                        "must_not": [
-                            {
-                                "exists": {
-                                    "field": "image_vector"
-                                }
-                            }
-                        ]
-                    }
-                },
-                "size": min(max_files or 10000, 10000),  # OpenSearch limit
-                "_source": [
-                    "file_name", "file_path", "file_key",
-                    "bucket", "s3_url", "file_extension"
-                ],
-                "sort": [{"indexed_at": "desc"}]
-            }
-
-            response = self.opensearch.search(
-                index=self.opensearch_index,
-                body=query
-            )
+        scanner = DocumentScanner(
+            self.opensearch,
+            self.opensearch_index,
+            query=self._without_vector_query(),
+            source=[
+                "file_name", "file_path", "file_key",
+                "bucket", "s3_url", "file_extension"
+            ],
+            sort=[{"indexed_at": "desc"}],
+            page_size=min(1000, max_files or 1000),
+            limit=max_files
+        )
 
-            files = []
-            for hit in response['hits']['hits']:
+        try:
+            for hit in scanner:
                 source = hit['_source']
-                files.append({
+                yield {
                     'doc_id': hit['_id'],
                     'file_name': source.get('file_name'),
                     'file_path': source.get('file_path'),
@@ -171,16 +205,11 @@ class BatchImageIndexer:
                     'file_key': source.get('file_key'),
                     'bucket': source.get('bucket'),
                     'extension': source.get('file_extension')
-                })
-
-            logger.info(f"Found {len(files)} images without vectors")
-            self.stats['total_files'] = len(files)
-
-            return files
-
+                }
         except Exception as e:
             logger.error(f"Failed to fetch files from OpenSearch: {e}")
-            return []
+
+        logger.info(f"Fetched {scanner.stats['documents']} images without vectors")
 
     def generate_embedding_via_lambda(
         self,
@@ -256,36 +285,34 @@ class BatchImageIndexer:
         embedding: List[float]
     ) -> bool:
         """
-        Update OpenSearch document with image vector
+        Queue an OpenSearch partial update with the image vector
 
         Args:
             doc_id: Document ID
             embedding: Embedding vector
 
         Returns:
-            True if successful
+            True if queued (bulk failures are collected by _on_update_result)
         """
-        try:
-            self.opensearch.update(
-                index=self.opensearch_index,
-                id=doc_id,
-                body={
-                    "doc": {
-                        "image_vector": embedding,
-                        "vector_dimension": len(embedding),
-                        "vector_updated_at": datetime.utcnow().isoformat(),
-                        "vector_model": "CLIP-ViT-B-32"
-                    }
-                },
-                refresh=False  # Batch refresh later
-            )
+        self.update_writer.add(
+            doc_id,
+            {
+                "image_vector": embedding,
+                "vector_dimension": len(embedding),
+                "vector_updated_at": datetime.utcnow().isoformat(),
+                "vector_model": "CLIP-ViT-B-32"
+            },
+            callback=lambda success, error: self._on_update_result(doc_id, success, error)
+        )
 
-            logger.debug(f"Updated document: {doc_id}")
-            return True
+        logger.debug(f"Queued update: {doc_id}")
+        return True
 
-        except Exception as e:
-            logger.error(f"Failed to update document {doc_id}: {e}")
-            return False
+    def _on_update_result(self, doc_id: str, success: bool, error: Optional[str]):
+        """Record documents whose bulk update failed"""
+        if not success:
+            logger.error(f"Failed to update document {doc_id}: {error}")
+            self._failed_updates.append(doc_id)
 
     def process_single_image(self, file_info: Dict) -> bool:
         """
@@ -371,6 +398,13 @@ class BatchImageIndexer:
                     )
                     batch_stats['failed'] += 1
 
+        # Send this batch's vector updates and move rejected items to failed
+        self.update_writer.flush()
+        failed_updates, self._failed_updates = self._failed_updates, []
+        batch_stats['succeeded'] -= len(failed_updates)
+        batch_stats['failed'] += len(failed_updates)
+        batch_stats['failed_ids'] = failed_updates
+
         return batch_stats
 
     def save_progress(self, processed_ids: List[str]):
@@ -465,35 +499,44 @@ class BatchImageIndexer:
         if resume:
             processed_ids = self.load_progress()
 
-        # Get images without vectors
-        files = self.get_images_without_vector(max_files)
+        # Count images without vectors (files themselves are fetched page by page)
+        total = self.count_images_without_vector()
+        if max_files:
+            total = min(total, max_files)
+        logger.info(f"Found {total} images without vectors")
+        self.stats['total_files'] = total
 
-        if not files:
+        if not total:
             logger.info("No files to process")
             return
 
-        # Filter out already processed files
+        files = self.get_images_without_vector(max_files)
+
+        # Filter out already processed files (updated documents are no longer counted)
         if resume and processed_ids:
-            files = [f for f in files if f['doc_id'] not in processed_ids]
-            logger.info(f"Remaining files after resume: {len(files)}")
+            processed_set = set(processed_ids)
+            files = (f for f in files if f['doc_id'] not in processed_set)
 
         if dry_run:
-            logger.info(f"DRY RUN: Would process {len(files)} files")
-            for i, file_info in enumerate(files[:10], 1):
+            logger.info(f"DRY RUN: Would process {total} files")
+            for i, file_info in enumerate(islice(files, 10), 1):
                 logger.info(
                     f"  {i}. {file_info['file_name']} "
                     f"(ID: {file_info['doc_id'][:8]}...)"
                 )
-            if len(files) > 10:
-                logger.info(f"  ... and {len(files) - 10} more files")
+            if total > 10:
+                logger.info(f"  ... and {total - 10} more files")
             return
 
         # Process in batches
-        total_batches = (len(files) + self.batch_size - 1) // self.batch_size
+        total_batches = (total + self.batch_size - 1) // self.batch_size
+        batch_num = 0
 
-        for batch_idx in range(0, len(files), self.batch_size):
-            batch = files[batch_idx:batch_idx + self.batch_size]
-            batch_num = (batch_idx // self.batch_size) + 1
+        while True:
+            batch = list(islice(files, self.batch_size))
+            if not batch:
+                break
+            batch_num += 1
 
             logger.info(f"Processing batch {batch_num}/{total_batches}")
 
@@ -505,20 +548,21 @@ class BatchImageIndexer:
             self.stats['succeeded'] += batch_stats['succeeded']
             self.stats['failed'] += batch_stats['failed']
 
-            # Add successful IDs to processed list
+            # Add IDs to processed list (documents whose update was rejected are retried on resume)
+            failed_ids = set(batch_stats['failed_ids'])
             for file_info in batch:
-                # Simplified: assume success if in batch_stats
-                processed_ids.append(file_info['doc_id'])
+                if file_info['doc_id'] not in failed_ids:
+                    processed_ids.append(file_info['doc_id'])
 
             # Save progress every batch
             self.save_progress(processed_ids)
             self.send_metrics()
 
             # Progress report
-            progress = (batch_idx + len(batch)) / len(files) * 100
+            progress = self.stats['processed'] / max(total, 1) * 100
             logger.info(
                 f"Progress: {progress:.1f}% "
-                f"({self.stats['processed']}/{len(files)} files)"
+                f"({self.stats['processed']}/{total} files)"
             )
 
         # Final refresh
@@ -626,6 +670,12 @@ Examples:
         default='batch-progress.json',
         help='Progress state file path'
     )
+    parser.add_argument(
+        '--bulk-size',
+        type=int,
+        default=200,
+        help='Vector updates per OpenSearch _bulk request (default: 200)'
+    )
 
     args = parser.parse_args()
 
@@ -646,7 +696,8 @@ Examples:
             aws_region=args.aws_region,
             concurrency=args.concurrency,
             batch_size=args.batch_size,
-            state_file=args.state_file
+            state_file=args.state_file,
+            bulk_size=args.bulk_size
         )
 
         # Run indexing
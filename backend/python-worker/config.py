@@ -30,6 +30,10 @@ class AWSConfig:
     sqs_wait_time_seconds: int = int(os.environ.get('SQS_WAIT_TIME', '20'))
     sqs_visibility_timeout: int = int(os.environ.get('SQS_VISIBILITY_TIMEOUT', '600'))  # Increased to 10 minutes
     sqs_max_messages: int = int(os.environ.get('SQS_MAX_MESSAGES', '10'))  # Optimized: batch 10 messages
+    sqs_heartbeat_interval: int = int(os.environ.get('SQS_HEARTBEAT_INTERVAL', '60'))  # Async consumer visibility extension check
+    sqs_max_processing_time: int = int(os.environ.get('SQS_MAX_PROCESSING_TIME', '3600'))  # Stop extending (assume hung) after this long
+    sqs_ack_max_delay: float = float(os.environ.get('SQS_ACK_MAX_DELAY', '0.5'))  # Max wait to fill a 10-message delete batch
+    sqs_ack_urgent_seconds: float = float(os.environ.get('SQS_ACK_URGENT_SECONDS', '30'))  # Delete at once when this close to visibility expiry
 
     # OpenSearch Configuration
     opensearch_endpoint: str = os.environ.get('OPENSEARCH_ENDPOINT', '')
@@ -39,6 +43,12 @@ class AWSConfig:
     opensearch_use_ssl: bool = os.environ.get('OPENSEARCH_USE_SSL', 'true').lower() == 'true'
     opensearch_verify_certs: bool = os.environ.get('OPENSEARCH_VERIFY_CERTS', 'true').lower() == 'true'
 
+    # OpenSearch Bulk Indexing (flush on doc count, payload size or max latency)
+    opensearch_bulk_enabled: bool = os.environ.get('OPENSEARCH_BULK_ENABLED', 'true').lower() == 'true'
+    opensearch_bulk_max_docs: int = int(os.environ.get('OPENSEARCH_BULK_MAX_DOCS', '100'))
+    opensearch_bulk_max_bytes: int = int(os.environ.get('OPENSEARCH_BULK_MAX_BYTES', str(5 * 1024 * 1024)))
+    opensearch_bulk_max_latency_seconds: float = float(os.environ.get('OPENSEARCH_BULK_MAX_LATENCY', '2.0'))
+
     # CloudWatch Logs
     cloudwatch_log_group: str = os.environ.get('CLOUDWATCH_LOG_GROUP', '/aws/ec2/file-processor')
     cloudwatch_log_stream: str = os.environ.get('CLOUDWATCH_LOG_STREAM', 'worker')
@@ -81,6 +91,73 @@ class ProcessingConfig:
     # t3.xlarge has 4 vCPUs, but file processing is I/O bound so we use 8 workers
     max_workers: int = int(os.environ.get('MAX_WORKERS', '8'))
 
+    # Streaming Pipeline Mode (receive → download → extract → enrich → index)
+    # Stages run continuously so a slow OCR job does not gate the whole SQS batch
+    pipeline_mode: bool = os.environ.get('PIPELINE_MODE', 'false').lower() == 'true'
+    pipeline_download_workers: int = int(os.environ.get('PIPELINE_DOWNLOAD_WORKERS', '4'))
+    pipeline_enrich_workers: int = int(os.environ.get('PIPELINE_ENRICH_WORKERS', '4'))
+    pipeline_index_workers: int = int(os.environ.get('PIPELINE_INDEX_WORKERS', '2'))
+    pipeline_queue_size: int = int(os.environ.get('PIPELINE_QUEUE_SIZE', '10'))
+    pipeline_max_in_flight: int = int(os.environ.get('PIPELINE_MAX_IN_FLIGHT', '20'))
+
+    # Async Queue Consumer (all modes: long polls, batched deletes and visibility
+    # heartbeats share one asyncio event loop and only receive while workers have room)
+    async_queue_pollers: int = int(os.environ.get('ASYNC_QUEUE_POLLERS', '2'))
+
+    # Extraction Backend ('thread' runs processors in worker threads,
+    # 'process' runs them in a persistent process pool to use all cores)
+    extraction_backend: str = os.environ.get('EXTRACTION_BACKEND', 'thread')
+    extraction_processes: int = int(os.environ.get('EXTRACTION_PROCESSES', '0'))  # 0 = CPU count
+    extraction_max_tasks_per_child: int = int(os.environ.get('EXTRACTION_MAX_TASKS_PER_CHILD', '200'))
+    extraction_max_child_memory_mb: int = int(os.environ.get('EXTRACTION_MAX_CHILD_MEMORY_MB', '1500'))
+
+    # Change Detection (HEAD + OpenSearch mget before download; unchanged
+    # objects are skipped, path-only changes become partial updates)
+    change_detection: bool = os.environ.get('CHANGE_DETECTION', 'false').lower() == 'true'
+    change_detection_head_workers: int = int(os.environ.get('CHANGE_DETECTION_HEAD_WORKERS', '10'))
+
+    # Batched Image Embedding (images are queued and sent to the embedding
+    # Lambda as multi-image payloads; flushed on batch size or max wait)
+    embedding_batch_enabled: bool = os.environ.get('EMBEDDING_BATCH_ENABLED', 'false').lower() == 'true'
+    embedding_batch_size: int = int(os.environ.get('EMBEDDING_BATCH_SIZE', '8'))
+    embedding_batch_max_wait_seconds: float = float(os.environ.get('EMBEDDING_BATCH_MAX_WAIT', '0.5'))
+
+    # Pooled S3 Uploads (thumbnails share one keep-alive connection pool;
+    # transient errors are retried with exponential backoff)
+    upload_max_workers: int = int(os.environ.get('UPLOAD_MAX_WORKERS', '8'))
+    upload_max_attempts: int = int(os.environ.get('UPLOAD_MAX_ATTEMPTS', '4'))
+
+    # Memory Admission Control (per-message memory is estimated from S3 size and
+    # file type; extraction only starts while the projected total fits the budget.
+    # Messages that do not fit within the wait are returned to SQS with a new
+    # visibility timeout instead of risking an OOM kill. Each deferral counts as
+    # a receive towards the queue's maxReceiveCount, so messages one receive
+    # short of the redrive limit are admitted over budget instead of deferred.)
+    admission_control: bool = os.environ.get('ADMISSION_CONTROL', 'false').lower() == 'true'
+    memory_budget_mb: int = int(os.environ.get('MEMORY_BUDGET_MB', '0'))  # 0 = 70% of system memory
+    admission_min_free_mb: int = int(os.environ.get('ADMISSION_MIN_FREE_MB', '300'))
+    admission_wait_seconds: float = float(os.environ.get('ADMISSION_WAIT_SECONDS', '30'))
+    admission_defer_seconds: int = int(os.environ.get('ADMISSION_DEFER_SECONDS', '120'))
+
+    # Adaptive Concurrency (extract worker count is hill-climbed on measured
+    # documents/second between the min/max ceilings; backs off on CPU/memory
+    # pressure and does not grow past the SQS backlog. MAX_WORKERS is the start value;
+    # poll mode caps the max at SQS_MAX_MESSAGES, and EXTRACTION_BACKEND=process
+    # resizes the extraction processes along with the worker threads.)
+    adaptive_concurrency: bool = os.environ.get('ADAPTIVE_CONCURRENCY', 'false').lower() == 'true'
+    concurrency_min_workers: int = int(os.environ.get('CONCURRENCY_MIN_WORKERS', '2'))
+    concurrency_max_workers: int = int(os.environ.get('CONCURRENCY_MAX_WORKERS', '16'))
+    concurrency_interval_seconds: float = float(os.environ.get('CONCURRENCY_INTERVAL_SECONDS', '30'))
+    concurrency_cpu_ceiling: float = float(os.environ.get('CONCURRENCY_CPU_CEILING', '90'))
+    concurrency_memory_ceiling: float = float(os.environ.get('CONCURRENCY_MEMORY_CEILING', '85'))
+
+    # LibreOffice Pool (Office thumbnails are converted to PDF by long-lived headless
+    # soffice instances over UNO instead of starting soffice per document. Needs pyuno;
+    # without it, and inside process-backend extraction children, one soffice runs per document)
+    office_pool_size: int = int(os.environ.get('OFFICE_POOL_SIZE', '2'))
+    office_pool_max_conversions: int = int(os.environ.get('OFFICE_POOL_MAX_CONVERSIONS', '200'))
+    office_conversion_timeout: int = int(os.environ.get('OFFICE_CONVERSION_TIMEOUT', '60'))
+
     # Retry Configuration
     max_retries: int = int(os.environ.get('MAX_RETRIES', '3'))
     retry_delay_seconds: int = int(os.environ.get('RETRY_DELAY', '5'))
@@ -112,6 +189,11 @@ class OCRConfig:
     # Page Limits
     max_pdf_pages: int = int(os.environ.get('MAX_PDF_PAGES', '1000'))
 
+    # Page-Parallel PDF OCR (render/OCR pages concurrently, skip pages with native text)
+    page_parallel: bool = os.environ.get('OCR_PAGE_PARALLEL', 'false').lower() == 'true'
+    page_workers: int = int(os.environ.get('OCR_PAGE_WORKERS', '0'))  # 0 = CPU count
+    min_native_chars_per_page: int = int(os.environ.get('OCR_MIN_NATIVE_CHARS', '50'))
+
 
 @dataclass
 class FileTypeConfig:
@@ -246,6 +328,29 @@ class DocuWorksConfig:
         return bool(self.sdk_path) and Path(self.sdk_path).exists()
 
 
+@dataclass
+class ResultCacheConfig:
+    """Content-addressed processing result cache configuration"""
+
+    # Enable cache lookups before download/extraction
+    enabled: bool = os.environ.get('RESULT_CACHE_ENABLED', 'false').lower() == 'true'
+
+    # Extra key component to invalidate all entries after a processing change
+    # that does not bump PROCESSOR_VERSION (e.g. tesseract or OCR language upgrade)
+    version: str = os.environ.get('RESULT_CACHE_VERSION', '')
+
+    # Local on-disk tier (LRU by access time)
+    local_dir: str = os.environ.get('RESULT_CACHE_DIR', '/tmp/file-processor-cache')
+    local_max_mb: int = int(os.environ.get('RESULT_CACHE_MAX_MB', '2048'))
+
+    # Entry lifetime (0 = no expiry)
+    ttl_days: int = int(os.environ.get('RESULT_CACHE_TTL_DAYS', '30'))
+
+    # Shared tier: '' (none), 'dynamodb', or 'memory' (local stand-in)
+    shared_backend: str = os.environ.get('RESULT_CACHE_SHARED_BACKEND', '')
+    dynamodb_table: str = os.environ.get('RESULT_CACHE_TABLE', 'cis-file-processing-result-cache')
+
+
 @dataclass
 class LoggingConfig:
     """Logging configuration"""
@@ -291,6 +396,7 @@ class Config:
         self.file_types = FileTypeConfig()
         self.thumbnail = ThumbnailConfig()
         self.docuworks = DocuWorksConfig()
+        self.cache = ResultCacheConfig()
         self.logging = LoggingConfig()
 
     def validate(self) -> bool:
@@ -319,6 +425,14 @@ class Config:
         logger.info(f"OCR Language: {self.ocr.default_language}")
         logger.info(f"PDF DPI: {self.ocr.pdf_dpi}")
         logger.info(f"Max Workers: {self.processing.max_workers}")
+        logger.info(f"Bulk Indexing: {'Enabled' if self.aws.opensearch_bulk_enabled else 'Disabled'}")
+        logger.info(f"Result Cache: {'Enabled' if self.cache.enabled else 'Disabled'}")
+        logger.info(f"Extraction Backend: {self.processing.extraction_backend}")
+        logger.info(f"Pipeline Mode: {'Enabled' if self.processing.pipeline_mode else 'Disabled'}")
+        logger.info(f"Change Detection: {'Enabled' if self.processing.change_detection else 'Disabled'}")
+        logger.info(f"Embedding Batching: {'Enabled' if self.processing.embedding_batch_enabled else 'Disabled'}")
+        logger.info(f"Admission Control: {'Enabled' if self.processing.admission_control else 'Disabled'}")
+        logger.info(f"Adaptive Concurrency: {'Enabled' if self.processing.adaptive_concurrency else 'Disabled'}")
         logger.info(f"DocuWorks SDK: {'Configured' if self.docuworks.is_configured() else 'Not configured'}")
         logger.info(f"Log Level: {self.logging.log_level}")
         logger.info("============================")
@@ -190,6 +190,10 @@ class OpenSearchClient:
                         # Thumbnail
                         "thumbnail_url": {"type": "keyword"},
 
+                        # Source object identity (change detection)
+                        "source_etag": {"type": "keyword"},
+                        "source_last_modified": {"type": "date"},
+
                         # Status
                         "success": {"type": "boolean"},
                         "error_message": {"type": "text"},
@@ -313,6 +317,155 @@ class OpenSearchClient:
             logger.error(f"Bulk indexing failed: {e}")
             return {'success': 0, 'failed': len(documents)}
 
+    def bulk_index_items(
+        self,
+        documents: List[Dict[str, Any]],
+        document_ids: Optional[List[str]] = None,
+        index_name: Optional[str] = None
+    ) -> List[Optional[str]]:
+        """
+        Bulk index documents and report the outcome of each item
+
+        Args:
+            documents: List of documents to index
+            document_ids: Document IDs aligned with documents (defaults to file_key)
+            index_name: Index name (defaults to config)
+
+        Returns:
+            List aligned with documents: None for success, error description for failure
+        """
+        if not documents:
+            return []
+
+        if not self.is_connected():
+            logger.error("OpenSearch client not connected")
+            return ["OpenSearch not connected"] * len(documents)
+
+        index_name = index_name or self.config.aws.opensearch_index
+
+        try:
+            bulk_body = []
+            indexed_at = datetime.utcnow().isoformat()
+            for i, doc in enumerate(documents):
+                doc['indexed_at'] = indexed_at
+                document_id = (document_ids[i] if document_ids else None) or doc.get('file_key', '')
+                bulk_body.append({'index': {'_index': index_name, '_id': document_id}})
+                bulk_body.append(doc)
+
+            response = self.client.bulk(body=bulk_body, refresh=False)
+
+            if not response.get('errors'):
+                return [None] * len(documents)
+
+            # Bulk responses preserve request order
+            results: List[Optional[str]] = []
+            for item in response.get('items', []):
+                action = item.get('index', {})
+                error = action.get('error')
+                if error:
+                    if isinstance(error, dict):
+                        error = f"{error.get('type', 'error')}: {error.get('reason', '')}"
+                    results.append(f"[{action.get('status', '?')}] {error}")
+                else:
+                    results.append(None)
+
+            # Defensive: a short response means the missing items were not acknowledged
+            results.extend(["Missing bulk response item"] * (len(documents) - len(results)))
+            return results
+
+        except Exception as e:
+            logger.error(f"Bulk indexing failed: {e}")
+            return [f"Bulk request failed: {e}"] * len(documents)
+
+    def get_documents(
+        self,
+        document_ids: List[str],
+        source_fields: Optional[List[str]] = None,
+        index_name: Optional[str] = None
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Fetch several documents in a single mget request
+
+        Args:
+            document_ids: Document IDs to fetch
+            source_fields: _source fields to return (all fields if None)
+            index_name: Index name (defaults to config)
+
+        Returns:
+            Mapping of document ID to _source for documents that exist,
+            or None if the request failed
+        """
+        if not document_ids:
+            return {}
+
+        if not self.is_connected():
+            logger.error("OpenSearch client not connected")
+            return None
+
+        index_name = index_name or self.config.aws.opensearch_index
+
+        try:
+            params = {}
+            if source_fields:
+                params['_source_includes'] = ','.join(source_fields)
+
+            response = self.client.mget(
+                index=index_name,
+                body={'ids': list(document_ids)},
+                params=params
+            )
+
+            return {
+                doc['_id']: doc.get('_source', {})
+                for doc in response.get('docs', [])
+                if doc.get('found')
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to fetch documents: {e}")
+            return None
+
+    def update_document(
+        self,
+        document_id: str,
+        fields: Dict[str, Any],
+        index_name: Optional[str] = None
+    ) -> bool:
+        """
+        Partially update an existing document
+
+        Args:
+            document_id: Document ID to update
+            fields: Fields to set
+            index_name: Index name (defaults to config)
+
+        Returns:
+            True if successful
+        """
+        if not self.is_connected():
+            logger.error("OpenSearch client not connected")
+            return False
+
+        index_name = index_name or self.config.aws.opensearch_index
+
+        try:
+            fields = dict(fields)
+            fields['indexed_at'] = datetime.utcnow().isoformat()
+
+            self.client.update(
+                index=index_name,
+                id=document_id,
+                body={'doc': fields},
+                refresh=False
+            )
+
+            logger.info(f"Updated document: {document_id} ({', '.join(sorted(fields))})")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to update document: {e}")
+            return False
+
     def search(
         self,
         query: str,
@@ -6,6 +6,7 @@ Contains specialized processors for different file types
 from .base_processor import BaseProcessor, ProcessingResult
 from .image_processor import ImageProcessor
 from .pdf_processor import PDFProcessor
+from .pdf_page_ocr import PageParallelOCR
 from .office_processor import OfficeProcessor
 from .docuworks_processor import DocuWorksProcessor
 from .metadata_processor import MetadataOnlyProcessor
@@ -16,6 +17,7 @@ __all__ = [
     'ProcessingResult',
     'ImageProcessor',
     'PDFProcessor',
+    'PageParallelOCR',
     'OfficeProcessor',
     'DocuWorksProcessor',
     'MetadataOnlyProcessor',
@@ -12,6 +12,9 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# 抽出結果の形式・内容が変わる変更をしたら上げる（結果キャッシュのキーに含まれる）
+PROCESSOR_VERSION = "1.0.0"
+
 
 @dataclass
 class ProcessingResult:
@@ -44,7 +47,7 @@ class ProcessingResult:
     # Processing Information
     processing_time_seconds: float = 0.0
     processor_name: str = ""
-    processor_version: str = "1.0.0"
+    processor_version: str = PROCESSOR_VERSION
     processed_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
 
     # OCR Information (if applicable)
@@ -108,33 +108,8 @@ class ImageEmbeddingGenerator:
                 Payload=json.dumps(payload)
             )
 
-            # Check for function error
-            if response.get('FunctionError'):
-                logger.error(f"Lambda function error: {response.get('FunctionError')}")
-                return None
-
-            # Parse response
-            result = json.loads(response['Payload'].read())
-
-            # Handle both direct Lambda response and API Gateway response formats
-            if 'statusCode' in result:
-                # API Gateway format: {statusCode: 200, body: "..."}
-                if result.get('statusCode') != 200:
-                    error_body = result.get('body', '{}')
-                    if isinstance(error_body, str):
-                        error_body = json.loads(error_body)
-                    logger.error(f"Lambda returned error: {error_body}")
-                    return None
-
-                body = result.get('body', '{}')
-                if isinstance(body, str):
-                    body = json.loads(body)
-            else:
-                # Direct Lambda response format: {success: true, data: {...}}
-                body = result
-
-            if not body.get('success'):
-                logger.error(f"Embedding generation failed: {body.get('error')}")
+            body = self._parse_invoke_response(response)
+            if body is None:
                 return None
 
             data = body.get('data', {})
@@ -167,6 +142,128 @@ class ImageEmbeddingGenerator:
             logger.error(f"Unexpected error generating embedding: {e}", exc_info=True)
             return None
 
+    def generate_embeddings_batch(
+        self,
+        s3_urls: List[str],
+        use_cache: bool = True
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Generate embeddings for several images with a single Lambda invocation
+
+        The Lambda receives an 'images' list and runs CLIP on the stacked batch.
+
+        Args:
+            s3_urls: S3 URLs of the images (s3://bucket/key)
+            use_cache: Whether to use DynamoDB cache
+
+        Returns:
+            One result per URL, in the same order (same shape as
+            generate_embedding), with None for images that failed
+        """
+        if not s3_urls:
+            return []
+
+        if not self.enabled:
+            logger.debug("Embedding generation is disabled")
+            return [None] * len(s3_urls)
+
+        try:
+            payload = {
+                'images': [{'imageUrl': url} for url in s3_urls],
+                'useCache': use_cache,
+                'operation': 'generate'
+            }
+
+            logger.debug(f"Invoking Lambda for {len(s3_urls)} embeddings")
+
+            response = self.lambda_client.invoke(
+                FunctionName=self.lambda_function_name,
+                InvocationType='RequestResponse',
+                Payload=json.dumps(payload)
+            )
+
+            body = self._parse_invoke_response(response)
+            if body is None:
+                return [None] * len(s3_urls)
+
+            data = body.get('data', {})
+            items = data.get('results') or []
+            if len(items) != len(s3_urls):
+                logger.error(
+                    f"Lambda returned {len(items)} embeddings for {len(s3_urls)} images"
+                )
+                return [None] * len(s3_urls)
+
+            results: List[Optional[Dict[str, Any]]] = []
+            for url, item in zip(s3_urls, items):
+                if not item.get('success') or not item.get('embedding'):
+                    logger.warning(f"Embedding generation failed for {url}: {item.get('error')}")
+                    results.append(None)
+                    continue
+                results.append({
+                    'embedding': item['embedding'],
+                    'dimension': item.get('dimension', len(item['embedding'])),
+                    'cached': item.get('cached', False),
+                    'inference_time': data.get('inferenceTime', 0)
+                })
+
+            logger.info(
+                f"Generated {sum(1 for r in results if r)}/{len(s3_urls)} embeddings "
+                f"in one invocation (inference={data.get('inferenceTime', 0)}s)"
+            )
+            return results
+
+        except ClientError as e:
+            logger.error(f"Lambda invocation failed: {e}")
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse Lambda response: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error generating embeddings: {e}", exc_info=True)
+
+        return [None] * len(s3_urls)
+
+    @staticmethod
+    def _parse_invoke_response(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Parse a Lambda invoke response into the handler's body
+
+        Args:
+            response: boto3 Lambda invoke response
+
+        Returns:
+            Body dictionary with 'success' true, or None on error
+        """
+        # Check for function error
+        if response.get('FunctionError'):
+            logger.error(f"Lambda function error: {response.get('FunctionError')}")
+            return None
+
+        # Parse response
+        result = json.loads(response['Payload'].read())
+
+        # Handle both direct Lambda response and API Gateway response formats
+        if 'statusCode' in result:
+            # API Gateway format: {statusCode: 200, body: "..."}
+            if result.get('statusCode') != 200:
+                error_body = result.get('body', '{}')
+                if isinstance(error_body, str):
+                    error_body = json.loads(error_body)
+                logger.error(f"Lambda returned error: {error_body}")
+                return None
+
+            body = result.get('body', '{}')
+            if isinstance(body, str):
+                body = json.loads(body)
+        else:
+            # Direct Lambda response format: {success: true, data: {...}}
+            body = result
+
+        if not body.get('success'):
+            logger.error(f"Embedding generation failed: {body.get('error')}")
+            return None
+
+        return body
+
     def generate_embedding_safe(
         self,
         s3_url: str,
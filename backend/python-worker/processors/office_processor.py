@@ -4,6 +4,9 @@ Handles Microsoft Office documents (Word, Excel, PowerPoint)
 """
 
 import io
+import os
+import shutil
+import subprocess
 import time
 from pathlib import Path
 from typing import Optional
@@ -13,6 +16,7 @@ from pptx import Presentation
 from openpyxl import load_workbook
 from PIL import Image
 
+from services.office_pool import OfficePoolUnavailable, get_shared_pool
 from .base_processor import BaseProcessor, ProcessingResult
 
 
@@ -22,6 +26,19 @@ class OfficeProcessor(BaseProcessor):
     Supports: DOC, DOCX, XLS, XLSX, PPT, PPTX
     """
 
+    def __init__(self, config):
+        """
+        Initialize processor
+
+        Args:
+            config: Configuration object
+        """
+        super().__init__(config)
+        # Resolved once instead of running `which libreoffice` for every document
+        self._libreoffice_path = shutil.which('libreoffice') or shutil.which('soffice')
+        self._office_pool = None
+        self._office_pool_resolved = False
+
     def can_process(self, file_path: str) -> bool:
         """Check if this processor can handle the file"""
         ext = Path(file_path).suffix.lower()
@@ -322,6 +339,65 @@ class OfficeProcessor(BaseProcessor):
             self.logger.warning(f"Thumbnail generation failed for {file_ext}: {e}")
             return None
 
+    def _convert_to_pdf(self, file_path: str, output_dir: str) -> Optional[str]:
+        """
+        Convert an Office document to PDF with LibreOffice
+
+        Uses the shared pool of long-lived soffice instances when pyuno is
+        installed, otherwise starts a headless soffice for this document.
+
+        Args:
+            file_path: Path to Office document
+            output_dir: Directory for the PDF
+
+        Returns:
+            PDF path or None
+        """
+        timeout = self.config.processing.office_conversion_timeout
+
+        if not self._office_pool_resolved:
+            self._office_pool = get_shared_pool(
+                self._libreoffice_path,
+                self.config.processing.office_pool_size,
+                max_conversions=self.config.processing.office_pool_max_conversions
+            )
+            self._office_pool_resolved = True
+
+        if self._office_pool is not None:
+            try:
+                return self._office_pool.convert(file_path, output_dir, timeout)
+            except OfficePoolUnavailable as e:
+                self.logger.warning(f"LibreOffice pool unavailable ({e}), converting with a new process")
+
+        # Convert to PDF using LibreOffice headless
+        cmd = [
+            self._libreoffice_path,
+            '--headless',
+            '--convert-to', 'pdf',
+            '--outdir', output_dir,
+            file_path
+        ]
+
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+
+        if result.returncode != 0:
+            self.logger.warning(f"LibreOffice conversion failed: {result.stderr}")
+            return None
+
+        # Find the generated PDF
+        pdf_path = os.path.join(output_dir, f"{Path(file_path).stem}.pdf")
+
+        if not os.path.exists(pdf_path):
+            self.logger.warning("PDF output not found after LibreOffice conversion")
+            return None
+
+        return pdf_path
+
     def _generate_pptx_thumbnail(self, file_path: str) -> Optional[bytes]:
         """
         Generate thumbnail from PowerPoint presentation
@@ -386,7 +462,7 @@ class OfficeProcessor(BaseProcessor):
     def _generate_office_thumbnail_via_libreoffice(self, file_path: str) -> Optional[bytes]:
         """
         Generate thumbnail using LibreOffice headless conversion
-        Converts first page to PDF, then to image
+        Converts to PDF (on a pooled soffice instance when available), then first page to image
 
         Args:
             file_path: Path to Office document
@@ -394,50 +470,18 @@ class OfficeProcessor(BaseProcessor):
         Returns:
             Thumbnail as bytes or None
         """
-        import subprocess
         import tempfile
-        import os
 
         try:
             # Check if LibreOffice is available
-            result = subprocess.run(
-                ['which', 'libreoffice'],
-                capture_output=True,
-                text=True
-            )
-
-            if result.returncode != 0:
+            if self._libreoffice_path is None:
                 self.logger.debug("LibreOffice not available for thumbnail generation")
                 return None
 
             # Create temp directory for conversion
             with tempfile.TemporaryDirectory() as temp_dir:
-                # Convert to PDF using LibreOffice headless
-                cmd = [
-                    'libreoffice',
-                    '--headless',
-                    '--convert-to', 'pdf',
-                    '--outdir', temp_dir,
-                    file_path
-                ]
-
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=60  # 60 second timeout
-                )
-
-                if result.returncode != 0:
-                    self.logger.warning(f"LibreOffice conversion failed: {result.stderr}")
-                    return None
-
-                # Find the generated PDF
-                base_name = Path(file_path).stem
-                pdf_path = os.path.join(temp_dir, f"{base_name}.pdf")
-
-                if not os.path.exists(pdf_path):
-                    self.logger.warning("PDF output not found after LibreOffice conversion")
+                pdf_path = self._convert_to_pdf(file_path, temp_dir)
+                if pdf_path is None:
                     return None
 
                 # Convert first page of PDF to image
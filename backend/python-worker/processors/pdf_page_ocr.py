@@ -0,0 +1,287 @@
+"""
+Page-Parallel PDF OCR Module
+Renders and OCRs PDF pages concurrently, skipping pages with native text
+"""
+
+import os
+import shlex
+import subprocess
+import tempfile
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Tuple
+
+import pdfplumber
+from pdf2image import convert_from_path
+import pytesseract
+
+
+class PageParallelOCR:
+    """
+    Page-sharded OCR for PDFs
+
+    Each page is rasterized (poppler) and recognized (tesseract) independently.
+    Both are external processes, so a thread pool is enough to keep one
+    render/OCR process pair busy per worker without holding the GIL.
+    Pages whose native text layer already has enough characters are not OCR'd,
+    and results are always assembled in page order. Every poppler/tesseract
+    call is given the time left until the overall OCR deadline, so no page
+    process outlives the document's OCR timeout.
+    """
+
+    TESSERACT_CONFIG = '--oem 3 --psm 3'
+
+    def __init__(self, config, max_workers: Optional[int] = None):
+        """
+        Initialize page-parallel OCR
+
+        Args:
+            config: Configuration object
+            max_workers: Concurrent pages (defaults to config.ocr.page_workers or CPU count)
+        """
+        self.config = config
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.max_workers = max_workers or config.ocr.page_workers or os.cpu_count() or 1
+        self.min_native_chars = config.ocr.min_native_chars_per_page
+
+        # One tesseract per page already saturates the cores; stop each
+        # tesseract from spawning its own OpenMP thread pool on top of that.
+        # The limit goes into the tesseract environment only (an explicit
+        # OMP_THREAD_LIMIT still wins), never into this process's environment.
+        self._tesseract_env = None
+        if self.max_workers > 1:
+            self._tesseract_env = {'OMP_THREAD_LIMIT': '1', **os.environ}
+
+    def extract_native_pages(self, file_path: str) -> List[str]:
+        """
+        Extract the native text layer page by page
+
+        Args:
+            file_path: Path to PDF file
+
+        Returns:
+            List of page texts (empty list if the PDF cannot be read)
+        """
+        try:
+            with pdfplumber.open(file_path) as pdf:
+                pages = []
+                for page in pdf.pages:
+                    try:
+                        pages.append(page.extract_text() or '')
+                    except Exception as e:
+                        self.logger.debug(f"Native extraction failed on a page: {e}")
+                        pages.append('')
+                    finally:
+                        # Release cached layout objects for large documents
+                        page.flush_cache()
+                return pages
+        except Exception as e:
+            self.logger.warning(f"Native per-page extraction failed: {e}")
+            return []
+
+    def pages_needing_ocr(self, native_pages: List[str], page_count: int) -> List[int]:
+        """
+        Determine which pages require OCR
+
+        Args:
+            native_pages: Native text per page
+            page_count: Total number of pages
+
+        Returns:
+            1-based page numbers to OCR
+        """
+        pages = []
+        for page_number in range(1, page_count + 1):
+            native = native_pages[page_number - 1] if page_number <= len(native_pages) else ''
+            if len(native.strip()) < self.min_native_chars:
+                pages.append(page_number)
+        return pages
+
+    def extract(
+        self,
+        file_path: str,
+        native_pages: Optional[List[str]] = None,
+        page_count: Optional[int] = None
+    ) -> Tuple[str, Dict[str, float]]:
+        """
+        Extract text, OCR'ing only pages without enough native text
+
+        Args:
+            file_path: Path to PDF file
+            native_pages: Pre-extracted native text per page (extracted if None)
+            page_count: Total page count (defaults to len(native_pages))
+
+        Returns:
+            (text, stats) where text is assembled in page order
+        """
+        start_time = time.time()
+
+        if native_pages is None:
+            native_pages = self.extract_native_pages(file_path)
+
+        page_count = page_count or len(native_pages)
+        max_pages = min(page_count, self.config.ocr.max_pdf_pages)
+        if page_count > max_pages:
+            self.logger.warning(f"Limiting OCR to first {max_pages} of {page_count} pages")
+
+        ocr_pages = self.pages_needing_ocr(native_pages, max_pages)
+        ocr_texts = self._ocr_pages(file_path, ocr_pages) if ocr_pages else {}
+
+        text_parts = []
+        for page_number in range(1, max_pages + 1):
+            native = native_pages[page_number - 1] if page_number <= len(native_pages) else ''
+            page_text = ocr_texts.get(page_number) or native
+            if page_text.strip():
+                text_parts.append(page_text)
+
+        text = '\n\n'.join(text_parts)
+
+        stats = {
+            'pages': max_pages,
+            'ocr_pages': len(ocr_pages),
+            'ocr_pages_completed': len(ocr_texts),
+            'native_pages': max_pages - len(ocr_pages),
+            'elapsed_seconds': time.time() - start_time,
+        }
+
+        self.logger.info(
+            f"Page-parallel extraction: {stats['native_pages']} native page(s), "
+            f"{stats['ocr_pages_completed']}/{stats['ocr_pages']} OCR page(s), "
+            f"{len(text)} chars in {stats['elapsed_seconds']:.2f}s"
+        )
+
+        return text, stats
+
+    def _ocr_pages(self, file_path: str, page_numbers: List[int]) -> Dict[int, str]:
+        """
+        OCR pages concurrently within the overall OCR timeout
+
+        Args:
+            file_path: Path to PDF file
+            page_numbers: 1-based page numbers
+
+        Returns:
+            Mapping of page number to OCR text (pages that failed or ran out of time are omitted)
+        """
+        deadline = time.time() + self.config.processing.ocr_timeout
+        results: Dict[int, str] = {}
+        workers = min(self.max_workers, len(page_numbers))
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pdf-ocr')
+        try:
+            pending = {
+                executor.submit(self._ocr_page, file_path, page_number, deadline): page_number
+                for page_number in page_numbers
+            }
+
+            while pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self.logger.warning(
+                        f"OCR timeout ({self.config.processing.ocr_timeout}s) reached; "
+                        f"{len(pending)} page(s) not recognized"
+                    )
+                    break
+
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_number = pending.pop(future)
+                    try:
+                        results[page_number] = future.result()
+                    except Exception as e:
+                        self.logger.warning(f"Error OCR'ing page {page_number}: {e}")
+
+            for future in pending:
+                future.cancel()
+        finally:
+            # Pages still running stop on their own tesseract/poppler timeout at the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
+
+    @staticmethod
+    def _remaining(deadline: float) -> int:
+        """
+        Seconds left until the OCR deadline, as a subprocess timeout
+
+        Raises:
+            TimeoutError: If the deadline has already passed
+        """
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise TimeoutError("OCR deadline reached before the page started")
+        # 0 would disable the timeout in pytesseract/pdf2image
+        return max(1, int(remaining + 0.5))
+
+    def _ocr_page(self, file_path: str, page_number: int, deadline: float) -> str:
+        """
+        Render and OCR a single page
+
+        Args:
+            file_path: Path to PDF file
+            page_number: 1-based page number
+            deadline: Overall OCR deadline (time.time() based); bounds each subprocess
+
+        Returns:
+            Recognized text
+        """
+        images = convert_from_path(
+            file_path,
+            dpi=self.config.ocr.pdf_dpi,
+            first_page=page_number,
+            last_page=page_number,
+            thread_count=1,
+            timeout=self._remaining(deadline)
+        )
+
+        if not images:
+            return ''
+
+        image = images[0]
+        try:
+            text = self._run_tesseract(image, timeout=self._remaining(deadline))
+        finally:
+            image.close()
+
+        return text.strip()
+
+    def _run_tesseract(self, image, timeout: int) -> str:
+        """
+        Recognize one page image with the tesseract CLI
+
+        tesseract is run directly rather than through pytesseract.image_to_string
+        so that it can be given its own environment.
+
+        Args:
+            image: Rendered page (PIL image)
+            timeout: Seconds before tesseract is killed
+
+        Returns:
+            Recognized text
+
+        Raises:
+            RuntimeError: If tesseract exits with an error
+            subprocess.TimeoutExpired: If tesseract runs past the timeout
+        """
+        with tempfile.TemporaryDirectory(prefix='pdf-ocr-') as tmp_dir:
+            # Uncompressed and lossless, so saving costs no encode time
+            input_path = os.path.join(tmp_dir, 'page.ppm')
+            image.save(input_path)
+
+            result = subprocess.run(
+                [
+                    pytesseract.pytesseract.tesseract_cmd, input_path, 'stdout',
+                    '-l', self.config.ocr.default_language,
+                    *shlex.split(self.TESSERACT_CONFIG)
+                ],
+                capture_output=True,
+                timeout=timeout,
+                env=self._tesseract_env
+            )
+
+        if result.returncode != 0:
+            error = result.stderr.decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"tesseract exited with {result.returncode}: {error}")
+
+        return result.stdout.decode('utf-8', errors='replace')
@@ -15,6 +15,7 @@ from pdf2image import convert_from_path
 import pytesseract
 
 from .base_processor import BaseProcessor, ProcessingResult
+from .pdf_page_ocr import PageParallelOCR
 
 
 class PDFProcessor(BaseProcessor):
@@ -64,13 +65,20 @@ class PDFProcessor(BaseProcessor):
                     f"PDF has {page_count} pages (max: {self.config.ocr.max_pdf_pages})"
                 )
 
-            # Try text extraction first (faster)
-            extracted_text = self._extract_text_native(file_path)
-
-            # If no text found, use OCR
-            if not extracted_text.strip():
-                self.logger.info("No native text found, using OCR fallback")
-                extracted_text = self._extract_text_ocr(file_path)
+            if self.config.ocr.page_parallel:
+                # Per-page native text; OCR only the pages that lack it, concurrently
+                extracted_text, _ = PageParallelOCR(self.config).extract(
+                    file_path,
+                    page_count=page_count
+                )
+            else:
+                # Try text extraction first (faster)
+                extracted_text = self._extract_text_native(file_path)
+
+                # If no text found, use OCR
+                if not extracted_text.strip():
+                    self.logger.info("No native text found, using OCR fallback")
+                    extracted_text = self._extract_text_ocr(file_path)
 
             # Generate thumbnail from first page
             thumbnail_data = self._generate_thumbnail(file_path)
@@ -18,6 +18,7 @@ from pdf2image import convert_from_path
 import pytesseract
 
 from .base_processor import BaseProcessor, ProcessingResult
+from .pdf_page_ocr import PageParallelOCR
 
 
 logger = logging.getLogger(__name__)
@@ -74,7 +75,13 @@ class PDFProcessorOptimized(BaseProcessor):
             self.logger.info(f"Processing PDF: {page_count} pages, {file_size_mb:.1f}MB")
 
             # Choose processing strategy based on size
-            if file_size_mb > 50 or page_count > 100:
+            if self.config.ocr.page_parallel:
+                # Per-page native text; OCR only the pages that lack it, concurrently
+                extracted_text, _ = PageParallelOCR(self.config).extract(
+                    file_path,
+                    page_count=page_count
+                )
+            elif file_size_mb > 50 or page_count > 100:
                 # Large PDF - use streaming approach
                 extracted_text = self._extract_text_streaming(file_path, page_count)
             else:
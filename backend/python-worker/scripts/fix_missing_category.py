@@ -28,16 +28,25 @@ Requirements:
 
 import argparse
 import logging
-import re
 import sys
 import time
 from datetime import datetime
+from itertools import islice
+from pathlib import Path
 from typing import Dict, Any, Tuple
 
 import boto3
 from opensearchpy import OpenSearch, RequestsHttpConnection, helpers
 from requests_aws4auth import AWS4Auth
 
+# Shared point-in-time scanner (backend/scripts/document_scanner.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
+from document_scanner import DocumentScanner
+
+# Shared path parser (python-worker/services/path_metadata.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from services.path_metadata import infer_category_from_server, parse_path_metadata_bulk
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -46,75 +55,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# File path pattern for extracting category/server information
-FILE_PATH_PATTERN = re.compile(
-    r'(?:documents|processed|docuworks-converted)/(road|structure)/(ts-server\d+)/([^/]+)/'
-)
-
-# Simple fallback pattern
-SIMPLE_CATEGORY_PATTERN = re.compile(r'/(road|structure)/')
-
-# Category display names
-CATEGORY_DISPLAY_MAP = {
-    'road': '道路',
-    'structure': '構造'
-}
-
-# NAS server to category mapping
-# ts-server3, ts-server5 -> road (道路)
-# ts-server6, ts-server7 -> structure (構造)
-NAS_SERVER_CATEGORY_MAP = {
-    'ts-server3': 'road',
-    'ts-server5': 'road',
-    'ts-server6': 'structure',
-    'ts-server7': 'structure'
-}
-
-
-def extract_metadata_from_path(file_path: str) -> Dict[str, str]:
-    """
-    Extract category, nas_server, root_folder, and nas_path from file path.
-
-    Args:
-        file_path: S3 file path
-
-    Returns:
-        Dictionary with extracted metadata
-    """
-    metadata = {}
-
-    if not file_path:
-        return metadata
-
-    # Try main pattern first
-    match = FILE_PATH_PATTERN.search(file_path)
-    if match:
-        category = match.group(1)
-        nas_server = match.group(2)
-        root_folder = match.group(3)
-
-        metadata['category'] = category
-        metadata['category_display'] = CATEGORY_DISPLAY_MAP.get(category, category)
-        metadata['nas_server'] = nas_server
-        metadata['root_folder'] = root_folder
-
-        # Generate NAS path
-        if nas_server in file_path:
-            remaining = file_path.split(f'{nas_server}/', 1)[-1]
-            windows_path = remaining.replace('/', '\\')
-            metadata['nas_path'] = f"\\\\{nas_server}\\share\\{windows_path}"
-
-        return metadata
-
-    # Fallback: try simple category extraction
-    simple_match = SIMPLE_CATEGORY_PATTERN.search(file_path)
-    if simple_match:
-        category = simple_match.group(1)
-        metadata['category'] = category
-        metadata['category_display'] = CATEGORY_DISPLAY_MAP.get(category, category)
-
-    return metadata
-
 
 def create_opensearch_client(endpoint: str, region: str = 'ap-northeast-1') -> OpenSearch:
     """Create OpenSearch client with AWS authentication."""
@@ -185,28 +125,6 @@ def count_documents_with_category(client: OpenSearch, index: str) -> Dict[str, i
     return counts
 
 
-def infer_category_from_server(nas_server: str) -> Dict[str, str]:
-    """
-    Infer correct category from nas_server field.
-
-    Args:
-        nas_server: NAS server name (e.g., 'ts-server6')
-
-    Returns:
-        Dictionary with category and category_display, or empty dict if unknown
-    """
-    if not nas_server:
-        return {}
-
-    category = NAS_SERVER_CATEGORY_MAP.get(nas_server)
-    if category:
-        return {
-            'category': category,
-            'category_display': CATEGORY_DISPLAY_MAP.get(category, category)
-        }
-    return {}
-
-
 def count_documents_with_wrong_category(client: OpenSearch, index: str) -> Dict[str, int]:
     """
     Count documents where nas_server implies a different category.
@@ -325,16 +243,16 @@ def fix_wrong_category(
         "_source": ["nas_server", "category", "file_name"]
     }
 
-    # Scroll through documents
-    scroll_response = client.search(
-        index=index,
-        scroll='10m',
-        size=batch_size,
-        body=query
-    )
-
-    scroll_id = scroll_response['_scroll_id']
-    hits = scroll_response['hits']['hits']
+    # Stream documents (point in time + search_after)
+    documents = iter(DocumentScanner(
+        client,
+        index,
+        query=query['query'],
+        source=query['_source'],
+        page_size=batch_size,
+        keep_alive='10m'
+    ))
+    hits = list(islice(documents, batch_size))
 
     start_time = time.time()
 
@@ -401,15 +319,7 @@ def fix_wrong_category(
         )
 
         # Get next batch
-        scroll_response = client.scroll(scroll_id=scroll_id, scroll='10m')
-        scroll_id = scroll_response['_scroll_id']
-        hits = scroll_response['hits']['hits']
-
-    # Clear scroll
-    try:
-        client.clear_scroll(scroll_id=scroll_id)
-    except Exception:
-        pass
+        hits = list(islice(documents, batch_size))
 
     # Refresh index to make updates visible
     if not dry_run and updated_count > 0:
@@ -471,37 +381,33 @@ def fix_missing_category(
     # Category distribution for logging
     category_stats = {'road': 0, 'structure': 0, 'none': 0}
 
-    # Scroll through documents without category
-    scroll_response = client.search(
-        index=index,
-        scroll='10m',
-        size=batch_size,
-        body={
-            "query": {
-                "bool": {
-                    "must_not": [
-                        {"exists": {"field": "category"}}
-                    ]
-                }
-            },
-            "_source": ["file_path", "file_name"]
-        }
-    )
-
-    scroll_id = scroll_response['_scroll_id']
-    hits = scroll_response['hits']['hits']
+    # Stream documents without category (point in time + search_after)
+    documents = iter(DocumentScanner(
+        client,
+        index,
+        query={
+            "bool": {
+                "must_not": [
+                    {"exists": {"field": "category"}}
+                ]
+            }
+        },
+        source=["file_path", "file_name"],
+        page_size=batch_size,
+        keep_alive='10m'
+    ))
+    hits = list(islice(documents, batch_size))
 
     start_time = time.time()
 
     while hits:
         bulk_actions = []
 
-        for hit in hits:
-            doc_id = hit['_id']
-            file_path = hit['_source'].get('file_path', '')
+        # Extract metadata from file_path (parsed in bulk per batch)
+        extracted = parse_path_metadata_bulk(hit['_source'].get('file_path', '') for hit in hits)
 
-            # Extract metadata from file_path
-            metadata = extract_metadata_from_path(file_path)
+        for hit, metadata in zip(hits, extracted):
+            doc_id = hit['_id']
 
             if metadata:
                 # Update category stats
@@ -557,15 +463,7 @@ def fix_missing_category(
         )
 
         # Get next batch
-        scroll_response = client.scroll(scroll_id=scroll_id, scroll='10m')
-        scroll_id = scroll_response['_scroll_id']
-        hits = scroll_response['hits']['hits']
-
-    # Clear scroll
-    try:
-        client.clear_scroll(scroll_id=scroll_id)
-    except Exception:
-        pass
+        hits = list(islice(documents, batch_size))
 
     # Refresh index to make updates visible
     if not dry_run and updated_count > 0:
@@ -14,15 +14,25 @@ Usage:
 
 import argparse
 import json
-import re
 import sys
-from typing import Optional, Dict, Any, List
+from itertools import islice
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, List
+from urllib.parse import urlencode
 import boto3
 from botocore.auth import SigV4Auth
 from botocore.awsrequest import AWSRequest
 import urllib.request
 import ssl
 
+# Shared point-in-time scanner (backend/scripts/document_scanner.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
+from document_scanner import DocumentScanner
+
+# Shared path parser (python-worker/services/path_metadata.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from services.path_metadata import s3_key_to_nas_path
+
 # Configuration
 OPENSEARCH_ENDPOINT = 'https://vpc-cis-filesearch-opensearch-xuupcpgtq6a4opklfeh65x3uqe.ap-northeast-1.es.amazonaws.com'
 OPENSEARCH_INDEX = 'cis-files'
@@ -64,75 +74,30 @@ def signed_request(method: str, url: str, body: Optional[Dict] = None, headers:
         raise
 
 
-def generate_nas_path(file_path: str) -> Optional[str]:
-    """
-    Generate nas_path from file_path (S3 path).
-
-    Examples:
-    - s3://bucket/documents/road/ts-server3/R06_JOB/xxx/file.pdf
-      → \\ts-server3\share\R06_JOB\xxx\file.pdf
-    - documents/structure/ts-server6/H22_JOB/xxx/file.pdf
-      → \\ts-server6\share\H22_JOB\xxx\file.pdf
-    """
-    if not file_path:
-        return None
-
-    # Normalize path
-    normalized = file_path.replace('\\', '/')
-
-    # Remove s3:// prefix and bucket name if present
-    if normalized.startswith('s3://'):
-        parts = normalized[5:].split('/', 1)
-        if len(parts) > 1:
-            normalized = parts[1]
-
-    # Extract server name
-    server_match = re.search(r'(ts-server\d+)', normalized)
-    if not server_match:
-        return None
-
-    nas_server = server_match.group(1)
-
-    # Get the path after server name
-    parts = normalized.split(f'{nas_server}/')
-    if len(parts) < 2:
-        return None
-
-    remaining = parts[1]
-
-    # Convert to Windows path
-    windows_path = remaining.replace('/', '\\')
-
-    return f"\\\\{nas_server}\\share\\{windows_path}"
-
-
-def find_documents_without_nas_path(scroll_id: Optional[str] = None) -> Dict:
-    """Find documents with missing nas_path using scroll API."""
-    url = f"{OPENSEARCH_ENDPOINT}/{OPENSEARCH_INDEX}/_search"
-
-    if scroll_id:
-        # Continue scrolling
-        url = f"{OPENSEARCH_ENDPOINT}/_search/scroll"
-        body = {
-            "scroll": "5m",
-            "scroll_id": scroll_id
-        }
-    else:
-        # Initial search
-        url = f"{OPENSEARCH_ENDPOINT}/{OPENSEARCH_INDEX}/_search?scroll=5m"
-        body = {
-            "query": {
-                "bool": {
-                    "must_not": [
-                        {"exists": {"field": "nas_path"}}
-                    ]
-                }
-            },
-            "size": BATCH_SIZE,
-            "_source": ["file_path", "file_name", "nas_server"]
-        }
-
-    return signed_request('POST', url, body)
+def perform_request(method: str, path: str, params: Optional[Dict] = None, body: Optional[Dict] = None) -> Dict:
+    """Signed request by path (transport.perform_request compatible, for DocumentScanner)."""
+    url = f"{OPENSEARCH_ENDPOINT}{path}"
+    if params:
+        url += '?' + urlencode(params)
+    return signed_request(method, url, body)
+
+
+def find_documents_without_nas_path(limit: Optional[int] = None) -> Iterator[Dict]:
+    """Stream documents with missing nas_path (point in time + search_after)."""
+    return iter(DocumentScanner(
+        perform_request,
+        OPENSEARCH_INDEX,
+        query={
+            "bool": {
+                "must_not": [
+                    {"exists": {"field": "nas_path"}}
+                ]
+            }
+        },
+        source=["file_path", "file_name", "nas_server"],
+        page_size=BATCH_SIZE,
+        limit=limit
+    ))
 
 
 def update_documents(updates: List[Dict]) -> Dict:
@@ -178,15 +143,14 @@ def main():
     total_found = 0
     total_fixed = 0
     total_failed = 0
-    scroll_id = None
+
+    # The point in time keeps the result set stable while documents are updated
+    documents = find_documents_without_nas_path(args.limit or None)
 
     try:
         while True:
             # Find documents without nas_path
-            response = find_documents_without_nas_path(scroll_id)
-
-            scroll_id = response.get('_scroll_id')
-            hits = response.get('hits', {}).get('hits', [])
+            hits = list(islice(documents, BATCH_SIZE))
 
             if not hits:
                 break
@@ -200,7 +164,7 @@ def main():
                 source = hit.get('_source', {})
                 file_path = source.get('file_path', '')
 
-                nas_path = generate_nas_path(file_path)
+                nas_path = s3_key_to_nas_path(file_path)
 
                 if nas_path:
                     updates.append({
@@ -254,13 +218,8 @@ def main():
             print("Run without --dry-run to apply changes.")
 
     finally:
-        # Clear scroll
-        if scroll_id:
-            try:
-                url = f"{OPENSEARCH_ENDPOINT}/_search/scroll"
-                signed_request('DELETE', url, {"scroll_id": scroll_id})
-            except:
-                pass
+        # Delete the point in time
+        documents.close()
 
 
 if __name__ == '__main__':
@@ -11,22 +11,41 @@ Usage:
         --source-index cis-files --dest-index cis-files-v2 \
         --batch-size 1000 --dry-run
 
+    # Parallel: 8 sliced readers, 4 bulk writers, max 5,000 docs/sec
+    python reindex_with_category.py ... --slices 8 --bulk-workers 4 --requests-per-second 5000
+
+    # Continue an interrupted reindex from its per-slice checkpoint
+    python reindex_with_category.py ... --resume
+
 Requirements:
     pip install opensearch-py requests-aws4auth boto3
 """
 
 import argparse
+import json
 import logging
-import re
+import os
+import queue
 import sys
+import threading
 import time
 from datetime import datetime
-from typing import Dict, Any, Optional, Tuple
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
 
 import boto3
 from opensearchpy import OpenSearch, RequestsHttpConnection, helpers
 from requests_aws4auth import AWS4Auth
 
+# Shared point-in-time scanner (backend/scripts/document_scanner.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
+from document_scanner import DocumentScanner
+
+# Shared path parser (python-worker/services/path_metadata.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from services.path_metadata import parse_path_metadata, parse_path_metadata_bulk
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -35,56 +54,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# File path pattern for extracting category/server information
-# Handles: documents/, processed/, docuworks-converted/ prefixes
-FILE_PATH_PATTERN = re.compile(
-    r'(?:documents|processed|docuworks-converted)/(road|structure)/(ts-server\d+)/([^/]+)/'
-)
-
-# Simple fallback pattern
-SIMPLE_CATEGORY_PATTERN = re.compile(r'/(road|structure)/')
-
-# Category display names
-CATEGORY_DISPLAY_MAP = {
-    'road': '道路',
-    'structure': '構造'
-}
-
-
-def extract_metadata_from_path(file_path: str) -> Dict[str, str]:
-    """
-    Extract category, nas_server, and root_folder from file path.
-
-    Args:
-        file_path: S3 file path
-
-    Returns:
-        Dictionary with extracted metadata
-    """
-    metadata = {}
-
-    if not file_path:
-        return metadata
-
-    # Try main pattern first
-    match = FILE_PATH_PATTERN.search(file_path)
-    if match:
-        category = match.group(1)
-        metadata['category'] = category
-        metadata['category_display'] = CATEGORY_DISPLAY_MAP.get(category, category)
-        metadata['nas_server'] = match.group(2)
-        metadata['root_folder'] = match.group(3)
-        return metadata
-
-    # Fallback: try simple category extraction
-    simple_match = SIMPLE_CATEGORY_PATTERN.search(file_path)
-    if simple_match:
-        category = simple_match.group(1)
-        metadata['category'] = category
-        metadata['category_display'] = CATEGORY_DISPLAY_MAP.get(category, category)
-
-    return metadata
-
+# Replica count of the destination index once the reindex is finalized
+# (replicas are disabled while bulk loading)
+DEST_NUMBER_OF_REPLICAS = 1
 
 def create_opensearch_client(endpoint: str, region: str = 'ap-northeast-1') -> OpenSearch:
     """Create OpenSearch client with AWS authentication."""
@@ -120,7 +92,7 @@ def get_index_mapping() -> Dict[str, Any]:
         "settings": {
             "index": {
                 "number_of_shards": 2,
-                "number_of_replicas": 1,
+                "number_of_replicas": DEST_NUMBER_OF_REPLICAS,
                 "refresh_interval": "-1"  # Disable during bulk indexing
             },
             "analysis": {
@@ -193,11 +165,17 @@ def transform_document(doc: Dict[str, Any]) -> Dict[str, Any]:
         Transformed document
     """
     source = doc.get('_source', {}).copy()
-    file_path = source.get('file_path', '')
+    return _merge_metadata(source, parse_path_metadata(source.get('file_path', '')))
+
 
-    # Extract metadata from file path
-    extracted = extract_metadata_from_path(file_path)
+def transform_documents(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Transform a batch of documents (path metadata is parsed in bulk)."""
+    sources = [doc.get('_source', {}).copy() for doc in docs]
+    extracted = parse_path_metadata_bulk(source.get('file_path', '') for source in sources)
+    return [_merge_metadata(source, metadata) for source, metadata in zip(sources, extracted)]
 
+
+def _merge_metadata(source: Dict[str, Any], extracted: Dict[str, str]) -> Dict[str, Any]:
     # Update source with extracted metadata (don't overwrite existing values)
     for key, value in extracted.items():
         if key not in source or not source[key]:
@@ -206,22 +184,170 @@ def transform_document(doc: Dict[str, Any]) -> Dict[str, Any]:
     return source
 
 
+class RateLimiter:
+    """Thread-safe documents-per-second throttle (same unit as _reindex requests_per_second)."""
+
+    def __init__(self, rate: Optional[float] = None):
+        self.rate = rate if rate and rate > 0 else None
+        self._lock = threading.Lock()
+        self._next_time = time.monotonic()
+
+    def acquire(self, count: int):
+        """Block until count documents may be written."""
+        if self.rate is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time)
+            self._next_time = start + count / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+class ReindexCheckpoint:
+    """
+    Per-slice resume positions.
+
+    Batches of a slice complete out of order across bulk writers, so a slice's
+    search_after position only advances past the longest run of fully written
+    batches. Resuming therefore never skips a document (at worst a few batches
+    are written twice, which is idempotent by _id).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        source_index: str,
+        dest_index: str,
+        slices: int,
+        resume: bool = False
+    ):
+        self.path = path
+        self.slices = slices
+        self._lock = threading.Lock()
+        self.state = {
+            'source_index': source_index,
+            'dest_index': dest_index,
+            'slices': slices,
+            'slice_state': {
+                str(i): {'search_after': None, 'processed': 0, 'done': False}
+                for i in range(slices)
+            }
+        }
+
+        if resume and path and os.path.exists(path):
+            with open(path, 'r') as f:
+                saved = json.load(f)
+            if (saved.get('source_index'), saved.get('dest_index'), saved.get('slices')) != \
+                    (source_index, dest_index, slices):
+                raise ValueError(
+                    f"Checkpoint {path} was written for {saved.get('source_index')} -> "
+                    f"{saved.get('dest_index')} with {saved.get('slices')} slices"
+                )
+            self.state = saved
+            logger.info(f"Resuming from checkpoint {path}: {self.processed():,} documents already reindexed")
+
+        self._next_seq = {i: 0 for i in range(slices)}
+        self._completed: Dict[int, Dict[int, Tuple[Any, int]]] = {i: {} for i in range(slices)}
+        self._total_batches: Dict[int, Optional[int]] = {i: None for i in range(slices)}
+
+    def slice_state(self, slice_id: int) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.state['slice_state'][str(slice_id)])
+
+    def processed(self) -> int:
+        return sum(s['processed'] for s in self.state['slice_state'].values())
+
+    def batch_done(self, slice_id: int, seq: int, last_sort: Any, count: int):
+        """Record a written batch and advance the slice position if contiguous."""
+        with self._lock:
+            self._completed[slice_id][seq] = (last_sort, count)
+            self._advance(slice_id)
+
+    def reader_done(self, slice_id: int, batches: int):
+        """Record that a slice reader reached the end after emitting batches."""
+        with self._lock:
+            self._total_batches[slice_id] = batches
+            self._advance(slice_id)
+
+    def _advance(self, slice_id: int):
+        state = self.state['slice_state'][str(slice_id)]
+        completed = self._completed[slice_id]
+        advanced = False
+
+        while self._next_seq[slice_id] in completed:
+            last_sort, count = completed.pop(self._next_seq[slice_id])
+            state['search_after'] = last_sort
+            state['processed'] += count
+            self._next_seq[slice_id] += 1
+            advanced = True
+
+        if self._total_batches[slice_id] == self._next_seq[slice_id] and not state['done']:
+            state['done'] = True
+            advanced = True
+
+        if advanced:
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def prepare_dest_index(client: OpenSearch, index_name: str):
+    """
+    Apply bulk-load settings to the destination index (no refresh, no replicas).
+    finalize_index restores them after the reindex.
+
+    Args:
+        client: OpenSearch client
+        index_name: Index name
+    """
+    client.indices.put_settings(
+        index=index_name,
+        body={"index": {"refresh_interval": "-1", "number_of_replicas": 0}}
+    )
+    logger.info(f"Disabled refresh and replicas on {index_name} for bulk loading")
+
+
 def reindex_documents(
     client: OpenSearch,
     source_index: str,
     dest_index: str,
     batch_size: int = 1000,
-    dry_run: bool = False
+    dry_run: bool = False,
+    slices: int = 1,
+    bulk_workers: int = 1,
+    requests_per_second: Optional[float] = None,
+    checkpoint_path: Optional[str] = None,
+    resume: bool = False
 ) -> Tuple[int, int]:
     """
     Reindex documents with transformation.
 
+    Each slice of the source index is read by its own thread (point in time +
+    search_after); batches are transformed and bulk-written by a pool of
+    writer threads so reads, transforms and writes overlap.
+
     Args:
         client: OpenSearch client
         source_index: Source index name
         dest_index: Destination index name
         batch_size: Number of documents per batch
         dry_run: If True, only simulate
+        slices: Number of parallel sliced readers
+        bulk_workers: Number of concurrent transform/bulk writers
+        requests_per_second: Documents per second throttle (None/0 = unlimited)
+        checkpoint_path: Per-slice checkpoint file (None = no checkpointing)
+        resume: Continue from checkpoint_path
 
     Returns:
         Tuple of (success_count, error_count)
@@ -241,106 +367,199 @@ def reindex_documents(
             client.indices.create(index=dest_index, body=get_index_mapping())
         else:
             logger.info(f"Destination index {dest_index} already exists")
+        prepare_dest_index(client, dest_index)
+
+    slices = max(1, slices)
+    bulk_workers = max(1, bulk_workers)
+    checkpoint = ReindexCheckpoint(
+        None if dry_run else checkpoint_path,
+        source_index, dest_index, slices, resume
+    )
+    limiter = RateLimiter(requests_per_second)
 
-    # Scroll through source documents
+    stats_lock = threading.Lock()
     success_count = 0
     error_count = 0
-    processed_count = 0
+    processed_count = checkpoint.processed()
 
     # Statistics for validation
     category_stats = {'road': 0, 'structure': 0, 'none': 0}
     server_stats = {}
     folder_stats = {}
 
-    scroll_response = client.search(
-        index=source_index,
-        scroll='5m',
-        size=batch_size,
-        body={"query": {"match_all": {}}}
-    )
-
-    scroll_id = scroll_response['_scroll_id']
-    hits = scroll_response['hits']['hits']
+    batches: queue.Queue = queue.Queue(maxsize=bulk_workers * 2)
+    stop = threading.Event()
+    readers_finished = threading.Event()
 
     start_time = time.time()
-
-    while hits:
+    resumed_count = processed_count
+
+    def read_slice(slice_id: int):
+        nonlocal error_count
+        state = checkpoint.slice_state(slice_id)
+        if state['done']:
+            return
+
+        documents = iter(DocumentScanner(
+            client,
+            source_index,
+            page_size=batch_size,
+            slices=slices,
+            slice_id=slice_id if slices > 1 else None,
+            search_after=state['search_after'],
+            # Checkpointed sort values must stay valid in a new point in time
+            tiebreaker='file_key',
+            keep_alive='10m'
+        ))
+        seq = 0
+        try:
+            while not stop.is_set():
+                hits = list(islice(documents, batch_size))
+                if not hits:
+                    checkpoint.reader_done(slice_id, seq)
+                    return
+                while not stop.is_set():
+                    try:
+                        batches.put((slice_id, seq, hits), timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+                seq += 1
+        except Exception as e:
+            logger.error(f"Slice {slice_id} reader failed: {e}")
+            with stats_lock:
+                error_count += 1
+            stop.set()
+        finally:
+            documents.close()
+
+    def write_batch(slice_id: int, seq: int, hits: List[Dict[str, Any]]):
+        nonlocal success_count, error_count, processed_count
         batch_actions = []
+        batch_categories: Dict[str, int] = {}
+        batch_servers: Dict[str, int] = {}
+        batch_folders: Dict[str, int] = {}
 
-        for doc in hits:
-            transformed = transform_document(doc)
+        for doc, transformed in zip(hits, transform_documents(hits)):
 
             # Update statistics
-            category = transformed.get('category')
-            if category:
-                category_stats[category] = category_stats.get(category, 0) + 1
-            else:
-                category_stats['none'] += 1
+            category = transformed.get('category') or 'none'
+            batch_categories[category] = batch_categories.get(category, 0) + 1
 
             server = transformed.get('nas_server')
             if server:
-                server_stats[server] = server_stats.get(server, 0) + 1
+                batch_servers[server] = batch_servers.get(server, 0) + 1
 
             folder = transformed.get('root_folder')
             if folder:
-                folder_stats[folder] = folder_stats.get(folder, 0) + 1
+                batch_folders[folder] = batch_folders.get(folder, 0) + 1
 
-            if not dry_run:
-                action = {
-                    '_index': dest_index,
-                    '_id': doc['_id'],
-                    '_source': transformed
-                }
-                batch_actions.append(action)
+            batch_actions.append({
+                '_index': dest_index,
+                '_id': doc['_id'],
+                '_source': transformed
+            })
 
-        processed_count += len(hits)
+        success = 0
+        errors = 0
 
         # Bulk index
-        if not dry_run and batch_actions:
+        if dry_run:
+            success = len(hits)
+        else:
+            limiter.acquire(len(batch_actions))
             try:
-                success, errors = helpers.bulk(
+                success, bulk_errors = helpers.bulk(
                     client,
                     batch_actions,
+                    chunk_size=len(batch_actions),
+                    max_retries=3,
                     raise_on_error=False,
                     raise_on_exception=False
                 )
-                success_count += success
-                if errors:
-                    error_count += len(errors)
-                    for error in errors[:5]:  # Log first 5 errors
+                if bulk_errors:
+                    errors = len(bulk_errors)
+                    for error in bulk_errors[:5]:  # Log first 5 errors
                         logger.error(f"Bulk error: {error}")
             except Exception as e:
                 logger.error(f"Bulk indexing failed: {e}")
-                error_count += len(batch_actions)
-        else:
-            success_count += len(hits)
-
-        # Progress logging
-        elapsed = time.time() - start_time
-        docs_per_sec = processed_count / elapsed if elapsed > 0 else 0
-        eta_seconds = (total_docs - processed_count) / docs_per_sec if docs_per_sec > 0 else 0
-
-        logger.info(
-            f"Progress: {processed_count:,}/{total_docs:,} "
-            f"({100*processed_count/total_docs:.1f}%) - "
-            f"{docs_per_sec:.0f} docs/sec - "
-            f"ETA: {eta_seconds/60:.1f} min"
-        )
+                errors = len(batch_actions)
+
+        # A failed request or any rejected document holds the slice position so
+        # --resume rereads this batch (and rewrites the later ones, idempotent by _id)
+        if not errors:
+            checkpoint.batch_done(slice_id, seq, hits[-1]['sort'], len(hits))
+
+        with stats_lock:
+            success_count += success
+            error_count += errors
+            processed_count += len(hits)
+            for key, count in batch_categories.items():
+                category_stats[key] = category_stats.get(key, 0) + count
+            for key, count in batch_servers.items():
+                server_stats[key] = server_stats.get(key, 0) + count
+            for key, count in batch_folders.items():
+                folder_stats[key] = folder_stats.get(key, 0) + count
+
+            # Progress logging
+            elapsed = time.time() - start_time
+            docs_per_sec = (processed_count - resumed_count) / elapsed if elapsed > 0 else 0
+            eta_seconds = (total_docs - processed_count) / docs_per_sec if docs_per_sec > 0 else 0
+
+            logger.info(
+                f"Progress: {processed_count:,}/{total_docs:,} "
+                f"({100*processed_count/max(total_docs, 1):.1f}%) - "
+                f"{docs_per_sec:.0f} docs/sec - "
+                f"ETA: {eta_seconds/60:.1f} min"
+            )
 
-        # Get next batch
-        scroll_response = client.scroll(scroll_id=scroll_id, scroll='5m')
-        scroll_id = scroll_response['_scroll_id']
-        hits = scroll_response['hits']['hits']
+    def write_batches():
+        while True:
+            try:
+                item = batches.get(timeout=0.5)
+            except queue.Empty:
+                if readers_finished.is_set() or stop.is_set():
+                    return
+                continue
+            if stop.is_set():
+                return
+            write_batch(*item)
+
+    readers = [
+        threading.Thread(target=read_slice, args=(i,), name=f'reindex-slice-{i}', daemon=True)
+        for i in range(slices)
+    ]
+    writers = [
+        threading.Thread(target=write_batches, name=f'reindex-bulk-{i}', daemon=True)
+        for i in range(bulk_workers)
+    ]
+    for thread in readers + writers:
+        thread.start()
 
-    # Clear scroll
     try:
-        client.clear_scroll(scroll_id=scroll_id)
-    except Exception:
-        pass
+        for thread in readers:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+        readers_finished.set()
+        for thread in writers:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+    except KeyboardInterrupt:
+        logger.warning("Interrupted - waiting for in-flight bulk requests before stopping")
+        stop.set()
+        for thread in writers:
+            thread.join()
+        error_count += 1
+
+    interrupted = stop.is_set()
+    if interrupted and checkpoint.path:
+        logger.warning(f"Reindex stopped early; rerun with --resume to continue from {checkpoint.path}")
+    elif not dry_run and not error_count:
+        checkpoint.remove()
 
     # Log statistics
     logger.info("=" * 60)
-    logger.info("REINDEX COMPLETE")
+    logger.info("REINDEX INTERRUPTED" if interrupted else "REINDEX COMPLETE")
     logger.info("=" * 60)
     logger.info(f"Total processed: {processed_count:,}")
     logger.info(f"Success: {success_count:,}")
@@ -405,19 +624,22 @@ def switch_alias(
 
 def finalize_index(client: OpenSearch, index_name: str):
     """
-    Finalize index after reindexing (enable refresh, optimize).
+    Finalize index after reindexing (enable refresh and replicas).
 
     Args:
         client: OpenSearch client
         index_name: Index name
     """
     try:
-        # Enable refresh
+        # Enable refresh and restore replicas
         client.indices.put_settings(
             index=index_name,
-            body={"index": {"refresh_interval": "5s"}}
+            body={"index": {
+                "refresh_interval": "5s",
+                "number_of_replicas": DEST_NUMBER_OF_REPLICAS
+            }}
         )
-        logger.info(f"Enabled refresh interval for {index_name}")
+        logger.info(f"Enabled refresh interval and {DEST_NUMBER_OF_REPLICAS} replica(s) for {index_name}")
 
         # Refresh to make all documents searchable
         client.indices.refresh(index=index_name)
@@ -436,6 +658,13 @@ def main():
     parser.add_argument('--dest-index', required=True, help='Destination index name')
     parser.add_argument('--region', default='ap-northeast-1', help='AWS region')
     parser.add_argument('--batch-size', type=int, default=1000, help='Batch size')
+    parser.add_argument('--slices', type=int, default=4, help='Number of parallel sliced readers')
+    parser.add_argument('--bulk-workers', type=int, default=4, help='Number of concurrent bulk writers')
+    parser.add_argument('--requests-per-second', type=float, default=0,
+                        help='Throttle in documents per second (0 = unlimited)')
+    parser.add_argument('--checkpoint', help='Per-slice checkpoint file '
+                        '(default: reindex_<source>_to_<dest>.checkpoint.json)')
+    parser.add_argument('--resume', action='store_true', help='Resume from the checkpoint file')
     parser.add_argument('--dry-run', action='store_true', help='Dry run mode')
     parser.add_argument('--alias', help='Alias name to switch after reindex')
     parser.add_argument('--skip-finalize', action='store_true', help='Skip finalization')
@@ -449,6 +678,8 @@ def main():
     logger.info(f"Source Index: {args.source_index}")
     logger.info(f"Destination Index: {args.dest_index}")
     logger.info(f"Batch Size: {args.batch_size}")
+    logger.info(f"Slices: {args.slices}, Bulk Workers: {args.bulk_workers}")
+    logger.info(f"Requests/sec: {args.requests_per_second or 'unlimited'}")
     logger.info(f"Dry Run: {args.dry_run}")
     logger.info("=" * 60)
 
@@ -463,21 +694,34 @@ def main():
         logger.error(f"Failed to connect to OpenSearch: {e}")
         sys.exit(1)
 
+    checkpoint_path = args.checkpoint or f"reindex_{args.source_index}_to_{args.dest_index}.checkpoint.json"
+
     # Reindex
-    success, errors = reindex_documents(
-        client,
-        args.source_index,
-        args.dest_index,
-        args.batch_size,
-        args.dry_run
-    )
+    try:
+        success, errors = reindex_documents(
+            client,
+            args.source_index,
+            args.dest_index,
+            args.batch_size,
+            args.dry_run,
+            slices=args.slices,
+            bulk_workers=args.bulk_workers,
+            requests_per_second=args.requests_per_second,
+            checkpoint_path=checkpoint_path,
+            resume=args.resume
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
 
     if not args.dry_run and not args.skip_finalize:
         # Finalize index
         finalize_index(client, args.dest_index)
 
-        # Switch alias if specified
-        if args.alias:
+        # Switch alias if specified (never onto an incomplete index)
+        if args.alias and errors > 0:
+            logger.warning(f"Not switching alias '{args.alias}': reindex finished with {errors} errors")
+        elif args.alias:
             switch_alias(client, args.alias, args.source_index, args.dest_index)
 
     # Exit with error if there were failures
@@ -57,6 +57,10 @@ cd "$SCRIPT_DIR"
 
 aws s3 cp s3://cis-filesearch-worker-scripts/scripts/fix_missing_category.py ./fix_missing_category.py --region $REGION
 chmod +x fix_missing_category.py
+# 共有モジュール（backend/scripts/document_scanner.py, python-worker/services/path_metadata.py）をスクリプトと同じディレクトリに配置
+aws s3 cp s3://cis-filesearch-worker-scripts/scripts/document_scanner.py ./document_scanner.py --region $REGION
+mkdir -p services
+aws s3 cp s3://cis-filesearch-worker-scripts/scripts/services/path_metadata.py ./services/path_metadata.py --region $REGION
 echo -e "${GREEN}✓ Script downloaded${NC}"
 echo ""
 
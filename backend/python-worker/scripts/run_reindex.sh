@@ -59,6 +59,10 @@ cd "$SCRIPT_DIR"
 
 aws s3 cp s3://cis-filesearch-worker-scripts/scripts/reindex_with_category.py ./reindex_with_category.py --region $REGION
 chmod +x reindex_with_category.py
+# 共有モジュール（backend/scripts/document_scanner.py, python-worker/services/path_metadata.py）をスクリプトと同じディレクトリに配置
+aws s3 cp s3://cis-filesearch-worker-scripts/scripts/document_scanner.py ./document_scanner.py --region $REGION
+mkdir -p services
+aws s3 cp s3://cis-filesearch-worker-scripts/scripts/services/path_metadata.py ./services/path_metadata.py --region $REGION
 echo -e "${GREEN}✓ Script downloaded${NC}"
 echo ""
 
@@ -0,0 +1,219 @@
+"""
+Admission Control Service
+S3オブジェクトのサイズとファイル種類からメッセージごとのメモリ使用量を見積もり、
+予測メモリ使用量がメモリ予算に収まる場合のみ抽出処理を開始する
+
+予算に収まらないメッセージは一定時間待機し、それでも空かなければ呼び出し側が
+SQSの可視性タイムアウトを延長して後で再処理する（OOMでワーカーが落ちるより安全）。
+処理中のメッセージがない場合は予算超過の大きいファイルでも単独で実行する。
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+MB = 1024 * 1024
+
+# A4 (8.27 x 11.69 inch) をRGBでラスタライズした1ページのバイト数 / DPI^2
+A4_RGB_BYTES_PER_DPI2 = 8.27 * 11.69 * 3
+
+# OCR中はラスタ画像に加えTesseractの作業領域（二値化・レイアウト解析）を使う
+OCR_WORKING_SET_FACTOR = 2.0
+
+# スキャンPDFの1ページあたりの平均サイズ（ページ数が分からない場合の推定）
+PDF_BYTES_PER_PAGE = 100 * 1024
+
+# サイズ不明のメッセージに仮定するサイズ
+UNKNOWN_SIZE_BYTES = 10 * MB
+
+# MEMORY_BUDGET_MB未設定時に使うシステムメモリの割合
+DEFAULT_BUDGET_FRACTION = 0.7
+
+
+@dataclass
+class MemoryProfile:
+    """ファイル種類ごとのメモリモデル（base_mb + 入力サイズ × size_multiplier）"""
+    base_mb: float
+    size_multiplier: float
+    ocr: bool = False                 # PDFページのラスタライズ + OCRを行う
+
+
+DEFAULT_PROFILES: Dict[str, MemoryProfile] = {
+    'text': MemoryProfile(base_mb=30, size_multiplier=3),
+    'office': MemoryProfile(base_mb=300, size_multiplier=4),      # LibreOffice変換
+    'image': MemoryProfile(base_mb=80, size_multiplier=12),       # 圧縮画像の展開 + 前処理
+    'pdf': MemoryProfile(base_mb=120, size_multiplier=3, ocr=True),
+    'docuworks': MemoryProfile(base_mb=200, size_multiplier=4, ocr=True),
+    'other': MemoryProfile(base_mb=20, size_multiplier=0),        # メタデータのみ
+}
+
+
+class AdmissionController:
+    """メモリ予算に基づくスレッドセーフな受付制御"""
+
+    def __init__(
+        self,
+        config,
+        budget_mb: Optional[float] = None,
+        min_free_mb: Optional[float] = None,
+        profiles: Optional[Dict[str, MemoryProfile]] = None
+    ):
+        """
+        初期化
+
+        Args:
+            config: アプリケーション設定
+            budget_mb: メモリ予算（MB、None/0の場合は設定値、それも0ならシステムメモリの70%）
+            min_free_mb: これを下回る空きメモリでは新規受付しない（MB）
+            profiles: ファイル種類ごとのメモリモデル
+        """
+        processing = config.processing
+        budget_mb = budget_mb or processing.memory_budget_mb
+        if not budget_mb:
+            budget_mb = psutil.virtual_memory().total / MB * DEFAULT_BUDGET_FRACTION
+        self.budget_mb = float(budget_mb)
+        self.min_free_mb = float(min_free_mb if min_free_mb is not None else processing.admission_min_free_mb)
+        self.profiles = profiles or DEFAULT_PROFILES
+
+        # 拡張子 → ファイル種類
+        file_types = config.file_types
+        self._kinds: Dict[str, str] = {}
+        for kind, extensions in (
+            ('text', file_types.text_extensions),
+            ('office', file_types.office_extensions),
+            ('image', file_types.image_extensions),
+            ('pdf', file_types.pdf_extensions),
+            ('docuworks', file_types.docuworks_extensions),
+        ):
+            for ext in extensions:
+                self._kinds[ext.lower()] = kind
+
+        # 同時にラスタライズされるPDFページ数
+        ocr = config.ocr
+        self._page_mb = A4_RGB_BYTES_PER_DPI2 * ocr.pdf_dpi * ocr.pdf_dpi / MB * OCR_WORKING_SET_FACTOR
+        self._max_pages = ocr.max_pdf_pages
+        self._concurrent_pages = (ocr.page_workers or os.cpu_count() or 1) if ocr.page_parallel else None
+
+        self._lock = threading.Condition()
+        self._reserved_mb = 0.0
+        self._in_flight = 0
+
+        self.stats = {
+            'admitted': 0,
+            'waited': 0,
+            'rejected': 0,
+            'forced': 0,
+            'oversized': 0,
+        }
+
+        logger.info(
+            f"AdmissionController initialized: budget={self.budget_mb:.0f}MB, "
+            f"min_free={self.min_free_mb:.0f}MB, page_raster={self._page_mb:.0f}MB"
+        )
+
+    def estimate_mb(self, key: str, size_bytes: Optional[int]) -> float:
+        """
+        メッセージのピークメモリ使用量を見積もる
+
+        Args:
+            key: S3キー（拡張子でファイル種類を判定）
+            size_bytes: S3オブジェクトサイズ（不明な場合はNone）
+
+        Returns:
+            見積もりメモリ（MB）
+        """
+        kind = self._kinds.get(Path(key).suffix.lower(), 'other')
+        profile = self.profiles.get(kind, self.profiles['other'])
+        size = size_bytes if size_bytes is not None else UNKNOWN_SIZE_BYTES
+
+        estimate = profile.base_mb + size / MB * profile.size_multiplier
+        if profile.ocr:
+            # ページ並列OCRは同時処理ページ分、一括変換は全ページ分のラスタを保持する
+            pages = max(1, min(self._max_pages, int(size / PDF_BYTES_PER_PAGE) + 1))
+            if self._concurrent_pages is not None:
+                pages = min(pages, self._concurrent_pages)
+            estimate += pages * self._page_mb
+
+        return estimate
+
+    def acquire(self, cost_mb: float, timeout: float = 0.0, force: bool = False) -> bool:
+        """
+        メモリ予算を確保（収まらない場合はtimeout秒まで解放を待つ）
+
+        Args:
+            cost_mb: 見積もりメモリ（MB）
+            timeout: 最大待機秒数
+            force: 待機しても収まらない場合も確保する（これ以上延期できないメッセージ用）
+
+        Returns:
+            確保できた場合True（release()で解放すること）
+        """
+        deadline = time.monotonic() + timeout
+        waited = False
+
+        with self._lock:
+            while not self._fits(cost_mb):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and force:
+                    self.stats['forced'] += 1
+                    logger.warning(
+                        f"Admitting {cost_mb:.0f}MB job over budget "
+                        f"({self._reserved_mb:.0f}/{self.budget_mb:.0f}MB reserved): cannot be deferred again"
+                    )
+                    break
+                if remaining <= 0:
+                    self.stats['rejected'] += 1
+                    logger.info(
+                        f"Admission rejected: {cost_mb:.0f}MB requested, "
+                        f"{self._reserved_mb:.0f}/{self.budget_mb:.0f}MB reserved by {self._in_flight} job(s)"
+                    )
+                    return False
+                waited = True
+                # 空きメモリの回復（他プロセスの解放）も拾うため定期的に再評価
+                self._lock.wait(min(remaining, 1.0))
+
+            if cost_mb > self.budget_mb:
+                self.stats['oversized'] += 1
+                logger.warning(f"Admitting {cost_mb:.0f}MB job alone (exceeds {self.budget_mb:.0f}MB budget)")
+
+            self._reserved_mb += cost_mb
+            self._in_flight += 1
+            self.stats['admitted'] += 1
+            if waited:
+                self.stats['waited'] += 1
+            return True
+
+    def release(self, cost_mb: float):
+        """acquire()で確保したメモリ予算を解放"""
+        with self._lock:
+            self._reserved_mb = max(0.0, self._reserved_mb - cost_mb)
+            self._in_flight = max(0, self._in_flight - 1)
+            self._lock.notify_all()
+
+    def get_stats(self) -> Dict[str, float]:
+        """統計と現在の予約状況"""
+        with self._lock:
+            return {
+                **self.stats,
+                'reserved_mb': round(self._reserved_mb, 1),
+                'in_flight': self._in_flight,
+                'budget_mb': round(self.budget_mb, 1),
+            }
+
+    def _fits(self, cost_mb: float) -> bool:
+        """予約済み + 見積もりが予算内、かつ実際の空きメモリが下限以上か（ロック保持中に呼ぶ）"""
+        if self._in_flight == 0:
+            # 処理中がなければ必ず受け付ける（大きいファイルが永久に待たないように）
+            return True
+        if self._reserved_mb + cost_mb > self.budget_mb:
+            return False
+        return psutil.virtual_memory().available / MB >= self.min_free_mb
@@ -3,9 +3,10 @@ Batch Processing Service
 複数メッセージの効率的な並列処理とバッチインデックス
 """
 
+import json
 import logging
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 import threading
@@ -309,6 +310,239 @@ class BatchIndexer:
             self.flush()
 
 
+@dataclass
+class _PendingIndexItem:
+    """バルクバッファ内の1ドキュメント"""
+
+    document: Dict[str, Any]
+    document_id: str
+    callback: Callable[[bool, Optional[str]], None]
+    size_bytes: int
+    added_at: float
+
+
+class StreamingBulkIndexer:
+    """
+    スレッドセーフなストリーミングバルクインデクサー
+
+    - ドキュメント数・ペイロードサイズ・最大待機時間のいずれかでフラッシュ
+    - アイテム単位の結果をコールバックで通知（失敗分のみDLQへ送れる）
+    - 呼び出し元はACK受信後にSQSメッセージを削除する
+    """
+
+    def __init__(
+        self,
+        opensearch_client,
+        max_docs: int = 100,
+        max_bytes: int = 5 * 1024 * 1024,
+        max_latency_seconds: float = 2.0,
+        index_name: Optional[str] = None
+    ):
+        """
+        初期化
+
+        Args:
+            opensearch_client: OpenSearchクライアント（bulk_index_itemsを持つこと）
+            max_docs: フラッシュするドキュメント数
+            max_bytes: フラッシュするペイロードサイズ（バイト）
+            max_latency_seconds: 最古のドキュメントの最大待機秒数
+            index_name: インデックス名（Noneの場合は設定値）
+        """
+        self.opensearch_client = opensearch_client
+        self.max_docs = max(1, max_docs)
+        self.max_bytes = max_bytes
+        self.max_latency_seconds = max_latency_seconds
+        self.index_name = index_name
+
+        self._buffer: List[_PendingIndexItem] = []
+        self._buffer_bytes = 0
+        self._lock = threading.Lock()
+        # 同時に複数のバルクリクエストを投げない（順序と負荷の制御）
+        self._flush_lock = threading.Lock()
+
+        self._stop_event = threading.Event()
+        self._timer_thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'flushes': 0,
+            'indexed': 0,
+            'failed': 0,
+        }
+
+        logger.info(
+            f"StreamingBulkIndexer initialized: max_docs={self.max_docs}, "
+            f"max_bytes={self.max_bytes}, max_latency={self.max_latency_seconds}s"
+        )
+
+    def start(self):
+        """最大待機時間ベースのフラッシュスレッドを起動"""
+        if self._timer_thread and self._timer_thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._timer_thread = threading.Thread(
+            target=self._timer_loop,
+            name='bulk-indexer-timer',
+            daemon=True
+        )
+        self._timer_thread.start()
+
+    def add(
+        self,
+        document: Dict[str, Any],
+        document_id: str,
+        callback: Callable[[bool, Optional[str]], None]
+    ):
+        """
+        ドキュメントをバッファに追加（閾値に達した場合は呼び出しスレッドでフラッシュ）
+
+        Args:
+            document: インデックスするドキュメント
+            document_id: ドキュメントID
+            callback: 結果通知 (success, error_message)
+        """
+        size = self._estimate_size(document)
+        should_flush = False
+
+        with self._lock:
+            self._buffer.append(_PendingIndexItem(
+                document=document,
+                document_id=document_id,
+                callback=callback,
+                size_bytes=size,
+                added_at=time.time()
+            ))
+            self._buffer_bytes += size
+
+            if len(self._buffer) >= self.max_docs or self._buffer_bytes >= self.max_bytes:
+                should_flush = True
+
+        if should_flush:
+            self.flush()
+
+    def index_and_wait(
+        self,
+        document: Dict[str, Any],
+        document_id: str,
+        timeout: Optional[float] = None
+    ) -> Tuple[Optional[bool], Optional[str]]:
+        """
+        ドキュメントを追加し、バルクACKを受け取るまで待機
+
+        Args:
+            document: インデックスするドキュメント
+            document_id: ドキュメントID
+            timeout: 最大待機秒数
+
+        Returns:
+            (success, error_message)。タイムアウト時はsuccessがNone
+            （バルク送信は後で成功する可能性があり、結果は不明）
+        """
+        done = threading.Event()
+        outcome: Dict[str, Any] = {}
+
+        def _ack(success: bool, error: Optional[str]):
+            outcome['success'] = success
+            outcome['error'] = error
+            done.set()
+
+        self.add(document, document_id, _ack)
+
+        if not done.wait(timeout):
+            return (None, f"Bulk index acknowledgement timed out after {timeout}s")
+
+        return (outcome['success'], outcome['error'])
+
+    def flush(self) -> int:
+        """
+        バッファ内のドキュメントをバルクインデックスし、各コールバックを呼び出す
+
+        Returns:
+            失敗したドキュメント数
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return 0
+                items = self._buffer
+                self._buffer = []
+                self._buffer_bytes = 0
+
+            logger.info(f"Flushing {len(items)} documents to OpenSearch (bulk)...")
+
+            try:
+                results = self.opensearch_client.bulk_index_items(
+                    [item.document for item in items],
+                    document_ids=[item.document_id for item in items],
+                    index_name=self.index_name
+                )
+            except Exception as e:
+                logger.error(f"Bulk indexing failed: {e}", exc_info=True)
+                results = [f"Bulk request failed: {e}"] * len(items)
+
+            failed = 0
+            for item, error in zip(items, results):
+                if error:
+                    failed += 1
+                    logger.warning(f"Bulk item failed for {item.document_id}: {error}")
+                try:
+                    item.callback(error is None, error)
+                except Exception as e:
+                    logger.error(f"Bulk index callback failed: {e}", exc_info=True)
+
+            with self._lock:
+                self.stats['flushes'] += 1
+                self.stats['indexed'] += len(items) - failed
+                self.stats['failed'] += failed
+
+            logger.info(f"Bulk flush complete: {len(items) - failed} succeeded, {failed} failed")
+            return failed
+
+    def pending(self) -> int:
+        """バッファ内の件数"""
+        with self._lock:
+            return len(self._buffer)
+
+    def close(self):
+        """タイマーを停止し残りのドキュメントをフラッシュ"""
+        self._stop_event.set()
+        if self._timer_thread:
+            self._timer_thread.join(timeout=5)
+            self._timer_thread = None
+        self.flush()
+
+    def _timer_loop(self):
+        """最古のドキュメントが最大待機時間を超えたらフラッシュ"""
+        interval = max(0.05, self.max_latency_seconds / 4)
+
+        while not self._stop_event.wait(interval):
+            with self._lock:
+                oldest = self._buffer[0].added_at if self._buffer else None
+
+            if oldest is not None and time.time() - oldest >= self.max_latency_seconds:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"Timed bulk flush failed: {e}", exc_info=True)
+
+    @staticmethod
+    def _estimate_size(document: Dict[str, Any]) -> int:
+        """バルクペイロードのサイズを見積もる（バイト）"""
+        try:
+            return len(json.dumps(document, ensure_ascii=False, default=str).encode('utf-8'))
+        except Exception:
+            return len(str(document))
+
+    def __enter__(self):
+        """コンテキストマネージャー開始"""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """コンテキストマネージャー終了時にフラッシュ"""
+        self.close()
+
+
 class MessageBatcher:
     """
     SQSメッセージのバッチ取得と管理
@@ -0,0 +1,210 @@
+"""
+Change Detection Service
+S3オブジェクトの同一性（ETag/LastModified/サイズ）とOpenSearchの既存ドキュメントを比較し、
+再同期された未変更ファイルの再処理を回避する
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = logging.getLogger(__name__)
+
+
+# 判定結果
+UNCHANGED = 'unchanged'
+METADATA_ONLY = 'metadata_only'
+CHANGED = 'changed'
+
+
+@dataclass
+class ObjectState:
+    """HEADで取得したS3オブジェクトの状態"""
+    etag: str
+    size: int
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class ChangeDecision:
+    """1オブジェクトの変更判定"""
+    action: str
+    reason: str = ''
+    object_state: Optional[ObjectState] = None
+    # METADATA_ONLYの場合に部分更新するフィールド
+    updates: Dict[str, Any] = field(default_factory=dict)
+
+
+def normalize_etag(etag: Optional[str]) -> Optional[str]:
+    """ETagの引用符を除去（S3イベントは引用符なし、HEADは引用符付き）"""
+    return etag.strip('"') if etag else etag
+
+
+def _format_last_modified(value: Any) -> Optional[str]:
+    """LastModifiedをISO8601文字列に変換"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _same_instant(a: Optional[str], b: Optional[str]) -> bool:
+    """2つのISO8601文字列が同じ時刻を表すか"""
+    if a == b:
+        return True
+    if not a or not b:
+        return False
+    try:
+        return datetime.fromisoformat(a.replace('Z', '+00:00')) == datetime.fromisoformat(b.replace('Z', '+00:00'))
+    except ValueError:
+        return False
+
+
+class ChangeDetector:
+    """
+    再同期ファイルの変更検出
+
+    - HEADでS3オブジェクトのETag/サイズ/LastModifiedを取得（並列）
+    - 対応するOpenSearchドキュメントをmgetで一括取得
+    - 内容が同一なら何もしない／パス系メタデータのみ変わっていれば部分更新／それ以外は再処理
+    """
+
+    # 比較に必要な_sourceフィールド
+    SOURCE_FIELDS = [
+        'source_etag',
+        'source_last_modified',
+        'file_size',
+        'success',
+        'category',
+        'category_display',
+        'nas_server',
+        'root_folder',
+        'nas_path',
+    ]
+
+    def __init__(self, s3_client, opensearch_client, head_workers: int = 10):
+        """
+        初期化
+
+        Args:
+            s3_client: boto3 S3クライアント
+            opensearch_client: OpenSearchClient
+            head_workers: HEADリクエストの並列数
+        """
+        self.s3_client = s3_client
+        self.opensearch = opensearch_client
+        self.head_workers = head_workers
+
+    def head_object(self, bucket: str, key: str) -> Optional[ObjectState]:
+        """
+        オブジェクトの状態を取得
+
+        Args:
+            bucket: バケット名
+            key: オブジェクトキー
+
+        Returns:
+            ObjectState、取得できない場合None
+        """
+        try:
+            response = self.s3_client.head_object(Bucket=bucket, Key=key)
+        except (ClientError, BotoCoreError) as e:
+            logger.warning(f"HEAD failed for s3://{bucket}/{key}: {e}")
+            return None
+
+        return ObjectState(
+            etag=normalize_etag(response.get('ETag')),
+            size=response.get('ContentLength'),
+            last_modified=_format_last_modified(response.get('LastModified'))
+        )
+
+    def classify(self, items: List[Dict[str, Any]]) -> List[ChangeDecision]:
+        """
+        複数オブジェクトの変更を一括判定
+
+        Args:
+            items: {'bucket', 'key', 'expected'} のリスト
+                   expected はS3キー/元パスから算出したパス系メタデータ
+
+        Returns:
+            itemsと同じ順序のChangeDecisionリスト
+        """
+        if not items:
+            return []
+
+        workers = max(1, min(self.head_workers, len(items)))
+        if workers == 1:
+            states = [self.head_object(item['bucket'], item['key']) for item in items]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='change-head') as executor:
+                states = list(executor.map(
+                    lambda item: self.head_object(item['bucket'], item['key']),
+                    items
+                ))
+
+        indexed = self.opensearch.get_documents(
+            [item['key'] for item in items],
+            source_fields=self.SOURCE_FIELDS
+        )
+        if indexed is None:
+            # 既存ドキュメントが判別できない場合は安全側（再処理）に倒す
+            indexed = {}
+
+        return [
+            self.compare(state, indexed.get(item['key']), item.get('expected') or {})
+            for item, state in zip(items, states)
+        ]
+
+    @staticmethod
+    def compare(
+        state: Optional[ObjectState],
+        indexed: Optional[Dict[str, Any]],
+        expected: Dict[str, Any]
+    ) -> ChangeDecision:
+        """
+        オブジェクト状態とインデックス済みドキュメントを比較
+
+        Args:
+            state: HEADで取得した状態
+            indexed: 既存ドキュメントの_source
+            expected: 今回のメッセージから算出したパス系メタデータ
+
+        Returns:
+            ChangeDecision
+        """
+        if state is None:
+            return ChangeDecision(CHANGED, 'object state unavailable')
+
+        if not indexed:
+            return ChangeDecision(CHANGED, 'not indexed', state)
+
+        if indexed.get('success') is False:
+            return ChangeDecision(CHANGED, 'previous processing failed', state)
+
+        if not indexed.get('source_etag'):
+            # この機能の導入前にインデックスされたドキュメント
+            return ChangeDecision(CHANGED, 'no stored source identity', state)
+
+        if normalize_etag(indexed['source_etag']) != state.etag:
+            return ChangeDecision(CHANGED, 'etag changed', state)
+
+        if state.size is not None and indexed.get('file_size') not in (None, state.size):
+            return ChangeDecision(CHANGED, 'size changed', state)
+
+        updates = {
+            name: value
+            for name, value in expected.items()
+            if value is not None and indexed.get(name) != value
+        }
+        if state.last_modified and not _same_instant(indexed.get('source_last_modified'), state.last_modified):
+            updates['source_last_modified'] = state.last_modified
+
+        if updates:
+            return ChangeDecision(METADATA_ONLY, 'metadata changed', state, updates)
+
+        return ChangeDecision(UNCHANGED, 'unchanged', state)
@@ -0,0 +1,220 @@
+"""
+Adaptive Concurrency Service
+計測したスループット（documents/秒）に対する山登り法で抽出ワーカー数を実行時に調整する
+
+- 一定間隔ごとに直前ウィンドウのスループットを前回と比較し、改善していれば同じ方向へ、
+  悪化していれば逆方向へ1ステップ動かす（横ばいは飽和とみなし減らす方向に寄せる）
+- CPU / メモリ使用率が上限を超えた場合はスループットに関係なく減らす
+- SQSの待機メッセージ数が現在のワーカー数以下なら増やさない（入力律速で計測が無意味なため）
+- ワーカー数は常に [min_workers, max_workers] に収める
+
+インスタンスタイプやファイル構成ごとにMAX_WORKERSを手動で調整する代わりに使う。
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyController:
+    """スループット山登り法によるワーカー数コントローラー（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        initial: int,
+        min_workers: int = 1,
+        max_workers: int = 16,
+        interval_seconds: float = 30.0,
+        step: int = 1,
+        tolerance: float = 0.1,
+        cpu_ceiling: float = 90.0,
+        memory_ceiling: float = 85.0,
+        queue_depth_fn: Optional[Callable[[], Optional[int]]] = None,
+        on_resize: Optional[Callable[[int], None]] = None
+    ):
+        """
+        初期化
+
+        Args:
+            initial: 初期ワーカー数
+            min_workers: 下限
+            max_workers: 上限（安全上限）
+            interval_seconds: 調整間隔（1回の計測ウィンドウ）
+            step: 1回の調整幅
+            tolerance: スループット変化を有意とみなす割合
+            cpu_ceiling: これ以上のCPU使用率（%）では減らす
+            memory_ceiling: これ以上のメモリ使用率（%）では減らす
+            queue_depth_fn: SQS待機メッセージ数を返す関数（不明ならNone）
+            on_resize: ワーカー数変更時に呼び出すコールバック
+        """
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.interval_seconds = interval_seconds
+        self.step = max(1, step)
+        self.tolerance = tolerance
+        self.cpu_ceiling = cpu_ceiling
+        self.memory_ceiling = memory_ceiling
+        self.queue_depth_fn = queue_depth_fn
+        self.on_resize = on_resize
+
+        self._lock = threading.Lock()
+        self._current = self._clamp(initial)
+        self._direction = 1
+        self._last_throughput: Optional[float] = None
+        self._window_start = time.monotonic()
+        self._window_completed = 0
+        self._window_latency = 0.0
+
+        self.stats = {
+            'adjustments': 0,
+            'increases': 0,
+            'decreases': 0,
+            'pressure_backoffs': 0,
+            'last_throughput': 0.0,
+            'last_latency': 0.0,
+        }
+
+        # cpu_percent(None)は前回呼び出しからの使用率を返すため初回で基準を取る
+        psutil.cpu_percent(None)
+
+        logger.info(
+            f"ConcurrencyController initialized: workers={self._current} "
+            f"(min={self.min_workers}, max={self.max_workers}, interval={interval_seconds}s)"
+        )
+
+    @property
+    def current(self) -> int:
+        """現在のワーカー数"""
+        with self._lock:
+            return self._current
+
+    def set_max_workers(self, max_workers: int) -> int:
+        """
+        上限を変更（実行モードで決まる上限に合わせる。on_resizeは呼び出さない）
+
+        Args:
+            max_workers: 新しい上限
+
+        Returns:
+            変更後のワーカー数
+        """
+        with self._lock:
+            self.max_workers = max(self.min_workers, max_workers)
+            self._current = self._clamp(self._current)
+            return self._current
+
+    def record(self, latency_seconds: float, count: int = 1):
+        """
+        処理完了を記録
+
+        Args:
+            latency_seconds: 1件の処理時間（秒）
+            count: 完了件数
+        """
+        with self._lock:
+            self._window_completed += count
+            self._window_latency += latency_seconds * count
+
+    def maybe_adjust(self) -> int:
+        """調整間隔が経過していれば調整する（受信ループから毎回呼び出してよい）"""
+        with self._lock:
+            due = time.monotonic() - self._window_start >= self.interval_seconds
+        if due:
+            return self.adjust()
+        return self.current
+
+    def adjust(self) -> int:
+        """
+        直前ウィンドウの計測値からワーカー数を1ステップ調整
+
+        Returns:
+            調整後のワーカー数
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(now - self._window_start, 1e-6)
+            completed = self._window_completed
+            throughput = completed / elapsed
+            latency = self._window_latency / completed if completed else 0.0
+            self._window_start = now
+            self._window_completed = 0
+            self._window_latency = 0.0
+            current = self._current
+            last_throughput = self._last_throughput
+
+        cpu = psutil.cpu_percent(None)
+        memory = psutil.virtual_memory().percent
+        backlog = self._queue_depth()
+
+        reason = None
+        if cpu >= self.cpu_ceiling or memory >= self.memory_ceiling:
+            direction = -1
+            reason = f"pressure cpu={cpu:.0f}% mem={memory:.0f}%"
+        elif completed == 0 and not backlog:
+            # アイドル中は計測できないので据え置き
+            direction = 0
+        elif last_throughput is None:
+            direction = 1
+        elif throughput > last_throughput * (1 + self.tolerance):
+            direction = self._direction
+        elif throughput < last_throughput * (1 - self.tolerance):
+            direction = -self._direction
+        else:
+            # 横ばい: 増やしても効果がないので少ない側へ寄せる
+            direction = -1
+
+        if direction > 0 and backlog is not None and backlog <= current:
+            direction = 0
+
+        target = self._clamp(current + direction * self.step)
+
+        with self._lock:
+            if direction != 0:
+                self._direction = direction
+            if direction != 0 or completed:
+                self._last_throughput = throughput
+            self._current = target
+            self.stats['last_throughput'] = round(throughput, 3)
+            self.stats['last_latency'] = round(latency, 3)
+            if target != current:
+                self.stats['adjustments'] += 1
+                self.stats['increases' if target > current else 'decreases'] += 1
+                if reason:
+                    self.stats['pressure_backoffs'] += 1
+
+        if target != current:
+            logger.info(
+                f"Concurrency {current} -> {target}: {throughput:.2f} docs/s, "
+                f"avg latency {latency:.1f}s, backlog={backlog}" + (f", {reason}" if reason else "")
+            )
+            if self.on_resize is not None:
+                try:
+                    self.on_resize(target)
+                except Exception as e:
+                    logger.error(f"Failed to apply concurrency {target}: {e}")
+
+        return target
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計と現在のワーカー数"""
+        with self._lock:
+            return {**self.stats, 'workers': self._current}
+
+    def _queue_depth(self) -> Optional[int]:
+        """SQS待機メッセージ数（取得できない場合はNone）"""
+        if self.queue_depth_fn is None:
+            return None
+        try:
+            return self.queue_depth_fn()
+        except Exception as e:
+            logger.warning(f"Failed to get queue depth: {e}")
+            return None
+
+    def _clamp(self, workers: int) -> int:
+        """ワーカー数を上下限に収める"""
+        return max(self.min_workers, min(self.max_workers, workers))
@@ -0,0 +1,211 @@
+"""
+Embedding Batch Queue Service
+画像埋め込みリクエストをキューに溜め、複数画像を1回のLambda呼び出しにまとめる
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingEmbedding:
+    """キュー内の埋め込みリクエスト"""
+    s3_url: str
+    callback: Callable[[Optional[Dict[str, Any]]], None]
+    added_at: float
+
+
+class EmbeddingBatchQueue:
+    """
+    スレッドセーフな画像埋め込みバッチキュー
+
+    - 件数または最大待機時間のいずれかでフラッシュ
+    - フラッシュ単位で1回のLambda呼び出し（Lambda側で画像をスタックしてCLIP推論）
+    - 結果は画像ごとにコールバックで待機中のドキュメントへ返す
+    - Lambda呼び出し中はロックを保持しないため、複数バッチが並行して実行される
+    """
+
+    def __init__(
+        self,
+        generator,
+        max_batch_size: int = 8,
+        max_wait_seconds: float = 0.5,
+        use_cache: bool = True
+    ):
+        """
+        初期化
+
+        Args:
+            generator: ImageEmbeddingGenerator（generate_embeddings_batchを持つこと）
+            max_batch_size: 1回の呼び出しに含める最大画像数
+            max_wait_seconds: 最古のリクエストの最大待機秒数
+            use_cache: Lambda側のDynamoDBキャッシュを使用するか
+        """
+        self.generator = generator
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self.use_cache = use_cache
+
+        self._buffer: List[_PendingEmbedding] = []
+        self._lock = threading.Lock()
+
+        self._stop_event = threading.Event()
+        self._timer_thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'invocations': 0,
+            'images': 0,
+            'failed': 0,
+        }
+
+        logger.info(
+            f"EmbeddingBatchQueue initialized: max_batch_size={self.max_batch_size}, "
+            f"max_wait={self.max_wait_seconds}s"
+        )
+
+    def start(self):
+        """最大待機時間ベースのフラッシュスレッドを起動"""
+        if self._timer_thread and self._timer_thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._timer_thread = threading.Thread(
+            target=self._timer_loop,
+            name='embedding-queue-timer',
+            daemon=True
+        )
+        self._timer_thread.start()
+
+    def add(self, s3_url: str, callback: Callable[[Optional[Dict[str, Any]]], None]):
+        """
+        埋め込みリクエストを追加（バッチが満杯の場合は呼び出しスレッドでフラッシュ）
+
+        Args:
+            s3_url: 画像のS3 URL
+            callback: 結果通知（generate_embeddingと同じ形式、失敗時はNone）
+        """
+        batch = None
+
+        with self._lock:
+            self._buffer.append(_PendingEmbedding(
+                s3_url=s3_url,
+                callback=callback,
+                added_at=time.time()
+            ))
+            if len(self._buffer) >= self.max_batch_size:
+                batch = self._take_batch()
+
+        if batch:
+            self._invoke(batch)
+
+    def embed_and_wait(self, s3_url: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        リクエストを追加し、バッチ結果を受け取るまで待機
+
+        Args:
+            s3_url: 画像のS3 URL
+            timeout: 最大待機秒数
+
+        Returns:
+            埋め込み結果、失敗またはタイムアウト時はNone
+        """
+        done = threading.Event()
+        outcome: Dict[str, Any] = {}
+
+        def _deliver(result: Optional[Dict[str, Any]]):
+            outcome['result'] = result
+            done.set()
+
+        self.add(s3_url, _deliver)
+
+        if not done.wait(timeout):
+            logger.warning(f"Embedding result timed out after {timeout}s: {s3_url}")
+            return None
+
+        return outcome['result']
+
+    def flush(self):
+        """キュー内のリクエストをすべて送信"""
+        while True:
+            with self._lock:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._invoke(batch)
+
+    def pending(self) -> int:
+        """キュー内の件数"""
+        with self._lock:
+            return len(self._buffer)
+
+    def close(self):
+        """タイマーを停止し残りのリクエストを送信"""
+        self._stop_event.set()
+        if self._timer_thread:
+            self._timer_thread.join(timeout=5)
+            self._timer_thread = None
+        self.flush()
+
+    def _take_batch(self) -> List[_PendingEmbedding]:
+        """先頭から最大max_batch_size件を取り出す（ロック保持中に呼ぶこと）"""
+        batch = self._buffer[:self.max_batch_size]
+        self._buffer = self._buffer[self.max_batch_size:]
+        return batch
+
+    def _invoke(self, batch: List[_PendingEmbedding]):
+        """1バッチ分のLambda呼び出しを行い、各コールバックに結果を返す"""
+        logger.info(f"Invoking embedding Lambda for {len(batch)} image(s)...")
+
+        try:
+            results = self.generator.generate_embeddings_batch(
+                [item.s3_url for item in batch],
+                use_cache=self.use_cache
+            )
+        except Exception as e:
+            logger.error(f"Batched embedding invocation failed: {e}", exc_info=True)
+            results = [None] * len(batch)
+
+        failed = 0
+        for item, result in zip(batch, results):
+            if result is None:
+                failed += 1
+            try:
+                item.callback(result)
+            except Exception as e:
+                logger.error(f"Embedding callback failed: {e}", exc_info=True)
+
+        with self._lock:
+            self.stats['invocations'] += 1
+            self.stats['images'] += len(batch)
+            self.stats['failed'] += failed
+
+    def _timer_loop(self):
+        """最古のリクエストが最大待機時間を超えたらフラッシュ"""
+        interval = max(0.02, self.max_wait_seconds / 4)
+
+        while not self._stop_event.wait(interval):
+            with self._lock:
+                oldest = self._buffer[0].added_at if self._buffer else None
+                batch = None
+                if oldest is not None and time.time() - oldest >= self.max_wait_seconds:
+                    batch = self._take_batch()
+
+            if batch:
+                try:
+                    self._invoke(batch)
+                except Exception as e:
+                    logger.error(f"Timed embedding flush failed: {e}", exc_info=True)
+
+    def __enter__(self):
+        """コンテキストマネージャー開始"""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """コンテキストマネージャー終了時にフラッシュ"""
+        self.close()
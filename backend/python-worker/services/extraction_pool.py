@@ -0,0 +1,347 @@
+"""
+Process Pool Extraction Service
+GILを回避するための常駐プロセスプールによるファイル抽出バックエンド
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+import psutil
+
+from processors.base_processor import ProcessingResult
+
+logger = logging.getLogger(__name__)
+
+
+# 子プロセス内で一度だけ初期化されるグローバル状態
+_child_router = None
+
+
+class ExtractionPoolBroken(Exception):
+    """
+    プールの子プロセスが異常終了してタスクが失われた（ファイル自体の失敗とは限らない）
+
+    呼び出し側はDLQに送らず、メッセージを再配信させて再試行する
+    """
+
+
+def _init_extraction_child(config):
+    """
+    プール初期化関数（子プロセス毎に1回だけ実行）
+
+    FileRouterと全プロセッサをここで生成し、以降のタスクで再利用する。
+
+    Args:
+        config: 親プロセスから渡された設定オブジェクト
+    """
+    global _child_router
+
+    # 親のシグナルハンドラを継承しない（停止は親が制御する）
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from file_router import FileRouter
+
+    # 子プロセスはos._exitで終了しatexitが実行されないため、常駐sofficeプールは使わない
+    # （リサイクルのたびにsofficeが残る）。Office変換は文書ごとのプロセスで行う
+    config.processing.office_pool_size = 0
+
+    _child_router = FileRouter(config)
+
+    logging.getLogger(__name__).info(f"Extraction child initialized (pid={os.getpid()})")
+
+
+def _extract_in_child(
+    file_path: str,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Tuple[ProcessingResult, Dict[str, Any]]:
+    """
+    子プロセスで実行される抽出タスク
+
+    Args:
+        file_path: ローカルファイルパス
+        metadata: 呼び出し元のメタデータ（S3キー等、ログ用途のみ）
+
+    Returns:
+        (ProcessingResult, 子プロセス情報)
+    """
+    started = time.time()
+    result = _child_router.process_file(file_path)
+
+    if not result.success and metadata:
+        logging.getLogger(__name__).warning(
+            f"Extraction failed for {metadata.get('key', file_path)}: {result.error_message}"
+        )
+
+    try:
+        rss_mb = psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+    except Exception:
+        rss_mb = 0.0
+
+    child_info = {
+        'pid': os.getpid(),
+        'rss_mb': rss_mb,
+        'elapsed_seconds': time.time() - started,
+    }
+
+    return result, child_info
+
+
+class ProcessPoolExtractor:
+    """
+    常駐プロセスプールによる抽出バックエンド
+
+    - 子プロセスはプール初期化時にFileRouter/プロセッサを一度だけ生成
+    - タスクにはローカルファイルパスとメタデータのみを渡す
+    - ProcessingResultをそのまま返す（FileRouter.process_fileと同じインターフェース）
+    - タスク数(max_tasks_per_child)と子プロセスのRSSでプロセスをリサイクル
+    - タイムアウト時は旧プールを退役させ、同じプールの他タスクの完了後に停止した子を終了
+    - resize()で子プロセス数を実行中に変更（適応的並列度から呼び出す）
+    """
+
+    def __init__(
+        self,
+        config,
+        processes: Optional[int] = None,
+        max_tasks_per_child: int = 200,
+        max_child_memory_mb: float = 1500.0,
+        task_timeout: Optional[float] = None
+    ):
+        """
+        初期化
+
+        Args:
+            config: アプリケーション設定
+            processes: 子プロセス数（Noneの場合はCPUコア数）
+            max_tasks_per_child: 子プロセスを入れ替えるまでのタスク数
+            max_child_memory_mb: このRSSを超えた子が出たらプールを入れ替える
+            task_timeout: 1タスクの最大待機秒数（Noneの場合はprocessing_timeout）
+        """
+        self.config = config
+        self.processes = processes or os.cpu_count() or 1
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_child_memory_mb = max_child_memory_mb
+        self.task_timeout = task_timeout or config.processing.processing_timeout
+
+        # spawnでプロセッサのネイティブライブラリ状態をforkで共有しない
+        self._mp_context = multiprocessing.get_context('spawn')
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._generation = 0
+
+        # プールごとの待機中タスク数と、タスク完了後に子を終了させる退役プール
+        self._in_flight: Dict[ProcessPoolExecutor, int] = {}
+        self._retired: Dict[ProcessPoolExecutor, List[Any]] = {}
+
+        self.stats = {
+            'tasks': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'broken': 0,
+            'recycles': 0,
+            'peak_child_rss_mb': 0.0,
+        }
+
+        self._executor = self._create_executor()
+
+        logger.info(
+            f"ProcessPoolExtractor initialized: processes={self.processes}, "
+            f"max_tasks_per_child={self.max_tasks_per_child}, "
+            f"max_child_memory_mb={self.max_child_memory_mb}"
+        )
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """プロセスプールを生成"""
+        self._generation += 1
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=self._mp_context,
+            initializer=_init_extraction_child,
+            initargs=(self.config,),
+            max_tasks_per_child=self.max_tasks_per_child or None
+        )
+
+    def _recycle(self, executor: ProcessPoolExecutor, reason: str, kill_when_idle: bool = False):
+        """
+        プールを入れ替える（実行中タスクは旧プールで完了させる）
+
+        Args:
+            executor: 入れ替え対象のプール
+            reason: ログ用の理由
+            kill_when_idle: 旧プールで待機中のタスクがなくなったら子プロセスを終了する
+                （停止した子を残さないため。子を1つでも終了させるとプール全体が
+                BrokenProcessPoolになるので、他タスクの完了を待つ）
+        """
+        with self._lock:
+            if self._executor is not executor:
+                # 他スレッドが既に入れ替え済み
+                return
+            self._executor = self._create_executor()
+            self.stats['recycles'] += 1
+            if kill_when_idle:
+                self._retired[executor] = list((getattr(executor, '_processes', None) or {}).values())
+
+        logger.info(f"Recycling extraction pool (generation {self._generation}): {reason}")
+        executor.shutdown(wait=False)
+        self._reap_if_idle(executor)
+
+    def _reap_if_idle(self, executor: ProcessPoolExecutor):
+        """退役プールで待機中のタスクがなければ子プロセスを終了"""
+        with self._lock:
+            if executor not in self._retired or self._in_flight.get(executor):
+                return
+            processes = self._retired.pop(executor)
+
+        self._terminate_processes(processes)
+
+    @staticmethod
+    def _terminate_processes(processes, grace_seconds: float = 5.0):
+        """
+        子プロセスをSIGTERMで終了させ、猶予内に終了しなければSIGKILL
+
+        Args:
+            processes: multiprocessing.Processのリスト
+            grace_seconds: SIGTERM後に待つ秒数
+        """
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + grace_seconds
+        for process in processes:
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Extraction child {process.pid} ignored SIGTERM, killing")
+                process.kill()
+                process.join(timeout=1)
+
+    def process_file(
+        self,
+        file_path: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> ProcessingResult:
+        """
+        子プロセスでファイルを処理
+
+        Args:
+            file_path: ローカルファイルパス
+            metadata: 付随メタデータ（S3キー等）
+
+        Returns:
+            ProcessingResult（失敗時はsuccess=False）
+
+        Raises:
+            ExtractionPoolBroken: 子プロセスの異常終了でタスクが失われた場合（再試行可能）
+        """
+        with self._lock:
+            executor = self._executor
+            self.stats['tasks'] += 1
+            self._in_flight[executor] = self._in_flight.get(executor, 0) + 1
+
+        try:
+            future = executor.submit(_extract_in_child, file_path, metadata)
+            result, child_info = future.result(timeout=self.task_timeout)
+
+        except FutureTimeoutError:
+            with self._lock:
+                self.stats['timeouts'] += 1
+                self.stats['failed'] += 1
+            logger.error(f"Extraction timed out after {self.task_timeout}s: {file_path}")
+            # 停止した子がスロットを占有し続けないよう新しいプールへ切り替える。
+            # 旧プールの他タスクはそのまま完了させ、最後のタスクの後で停止した子を終了する
+            self._recycle(executor, "task timeout", kill_when_idle=True)
+            return ProcessingResult(
+                success=False,
+                error_message=f"Extraction timed out after {self.task_timeout}s",
+                file_path=file_path
+            )
+
+        except BrokenProcessPool as e:
+            with self._lock:
+                self.stats['broken'] += 1
+            logger.error(f"Extraction child crashed while processing {file_path}: {e}")
+            self._recycle(executor, "broken process pool")
+            raise ExtractionPoolBroken(f"Extraction process crashed: {e}") from e
+
+        except Exception as e:
+            with self._lock:
+                self.stats['failed'] += 1
+            logger.error(f"Extraction failed for {file_path}: {e}", exc_info=True)
+            return ProcessingResult(
+                success=False,
+                error_message=f"Extraction error: {e}",
+                file_path=file_path
+            )
+
+        finally:
+            with self._lock:
+                self._in_flight[executor] -= 1
+                if not self._in_flight[executor]:
+                    del self._in_flight[executor]
+            self._reap_if_idle(executor)
+
+        rss_mb = child_info.get('rss_mb', 0.0)
+        with self._lock:
+            self.stats['peak_child_rss_mb'] = max(self.stats['peak_child_rss_mb'], rss_mb)
+            if not result.success:
+                self.stats['failed'] += 1
+
+        if self.max_child_memory_mb and rss_mb > self.max_child_memory_mb:
+            self._recycle(
+                executor,
+                f"child {child_info.get('pid')} RSS {rss_mb:.0f}MB > {self.max_child_memory_mb:.0f}MB"
+            )
+
+        return result
+
+    def resize(self, processes: int):
+        """
+        子プロセス数を実行中に変更
+
+        ProcessPoolExecutorは生成後にサイズを変えられないため、新しいサイズのプールへ
+        入れ替える。実行中タスクは旧プールで完了させる（タスクは失われない）。
+
+        Args:
+            processes: 新しい子プロセス数（1以上）
+        """
+        processes = max(1, processes)
+        with self._lock:
+            executor = self._executor
+            if executor is None or processes == self.processes:
+                return
+            self.processes = processes
+
+        self._recycle(executor, f"resized to {processes} process(es)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['generation'] = self._generation
+        stats['processes'] = self.processes
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        """プールを停止"""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+            logger.info(f"ProcessPoolExtractor shut down: {self.get_stats()}")
+
+    def __enter__(self):
+        """コンテキストマネージャー開始"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """コンテキストマネージャー終了"""
+        self.shutdown()
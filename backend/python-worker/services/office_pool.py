@@ -0,0 +1,424 @@
+"""
+LibreOffice Converter Pool Service
+常駐するheadless sofficeにUNO経由でPDF変換を依頼するプール（ec2-workerのoffice_poolと同一実装）
+
+- 文書ごとのsoffice起動（数秒）を省き、インスタンスごとに別プロファイルを使うため
+  共有プロファイルのロックで直列化されない
+- 空きインスタンスをキューで貸し出し、全て使用中なら空くまで待機する
+- 貸し出し時にプロセス生存とUNO応答を確認し、異常なインスタンスは再起動する
+- max_conversions回変換したインスタンスは再起動（LibreOfficeのメモリ増加対策）
+- タイムアウトした変換はインスタンスごと強制終了し、次回の貸し出し時に再起動する
+- pyuno（python3-uno）が無い環境ではget_shared_pool()がNoneを返し、
+  呼び出し側は従来の1文書1プロセス変換を使う
+"""
+
+import atexit
+import logging
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# sofficeの起動からUNO接続可能になるまでの最大待機秒数
+DEFAULT_STARTUP_TIMEOUT = 60.0
+
+# 再起動までの変換数
+DEFAULT_MAX_CONVERSIONS = 200
+
+# 文書種類ごとのPDFエクスポートフィルタ（supportsServiceで判定）
+PDF_EXPORT_FILTERS = (
+    ('com.sun.star.sheet.SpreadsheetDocument', 'calc_pdf_Export'),
+    ('com.sun.star.presentation.PresentationDocument', 'impress_pdf_Export'),
+    ('com.sun.star.drawing.DrawingDocument', 'draw_pdf_Export'),
+    ('com.sun.star.text.TextDocument', 'writer_pdf_Export'),
+)
+
+
+class OfficePoolUnavailable(Exception):
+    """プールで変換できない（インスタンス起動失敗・待機タイムアウト）。呼び出し側は従来方式で変換する"""
+
+
+def _import_uno():
+    """pyunoをインポート（無ければNone）"""
+    try:
+        import uno
+        return uno
+    except ImportError:
+        return None
+
+
+def uno_available() -> bool:
+    """pyunoが利用可能か"""
+    return _import_uno() is not None
+
+
+class SofficeInstance:
+    """UNOパイプで接続する常駐headless soffice 1プロセス"""
+
+    def __init__(self, index: int, soffice_path: str, startup_timeout: float = DEFAULT_STARTUP_TIMEOUT):
+        """
+        Args:
+            index: プール内の番号（プロファイル・パイプ名に使用）
+            soffice_path: soffice実行ファイル
+            startup_timeout: 起動待機秒数
+        """
+        self.index = index
+        self.soffice_path = soffice_path
+        self.startup_timeout = startup_timeout
+        # ワーカープロセスが複数あっても衝突しないようPIDを含める
+        self.pipe_name = f"cis-office-{os.getpid()}-{index}"
+        self.profile_dir = os.path.join(tempfile.gettempdir(), f"cis-office-profile-{os.getpid()}-{index}")
+        self.conversions = 0
+        self.timed_out = False
+        self._process: Optional[subprocess.Popen] = None
+        self._desktop = None
+
+    def start(self):
+        """sofficeを起動しUNO接続する（失敗時は例外）"""
+        uno = _import_uno()
+        if uno is None:
+            raise OfficePoolUnavailable("pyuno is not installed")
+
+        self.conversions = 0
+        self.timed_out = False
+        cmd = [
+            self.soffice_path,
+            '--headless',
+            '--invisible',
+            '--nologo',
+            '--norestore',
+            '--nodefault',
+            '--nolockcheck',
+            '--nofirststartwizard',
+            f"-env:UserInstallation=file://{self.profile_dir}",
+            f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+        ]
+        # sofficeはラッパー → soffice.binと子プロセスを作るためプロセスグループごと管理する
+        self._process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+
+        local_ctx = uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local_ctx
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            try:
+                ctx = resolver.resolve(f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext")
+                self._desktop = ctx.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', ctx)
+                break
+            except Exception as e:
+                if self._process.poll() is not None or time.monotonic() >= deadline:
+                    self.kill()
+                    raise OfficePoolUnavailable(f"soffice #{self.index} did not start: {e}")
+                time.sleep(0.25)
+
+        logger.info(f"soffice #{self.index} started (pid={self._process.pid})")
+
+    def is_running(self) -> bool:
+        """起動済みでプロセスが生存しているか"""
+        return self._process is not None and self._process.poll() is None and self._desktop is not None
+
+    def is_healthy(self) -> bool:
+        """プロセス生存とUNO応答を確認"""
+        if not self.is_running():
+            return False
+        try:
+            self._desktop.getComponents()
+            return True
+        except Exception:
+            return False
+
+    def convert(self, input_path: str, output_path: str):
+        """
+        文書をPDFに変換（失敗時は例外）
+
+        Args:
+            input_path: 入力ファイルパス
+            output_path: 出力PDFパス
+        """
+        uno = _import_uno()
+        load_props = self._props(uno, Hidden=True, ReadOnly=True, UpdateDocMode=0)
+        document = self._desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(input_path)), '_blank', 0, load_props
+        )
+        if document is None:
+            raise RuntimeError(f"LibreOffice could not load {Path(input_path).name}")
+
+        try:
+            filter_name = 'writer_pdf_Export'
+            for service, name in PDF_EXPORT_FILTERS:
+                if document.supportsService(service):
+                    filter_name = name
+                    break
+            document.storeToURL(
+                uno.systemPathToFileUrl(os.path.abspath(output_path)),
+                self._props(uno, FilterName=filter_name)
+            )
+        finally:
+            try:
+                document.close(True)
+            except Exception:
+                document.dispose()
+
+    def kill(self):
+        """プロセスグループを強制終了（ハング時）"""
+        self._desktop = None
+        if self._process is not None and self._process.poll() is None:
+            try:
+                os.killpg(self._process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+            self._process.wait(timeout=5)
+        self._process = None
+
+    def stop(self):
+        """正常終了を試み、応答がなければ強制終了してプロファイルを削除"""
+        if self._desktop is not None:
+            try:
+                self._desktop.terminate()
+            except Exception:
+                pass
+            self._desktop = None
+
+        if self._process is not None:
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+            self.kill()
+
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    @staticmethod
+    def _props(uno, **values):
+        """UNOのPropertyValueタプルを作成"""
+        props = []
+        for name, value in values.items():
+            prop = uno.createUnoStruct('com.sun.star.beans.PropertyValue')
+            prop.Name = name
+            prop.Value = value
+            props.append(prop)
+        return tuple(props)
+
+
+class OfficeConverterPool:
+    """常駐sofficeインスタンスのプール（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        soffice_path: str,
+        size: int = 2,
+        max_conversions: int = DEFAULT_MAX_CONVERSIONS,
+        acquire_timeout: float = 300.0,
+        startup_timeout: float = DEFAULT_STARTUP_TIMEOUT,
+        instance_factory: Optional[Callable[[int], Any]] = None
+    ):
+        """
+        初期化（sofficeは最初の貸し出し時に起動）
+
+        Args:
+            soffice_path: soffice実行ファイル
+            size: 常駐インスタンス数
+            max_conversions: インスタンスを再起動するまでの変換数
+            acquire_timeout: 空きインスタンスを待つ最大秒数
+            startup_timeout: soffice起動待機秒数
+            instance_factory: インスタンス生成関数（番号 → インスタンス）
+        """
+        self.size = max(1, size)
+        self.max_conversions = max(1, max_conversions)
+        self.acquire_timeout = acquire_timeout
+
+        factory = instance_factory or (lambda index: SofficeInstance(index, soffice_path, startup_timeout))
+        self._instances = [factory(index) for index in range(self.size)]
+        self._idle: queue.Queue = queue.Queue()
+        for instance in self._instances:
+            self._idle.put(instance)
+
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {
+            'conversions': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'restarts': 0,
+            'recycled': 0,
+            'waited': 0,
+        }
+
+        logger.info(f"OfficeConverterPool initialized: size={self.size}, max_conversions={self.max_conversions}")
+
+    def convert(self, input_path: str, output_dir: Optional[str] = None, timeout: float = 120) -> Optional[str]:
+        """
+        Office文書をPDFに変換
+
+        Args:
+            input_path: 入力ファイルパス
+            output_dir: 出力ディレクトリ（Noneの場合は一時ディレクトリ）
+            timeout: 変換タイムアウト秒数（超過したインスタンスは強制終了）
+
+        Returns:
+            生成されたPDFのパス、変換失敗時はNone
+
+        Raises:
+            OfficePoolUnavailable: インスタンスを確保・起動できない場合
+        """
+        instance = self._acquire()
+
+        cleanup_output_dir = output_dir is None
+        if output_dir is None:
+            output_dir = tempfile.mkdtemp(prefix='office_convert_')
+        else:
+            os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, f"{Path(input_path).stem}.pdf")
+
+        restart = False
+        watchdog = threading.Timer(timeout, self._on_timeout, args=(instance,))
+        watchdog.daemon = True
+        started = time.time()
+        try:
+            watchdog.start()
+            instance.convert(input_path, output_path)
+            if not os.path.exists(output_path):
+                raise RuntimeError("PDF output was not created")
+
+            with self._lock:
+                self.stats['conversions'] += 1
+            logger.info(
+                f"Converted {Path(input_path).name} to PDF on soffice #{instance.index} "
+                f"in {time.time() - started:.1f}s"
+            )
+            return output_path
+
+        except Exception as e:
+            if instance.timed_out:
+                logger.error(f"LibreOffice conversion timed out after {timeout}s for {Path(input_path).name}")
+            else:
+                logger.error(f"LibreOffice conversion failed for {Path(input_path).name}: {e}")
+                with self._lock:
+                    self.stats['failed'] += 1
+            restart = instance.timed_out or not instance.is_healthy()
+            if cleanup_output_dir:
+                shutil.rmtree(output_dir, ignore_errors=True)
+            return None
+
+        finally:
+            watchdog.cancel()
+            self._release(instance, restart)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計と空きインスタンス数"""
+        with self._lock:
+            return {**self.stats, 'size': self.size, 'idle': self._idle.qsize()}
+
+    def shutdown(self):
+        """全インスタンスを停止"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        for instance in self._instances:
+            try:
+                instance.stop()
+            except Exception as e:
+                logger.warning(f"Failed to stop soffice #{instance.index}: {e}")
+        logger.info(f"OfficeConverterPool shut down: {self.get_stats()}")
+
+    def _acquire(self):
+        """空きインスタンスを借りる（必要なら起動・再起動）"""
+        if self._closed:
+            raise OfficePoolUnavailable("pool is shut down")
+
+        try:
+            instance = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.stats['waited'] += 1
+            try:
+                instance = self._idle.get(timeout=self.acquire_timeout)
+            except queue.Empty:
+                raise OfficePoolUnavailable(f"no soffice instance free within {self.acquire_timeout}s")
+
+        if instance.is_healthy():
+            return instance
+
+        try:
+            if instance.is_running():
+                logger.warning(f"soffice #{instance.index} failed health check, restarting")
+            instance.stop()
+            instance.start()
+            with self._lock:
+                self.stats['restarts'] += 1
+            return instance
+        except Exception as e:
+            self._idle.put(instance)
+            if isinstance(e, OfficePoolUnavailable):
+                raise
+            raise OfficePoolUnavailable(f"soffice #{instance.index} failed to start: {e}")
+
+    def _release(self, instance, restart: bool):
+        """インスタンスを返却（ハング・変換数上限の場合は停止し、次回の貸し出しで起動）"""
+        instance.conversions += 1
+        if restart or instance.conversions >= self.max_conversions:
+            if not restart:
+                logger.info(f"Recycling soffice #{instance.index} after {instance.conversions} conversions")
+                with self._lock:
+                    self.stats['recycled'] += 1
+            try:
+                instance.stop()
+            except Exception as e:
+                logger.warning(f"Failed to stop soffice #{instance.index}: {e}")
+        self._idle.put(instance)
+
+    def _on_timeout(self, instance):
+        """変換タイムアウト（ウォッチドッグスレッドから呼ばれる）"""
+        instance.timed_out = True
+        with self._lock:
+            self.stats['timeouts'] += 1
+        logger.warning(f"Killing hung soffice #{instance.index}")
+        instance.kill()
+
+
+_shared_pool: Optional[OfficeConverterPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_pool(soffice_path: Optional[str], size: int, **kwargs) -> Optional[OfficeConverterPool]:
+    """
+    プロセス共有のプールを取得（初回呼び出し時に作成、終了時に停止）
+
+    Args:
+        soffice_path: soffice実行ファイル（Noneの場合はプールなし）
+        size: 常駐インスタンス数（0以下の場合はプールなし）
+        **kwargs: OfficeConverterPoolへの追加引数
+
+    Returns:
+        OfficeConverterPool、利用できない場合はNone
+    """
+    global _shared_pool
+
+    if size <= 0 or not soffice_path:
+        return None
+
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            if not uno_available():
+                logger.info("pyuno not installed - Office conversion uses one soffice process per document")
+                return None
+            _shared_pool = OfficeConverterPool(soffice_path, size=size, **kwargs)
+            atexit.register(_shared_pool.shutdown)
+        return _shared_pool
@@ -0,0 +1,217 @@
+"""
+Path Metadata Service
+S3キー（file_path）からcategory / nas_server / root_folder / nas_pathを抽出する共有パーサー
+
+ワーカーの取り込み処理と保守スクリプト（reindex_with_category, fix_missing_category,
+fix_nas_path）で同じ規則を使う。同一フォルダ配下の数千ファイルは
+{prefix}/{category}/{server}/{root_folder}/ が共通のため、先頭4階層をキーに
+解析結果をLRUキャッシュし、ファイルごとの処理は文字列連結のみにする。
+
+S3キー形式:
+- documents/road/ts-server3/R06_JOB/.../file.xdw
+- processed/road/ts-server5/trashbox/.../file.doc
+- s3://bucket/documents/structure/ts-server6/H22_JOB/.../file.pdf
+
+カテゴリ対応:
+- road: ts-server3, ts-server5 (道路)
+- structure: ts-server6, ts-server7 (構造)
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# {prefix}/{category}/{server}/{root_folder}/
+FOLDER_PREFIX_PATTERN = re.compile(
+    r'^(?:documents|processed|docuworks-converted)/(road|structure)/(ts-server\d+)/([^/]+)$'
+)
+
+# フォールバック用
+SERVER_PATTERN = re.compile(r'ts-server\d+')
+SIMPLE_CATEGORY_PATTERN = re.compile(r'/(road|structure)/')
+
+CATEGORY_DISPLAY_MAP = {
+    'road': '道路',
+    'structure': '構造'
+}
+
+NAS_SERVER_CATEGORY_MAP = {
+    'ts-server3': 'road',
+    'ts-server5': 'road',
+    'ts-server6': 'structure',
+    'ts-server7': 'structure'
+}
+
+# 先頭4階層（フォルダ単位）のキャッシュ上限
+PREFIX_CACHE_SIZE = 4096
+
+
+def parse_path_metadata(path: str, original_path: Optional[str] = None) -> Dict[str, str]:
+    """
+    S3キーからメタデータを抽出
+
+    Args:
+        path: S3キー（s3://bucket/ 付きも可）
+        original_path: file-scannerが記録した元のNASパス（nas_pathに優先使用）
+
+    Returns:
+        category, category_display, nas_server, root_folder, nas_path のうち
+        抽出できたもの
+    """
+    if not path:
+        return {}
+
+    key = _strip_bucket(path.replace('\\', '/'))
+    parts = key.split('/', 4)
+    metadata: Dict[str, str] = {}
+
+    if len(parts) == 5:
+        prefix = _parse_folder_prefix('/'.join(parts[:4]))
+        if prefix is not None:
+            category, nas_server, root_folder = prefix
+            metadata['category'] = category
+            metadata['category_display'] = CATEGORY_DISPLAY_MAP.get(category, category)
+            metadata['nas_server'] = nas_server
+            metadata['root_folder'] = root_folder
+            nas_path = original_to_nas_path(original_path) if original_path else None
+            metadata['nas_path'] = nas_path or _unc(nas_server, f"{root_folder}/{parts[4]}")
+            return metadata
+
+    # フォールバック: サーバー名からカテゴリを推定
+    server_match = SERVER_PATTERN.search(key)
+    if server_match:
+        nas_server = server_match.group()
+        metadata['nas_server'] = nas_server
+        metadata.update(infer_category_from_server(nas_server))
+
+    if 'category' not in metadata:
+        simple_match = SIMPLE_CATEGORY_PATTERN.search(key)
+        if simple_match:
+            category = simple_match.group(1)
+            metadata['category'] = category
+            metadata['category_display'] = CATEGORY_DISPLAY_MAP.get(category, category)
+
+    nas_path = original_to_nas_path(original_path) if original_path else None
+    if nas_path is None:
+        nas_path = s3_key_to_nas_path(key)
+    if nas_path:
+        metadata['nas_path'] = nas_path
+
+    return metadata
+
+
+def parse_path_metadata_bulk(
+    paths: Iterable[str],
+    original_paths: Optional[Iterable[Optional[str]]] = None
+) -> List[Dict[str, str]]:
+    """
+    複数パスをまとめて解析（保守スクリプトのバッチ用）
+
+    Args:
+        paths: S3キーのリスト
+        original_paths: pathsと同順の元NASパス（省略可）
+
+    Returns:
+        pathsと同順のメタデータリスト
+    """
+    if original_paths is None:
+        return [parse_path_metadata(path) for path in paths]
+    return [
+        parse_path_metadata(path, original_path)
+        for path, original_path in zip(paths, original_paths)
+    ]
+
+
+def infer_category_from_server(nas_server: str) -> Dict[str, str]:
+    """
+    nas_serverからカテゴリを推定
+
+    Returns:
+        category, category_display（不明な場合は空dict）
+    """
+    category = NAS_SERVER_CATEGORY_MAP.get(nas_server) if nas_server else None
+    if not category:
+        return {}
+    return {
+        'category': category,
+        'category_display': CATEGORY_DISPLAY_MAP.get(category, category)
+    }
+
+
+def original_to_nas_path(original_path: str) -> Optional[str]:
+    """
+    元のNASパスをWindows UNCパスに変換
+
+    - /mnt/nas/ts-server3/R06_JOB/file.pdf → \\\\ts-server3\\share\\R06_JOB\\file.pdf
+    - /mnt/ts-server3/share/R06_JOB/file.pdf → \\\\ts-server3\\share\\R06_JOB\\file.pdf
+    - \\\\ts-server3\\share\\R06_JOB\\file.pdf → そのまま
+    """
+    if not original_path:
+        return None
+    if original_path.startswith('\\\\'):
+        return original_path
+
+    remaining = _after_server(original_path.replace('\\', '/'))
+    if remaining is None:
+        return None
+    nas_server, path = remaining
+
+    # 'share/' が含まれるパスと含まれないパスがある
+    if path.startswith('share/'):
+        path = path[6:]
+    return _unc(nas_server, path)
+
+
+def s3_key_to_nas_path(path: str) -> Optional[str]:
+    """
+    S3キー（s3://bucket/ 付きも可）をWindows UNCパスに変換
+
+    - documents/structure/ts-server6/H22_JOB/file.pdf → \\\\ts-server6\\share\\H22_JOB\\file.pdf
+    """
+    if not path:
+        return None
+    remaining = _after_server(_strip_bucket(path.replace('\\', '/')))
+    if remaining is None:
+        return None
+    nas_server, key = remaining
+    return _unc(nas_server, key) if key else None
+
+
+def cache_info():
+    """フォルダ単位キャッシュの統計（functools.lru_cacheのCacheInfo）"""
+    return _parse_folder_prefix.cache_info()
+
+
+@lru_cache(maxsize=PREFIX_CACHE_SIZE)
+def _parse_folder_prefix(prefix: str) -> Optional[Tuple[str, str, str]]:
+    """先頭4階層を (category, nas_server, root_folder) に解析（一致しなければNone）"""
+    match = FOLDER_PREFIX_PATTERN.match(prefix)
+    if not match:
+        return None
+    return match.group(1), match.group(2), match.group(3)
+
+
+def _strip_bucket(path: str) -> str:
+    """s3://bucket/ を取り除く"""
+    if path.startswith('s3://'):
+        parts = path[5:].split('/', 1)
+        return parts[1] if len(parts) > 1 else ''
+    return path
+
+
+def _after_server(path: str) -> Optional[Tuple[str, str]]:
+    """(サーバー名, サーバー名以降のパス) を返す"""
+    match = SERVER_PATTERN.search(path)
+    if not match:
+        return None
+    nas_server = match.group()
+    parts = path.split(f'{nas_server}/', 1)
+    if len(parts) < 2:
+        return None
+    return nas_server, parts[1]
+
+
+def _unc(nas_server: str, path: str) -> str:
+    """UNCパス \\\\{server}\\share\\{path} を組み立てる"""
+    windows_path = path.replace('/', '\\')
+    return f"\\\\{nas_server}\\share\\{windows_path}"
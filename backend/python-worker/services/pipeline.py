@@ -0,0 +1,326 @@
+"""
+Streaming Pipeline Service
+有界キューで接続したステージ群によるストリーミング処理
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PipelineItem:
+    """パイプラインを流れる1件分の処理単位"""
+
+    payload: Any
+    context: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    finished: bool = False
+    deferred: bool = False
+    failed_stage: Optional[str] = None
+    enqueued_at: float = field(default_factory=time.time)
+    stage_timings: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class Stage:
+    """
+    パイプラインステージ定義
+
+    handlerはPipelineItemを受け取りboolを返す。
+    Falseの場合はitem.errorを設定して失敗扱い、
+    item.finished=Trueの場合は後続ステージをスキップして成功扱いとなる。
+    item.deferred=Trueの場合は完了を保留し、後でStreamingPipeline.complete()を呼び出す。
+    """
+
+    name: str
+    handler: Callable[[PipelineItem], bool]
+    workers: int = 1
+    queue_size: int = 10
+
+
+class StreamingPipeline:
+    """
+    ステージ毎にワーカースレッドと有界キューを持つパイプライン
+
+    - 各ステージは独立したスレッド数で動作し、遅いファイルが他を止めない
+    - 有界キューとin-flight上限によるバックプレッシャー
+    - 完了(成功/失敗)時にon_completeコールバックを呼び出す
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        on_complete: Callable[[PipelineItem, bool], None],
+        max_in_flight: int = 20
+    ):
+        """
+        初期化
+
+        Args:
+            stages: ステージ定義のリスト（実行順）
+            on_complete: 完了コールバック (item, success)
+            max_in_flight: パイプライン内に同時に存在できる最大件数
+        """
+        if not stages:
+            raise ValueError("At least one stage is required")
+
+        self.stages = stages
+        self.on_complete = on_complete
+        self.max_in_flight = max_in_flight
+
+        self._queues: List[queue.Queue] = [
+            queue.Queue(maxsize=max(1, stage.queue_size)) for stage in stages
+        ]
+        self._threads: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+
+        self._lock = threading.Lock()
+        self._capacity = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._stage_busy = {stage.name: 0 for stage in stages}
+        self._stage_target = {stage.name: max(1, stage.workers) for stage in stages}
+        self._stage_alive = {stage.name: 0 for stage in stages}
+        self._stage_spawned = {stage.name: 0 for stage in stages}
+
+    def start(self):
+        """ステージワーカースレッドを起動"""
+        for index, stage in enumerate(self.stages):
+            for _ in range(self._stage_target[stage.name]):
+                self._spawn_worker(index)
+
+        logger.info(
+            "Pipeline started: " +
+            " -> ".join(f"{s.name}(x{max(1, s.workers)})" for s in self.stages)
+        )
+
+    def resize_stage(self, name: str, workers: int):
+        """
+        ステージのワーカースレッド数を実行中に変更
+
+        増やす場合は即座にスレッドを追加し、減らす場合は余剰スレッドが
+        処理中のアイテムを終えた後に終了する（アイテムは失われない）。
+
+        Args:
+            name: ステージ名
+            workers: 新しいワーカー数（1以上）
+        """
+        index = next((i for i, stage in enumerate(self.stages) if stage.name == name), None)
+        if index is None:
+            raise ValueError(f"Unknown stage: {name}")
+
+        workers = max(1, workers)
+        with self._lock:
+            self._stage_target[name] = workers
+            to_spawn = 0
+            if self._threads and not self._stop_event.is_set():
+                to_spawn = max(0, workers - self._stage_alive[name])
+
+        for _ in range(to_spawn):
+            self._spawn_worker(index)
+
+        logger.info(f"Pipeline stage '{name}' resized to {workers} worker(s)")
+
+    def available_slots(self) -> int:
+        """受け入れ可能な残り件数"""
+        with self._lock:
+            return max(0, self.max_in_flight - self._in_flight)
+
+    def wait_for_capacity(self, max_items: int, timeout: float = 1.0) -> int:
+        """
+        空きができるまで待機し、受け入れ可能な件数を返す
+
+        Args:
+            max_items: 要求件数の上限
+            timeout: 最大待機秒数
+
+        Returns:
+            受け入れ可能件数（タイムアウト時は0）
+        """
+        deadline = time.time() + timeout
+        with self._capacity:
+            while self._in_flight >= self.max_in_flight and not self._stop_event.is_set():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return 0
+                self._capacity.wait(remaining)
+            return min(max_items, self.max_in_flight - self._in_flight)
+
+    def submit(self, payload: Any, context: Optional[Dict[str, Any]] = None) -> PipelineItem:
+        """
+        先頭ステージへ投入（キューが満杯の場合はブロック）
+
+        Args:
+            payload: 処理対象（SQSメッセージ等）
+            context: 初期コンテキスト
+
+        Returns:
+            投入したPipelineItem
+        """
+        item = PipelineItem(payload=payload, context=context or {})
+        with self._lock:
+            self._in_flight += 1
+        self._queues[0].put(item)
+        return item
+
+    def in_flight(self) -> int:
+        """処理中件数"""
+        with self._lock:
+            return self._in_flight
+
+    def get_stats(self) -> Dict[str, Any]:
+        """パイプライン統計を取得"""
+        with self._lock:
+            return {
+                'in_flight': self._in_flight,
+                'completed': self._completed,
+                'failed': self._failed,
+                'queue_depths': {
+                    stage.name: self._queues[i].qsize()
+                    for i, stage in enumerate(self.stages)
+                },
+                'busy_workers': dict(self._stage_busy),
+                'stage_workers': dict(self._stage_target),
+            }
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        処理中アイテムが全て完了するまで待機
+
+        Args:
+            timeout: 最大待機秒数（Noneの場合は無制限）
+
+        Returns:
+            全件完了した場合True
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._capacity:
+            while self._in_flight > 0:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._capacity.wait(remaining if remaining is not None else 1.0)
+        return True
+
+    def stop(self, drain_timeout: Optional[float] = None) -> bool:
+        """
+        パイプラインを停止
+
+        Args:
+            drain_timeout: 処理中アイテム完了までの最大待機秒数
+
+        Returns:
+            全件完了してから停止できた場合True
+        """
+        drained = self.drain(drain_timeout)
+        if not drained:
+            logger.warning(f"Pipeline stopped with {self.in_flight()} item(s) still in flight")
+
+        self._stop_event.set()
+        with self._capacity:
+            self._capacity.notify_all()
+
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+        logger.info(f"Pipeline stopped: {self.get_stats()}")
+        return drained
+
+    def _spawn_worker(self, index: int):
+        """ステージワーカースレッドを1つ起動"""
+        name = self.stages[index].name
+        with self._lock:
+            worker_num = self._stage_spawned[name]
+            self._stage_spawned[name] += 1
+            self._stage_alive[name] += 1
+
+        thread = threading.Thread(
+            target=self._stage_loop,
+            args=(index,),
+            name=f"pipeline-{name}-{worker_num}",
+            daemon=True
+        )
+        thread.start()
+        self._threads.append(thread)
+
+    def _stage_loop(self, index: int):
+        """ステージワーカーのメインループ"""
+        stage = self.stages[index]
+        input_queue = self._queues[index]
+        is_last = index == len(self.stages) - 1
+
+        while not self._stop_event.is_set():
+            with self._lock:
+                if self._stage_alive[stage.name] > self._stage_target[stage.name]:
+                    # resize_stage()で縮小された余剰スレッド
+                    self._stage_alive[stage.name] -= 1
+                    return
+
+            try:
+                item = input_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            with self._lock:
+                self._stage_busy[stage.name] += 1
+
+            started = time.time()
+            try:
+                ok = stage.handler(item)
+            except Exception as e:
+                logger.error(f"Stage '{stage.name}' raised: {e}", exc_info=True)
+                item.error = item.error or f"{stage.name} stage error: {e}"
+                ok = False
+            finally:
+                item.stage_timings[stage.name] = time.time() - started
+                with self._lock:
+                    self._stage_busy[stage.name] -= 1
+                input_queue.task_done()
+
+            if not ok:
+                item.failed_stage = stage.name
+                self._complete(item, False)
+            elif item.deferred:
+                # 完了は非同期に通知される（例: バルクインデックスのACK）
+                continue
+            elif item.finished or is_last:
+                self._complete(item, True)
+            else:
+                self._queues[index + 1].put(item)
+
+    def complete(self, item: PipelineItem, success: bool, error: Optional[str] = None):
+        """
+        保留(deferred)中のアイテムを完了させる
+
+        Args:
+            item: 対象アイテム
+            success: 成功したか
+            error: 失敗時のエラー内容
+        """
+        if not success:
+            item.error = error or item.error
+            item.failed_stage = item.failed_stage or self.stages[-1].name
+        self._complete(item, success)
+
+    def _complete(self, item: PipelineItem, success: bool):
+        """完了処理（コールバック呼び出しとin-flight減算）"""
+        try:
+            self.on_complete(item, success)
+        except Exception as e:
+            logger.error(f"Pipeline completion callback failed: {e}", exc_info=True)
+        finally:
+            with self._capacity:
+                self._in_flight -= 1
+                if success:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+                self._capacity.notify_all()
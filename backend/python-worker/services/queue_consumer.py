@@ -0,0 +1,531 @@
+"""
+Async Queue Consumer Service
+asyncioベースのSQS受信・削除ループ（各ワーカー共通、ec2-workerのqueue_consumerと同一実装）
+
+- 複数のLong Pollingを1つのイベントループで多重化（boto3呼び出しは少数のI/Oスレッドにオフロード）
+- 受信数は空き枠（max_in_flight - 処理中件数）までに制限し、処理側の詰まりを受信側へ伝える
+- 削除は呼び出し側のMessageAcknowledgerに任せる（期限の近い順にまとめて送信、バックオフ付きリトライ）
+- 可視性変更は10件単位のBatch APIにまとめ、最大batch_max_delay秒で送信（一時的な失敗はリトライ）
+- 処理中メッセージの可視性タイムアウトをハートビートで延長（heartbeat_interval > 0の場合）
+- 処理はhandlerのスレッドプールまたは呼び出し側のパイプラインで行うため、受信レイテンシは処理時間に依存しない
+
+使い方:
+    acknowledger = MessageAcknowledger(sqs, queue_url, visibility_timeout=300)
+
+    # 1メッセージずつ処理する関数（Trueで削除、Falseで再配信に任せる）
+    consumer = AsyncQueueConsumer(sqs, queue_url, acknowledger, handler=process_message, max_in_flight=8)
+    consumer.run()        # stop()が呼ばれるまでブロック
+    acknowledger.close()  # 残りの削除を送信
+
+    # 受信バッチを独自のパイプラインへ渡す場合（完了時にcomplete()/defer()を呼ぶ）
+    consumer = AsyncQueueConsumer(sqs, queue_url, acknowledger, dispatch=submit_batch, max_in_flight=20)
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# SQS Batch APIの1リクエストあたりの最大件数
+SQS_BATCH_SIZE = 10
+
+# 可視性変更の最大試行回数（一時的な失敗のみリトライ）
+MAX_BATCH_ATTEMPTS = 3
+
+# 受信エラー時の待機秒数
+RECEIVE_ERROR_BACKOFF = 5.0
+
+
+class AsyncQueueConsumer:
+    """asyncioでSQSの受信・削除・可視性変更を行うコンシューマー"""
+
+    def __init__(
+        self,
+        sqs_client,
+        queue_url: str,
+        acknowledger,
+        handler: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        dispatch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        max_in_flight: int = 10,
+        pollers: int = 2,
+        wait_time_seconds: int = 20,
+        visibility_timeout: int = 300,
+        heartbeat_interval: float = 0.0,
+        visibility_extension: Optional[int] = None,
+        max_processing_time: Optional[float] = None,
+        batch_max_delay: float = 0.5,
+        idle_timeout: Optional[float] = None,
+        drain_timeout: Optional[float] = None
+    ):
+        """
+        初期化
+
+        Args:
+            sqs_client: boto3 SQSクライアント（スレッドから呼び出す）
+            queue_url: キューURL
+            acknowledger: 削除を送るMessageAcknowledger（close()は呼び出し側で行う）
+            handler: 1メッセージを処理する関数（Trueで削除）。handlerとdispatchはどちらか一方
+            dispatch: 受信バッチを受け渡す関数（完了はcomplete()/defer()で通知）
+            max_in_flight: 処理中メッセージ数の上限
+            pollers: 同時に発行するLong Polling数
+            wait_time_seconds: Long Pollingの待機秒数
+            visibility_timeout: 受信時の可視性タイムアウト（秒）
+            heartbeat_interval: 可視性タイムアウト延長の確認間隔（0で延長しない）
+            visibility_extension: 1回の延長幅（Noneの場合はvisibility_timeout）
+            max_processing_time: 受信からこの秒数を超えた処理はハングとみなし延長を止める（Noneで上限なし）
+            batch_max_delay: 可視性変更をまとめる最大待機秒数
+            idle_timeout: この秒数メッセージが無く処理中も無ければ停止（Noneで停止しない）
+            drain_timeout: 停止時に処理中メッセージの完了を待つ最大秒数（Noneの場合はvisibility_timeout）
+        """
+        if (handler is None) == (dispatch is None):
+            raise ValueError("Exactly one of handler or dispatch is required")
+
+        self.sqs = sqs_client
+        self.queue_url = queue_url
+        self.acknowledger = acknowledger
+        self.handler = handler
+        self.dispatch = dispatch
+        self.max_in_flight = max(1, max_in_flight)
+        self.pollers = max(1, pollers)
+        self.wait_time_seconds = wait_time_seconds
+        self.visibility_timeout = visibility_timeout
+        self.visibility_extension = visibility_extension or visibility_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.max_processing_time = max_processing_time
+        self.batch_max_delay = batch_max_delay
+        self.idle_timeout = idle_timeout
+        self.drain_timeout = visibility_timeout if drain_timeout is None else drain_timeout
+
+        # boto3呼び出し用（Long Polling + 可視性変更）
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=self.pollers + 1, thread_name_prefix='sqs-io'
+        )
+        # handler実行用 / dispatch呼び出し用（受け渡し順を保つため1スレッド）
+        self._work_executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight if handler is not None else 1,
+            thread_name_prefix='sqs-handler' if handler is not None else 'sqs-dispatch'
+        )
+
+        # 以下はイベントループのスレッドからのみ変更する
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight: Dict[str, Dict[str, float]] = {}  # ReceiptHandle -> 受信時刻・可視性期限
+        self._reserved = 0
+        self._pending_visibility: List[Dict[str, Any]] = []
+        self._stop_requested = False
+        self._closing = False
+        self._last_message_time = time.monotonic()
+        self._capacity_changed: Optional[asyncio.Event] = None
+        self._flush_wakeup: Optional[asyncio.Event] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+        self.stats = {
+            'receive_calls': 0,
+            'empty_receives': 0,
+            'received': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'deferred': 0,
+            'released': 0,
+            'extended': 0,
+            'abandoned': 0,
+            'visibility_calls': 0,
+            'visibility_failures': 0,
+        }
+
+        logger.info(
+            f"AsyncQueueConsumer initialized: max_in_flight={self.max_in_flight}, "
+            f"pollers={self.pollers}, heartbeat={heartbeat_interval or 'off'}"
+        )
+
+    # ------------------------------------------------------------------
+    # 公開API（任意のスレッドから呼び出し可）
+    # ------------------------------------------------------------------
+
+    def run(self):
+        """stop()が呼ばれるまで（またはidle_timeoutまで）受信ループを実行"""
+        asyncio.run(self.run_async())
+
+    def stop(self):
+        """受信を止め、処理中メッセージの完了を待って終了する"""
+        if not self._call_in_loop(self._request_stop):
+            self._stop_requested = True
+
+    def complete(self, message: Dict[str, Any], success: bool = True):
+        """
+        dispatchしたメッセージの完了を通知
+
+        Args:
+            message: SQSメッセージ
+            success: Trueで削除、Falseで可視性タイムアウト後の再配信に任せる
+        """
+        if not self._call_in_loop(self._on_complete, message, success) and success:
+            # ループ終了後の完了は待たずに送信
+            self.acknowledger.ack(message)
+            self.acknowledger.flush()
+
+    def defer(self, message: Dict[str, Any], delay_seconds: int):
+        """
+        dispatchしたメッセージを処理せずにキューへ戻す
+
+        Args:
+            message: SQSメッセージ
+            delay_seconds: 再表示までの秒数（0で即座に再表示）
+        """
+        entry = {'ReceiptHandle': message['ReceiptHandle'], 'VisibilityTimeout': delay_seconds, 'attempts': 0}
+        if not self._call_in_loop(self._on_defer, message, entry):
+            self._change_visibility_batch([entry])
+
+    def set_max_in_flight(self, max_in_flight: int):
+        """処理中メッセージ数の上限を変更（処理側の並列度の変更に合わせる）"""
+        def apply():
+            self.max_in_flight = max(1, max_in_flight)
+            self._capacity_changed.set()
+
+        if not self._call_in_loop(apply):
+            self.max_in_flight = max(1, max_in_flight)
+
+    def in_flight(self) -> int:
+        """処理中メッセージ数"""
+        return len(self._in_flight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計と現在の処理中件数（削除の統計はacknowledger.get_stats()）"""
+        return {**self.stats, 'in_flight': len(self._in_flight), 'max_in_flight': self.max_in_flight}
+
+    # ------------------------------------------------------------------
+    # イベントループ
+    # ------------------------------------------------------------------
+
+    async def run_async(self):
+        """受信ループ本体（イベントループ内で実行）"""
+        self._loop = asyncio.get_running_loop()
+        self._capacity_changed = asyncio.Event()
+        self._flush_wakeup = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._last_message_time = time.monotonic()
+        if self._stop_requested:
+            self._stopped.set()
+
+        # 削除はacknowledgerの送信スレッドで行う（イベントループをブロックしない）
+        self.acknowledger.start()
+
+        flusher = asyncio.create_task(self._flush_loop())
+        heartbeat = None
+        if self.heartbeat_interval > 0:
+            heartbeat = asyncio.create_task(self._heartbeat_loop())
+        pollers = [asyncio.create_task(self._poll_loop()) for _ in range(self.pollers)]
+
+        try:
+            await self._stopped.wait()
+
+            # 受信中のLong Pollingの完了を待つ（受け取ったメッセージは即座に戻す）
+            await asyncio.gather(*pollers, return_exceptions=True)
+            await self._drain()
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            # 送信待ちの可視性変更・削除を全て送ってから終了
+            self._closing = True
+            self._flush_wakeup.set()
+            await asyncio.gather(flusher, return_exceptions=True)
+            await self._loop.run_in_executor(self._io_executor, self.acknowledger.flush)
+
+            self._work_executor.shutdown(wait=not self._in_flight)
+            self._io_executor.shutdown(wait=True)
+            self._loop = None
+
+        logger.info(f"AsyncQueueConsumer stopped: {self.get_stats()}")
+
+    def _call_in_loop(self, callback: Callable, *args) -> bool:
+        """イベントループのスレッドでcallbackを実行（ループが動いていなければFalse）"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return False
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            return False
+        return True
+
+    def _request_stop(self):
+        self._stop_requested = True
+        self._capacity_changed.set()
+        self._stopped.set()
+
+    async def _io(self, func: Callable, **kwargs) -> Any:
+        """boto3呼び出しをI/Oスレッドで実行"""
+        return await self._loop.run_in_executor(self._io_executor, lambda: func(**kwargs))
+
+    async def _poll_loop(self):
+        """空き枠がある間Long Pollingを繰り返す"""
+        while not self._stop_requested:
+            count = await self._reserve_capacity()
+            if count == 0:
+                continue
+
+            requested_at = time.monotonic()
+            try:
+                response = await self._io(
+                    self.sqs.receive_message,
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=count,
+                    WaitTimeSeconds=self.wait_time_seconds,
+                    VisibilityTimeout=self.visibility_timeout,
+                    AttributeNames=['ApproximateReceiveCount'],
+                    MessageAttributeNames=['All']
+                )
+                messages = response.get('Messages', [])
+            except Exception as e:
+                logger.error(f"Failed to receive messages: {e}")
+                messages = None
+            finally:
+                self._reserved -= count
+                self.stats['receive_calls'] += 1
+
+            if messages is None:
+                self._capacity_changed.set()
+                await asyncio.sleep(RECEIVE_ERROR_BACKOFF)
+                continue
+
+            if not messages:
+                self.stats['empty_receives'] += 1
+                self._capacity_changed.set()
+                self._check_idle()
+                continue
+
+            self._last_message_time = time.monotonic()
+            self.stats['received'] += len(messages)
+            self.acknowledger.received(messages, requested_at)
+
+            if self._stop_requested:
+                self._release(messages)
+                continue
+
+            for message in messages:
+                # 可視性期限は受信リクエストの送信時刻から数える（安全側）
+                self._in_flight[message['ReceiptHandle']] = {
+                    'received_at': requested_at,
+                    'deadline': requested_at + self.visibility_timeout
+                }
+            self._start_work(messages)
+
+    async def _reserve_capacity(self) -> int:
+        """空き枠ができるまで待ち、今回受信する件数を予約"""
+        while not self._stop_requested:
+            free = self.max_in_flight - len(self._in_flight) - self._reserved
+            if free > 0:
+                count = min(SQS_BATCH_SIZE, free)
+                self._reserved += count
+                return count
+            self._capacity_changed.clear()
+            await self._capacity_changed.wait()
+        return 0
+
+    def _check_idle(self):
+        """idle_timeoutを過ぎても受信が無く処理中も無ければ停止"""
+        if self.idle_timeout is None or self._in_flight:
+            return
+        idle = time.monotonic() - self._last_message_time
+        if idle >= self.idle_timeout:
+            logger.info(f"Queue empty for {idle:.0f}s, stopping consumer")
+            self._request_stop()
+
+    def _start_work(self, messages: List[Dict[str, Any]]):
+        """受信メッセージをhandler/dispatchへ渡す"""
+        if self.handler is not None:
+            for message in messages:
+                future = self._loop.run_in_executor(self._work_executor, self._run_handler, message)
+                future.add_done_callback(
+                    lambda f, message=message: self._on_complete(message, not f.cancelled() and f.result())
+                )
+            return
+
+        future = self._loop.run_in_executor(self._work_executor, self.dispatch, messages)
+        future.add_done_callback(lambda f: self._on_dispatched(f, messages))
+
+    def _run_handler(self, message: Dict[str, Any]) -> bool:
+        """handlerを実行（例外は失敗として扱う）"""
+        try:
+            return bool(self.handler(message))
+        except Exception as e:
+            logger.error(f"Error processing message {message.get('MessageId', 'unknown')}: {e}", exc_info=True)
+            return False
+
+    def _on_dispatched(self, future: asyncio.Future, messages: List[Dict[str, Any]]):
+        """dispatchに失敗したメッセージは即座にキューへ戻す"""
+        if future.cancelled() or future.exception() is None:
+            return
+        logger.error(f"Failed to dispatch {len(messages)} message(s): {future.exception()}")
+        pending = [message for message in messages if message['ReceiptHandle'] in self._in_flight]
+        for message in pending:
+            self._in_flight.pop(message['ReceiptHandle'], None)
+            self.acknowledger.forget(message)
+        self._release(pending)
+        self._capacity_changed.set()
+
+    def _on_complete(self, message: Dict[str, Any], success: bool):
+        """完了したメッセージの削除をacknowledgerへ（失敗は再配信に任せる）"""
+        if self._in_flight.pop(message['ReceiptHandle'], None) is None:
+            return
+
+        if success:
+            self.stats['succeeded'] += 1
+            self.acknowledger.ack(message)
+        else:
+            self.stats['failed'] += 1
+            self.acknowledger.forget(message)
+
+        self._capacity_changed.set()
+
+    def _on_defer(self, message: Dict[str, Any], entry: Dict[str, Any]):
+        """処理せずに戻すメッセージを可視性変更キューへ"""
+        self._in_flight.pop(message['ReceiptHandle'], None)
+        self.acknowledger.forget(message)
+        self.stats['deferred'] += 1
+        self._queue_visibility([entry])
+        self._capacity_changed.set()
+
+    def _release(self, messages: List[Dict[str, Any]]):
+        """処理しないメッセージを即座に再表示"""
+        if not messages:
+            return
+        self.stats['released'] += len(messages)
+        self._queue_visibility([
+            {'ReceiptHandle': message['ReceiptHandle'], 'VisibilityTimeout': 0, 'attempts': 0}
+            for message in messages
+        ])
+
+    def _queue_visibility(self, entries: List[Dict[str, Any]]):
+        self._pending_visibility.extend(entries)
+        if len(self._pending_visibility) >= SQS_BATCH_SIZE:
+            self._flush_wakeup.set()
+
+    async def _heartbeat_loop(self):
+        """
+        次の確認までに可視性期限が切れる処理中メッセージを延長
+
+        max_processing_timeを超えたメッセージはハングとみなして延長を止め、再配信に任せる
+        （処理枠は処理が終わるまで占有したまま）
+        """
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            due = []
+            for handle, entry in self._in_flight.items():
+                if entry.get('abandoned') or entry['deadline'] - now > self.heartbeat_interval * 2:
+                    continue
+                elapsed = now - entry['received_at']
+                if self.max_processing_time is not None and elapsed >= self.max_processing_time:
+                    entry['abandoned'] = True
+                    self.stats['abandoned'] += 1
+                    logger.warning(
+                        f"Message in flight for {elapsed:.0f}s exceeded "
+                        f"{self.max_processing_time}s, no longer extending visibility"
+                    )
+                    continue
+                due.append({'ReceiptHandle': handle, 'VisibilityTimeout': self.visibility_extension, 'attempts': 0})
+            if due:
+                self._queue_visibility(due)
+                self._flush_wakeup.set()
+
+    async def _drain(self):
+        """処理中メッセージの完了をdrain_timeoutまで待つ"""
+        deadline = time.monotonic() + self.drain_timeout
+        if self._in_flight:
+            logger.info(f"Waiting for {len(self._in_flight)} in-flight message(s)...")
+
+        while self._in_flight:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"Drain timed out with {len(self._in_flight)} message(s) in flight")
+                return
+            self._capacity_changed.clear()
+            try:
+                await asyncio.wait_for(self._capacity_changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _flush_loop(self):
+        """可視性変更を10件またはbatch_max_delay秒ごとに送信"""
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wakeup.wait(), timeout=self.batch_max_delay)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wakeup.clear()
+
+            while self._pending_visibility:
+                batch = self._pending_visibility[:SQS_BATCH_SIZE]
+                del self._pending_visibility[:SQS_BATCH_SIZE]
+                sent_at = time.monotonic()
+                failed = await self._loop.run_in_executor(
+                    self._io_executor, self._change_visibility_batch, batch
+                )
+                self._after_visibility(batch, failed, sent_at)
+
+            if self._closing and not self._pending_visibility:
+                return
+
+    def _after_visibility(self, batch: List[Dict[str, Any]], failed: List[Dict[str, Any]], sent_at: float):
+        """延長に成功したメッセージの可視性期限を更新"""
+        failed_handles = {entry['ReceiptHandle'] for entry in failed}
+        for entry in batch:
+            handle = entry['ReceiptHandle']
+            if handle in failed_handles or entry['VisibilityTimeout'] == 0:
+                continue
+            tracked = self._in_flight.get(handle)
+            if tracked is not None:
+                tracked['deadline'] = sent_at + entry['VisibilityTimeout']
+                self.acknowledger.extended([entry], entry['VisibilityTimeout'], sent_at)
+                self.stats['extended'] += 1
+        self._retry_later(self._pending_visibility, failed)
+
+    def _retry_later(self, pending: List[Dict[str, Any]], failed: List[Dict[str, Any]]):
+        """一時的に失敗したエントリを再送キューへ戻す"""
+        for entry in failed:
+            entry['attempts'] += 1
+            if entry.get('retryable') and entry['attempts'] < MAX_BATCH_ATTEMPTS:
+                pending.append(entry)
+
+    # ------------------------------------------------------------------
+    # SQS Batch API（I/Oスレッドで実行）
+    # ------------------------------------------------------------------
+
+    def _change_visibility_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        ChangeMessageVisibilityBatchを実行
+
+        Returns:
+            失敗したエントリ（retryable=Trueならリトライ可能）
+        """
+        entries = [
+            {'Id': str(i), 'ReceiptHandle': entry['ReceiptHandle'], 'VisibilityTimeout': entry['VisibilityTimeout']}
+            for i, entry in enumerate(batch)
+        ]
+        failed = self._send_batch(self.sqs.change_message_visibility_batch, batch, entries)
+        self.stats['visibility_calls'] += 1
+        self.stats['visibility_failures'] += len(failed)
+        return failed
+
+    def _send_batch(self, api: Callable, batch: List[Dict[str, Any]], entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Batch APIを呼び出し、失敗したエントリを返す"""
+        try:
+            response = api(QueueUrl=self.queue_url, Entries=entries)
+        except Exception as e:
+            logger.warning(f"SQS batch request failed ({len(batch)} entries): {e}")
+            for entry in batch:
+                entry['retryable'] = True
+            return list(batch)
+
+        failed = []
+        for failure in response.get('Failed', []):
+            entry = batch[int(failure['Id'])]
+            # SenderFault（期限切れのReceiptHandle等）はリトライしても成功しない
+            entry['retryable'] = not failure.get('SenderFault', False)
+            failed.append(entry)
+            logger.warning(f"SQS batch entry failed: {failure.get('Code')} {failure.get('Message', '')}")
+        return failed
@@ -0,0 +1,578 @@
+"""
+Result Cache Service
+コンテンツハッシュをキーとした処理結果キャッシュ（ローカルディスク層 + 共有層）
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# 同一内容のオブジェクトを判別するためのキー接頭辞
+CONTENT_KEY_PREFIX = 'sha256:'
+OBJECT_KEY_PREFIX = 'etag:'
+
+# エントリの形式を変えたら上げる（キーに含めるため旧形式のエントリは参照されなくなる）
+CACHE_SCHEMA_VERSION = 1
+
+
+def compute_content_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    ファイルのSHA-256をストリーミングで計算
+
+    Args:
+        file_path: ファイルパス
+        chunk_size: 読み込みチャンクサイズ
+
+    Returns:
+        16進ハッシュ文字列
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_object_key(etag: Optional[str], size: Optional[int]) -> Optional[str]:
+    """
+    S3 ETagとサイズからエイリアスキーを生成
+
+    Args:
+        etag: S3 ETag（引用符付きでも可）
+        size: オブジェクトサイズ
+
+    Returns:
+        エイリアスキー、情報不足の場合None
+    """
+    if not etag or size is None:
+        return None
+    etag = etag.strip('"')
+    return f"{OBJECT_KEY_PREFIX}{etag}:{int(size)}"
+
+
+class CacheTier:
+    """
+    キャッシュ層の共通インターフェース
+
+    値はJSONシリアライズ可能なdict。
+    """
+
+    name = 'base'
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """キーに対応するエントリを取得（存在しない/期限切れの場合None）"""
+        raise NotImplementedError
+
+    def put(self, key: str, value: Dict[str, Any]) -> bool:
+        """エントリを保存"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """エントリを削除"""
+        raise NotImplementedError
+
+
+class InMemoryCacheTier(CacheTier):
+    """
+    プロセス内メモリのキャッシュ層（共有層のローカル代替・テスト用）
+
+    LRU + TTLで管理する。
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            max_entries: 最大エントリ数
+            ttl_seconds: 有効期限秒数（Noneの場合は無期限）
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+
+            stored_at, value = item
+            if self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return json.loads(value)
+
+    def put(self, key: str, value: Dict[str, Any]) -> bool:
+        with self._lock:
+            self._entries[key] = (time.time(), json.dumps(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class LocalDiskCacheTier(CacheTier):
+    """
+    ローカルディスクのキャッシュ層
+
+    - 1エントリ1ファイル（zlib圧縮JSON）
+    - アクセス時刻順のLRUで合計サイズを上限内に保つ
+    - 保存時刻からのTTLで期限切れを削除
+    """
+
+    name = 'disk'
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 2 * 1024 * 1024 * 1024,
+        ttl_seconds: Optional[float] = None
+    ):
+        """
+        初期化
+
+        Args:
+            directory: キャッシュディレクトリ
+            max_bytes: 合計サイズ上限（バイト）
+            ttl_seconds: 有効期限秒数（Noneの場合は無期限）
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        # key -> (path, size)、末尾が最近アクセスされたもの
+        self._index: "OrderedDict[str, tuple]" = OrderedDict()
+        self._total_bytes = 0
+
+        self._load_index()
+
+    def _path_for(self, key: str) -> Path:
+        """キーに対応するファイルパス（キーは任意文字列なのでハッシュ化）"""
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return self.directory / name[:2] / f"{name}.cache"
+
+    def _load_index(self):
+        """既存のキャッシュファイルからLRUインデックスを復元"""
+        entries = []
+        for path in self.directory.glob('*/*.cache'):
+            try:
+                stat = path.stat()
+                entries.append((stat.st_atime, path, stat.st_size))
+            except OSError:
+                continue
+
+        entries.sort(key=lambda e: e[0])
+        for _, path, size in entries:
+            # インデックスのキーはファイル名（元のキーはファイル内に保存）
+            self._index[path.stem] = (path, size)
+            self._total_bytes += size
+
+        if entries:
+            logger.info(f"Local result cache loaded: {len(entries)} entries, {self._total_bytes / 1024 / 1024:.1f}MB")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path_for(key)
+        index_key = path.stem
+
+        try:
+            with open(path, 'rb') as f:
+                record = json.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Corrupted cache entry removed: {e}")
+            self._remove(index_key, path)
+            return None
+
+        if record.get('key') != key:
+            return None
+
+        if self.ttl_seconds is not None and time.time() - record.get('stored_at', 0) > self.ttl_seconds:
+            self._remove(index_key, path)
+            return None
+
+        # LRU更新
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        with self._lock:
+            if index_key in self._index:
+                self._index.move_to_end(index_key)
+
+        return record.get('value')
+
+    def put(self, key: str, value: Dict[str, Any]) -> bool:
+        path = self._path_for(key)
+        index_key = path.stem
+
+        try:
+            payload = zlib.compress(json.dumps({
+                'key': key,
+                'stored_at': time.time(),
+                'value': value,
+            }).encode('utf-8'))
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".tmp{threading.get_ident()}")
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+
+        except Exception as e:
+            logger.warning(f"Failed to write cache entry: {e}")
+            return False
+
+        with self._lock:
+            previous = self._index.pop(index_key, None)
+            if previous:
+                self._total_bytes -= previous[1]
+            self._index[index_key] = (path, len(payload))
+            self._total_bytes += len(payload)
+
+        self._evict()
+        return True
+
+    def delete(self, key: str) -> None:
+        path = self._path_for(key)
+        self._remove(path.stem, path)
+
+    def _remove(self, index_key: str, path: Path):
+        """エントリを削除"""
+        with self._lock:
+            previous = self._index.pop(index_key, None)
+            if previous:
+                self._total_bytes -= previous[1]
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def _evict(self):
+        """サイズ上限を超えた分を古い順に削除"""
+        victims = []
+        with self._lock:
+            while self._total_bytes > self.max_bytes and self._index:
+                _, (path, size) = self._index.popitem(last=False)
+                self._total_bytes -= size
+                victims.append(path)
+
+        for path in victims:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+        if victims:
+            logger.debug(f"Evicted {len(victims)} local cache entries")
+
+    def size_bytes(self) -> int:
+        """現在の合計サイズ"""
+        with self._lock:
+            return self._total_bytes
+
+
+class DynamoDBCacheTier(CacheTier):
+    """
+    DynamoDBを使用した共有キャッシュ層
+
+    テーブル構成: パーティションキー cache_key (S)、TTL属性 expires_at (N)
+    値はzlib圧縮JSONをBinaryで保存（アイテム上限400KBを超えるものは保存しない）
+    """
+
+    name = 'dynamodb'
+
+    MAX_ITEM_BYTES = 380 * 1024
+
+    def __init__(self, table_name: str, region: str, ttl_seconds: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            table_name: DynamoDBテーブル名
+            region: AWSリージョン
+            ttl_seconds: 有効期限秒数（TTL属性に設定）
+        """
+        import boto3
+
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+        self.table = boto3.resource('dynamodb', region_name=region).Table(table_name)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.table.get_item(Key={'cache_key': key})
+        except Exception as e:
+            logger.warning(f"Shared cache get failed: {e}")
+            return None
+
+        item = response.get('Item')
+        if not item:
+            return None
+
+        # DynamoDBのTTL削除は遅延するため読み取り時にも期限を確認
+        expires_at = item.get('expires_at')
+        if expires_at is not None and time.time() > float(expires_at):
+            return None
+
+        try:
+            return json.loads(zlib.decompress(bytes(item['payload'])))
+        except Exception as e:
+            logger.warning(f"Invalid shared cache entry: {e}")
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> bool:
+        payload = zlib.compress(json.dumps(value).encode('utf-8'))
+        if len(payload) > self.MAX_ITEM_BYTES:
+            logger.debug(f"Skipping shared cache write for {key}: {len(payload)} bytes")
+            return False
+
+        item = {'cache_key': key, 'payload': payload}
+        if self.ttl_seconds is not None:
+            item['expires_at'] = Decimal(int(time.time() + self.ttl_seconds))
+
+        try:
+            self.table.put_item(Item=item)
+            return True
+        except Exception as e:
+            logger.warning(f"Shared cache put failed: {e}")
+            return False
+
+    def delete(self, key: str) -> None:
+        try:
+            self.table.delete_item(Key={'cache_key': key})
+        except Exception as e:
+            logger.warning(f"Shared cache delete failed: {e}")
+
+
+class ResultCache:
+    """
+    2層構成の処理結果キャッシュ
+
+    - ローカル層を先に参照し、共有層のヒットはローカル層へ昇格
+    - コンテンツハッシュ(sha256)で結果本体を保存
+    - ETag+サイズ → コンテンツハッシュのエイリアスでダウンロード前に判定
+    - キーにはスキーマバージョンと処理バージョンを含め、プロセッサ更新後は別エントリとして扱う
+    """
+
+    def __init__(
+        self,
+        local_tier: Optional[CacheTier] = None,
+        shared_tier: Optional[CacheTier] = None,
+        version: str = ''
+    ):
+        """
+        初期化
+
+        Args:
+            local_tier: ローカル層（通常LocalDiskCacheTier）
+            shared_tier: 共有層（DynamoDBCacheTier / InMemoryCacheTier）
+            version: 処理バージョン（プロセッサのバージョン等、変わると全エントリがミスになる）
+        """
+        self.local_tier = local_tier
+        self.shared_tier = shared_tier
+        self.key_prefix = f"v{CACHE_SCHEMA_VERSION}:{version}:" if version else f"v{CACHE_SCHEMA_VERSION}:"
+
+        self._lock = threading.Lock()
+        self.stats = {
+            'object_hits': 0,
+            'content_hits': 0,
+            'misses': 0,
+            'stores': 0,
+        }
+
+    def _content_key(self, content_hash: str) -> str:
+        """結果本体のキー"""
+        return f"{self.key_prefix}{CONTENT_KEY_PREFIX}{content_hash}"
+
+    def _object_key(self, etag: Optional[str], size: Optional[int]) -> Optional[str]:
+        """ETagエイリアスのキー"""
+        object_key = make_object_key(etag, size)
+        return f"{self.key_prefix}{object_key}" if object_key else None
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """ローカル → 共有の順に参照"""
+        if self.local_tier is not None:
+            value = self.local_tier.get(key)
+            if value is not None:
+                return value
+
+        if self.shared_tier is not None:
+            value = self.shared_tier.get(key)
+            if value is not None:
+                if self.local_tier is not None:
+                    self.local_tier.put(key, value)
+                return value
+
+        return None
+
+    def _put(self, key: str, value: Dict[str, Any]):
+        """両層に保存"""
+        for tier in (self.local_tier, self.shared_tier):
+            if tier is not None:
+                tier.put(key, value)
+
+    def lookup_object(self, etag: Optional[str], size: Optional[int]) -> Optional[Dict[str, Any]]:
+        """
+        ETag+サイズからキャッシュエントリを取得（ダウンロード前）
+
+        Args:
+            etag: S3 ETag
+            size: オブジェクトサイズ
+
+        Returns:
+            キャッシュエントリ、ない場合None
+        """
+        object_key = self._object_key(etag, size)
+        if not object_key:
+            return None
+
+        alias = self._get(object_key)
+        if not alias or not alias.get('content_hash'):
+            return None
+
+        entry = self._get(self._content_key(alias['content_hash']))
+        if entry is not None:
+            with self._lock:
+                self.stats['object_hits'] += 1
+        return entry
+
+    def lookup_content(
+        self,
+        content_hash: str,
+        etag: Optional[str] = None,
+        size: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        コンテンツハッシュからキャッシュエントリを取得（ダウンロード後）
+
+        ヒットした場合はETagエイリアスも登録し、次回はダウンロード前に判定できるようにする。
+
+        Args:
+            content_hash: sha256ハッシュ
+            etag: S3 ETag
+            size: オブジェクトサイズ
+
+        Returns:
+            キャッシュエントリ、ない場合None
+        """
+        entry = self._get(self._content_key(content_hash))
+
+        with self._lock:
+            if entry is not None:
+                self.stats['content_hits'] += 1
+            else:
+                self.stats['misses'] += 1
+
+        if entry is not None:
+            object_key = self._object_key(etag, size)
+            if object_key:
+                self._put(object_key, {'content_hash': content_hash})
+
+        return entry
+
+    def store(
+        self,
+        content_hash: str,
+        entry: Dict[str, Any],
+        etag: Optional[str] = None,
+        size: Optional[int] = None
+    ):
+        """
+        処理結果を保存
+
+        Args:
+            content_hash: sha256ハッシュ
+            entry: 保存するエントリ（JSONシリアライズ可能なdict）
+            etag: S3 ETag
+            size: オブジェクトサイズ
+        """
+        entry = dict(entry)
+        entry['content_hash'] = content_hash
+        entry.setdefault('cached_at', time.time())
+
+        self._put(self._content_key(content_hash), entry)
+
+        object_key = self._object_key(etag, size)
+        if object_key:
+            self._put(object_key, {'content_hash': content_hash})
+
+        with self._lock:
+            self.stats['stores'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        with self._lock:
+            return dict(self.stats)
+
+
+def create_result_cache(config) -> Optional[ResultCache]:
+    """
+    設定からResultCacheを生成
+
+    Args:
+        config: アプリケーション設定
+
+    Returns:
+        ResultCache、無効化されている場合None
+    """
+    from processors.base_processor import PROCESSOR_VERSION
+
+    cache_config = config.cache
+    if not cache_config.enabled:
+        return None
+
+    version = PROCESSOR_VERSION
+    if cache_config.version:
+        version = f"{version}+{cache_config.version}"
+
+    ttl_seconds = cache_config.ttl_days * 86400 if cache_config.ttl_days > 0 else None
+
+    local_tier = LocalDiskCacheTier(
+        cache_config.local_dir,
+        max_bytes=cache_config.local_max_mb * 1024 * 1024,
+        ttl_seconds=ttl_seconds
+    )
+
+    shared_tier = None
+    backend = cache_config.shared_backend.lower()
+    if backend == 'dynamodb':
+        shared_tier = DynamoDBCacheTier(
+            cache_config.dynamodb_table,
+            region=config.aws.region,
+            ttl_seconds=ttl_seconds
+        )
+    elif backend == 'memory':
+        shared_tier = InMemoryCacheTier(ttl_seconds=ttl_seconds)
+    elif backend:
+        logger.warning(f"Unknown shared cache backend '{cache_config.shared_backend}' - using local tier only")
+
+    logger.info(
+        f"Result cache enabled: local={cache_config.local_dir} "
+        f"({cache_config.local_max_mb}MB), shared={backend or 'none'}, version={version}"
+    )
+
+    return ResultCache(local_tier=local_tier, shared_tier=shared_tier, version=version)
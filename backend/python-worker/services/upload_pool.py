@@ -0,0 +1,268 @@
+"""
+S3 Upload Pool Service
+サムネイル等の画像を並列にS3へアップロードする共有サービス（ec2-workerのupload_poolと同一実装）
+
+- スレッド数に合わせたkeep-alive接続プールを持つS3クライアントを共有
+- 同時アップロード数を上限付きで制御（ストリーム入力もメモリを溜めない）
+- 一時的なエラーは指数バックオフ（ジッター付き）でリトライ
+- 結果は入力順（ページ順）で返す
+"""
+
+import io
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import BotoCoreError, ClientError, HTTPClientError
+from botocore.exceptions import ConnectionError as BotoConnectionError
+
+logger = logging.getLogger(__name__)
+
+
+# リトライ対象のS3エラーコード（スロットリング・一時的なサーバーエラー）
+RETRYABLE_ERROR_CODES = {
+    'SlowDown', 'Throttling', 'ThrottlingException', 'RequestTimeout',
+    'RequestTimeTooSkewed', 'InternalError', 'ServiceUnavailable', '500', '502', '503', '504',
+}
+
+# リトライするクライアント側エラー（接続・エンドポイント・接続/読み取りタイムアウト、切断）。
+# NoCredentialsErrorやParamValidationError等は再送しても成功しない
+RETRYABLE_BOTOCORE_ERRORS = (BotoConnectionError, HTTPClientError)
+
+# これ以上のサイズはマルチパートアップロード（プレビュー画像は通常単一PUT）
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+
+
+@dataclass
+class UploadRequest:
+    """アップロード要求"""
+    bucket: str
+    key: str
+    data: bytes
+    content_type: str = 'application/octet-stream'
+    metadata: Optional[Dict[str, str]] = None
+    context: Any = None               # 呼び出し側の付帯情報（結果にそのまま返す）
+
+
+@dataclass
+class UploadResult:
+    """アップロード結果"""
+    bucket: str
+    key: str
+    url: Optional[str]
+    size: int
+    attempts: int
+    context: Any = None
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.url is not None
+
+
+class S3UploadPool:
+    """上限付き並列S3アップローダ"""
+
+    def __init__(
+        self,
+        region: Optional[str] = None,
+        max_workers: int = 8,
+        max_attempts: int = 4,
+        backoff_base_seconds: float = 0.2,
+        backoff_max_seconds: float = 5.0,
+        s3_client=None
+    ):
+        """
+        Args:
+            region: AWSリージョン（s3_client未指定時）
+            max_workers: 同時アップロード数（接続プールも同数）
+            max_attempts: 1オブジェクトあたりの最大試行回数
+            backoff_base_seconds: バックオフの初期待機秒数
+            backoff_max_seconds: バックオフの最大待機秒数
+            s3_client: 既存のS3クライアント（テスト用など）
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+        if s3_client is None:
+            # リトライはこのクラスで行うため、botocore側は1回のみ
+            s3_client = boto3.client(
+                's3',
+                region_name=region,
+                config=BotoConfig(
+                    max_pool_connections=self.max_workers,
+                    tcp_keepalive=True,
+                    retries={'total_max_attempts': 1}
+                )
+            )
+        self.s3 = s3_client
+
+        self._transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            use_threads=False
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='s3-upload'
+        )
+
+        self._lock = threading.Lock()
+        self.stats = {
+            'uploaded': 0,
+            'failed': 0,
+            'retries': 0,
+            'bytes': 0,
+        }
+
+        logger.info(
+            f"S3UploadPool initialized: max_workers={self.max_workers}, "
+            f"max_attempts={self.max_attempts}"
+        )
+
+    def submit(self, request: UploadRequest) -> 'Future[UploadResult]':
+        """アップロードを非同期に開始"""
+        return self._executor.submit(self._upload, request)
+
+    def upload(self, request: UploadRequest) -> UploadResult:
+        """1件アップロード（完了まで待機）"""
+        return self.submit(request).result()
+
+    def upload_all(
+        self,
+        requests: Iterable[UploadRequest],
+        max_in_flight: Optional[int] = None
+    ) -> List[UploadResult]:
+        """
+        複数件を並列アップロードし、入力順の結果を返す
+
+        requestsはジェネレータでもよい。未完了のアップロードがmax_in_flight件
+        （デフォルトはmax_workersの2倍）に達すると、先頭の完了を待ってから
+        次の要求を取り出すため、生成側と並行しつつメモリ使用量は一定に保たれる。
+
+        Args:
+            requests: アップロード要求（リスト/イテレータ）
+            max_in_flight: 同時に保持する未完了アップロード数
+
+        Returns:
+            入力順のUploadResultリスト
+        """
+        limit = max(1, max_in_flight or self.max_workers * 2)
+        pending: Deque[Future] = deque()
+        results: List[UploadResult] = []
+
+        for request in requests:
+            pending.append(self.submit(request))
+            while len(pending) >= limit:
+                results.append(pending.popleft().result())
+
+        while pending:
+            results.append(pending.popleft().result())
+
+        return results
+
+    def close(self):
+        """実行中のアップロード完了を待ってスレッドプールを停止"""
+        self._executor.shutdown(wait=True)
+        logger.info(f"S3UploadPool closed: {self.stats}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def _upload(self, request: UploadRequest) -> UploadResult:
+        """リトライ付きで1件アップロード"""
+        size = len(request.data)
+        error: Optional[str] = None
+        attempt = 0
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self._put(request)
+                with self._lock:
+                    self.stats['uploaded'] += 1
+                    self.stats['bytes'] += size
+                logger.debug(f"Uploaded s3://{request.bucket}/{request.key} ({size} bytes, attempt {attempt})")
+                return UploadResult(
+                    bucket=request.bucket,
+                    key=request.key,
+                    url=f"s3://{request.bucket}/{request.key}",
+                    size=size,
+                    attempts=attempt,
+                    context=request.context
+                )
+
+            except (ClientError, BotoCoreError) as e:
+                error = str(e)
+                if attempt >= self.max_attempts or not self._is_retryable(e):
+                    break
+
+                delay = min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** (attempt - 1)))
+                delay = random.uniform(delay / 2, delay)
+                with self._lock:
+                    self.stats['retries'] += 1
+                logger.warning(
+                    f"Upload of {request.key} failed (attempt {attempt}/{self.max_attempts}): {e}, "
+                    f"retrying in {delay:.2f}s"
+                )
+                time.sleep(delay)
+
+            except Exception as e:
+                error = str(e)
+                break
+
+        with self._lock:
+            self.stats['failed'] += 1
+        logger.error(f"Failed to upload s3://{request.bucket}/{request.key}: {error}")
+        return UploadResult(
+            bucket=request.bucket,
+            key=request.key,
+            url=None,
+            size=size,
+            attempts=attempt,
+            context=request.context,
+            error=error
+        )
+
+    def _put(self, request: UploadRequest):
+        """単一PUT、またはサイズが大きい場合はマルチパートでアップロード"""
+        extra_args: Dict[str, Any] = {'ContentType': request.content_type}
+        if request.metadata:
+            extra_args['Metadata'] = request.metadata
+
+        if len(request.data) >= MULTIPART_THRESHOLD:
+            self.s3.upload_fileobj(
+                io.BytesIO(request.data),
+                request.bucket,
+                request.key,
+                ExtraArgs=extra_args,
+                Config=self._transfer_config
+            )
+        else:
+            self.s3.put_object(
+                Bucket=request.bucket,
+                Key=request.key,
+                Body=request.data,
+                **extra_args
+            )
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """一時的なエラーか判定（スロットリング・5xx・接続/タイムアウトのみリトライ）"""
+        if isinstance(error, ClientError):
+            code = str(error.response.get('Error', {}).get('Code', ''))
+            status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+            return code in RETRYABLE_ERROR_CODES or status >= 500 or status == 429
+        return isinstance(error, RETRYABLE_BOTOCORE_ERRORS)
@@ -0,0 +1,133 @@
+"""
+Unit Tests for Admission Control
+Tests per-type memory estimates, budget admission, waiting and the free-memory floor
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from services.admission_controller import AdmissionController
+
+MB = 1024 * 1024
+
+
+def _config(page_parallel=False, page_workers=2):
+    return SimpleNamespace(
+        processing=SimpleNamespace(memory_budget_mb=0, admission_min_free_mb=100),
+        file_types=SimpleNamespace(
+            text_extensions=['.txt', '.csv'],
+            office_extensions=['.docx', '.xlsx'],
+            image_extensions=['.png', '.jpg'],
+            pdf_extensions=['.pdf'],
+            docuworks_extensions=['.xdw'],
+        ),
+        ocr=SimpleNamespace(
+            pdf_dpi=300,
+            max_pdf_pages=100,
+            page_parallel=page_parallel,
+            page_workers=page_workers,
+        ),
+    )
+
+
+def _memory(available_mb=8000, total_mb=16000):
+    return Mock(available=available_mb * MB, total=total_mb * MB)
+
+
+class TestEstimate:
+    """Test AdmissionController.estimate_mb"""
+
+    def test_type_ordering(self):
+        """Test OCR types cost more than text of the same size"""
+        controller = AdmissionController(_config(), budget_mb=4000)
+
+        text = controller.estimate_mb('a/b.txt', 5 * MB)
+        pdf = controller.estimate_mb('a/b.PDF', 5 * MB)
+        other = controller.estimate_mb('a/b.zip', 5 * MB)
+
+        assert other < text < pdf
+
+    def test_page_parallel_caps_rasters(self):
+        """Test page-parallel OCR only holds page_workers rasters at once"""
+        sequential = AdmissionController(_config(), budget_mb=4000)
+        parallel = AdmissionController(_config(page_parallel=True, page_workers=2), budget_mb=4000)
+
+        assert parallel.estimate_mb('a.pdf', 5 * MB) < sequential.estimate_mb('a.pdf', 5 * MB)
+
+    def test_unknown_size(self):
+        """Test a missing size still produces a positive estimate"""
+        controller = AdmissionController(_config(), budget_mb=4000)
+
+        assert controller.estimate_mb('a.docx', None) > controller.estimate_mb('a.docx', 0)
+
+    def test_default_budget_from_system_memory(self):
+        """Test budget falls back to a fraction of total RAM"""
+        with patch('services.admission_controller.psutil.virtual_memory', return_value=_memory(total_mb=10000)):
+            controller = AdmissionController(_config())
+
+        assert controller.budget_mb == 7000
+
+
+class TestAdmission:
+    """Test acquire/release"""
+
+    @patch('services.admission_controller.psutil.virtual_memory', return_value=_memory())
+    def test_admits_oversized_when_idle(self, _):
+        """Test a job larger than the budget runs alone instead of waiting forever"""
+        controller = AdmissionController(_config(), budget_mb=100)
+
+        assert controller.acquire(500, timeout=0)
+        assert controller.get_stats()['oversized'] == 1
+
+    @patch('services.admission_controller.psutil.virtual_memory', return_value=_memory())
+    def test_rejects_over_budget(self, _):
+        """Test a second job that exceeds the remaining budget is rejected"""
+        controller = AdmissionController(_config(), budget_mb=1000)
+
+        assert controller.acquire(600, timeout=0)
+        assert not controller.acquire(600, timeout=0)
+        assert controller.acquire(300, timeout=0)
+
+        stats = controller.get_stats()
+        assert stats['rejected'] == 1
+        assert stats['in_flight'] == 2
+        assert stats['reserved_mb'] == 900
+
+    @patch('services.admission_controller.psutil.virtual_memory', return_value=_memory())
+    def test_force_admits_over_budget(self, _):
+        """Test a job that cannot be deferred again is admitted after the wait"""
+        controller = AdmissionController(_config(), budget_mb=1000)
+
+        assert controller.acquire(600, timeout=0)
+        assert controller.acquire(600, timeout=0, force=True)
+
+        stats = controller.get_stats()
+        assert stats['forced'] == 1
+        assert stats['rejected'] == 0
+        assert stats['reserved_mb'] == 1200
+
+    @patch('services.admission_controller.psutil.virtual_memory', return_value=_memory())
+    def test_release_wakes_waiter(self, _):
+        """Test a waiting job is admitted once memory is released"""
+        controller = AdmissionController(_config(), budget_mb=1000)
+        controller.acquire(800, timeout=0)
+        results = []
+
+        waiter = threading.Thread(target=lambda: results.append(controller.acquire(500, timeout=5)))
+        waiter.start()
+        time.sleep(0.1)
+        controller.release(800)
+        waiter.join(timeout=5)
+
+        assert results == [True]
+        assert controller.get_stats()['waited'] == 1
+
+    def test_low_free_memory_blocks(self):
+        """Test the free-memory floor blocks new work even within budget"""
+        controller = AdmissionController(_config(), budget_mb=1000)
+
+        with patch('services.admission_controller.psutil.virtual_memory', return_value=_memory(available_mb=50)):
+            assert controller.acquire(100, timeout=0)      # idle: always admitted
+            assert not controller.acquire(100, timeout=0)
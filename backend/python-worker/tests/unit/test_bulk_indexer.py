@@ -0,0 +1,151 @@
+"""
+Unit Tests for Streaming Bulk Indexer
+Tests size/time-based flushing and per-item acknowledgement
+"""
+
+import threading
+import time
+from unittest.mock import Mock
+
+from services.batch_processor import StreamingBulkIndexer
+
+
+def _client(results_fn=None):
+    """Create a mock OpenSearch client recording bulk calls"""
+    client = Mock()
+    client.calls = []
+
+    def bulk_index_items(documents, document_ids=None, index_name=None):
+        client.calls.append(list(document_ids))
+        if results_fn:
+            return results_fn(documents, document_ids)
+        return [None] * len(documents)
+
+    client.bulk_index_items.side_effect = bulk_index_items
+    return client
+
+
+class TestStreamingBulkIndexer:
+    """Test StreamingBulkIndexer"""
+
+    def test_flush_on_document_count(self):
+        """Test buffer is flushed once max_docs is reached"""
+        client = _client()
+        indexer = StreamingBulkIndexer(client, max_docs=3, max_latency_seconds=60)
+        acks = []
+
+        for i in range(3):
+            indexer.add({'n': i}, f"doc-{i}", lambda ok, err: acks.append(ok))
+
+        assert client.calls == [['doc-0', 'doc-1', 'doc-2']]
+        assert acks == [True, True, True]
+        assert indexer.pending() == 0
+
+    def test_flush_on_payload_bytes(self):
+        """Test buffer is flushed once max_bytes is exceeded"""
+        client = _client()
+        indexer = StreamingBulkIndexer(client, max_docs=100, max_bytes=50, max_latency_seconds=60)
+
+        indexer.add({'text': 'x' * 10}, 'small', lambda ok, err: None)
+        assert client.calls == []
+
+        indexer.add({'text': 'x' * 100}, 'large', lambda ok, err: None)
+        assert client.calls == [['small', 'large']]
+
+    def test_flush_on_max_latency(self):
+        """Test timer thread flushes a partially filled buffer"""
+        client = _client()
+        done = threading.Event()
+
+        with StreamingBulkIndexer(client, max_docs=100, max_latency_seconds=0.1) as indexer:
+            indexer.add({'n': 1}, 'doc-1', lambda ok, err: done.set())
+            assert done.wait(2)
+
+        assert client.calls == [['doc-1']]
+
+    def test_per_item_failures_are_reported(self):
+        """Test only failed bulk items are acknowledged as failures"""
+        client = _client(lambda docs, ids: [None, "[429] es_rejected_execution_exception: busy"])
+        indexer = StreamingBulkIndexer(client, max_docs=2, max_latency_seconds=60)
+        acks = {}
+
+        indexer.add({'n': 1}, 'ok-doc', lambda ok, err: acks.setdefault('ok-doc', (ok, err)))
+        indexer.add({'n': 2}, 'bad-doc', lambda ok, err: acks.setdefault('bad-doc', (ok, err)))
+
+        assert acks['ok-doc'] == (True, None)
+        assert acks['bad-doc'][0] is False
+        assert '429' in acks['bad-doc'][1]
+        assert indexer.stats['indexed'] == 1
+        assert indexer.stats['failed'] == 1
+
+    def test_bulk_exception_fails_all_items(self):
+        """Test a failed bulk request fails every buffered item"""
+        client = Mock()
+        client.bulk_index_items.side_effect = RuntimeError("connection reset")
+        indexer = StreamingBulkIndexer(client, max_docs=2, max_latency_seconds=60)
+        acks = []
+
+        indexer.add({}, 'a', lambda ok, err: acks.append(ok))
+        indexer.add({}, 'b', lambda ok, err: acks.append(ok))
+
+        assert acks == [False, False]
+
+    def test_index_and_wait_returns_item_result(self):
+        """Test index_and_wait blocks until the bulk acknowledgement"""
+        client = _client()
+        indexer = StreamingBulkIndexer(client, max_docs=100, max_latency_seconds=0.05)
+        indexer.start()
+
+        try:
+            started = time.time()
+            success, error = indexer.index_and_wait({'n': 1}, 'doc-1', timeout=2)
+        finally:
+            indexer.close()
+
+        assert success
+        assert error is None
+        assert time.time() - started < 2
+
+    def test_index_and_wait_times_out(self):
+        """Test index_and_wait reports a timeout when nothing flushes"""
+        indexer = StreamingBulkIndexer(_client(), max_docs=100, max_latency_seconds=60)
+
+        success, error = indexer.index_and_wait({'n': 1}, 'doc-1', timeout=0.05)
+
+        assert success is None
+        assert 'timed out' in error
+
+
+class TestBulkIndexItems:
+    """Test OpenSearchClient.bulk_index_items response mapping"""
+
+    def _client(self, response):
+        from opensearch_client import OpenSearchClient
+
+        client = OpenSearchClient.__new__(OpenSearchClient)
+        client.config = Mock()
+        client.config.aws.opensearch_index = 'test-index'
+        client.client = Mock()
+        client.client.bulk.return_value = response
+        return client
+
+    def test_maps_item_errors_in_order(self):
+        """Test per-item errors are aligned with the request order"""
+        client = self._client({
+            'errors': True,
+            'items': [
+                {'index': {'status': 201}},
+                {'index': {'status': 400, 'error': {'type': 'mapper_parsing_exception', 'reason': 'bad'}}},
+            ]
+        })
+
+        results = client.bulk_index_items([{'a': 1}, {'b': 2}], document_ids=['a', 'b'])
+
+        assert results[0] is None
+        assert 'mapper_parsing_exception' in results[1]
+
+    def test_all_success(self):
+        """Test a response without errors acknowledges every item"""
+        client = self._client({'errors': False, 'items': []})
+
+        assert client.bulk_index_items([{'a': 1}], document_ids=['a']) == [None]
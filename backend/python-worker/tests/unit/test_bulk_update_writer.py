@@ -0,0 +1,180 @@
+"""
+Unit Tests for Bulk Update Writer
+Tests per-item retries, result callbacks, update_and_wait and timer-driven flushing
+"""
+
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import Mock
+
+# Shared with the backfill scripts (backend/scripts/bulk_update_writer.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'scripts'))
+
+from bulk_update_writer import BulkUpdateWriter
+
+
+def _item(status, error_type=None):
+    """Build one _bulk response item"""
+    result = {'status': status}
+    if error_type:
+        result['error'] = {'type': error_type, 'reason': 'test'}
+    return {'update': result}
+
+
+def _client(*statuses_per_call):
+    """
+    Create a mock OpenSearch client returning the given item statuses
+
+    Each positional argument is the list of statuses for one bulk call
+    (in request order); calls beyond the given ones succeed.
+    """
+    client = Mock()
+    client.calls = []
+    responses = list(statuses_per_call)
+
+    def bulk(body, refresh=False):
+        ids = [line['update']['_id'] for line in body[::2]]
+        client.calls.append(ids)
+        statuses = responses.pop(0) if responses else [200] * len(ids)
+        return {'items': [
+            _item(status, None if status < 300 else f'error_{status}') for status in statuses
+        ]}
+
+    client.bulk.side_effect = bulk
+    return client
+
+
+class TestBulkUpdateWriter:
+    """Test BulkUpdateWriter"""
+
+    def test_flush_on_document_count_calls_success_callbacks(self):
+        """Test max_docs triggers a flush and every item is acknowledged"""
+        client = _client()
+        writer = BulkUpdateWriter(client, 'files', max_docs=2, max_latency_seconds=60)
+        acks = []
+
+        writer.add('a', {'n': 1}, lambda ok, err: acks.append((ok, err)))
+        assert client.calls == []
+        writer.add('b', {'n': 2}, lambda ok, err: acks.append((ok, err)))
+
+        assert client.calls == [['a', 'b']]
+        assert acks == [(True, None), (True, None)]
+        assert writer.stats['updated'] == 2
+        assert writer.pending() == 0
+
+    def test_update_actions_are_partial_docs(self):
+        """Test items are sent as update + doc with retry_on_conflict"""
+        client = _client()
+        writer = BulkUpdateWriter(client, 'files', max_docs=1, retry_on_conflict=3)
+
+        writer.add('a', {'preview_images': ['p1']})
+
+        body = client.bulk.call_args.kwargs['body']
+        assert body == [
+            {'update': {'_index': 'files', '_id': 'a', 'retry_on_conflict': 3}},
+            {'doc': {'preview_images': ['p1']}},
+        ]
+
+    def test_retries_only_rejected_items(self, monkeypatch):
+        """Test 429/5xx items are resent alone and succeed on retry"""
+        monkeypatch.setattr('bulk_update_writer.time.sleep', lambda seconds: None)
+        client = _client([200, 429, 503])
+        writer = BulkUpdateWriter(client, 'files', max_docs=3, max_latency_seconds=60)
+        acks = {}
+
+        for doc_id in ('a', 'b', 'c'):
+            writer.add(doc_id, {}, lambda ok, err, doc_id=doc_id: acks.setdefault(doc_id, (ok, err)))
+
+        assert client.calls == [['a', 'b', 'c'], ['b', 'c']]
+        assert acks == {'a': (True, None), 'b': (True, None), 'c': (True, None)}
+        assert writer.stats['retried'] == 2
+        assert writer.stats['failed'] == 0
+
+    def test_retries_stop_after_max_retries(self, monkeypatch):
+        """Test an item still rejected after max_retries is reported as failed"""
+        sleeps = []
+        monkeypatch.setattr('bulk_update_writer.time.sleep', sleeps.append)
+        client = _client([429], [429], [429])
+        writer = BulkUpdateWriter(client, 'files', max_docs=1, max_retries=2, backoff_seconds=0.5)
+        acks = []
+
+        writer.add('a', {}, lambda ok, err: acks.append((ok, err)))
+
+        assert len(client.calls) == 3
+        assert sleeps == [0.5, 1.0]
+        assert acks == [(False, 'error_429: test')]
+        assert writer.stats['failed'] == 1
+
+    def test_non_retryable_errors_fail_immediately(self):
+        """Test 4xx item errors other than 429 are not resent"""
+        client = _client([200, 404])
+        writer = BulkUpdateWriter(client, 'files', max_docs=2)
+        acks = {}
+
+        writer.add('a', {}, lambda ok, err: acks.setdefault('a', (ok, err)))
+        writer.add('missing', {}, lambda ok, err: acks.setdefault('missing', (ok, err)))
+
+        assert len(client.calls) == 1
+        assert acks['a'] == (True, None)
+        assert acks['missing'] == (False, 'error_404: test')
+        assert writer.flush() == 0
+
+    def test_request_exception_fails_every_item(self):
+        """Test a failed bulk request fails all buffered items"""
+        client = Mock()
+        client.bulk.side_effect = RuntimeError("connection reset")
+        writer = BulkUpdateWriter(client, 'files', max_docs=2)
+        acks = []
+
+        writer.add('a', {}, lambda ok, err: acks.append(ok))
+        writer.add('b', {}, lambda ok, err: acks.append(ok))
+
+        assert acks == [False, False]
+        assert writer.stats['failed'] == 2
+
+    def test_callback_errors_do_not_stop_the_flush(self):
+        """Test one raising callback does not skip the others"""
+        writer = BulkUpdateWriter(_client(), 'files', max_docs=2)
+        acks = []
+
+        writer.add('a', {}, Mock(side_effect=RuntimeError("boom")))
+        writer.add('b', {}, lambda ok, err: acks.append(ok))
+
+        assert acks == [True]
+
+    def test_flush_on_max_latency(self):
+        """Test the timer thread flushes a partially filled buffer"""
+        client = _client()
+        done = threading.Event()
+
+        with BulkUpdateWriter(client, 'files', max_docs=100, max_latency_seconds=0.1) as writer:
+            writer.add('a', {}, lambda ok, err: done.set())
+            assert done.wait(2)
+
+        assert client.calls == [['a']]
+
+    def test_update_and_wait_returns_item_result(self):
+        """Test update_and_wait blocks until the timer flush acknowledges the item"""
+        client = _client([404])
+
+        with BulkUpdateWriter(client, 'files', max_docs=100, max_latency_seconds=0.05) as writer:
+            success, error = writer.update_and_wait('missing', {}, timeout=2)
+
+        assert success is False
+        assert error == 'error_404: test'
+
+    def test_update_and_wait_times_out(self):
+        """Test update_and_wait reports a timeout when nothing flushes"""
+        client = _client()
+        writer = BulkUpdateWriter(client, 'files', max_docs=100, max_latency_seconds=60)
+
+        success, error = writer.update_and_wait('a', {}, timeout=0.05)
+
+        assert success is False
+        assert 'timed out' in error
+        assert client.calls == []
+        assert writer.pending() == 1
+
+        writer.close()
+        assert client.calls == [['a']]
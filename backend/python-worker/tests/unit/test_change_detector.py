@@ -0,0 +1,138 @@
+"""
+Unit Tests for Change Detector
+Tests skip / metadata-only / reprocess decisions
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import Mock
+
+from botocore.exceptions import ClientError
+
+from services.change_detector import (
+    ChangeDetector,
+    ObjectState,
+    UNCHANGED,
+    METADATA_ONLY,
+    CHANGED,
+)
+
+
+LAST_MODIFIED = '2025-01-10T08:00:00+00:00'
+
+
+def _indexed(**overrides):
+    """Indexed _source matching the default object state"""
+    source = {
+        'source_etag': 'abc',
+        'source_last_modified': LAST_MODIFIED,
+        'file_size': 100,
+        'success': True,
+        'nas_path': '\\\\ts-server3\\share\\a.pdf',
+    }
+    source.update(overrides)
+    return source
+
+
+class TestCompare:
+    """Test ChangeDetector.compare"""
+
+    state = ObjectState(etag='abc', size=100, last_modified=LAST_MODIFIED)
+    expected = {'nas_path': '\\\\ts-server3\\share\\a.pdf'}
+
+    def test_identical_object_is_unchanged(self):
+        """Test same ETag/size/LastModified/path is skipped"""
+        decision = ChangeDetector.compare(self.state, _indexed(), self.expected)
+        assert decision.action == UNCHANGED
+
+    def test_equivalent_timestamp_formats_are_unchanged(self):
+        """Test 'Z' and '+00:00' timestamps compare equal"""
+        indexed = _indexed(source_last_modified='2025-01-10T08:00:00Z')
+        decision = ChangeDetector.compare(self.state, indexed, self.expected)
+        assert decision.action == UNCHANGED
+
+    def test_etag_change_reprocesses(self):
+        """Test a different ETag triggers reprocessing"""
+        decision = ChangeDetector.compare(self.state, _indexed(source_etag='"other"'), self.expected)
+        assert decision.action == CHANGED
+
+    def test_size_change_reprocesses(self):
+        """Test a different size triggers reprocessing"""
+        decision = ChangeDetector.compare(self.state, _indexed(file_size=5), self.expected)
+        assert decision.action == CHANGED
+
+    def test_missing_document_reprocesses(self):
+        """Test objects not yet indexed are processed"""
+        assert ChangeDetector.compare(self.state, None, self.expected).action == CHANGED
+
+    def test_legacy_document_without_identity_reprocesses(self):
+        """Test documents indexed before change detection are reprocessed"""
+        indexed = _indexed()
+        del indexed['source_etag']
+        assert ChangeDetector.compare(self.state, indexed, self.expected).action == CHANGED
+
+    def test_failed_document_reprocesses(self):
+        """Test previously failed documents are retried"""
+        decision = ChangeDetector.compare(self.state, _indexed(success=False), self.expected)
+        assert decision.action == CHANGED
+
+    def test_path_change_is_metadata_only(self):
+        """Test a changed NAS path only updates metadata"""
+        expected = {'nas_path': '\\\\ts-server3\\share\\moved\\a.pdf'}
+        decision = ChangeDetector.compare(self.state, _indexed(), expected)
+
+        assert decision.action == METADATA_ONLY
+        assert decision.updates == expected
+
+    def test_touched_object_is_metadata_only(self):
+        """Test a new LastModified with the same content only updates metadata"""
+        state = ObjectState(etag='abc', size=100, last_modified='2025-02-01T00:00:00+00:00')
+        decision = ChangeDetector.compare(state, _indexed(), self.expected)
+
+        assert decision.action == METADATA_ONLY
+        assert decision.updates == {'source_last_modified': '2025-02-01T00:00:00+00:00'}
+
+
+class TestClassify:
+    """Test batched classification"""
+
+    def _detector(self, indexed):
+        s3_client = Mock()
+
+        def head_object(Bucket, Key):
+            if Key == 'missing.pdf':
+                raise ClientError({'Error': {'Code': '404'}}, 'HeadObject')
+            return {
+                'ETag': '"abc"',
+                'ContentLength': 100,
+                'LastModified': datetime(2025, 1, 10, 8, 0, tzinfo=timezone.utc),
+            }
+
+        s3_client.head_object.side_effect = head_object
+        opensearch = Mock()
+        opensearch.get_documents.return_value = indexed
+        return ChangeDetector(s3_client, opensearch, head_workers=4), opensearch
+
+    def test_batch_uses_single_mget(self):
+        """Test a batch is resolved with one mget and decisions keep input order"""
+        detector, opensearch = self._detector({'a.pdf': _indexed(nas_path=None)})
+        items = [
+            {'bucket': 'b', 'key': 'a.pdf', 'expected': {}},
+            {'bucket': 'b', 'key': 'new.pdf', 'expected': {}},
+            {'bucket': 'b', 'key': 'missing.pdf', 'expected': {}},
+        ]
+
+        decisions = detector.classify(items)
+
+        opensearch.get_documents.assert_called_once()
+        assert opensearch.get_documents.call_args[0][0] == ['a.pdf', 'new.pdf', 'missing.pdf']
+        assert [d.action for d in decisions] == [UNCHANGED, CHANGED, CHANGED]
+        assert decisions[0].object_state.etag == 'abc'
+        assert decisions[2].object_state is None
+
+    def test_mget_failure_reprocesses(self):
+        """Test an OpenSearch failure falls back to reprocessing"""
+        detector, _ = self._detector(None)
+
+        decisions = detector.classify([{'bucket': 'b', 'key': 'a.pdf', 'expected': {}}])
+
+        assert decisions[0].action == CHANGED
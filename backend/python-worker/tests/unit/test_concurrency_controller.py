@@ -0,0 +1,118 @@
+"""
+Unit Tests for Adaptive Concurrency
+Tests hill-climbing on throughput, resource back-off, backlog limits and ceilings
+"""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from services import concurrency_controller
+from services.concurrency_controller import ConcurrencyController
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock"""
+    now = [1000.0]
+    monkeypatch.setattr(concurrency_controller.time, 'monotonic', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def resources():
+    """Patch CPU and memory utilization"""
+    usage = {'cpu': 30.0, 'memory': 40.0}
+    with patch.object(concurrency_controller.psutil, 'cpu_percent', side_effect=lambda _: usage['cpu']), \
+            patch.object(concurrency_controller.psutil, 'virtual_memory',
+                         side_effect=lambda: Mock(percent=usage['memory'])):
+        yield usage
+
+
+def _window(controller, clock, completed, seconds=10.0):
+    """Record a measurement window and adjust"""
+    for _ in range(completed):
+        controller.record(1.0)
+    clock[0] += seconds
+    return controller.adjust()
+
+
+class TestConcurrencyController:
+    """Test ConcurrencyController"""
+
+    def test_climbs_while_throughput_improves(self, clock, resources):
+        """Test workers keep increasing while each step raises docs/second"""
+        controller = ConcurrencyController(initial=4, max_workers=10, queue_depth_fn=lambda: 1000)
+
+        assert _window(controller, clock, 40) == 5
+        assert _window(controller, clock, 50) == 6
+        assert _window(controller, clock, 60) == 7
+
+    def test_reverses_when_throughput_drops(self, clock, resources):
+        """Test a throughput drop after a step reverses the direction"""
+        controller = ConcurrencyController(initial=4, max_workers=10, queue_depth_fn=lambda: 1000)
+
+        assert _window(controller, clock, 40) == 5
+        assert _window(controller, clock, 30) == 4
+        assert _window(controller, clock, 40) == 3      # improved: keep going down
+
+    def test_flat_throughput_steps_down(self, clock, resources):
+        """Test saturation (no gain from more workers) drifts down"""
+        controller = ConcurrencyController(initial=4, max_workers=10, queue_depth_fn=lambda: 1000)
+
+        assert _window(controller, clock, 40) == 5
+        assert _window(controller, clock, 41) == 4
+
+    def test_backs_off_under_pressure(self, clock, resources):
+        """Test CPU or memory above the ceiling always decreases workers"""
+        controller = ConcurrencyController(initial=6, queue_depth_fn=lambda: 1000)
+        resources['memory'] = 95.0
+
+        assert _window(controller, clock, 100) == 5
+        assert controller.get_stats()['pressure_backoffs'] == 1
+
+    def test_does_not_grow_past_backlog(self, clock, resources):
+        """Test workers are not added when the queue holds fewer messages"""
+        controller = ConcurrencyController(initial=4, queue_depth_fn=lambda: 3)
+
+        assert _window(controller, clock, 40) == 4
+
+    def test_holds_when_idle(self, clock, resources):
+        """Test no completions and an empty queue leave the size unchanged"""
+        controller = ConcurrencyController(initial=4, queue_depth_fn=lambda: 0)
+
+        assert _window(controller, clock, 0) == 4
+
+    def test_respects_ceilings_and_calls_on_resize(self, clock, resources):
+        """Test min/max clamping and the resize callback"""
+        on_resize = Mock()
+        controller = ConcurrencyController(
+            initial=20, min_workers=2, max_workers=3, queue_depth_fn=lambda: 1000, on_resize=on_resize
+        )
+        assert controller.current == 3
+
+        assert _window(controller, clock, 40) == 3
+        on_resize.assert_not_called()
+
+        resources['cpu'] = 99.0
+        assert _window(controller, clock, 40) == 2
+        assert _window(controller, clock, 40) == 2
+        on_resize.assert_called_once_with(2)
+
+    def test_maybe_adjust_waits_for_interval(self, clock, resources):
+        """Test maybe_adjust only adjusts once the interval has elapsed"""
+        controller = ConcurrencyController(initial=4, interval_seconds=30, queue_depth_fn=lambda: 1000)
+        controller.record(1.0, count=10)
+
+        clock[0] += 10
+        assert controller.maybe_adjust() == 4
+        clock[0] += 25
+        assert controller.maybe_adjust() == 5
+
+    def test_set_max_workers_lowers_ceiling_and_current(self, clock, resources):
+        """Test a lower ceiling clamps the current size and later steps"""
+        controller = ConcurrencyController(initial=12, max_workers=16, queue_depth_fn=lambda: 1000)
+
+        assert controller.set_max_workers(10) == 10
+        assert controller.current == 10
+        assert _window(controller, clock, 40) == 10
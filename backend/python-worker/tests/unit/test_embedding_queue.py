@@ -0,0 +1,109 @@
+"""
+Unit Tests for Embedding Batch Queue
+Tests size/time-based batching and per-image result fan-out
+"""
+
+import threading
+from unittest.mock import Mock
+
+from services.embedding_queue import EmbeddingBatchQueue
+
+
+def _generator(results_fn=None):
+    """Create a mock ImageEmbeddingGenerator recording batched calls"""
+    generator = Mock()
+    generator.calls = []
+
+    def generate_embeddings_batch(s3_urls, use_cache=True):
+        generator.calls.append(list(s3_urls))
+        if results_fn:
+            return results_fn(s3_urls)
+        return [{'embedding': [float(i)], 'dimension': 1} for i, _ in enumerate(s3_urls)]
+
+    generator.generate_embeddings_batch.side_effect = generate_embeddings_batch
+    return generator
+
+
+class TestEmbeddingBatchQueue:
+    """Test EmbeddingBatchQueue"""
+
+    def test_flush_on_batch_size(self):
+        """Test a full batch is sent in one invocation"""
+        generator = _generator()
+        queue = EmbeddingBatchQueue(generator, max_batch_size=3, max_wait_seconds=60)
+        results = {}
+
+        for i in range(3):
+            queue.add(f"s3://b/{i}.jpg", lambda r, i=i: results.setdefault(i, r))
+
+        assert generator.calls == [['s3://b/0.jpg', 's3://b/1.jpg', 's3://b/2.jpg']]
+        assert [results[i]['embedding'] for i in range(3)] == [[0.0], [1.0], [2.0]]
+        assert queue.pending() == 0
+        assert queue.stats['invocations'] == 1
+
+    def test_flush_on_max_wait(self):
+        """Test timer thread sends a partially filled batch"""
+        generator = _generator()
+
+        with EmbeddingBatchQueue(generator, max_batch_size=10, max_wait_seconds=0.1) as queue:
+            result = queue.embed_and_wait('s3://b/a.jpg', timeout=2)
+
+        assert result == {'embedding': [0.0], 'dimension': 1}
+        assert generator.calls == [['s3://b/a.jpg']]
+
+    def test_concurrent_waiters_share_invocation(self):
+        """Test images from several threads are grouped and fanned back"""
+        generator = _generator(lambda urls: [{'embedding': [len(u)], 'dimension': 1} for u in urls])
+        results = {}
+
+        with EmbeddingBatchQueue(generator, max_batch_size=4, max_wait_seconds=5) as queue:
+            threads = [
+                threading.Thread(
+                    target=lambda url=url: results.setdefault(url, queue.embed_and_wait(url, timeout=5))
+                )
+                for url in ['s3://b/a.jpg', 's3://b/bb.jpg', 's3://b/ccc.jpg', 's3://b/dddd.jpg']
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert len(generator.calls) == 1
+        assert results['s3://b/ccc.jpg']['embedding'] == [len('s3://b/ccc.jpg')]
+
+    def test_failed_images_return_none(self):
+        """Test per-image failures are delivered without affecting others"""
+        generator = _generator(lambda urls: [{'embedding': [1.0], 'dimension': 1}, None])
+        queue = EmbeddingBatchQueue(generator, max_batch_size=2, max_wait_seconds=60)
+        results = {}
+
+        queue.add('s3://b/ok.jpg', lambda r: results.setdefault('ok', r))
+        queue.add('s3://b/bad.jpg', lambda r: results.setdefault('bad', r))
+
+        assert results['ok']['embedding'] == [1.0]
+        assert results['bad'] is None
+        assert queue.stats['failed'] == 1
+
+    def test_invocation_exception_fails_whole_batch(self):
+        """Test an exception from the generator is reported to every waiter"""
+        generator = Mock()
+        generator.generate_embeddings_batch.side_effect = RuntimeError("throttled")
+        queue = EmbeddingBatchQueue(generator, max_batch_size=2, max_wait_seconds=60)
+        results = []
+
+        queue.add('s3://b/1.jpg', results.append)
+        queue.add('s3://b/2.jpg', results.append)
+
+        assert results == [None, None]
+
+    def test_close_flushes_remaining(self):
+        """Test close sends requests still in the queue"""
+        generator = _generator()
+        queue = EmbeddingBatchQueue(generator, max_batch_size=10, max_wait_seconds=60)
+        results = []
+
+        queue.add('s3://b/a.jpg', results.append)
+        queue.close()
+
+        assert generator.calls == [['s3://b/a.jpg']]
+        assert len(results) == 1
@@ -0,0 +1,159 @@
+"""
+Unit Tests for Process Pool Extraction
+Tests the persistent process-pool backend and its recycling behaviour
+"""
+
+import threading
+import time
+
+import psutil
+import pytest
+from unittest.mock import patch
+
+from config import Config
+from processors.base_processor import ProcessingResult
+from services import extraction_pool
+from services.extraction_pool import ExtractionPoolBroken, ProcessPoolExtractor
+
+
+def _wait(predicate, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def sample_file(tmp_path):
+    """Create a small file that no processor accepts"""
+    path = tmp_path / "sample.unknownext"
+    path.write_text("sample")
+    return str(path)
+
+
+class TestProcessPoolExtractor:
+    """Test ProcessPoolExtractor"""
+
+    def test_returns_processing_result_from_child(self, sample_file):
+        """Test results cross the process boundary as ProcessingResult"""
+        with ProcessPoolExtractor(Config(), processes=1) as extractor:
+            result = extractor.process_file(sample_file, metadata={'key': 'docs/sample.unknownext'})
+
+        assert isinstance(result, ProcessingResult)
+        assert not result.success
+        assert "Unsupported file type" in result.error_message
+
+    def test_children_are_reused_between_tasks(self, sample_file):
+        """Test the pool is not recreated while memory stays under the limit"""
+        with ProcessPoolExtractor(Config(), processes=1, max_child_memory_mb=100000) as extractor:
+            extractor.process_file(sample_file)
+            extractor.process_file(sample_file)
+            stats = extractor.get_stats()
+
+        assert stats['tasks'] == 2
+        assert stats['recycles'] == 0
+        assert stats['generation'] == 1
+        assert stats['peak_child_rss_mb'] > 0
+
+    def test_recycles_pool_when_child_exceeds_memory(self, sample_file):
+        """Test a child above the RSS limit triggers a pool swap"""
+        with ProcessPoolExtractor(Config(), processes=1, max_child_memory_mb=1) as extractor:
+            extractor.process_file(sample_file)
+            stats = extractor.get_stats()
+
+        assert stats['recycles'] == 1
+        assert stats['generation'] == 2
+
+    def test_resize_swaps_to_pool_of_new_size(self, sample_file):
+        """Test resize replaces the pool and tasks keep working"""
+        with ProcessPoolExtractor(Config(), processes=1) as extractor:
+            extractor.resize(1)
+            assert extractor.get_stats()['recycles'] == 0
+
+            extractor.resize(2)
+            result = extractor.process_file(sample_file)
+            stats = extractor.get_stats()
+
+        assert not result.success
+        assert stats['processes'] == 2
+        assert stats['recycles'] == 1
+        assert stats['generation'] == 2
+
+    def test_in_process_task_uses_initialized_router(self, sample_file):
+        """Test the child task function reuses the router from the initializer"""
+        with patch('signal.signal'):
+            extraction_pool._init_extraction_child(Config())
+        router = extraction_pool._child_router
+
+        result, child_info = extraction_pool._extract_in_child(sample_file, {'key': 'k'})
+
+        assert extraction_pool._child_router is router
+        assert not result.success
+        assert child_info['rss_mb'] > 0
+
+    def test_timeout_terminates_hung_child(self, sample_file):
+        """Test a timed-out task's child process is killed when the pool is recycled"""
+        with ProcessPoolExtractor(Config(), processes=1, task_timeout=1) as extractor:
+            old_executor = extractor._executor
+            # Occupy the only child so the next task cannot finish in time
+            old_executor.submit(time.sleep, 120)
+            assert _wait(lambda: old_executor._processes)
+            children = [psutil.Process(pid) for pid in old_executor._processes]
+
+            result = extractor.process_file(sample_file)
+            stats = extractor.get_stats()
+
+        assert not result.success
+        assert "timed out" in result.error_message
+        assert stats['timeouts'] == 1
+        assert stats['recycles'] == 1
+        for child in children:
+            assert not child.is_running() or child.status() == psutil.STATUS_ZOMBIE
+
+    def test_timeout_keeps_other_tasks_of_the_pool_running(self, sample_file):
+        """Test the hung child is only killed once the old pool's other waiters are done"""
+        with ProcessPoolExtractor(Config(), processes=1, task_timeout=1) as extractor:
+            old_executor = extractor._executor
+            old_executor.submit(time.sleep, 120)
+            assert _wait(lambda: old_executor._processes)
+            children = [psutil.Process(pid) for pid in old_executor._processes]
+            # Another caller is still waiting on the old pool
+            extractor._in_flight[old_executor] = 1
+
+            extractor.process_file(sample_file)
+            assert all(child.is_running() for child in children)
+
+            with extractor._lock:
+                del extractor._in_flight[old_executor]
+            extractor._reap_if_idle(old_executor)
+
+        for child in children:
+            assert not child.is_running() or child.status() == psutil.STATUS_ZOMBIE
+
+    def test_crashed_child_is_retryable(self, sample_file):
+        """Test a task lost to a crashed child raises ExtractionPoolBroken instead of failing the file"""
+        with ProcessPoolExtractor(Config(), processes=1) as extractor:
+            old_executor = extractor._executor
+            old_executor.submit(time.sleep, 120)
+            assert _wait(lambda: old_executor._processes)
+            errors = []
+
+            def run():
+                try:
+                    extractor.process_file(sample_file)
+                except ExtractionPoolBroken as e:
+                    errors.append(e)
+
+            thread = threading.Thread(target=run)
+            thread.start()
+            for pid in list(old_executor._processes):
+                psutil.Process(pid).kill()
+            thread.join(10)
+            stats = extractor.get_stats()
+
+        assert len(errors) == 1
+        assert stats['broken'] == 1
+        assert stats['failed'] == 0
+        assert stats['recycles'] == 1
@@ -0,0 +1,160 @@
+"""
+Unit Tests for Message Acknowledger
+Tests delete coalescing, max-delay flushing, deadline priority and partial-failure retries
+"""
+
+import time
+from unittest.mock import MagicMock
+
+from services.message_acknowledger import MessageAcknowledger
+
+
+def _sqs(failures=None):
+    """SQS client mock; failures maps ReceiptHandle -> list of SenderFault flags per call"""
+    failures = failures or {}
+    sqs = MagicMock()
+    sqs.sent = []
+
+    def delete_message_batch(QueueUrl, Entries):
+        sqs.sent.append([e['ReceiptHandle'] for e in Entries])
+        ok, failed = [], []
+        for entry in Entries:
+            faults = failures.get(entry['ReceiptHandle'])
+            if faults:
+                failed.append({'Id': entry['Id'], 'SenderFault': faults.pop(0), 'Code': 'Err'})
+            else:
+                ok.append({'Id': entry['Id']})
+        return {'Successful': ok, 'Failed': failed}
+
+    sqs.delete_message_batch.side_effect = delete_message_batch
+    return sqs
+
+
+def _message(i):
+    return {'MessageId': f'm{i}', 'ReceiptHandle': f'h{i}'}
+
+
+class TestCoalescing:
+    """Test batching across completions"""
+
+    def test_full_batches_sent_without_timer(self):
+        """Test every 10 acks become one DeleteMessageBatch"""
+        sqs = _sqs()
+        acknowledger = MessageAcknowledger(sqs, 'url', visibility_timeout=600, max_delay=60)
+
+        for i in range(25):
+            acknowledger.ack(_message(i))
+
+        assert [len(batch) for batch in sqs.sent] == [10, 10]
+        assert acknowledger.pending() == 5
+
+        acknowledger.close()
+        assert [len(batch) for batch in sqs.sent] == [10, 10, 5]
+        assert acknowledger.get_stats()['deleted'] == 25
+
+    def test_partial_batch_flushed_after_max_delay(self):
+        """Test the timer sends a partial batch once the oldest ack waited max_delay"""
+        sqs = _sqs()
+        acknowledger = MessageAcknowledger(sqs, 'url', visibility_timeout=600, max_delay=0.1)
+        acknowledger.start()
+
+        for i in range(3):
+            acknowledger.ack(_message(i))
+        time.sleep(0.4)
+
+        assert sqs.sent == [['h0', 'h1', 'h2']]
+        acknowledger.close()
+
+
+class TestDeadlines:
+    """Test receipt-handle age tracking"""
+
+    def test_near_expiry_sent_immediately_and_first(self):
+        """Test an ack close to its visibility deadline skips the wait and leads the batch"""
+        sqs = _sqs()
+        acknowledger = MessageAcknowledger(
+            sqs, 'url', visibility_timeout=60, max_delay=60, urgent_seconds=30
+        )
+        now = time.monotonic()
+        acknowledger.received([_message(0)], received_at=now)
+        acknowledger.received([_message(1)], received_at=now - 50)
+
+        acknowledger.ack(_message(0))
+        assert sqs.sent == []
+
+        acknowledger.ack(_message(1))
+        assert sqs.sent == [['h1', 'h0']]
+        assert acknowledger.get_stats()['urgent_batches'] == 1
+
+    def test_extension_moves_deadline(self):
+        """Test a heartbeat extension stops an old receipt from being treated as urgent"""
+        sqs = _sqs()
+        acknowledger = MessageAcknowledger(
+            sqs, 'url', visibility_timeout=60, max_delay=60, urgent_seconds=30
+        )
+        acknowledger.received([_message(0)], received_at=time.monotonic() - 50)
+        acknowledger.extended([_message(0)], 300)
+
+        acknowledger.ack(_message(0))
+
+        assert sqs.sent == []
+        assert acknowledger.pending() == 1
+
+    def test_late_ack_counted(self):
+        """Test acks sent after the visibility deadline are counted"""
+        sqs = _sqs()
+        acknowledger = MessageAcknowledger(sqs, 'url', visibility_timeout=10)
+        acknowledger.received([_message(0)], received_at=time.monotonic() - 20)
+
+        acknowledger.ack(_message(0))
+
+        assert acknowledger.get_stats()['late'] == 1
+
+
+class TestFailures:
+    """Test retries of partial failures"""
+
+    def test_transient_failure_retried(self):
+        """Test a server-side failed entry is resent on its own"""
+        sqs = _sqs({'h1': [False]})
+        acknowledger = MessageAcknowledger(sqs, 'url', visibility_timeout=600, backoff_seconds=0)
+
+        acknowledger.ack(_message(0))
+        acknowledger.ack(_message(1))
+        acknowledger.flush()
+
+        assert sqs.sent == [['h0', 'h1'], ['h1']]
+        stats = acknowledger.get_stats()
+        assert stats['deleted'] == 2
+        assert stats['retried'] == 1
+        assert stats['failed'] == 0
+
+    def test_sender_fault_not_retried(self):
+        """Test an invalid receipt handle is reported instead of retried"""
+        failures = []
+        sqs = _sqs({'h0': [True]})
+        acknowledger = MessageAcknowledger(
+            sqs, 'url', visibility_timeout=600, backoff_seconds=0, on_failure=failures.append
+        )
+
+        acknowledger.ack(_message(0))
+        acknowledger.flush()
+
+        assert len(sqs.sent) == 1
+        assert failures == [1]
+        assert acknowledger.get_stats()['failed'] == 1
+
+    def test_request_error_retried_until_limit(self):
+        """Test a failing request is retried max_retries times before giving up"""
+        sqs = MagicMock()
+        sqs.delete_message_batch.side_effect = ConnectionError("down")
+        failures = []
+        acknowledger = MessageAcknowledger(
+            sqs, 'url', visibility_timeout=600, max_retries=2, backoff_seconds=0, on_failure=failures.append
+        )
+
+        acknowledger.ack(_message(0))
+        acknowledger.flush()
+
+        assert sqs.delete_message_batch.call_count == 3
+        assert failures == [1]
@@ -0,0 +1,172 @@
+"""
+Unit Tests for LibreOffice Converter Pool
+Tests instance reuse, recycling, health-check restarts, hang handling and queueing
+"""
+
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from services import office_pool
+from services.office_pool import OfficeConverterPool, OfficePoolUnavailable, get_shared_pool
+
+
+class FakeInstance:
+    """In-memory stand-in for a soffice process"""
+
+    def __init__(self, index, convert_delay=0.0, fail_start=False):
+        self.index = index
+        self.conversions = 0
+        self.timed_out = False
+        self.convert_delay = convert_delay
+        self.fail_start = fail_start
+        self.running = False
+        self.healthy = True
+        self.starts = 0
+        self.killed = threading.Event()
+
+    def start(self):
+        if self.fail_start:
+            raise OfficePoolUnavailable("cannot start")
+        self.starts += 1
+        self.running = True
+        self.healthy = True
+        self.conversions = 0
+        self.timed_out = False
+        self.killed.clear()
+
+    def is_running(self):
+        return self.running
+
+    def is_healthy(self):
+        return self.running and self.healthy
+
+    def convert(self, input_path, output_path):
+        if self.convert_delay and self.killed.wait(self.convert_delay):
+            raise RuntimeError("bridge disposed")
+        if 'corrupt' in input_path:
+            raise RuntimeError("load failed")
+        Path(output_path).write_bytes(b'%PDF')
+
+    def kill(self):
+        self.running = False
+        self.killed.set()
+
+    def stop(self):
+        self.running = False
+
+
+def _pool(tmp_path, size=1, **kwargs):
+    instances = []
+    delay = kwargs.pop('convert_delay', 0.0)
+
+    def factory(index):
+        instance = FakeInstance(index, convert_delay=delay)
+        instances.append(instance)
+        return instance
+
+    (tmp_path / 'doc.docx').write_bytes(b'x')
+    return OfficeConverterPool('soffice', size=size, instance_factory=factory, **kwargs), instances
+
+
+class TestOfficeConverterPool:
+    """Test OfficeConverterPool"""
+
+    def test_reuses_started_instance(self, tmp_path):
+        """Test soffice starts once and serves later conversions"""
+        pool, instances = _pool(tmp_path)
+
+        for _ in range(3):
+            pdf = pool.convert(str(tmp_path / 'doc.docx'), str(tmp_path / 'out'))
+            assert pdf == str(tmp_path / 'out' / 'doc.pdf')
+
+        assert instances[0].starts == 1
+        assert pool.get_stats()['conversions'] == 3
+
+    def test_recycles_after_max_conversions(self, tmp_path):
+        """Test an instance is restarted after max_conversions"""
+        pool, instances = _pool(tmp_path, max_conversions=2)
+
+        for _ in range(5):
+            pool.convert(str(tmp_path / 'doc.docx'), str(tmp_path / 'out'))
+
+        assert instances[0].starts == 3
+        assert pool.get_stats()['recycled'] == 2
+
+    def test_unhealthy_instance_restarted(self, tmp_path):
+        """Test a failed health check restarts the instance before use"""
+        pool, instances = _pool(tmp_path)
+        pool.convert(str(tmp_path / 'doc.docx'), str(tmp_path / 'out'))
+        instances[0].healthy = False
+
+        assert pool.convert(str(tmp_path / 'doc.docx'), str(tmp_path / 'out'))
+        assert instances[0].starts == 2
+
+    def test_conversion_failure_returns_none(self, tmp_path):
+        """Test a document that fails to convert returns None and keeps the instance"""
+        pool, instances = _pool(tmp_path)
+        (tmp_path / 'corrupt.docx').write_bytes(b'x')
+
+        assert pool.convert(str(tmp_path / 'corrupt.docx')) is None
+        assert pool.convert(str(tmp_path / 'doc.docx'), str(tmp_path / 'out'))
+        assert instances[0].starts == 1
+        assert pool.get_stats()['failed'] == 1
+
+    def test_hung_conversion_killed(self, tmp_path):
+        """Test a conversion past the timeout kills the instance and restarts it next time"""
+        pool, instances = _pool(tmp_path, convert_delay=5.0)
+
+        started = time.time()
+        assert pool.convert(str(tmp_path / 'doc.docx'), str(tmp_path / 'out'), timeout=0.1) is None
+        assert time.time() - started < 2
+        assert pool.get_stats()['timeouts'] == 1
+
+        instances[0].convert_delay = 0.0
+        assert pool.convert(str(tmp_path / 'doc.docx'), str(tmp_path / 'out'))
+        assert instances[0].starts == 2
+
+    def test_queues_when_all_busy(self, tmp_path):
+        """Test callers wait for a free instance instead of starting more"""
+        pool, instances = _pool(tmp_path, size=1, convert_delay=0.2)
+        results = []
+
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                pool.convert(str(tmp_path / 'doc.docx'), str(tmp_path / 'out'))
+            ))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert len(results) == 2 and all(results)
+        assert len(instances) == 1
+        assert pool.get_stats()['waited'] == 1
+
+    def test_unavailable_when_instance_cannot_start(self, tmp_path):
+        """Test a start failure raises OfficePoolUnavailable so callers can fall back"""
+        pool = OfficeConverterPool(
+            'soffice', size=1, instance_factory=lambda index: FakeInstance(index, fail_start=True)
+        )
+        (tmp_path / 'doc.docx').write_bytes(b'x')
+
+        with pytest.raises(OfficePoolUnavailable):
+            pool.convert(str(tmp_path / 'doc.docx'))
+        # The instance is returned so later calls can retry
+        assert pool.get_stats()['idle'] == 1
+
+
+class TestSharedPool:
+    """Test get_shared_pool"""
+
+    def test_disabled_without_pyuno_or_size(self):
+        """Test no pool when pyuno is missing, size is 0 or soffice is not found"""
+        with patch.object(office_pool, 'uno_available', return_value=False):
+            assert get_shared_pool('soffice', 2) is None
+        assert get_shared_pool('soffice', 0) is None
+        assert get_shared_pool(None, 2) is None
@@ -0,0 +1,100 @@
+"""
+Unit Tests for Path Metadata
+Tests category/server/root_folder/nas_path parsing, fallbacks and the folder-prefix cache
+"""
+
+from services.path_metadata import (
+    cache_info,
+    original_to_nas_path,
+    parse_path_metadata,
+    parse_path_metadata_bulk,
+    s3_key_to_nas_path,
+)
+
+
+class TestParsePathMetadata:
+    """Test parse_path_metadata"""
+
+    def test_standard_key(self):
+        """Test documents/{category}/{server}/{root_folder}/ keys"""
+        metadata = parse_path_metadata('documents/road/ts-server3/R06_JOB/sub/file.xdw')
+
+        assert metadata == {
+            'category': 'road',
+            'category_display': '道路',
+            'nas_server': 'ts-server3',
+            'root_folder': 'R06_JOB',
+            'nas_path': '\\\\ts-server3\\share\\R06_JOB\\sub\\file.xdw',
+        }
+
+    def test_s3_url_and_other_prefixes(self):
+        """Test s3:// URLs and processed/docuworks-converted prefixes"""
+        metadata = parse_path_metadata('s3://bucket/docuworks-converted/structure/ts-server6/H22_JOB/a.pdf')
+
+        assert metadata['category'] == 'structure'
+        assert metadata['category_display'] == '構造'
+        assert metadata['root_folder'] == 'H22_JOB'
+        assert metadata['nas_path'] == '\\\\ts-server6\\share\\H22_JOB\\a.pdf'
+
+    def test_original_path_preferred_for_nas_path(self):
+        """Test the file-scanner path wins over the S3 key"""
+        metadata = parse_path_metadata(
+            'processed/road/ts-server5/trashbox/a.doc',
+            '/mnt/ts-server5/share/trashbox/a.doc'
+        )
+
+        assert metadata['nas_path'] == '\\\\ts-server5\\share\\trashbox\\a.doc'
+        assert metadata['root_folder'] == 'trashbox'
+
+    def test_fallback_infers_category_from_server(self):
+        """Test non-standard keys still get server, category and nas_path"""
+        metadata = parse_path_metadata('imports/ts-server7/X/a.pdf')
+
+        assert metadata['nas_server'] == 'ts-server7'
+        assert metadata['category'] == 'structure'
+        assert 'root_folder' not in metadata
+        assert metadata['nas_path'] == '\\\\ts-server7\\share\\X\\a.pdf'
+
+    def test_fallback_simple_category(self):
+        """Test category-only extraction when no server is present"""
+        assert parse_path_metadata('misc/road/a.pdf') == {'category': 'road', 'category_display': '道路'}
+
+    def test_empty_and_unknown(self):
+        """Test empty and unrelated paths"""
+        assert parse_path_metadata('') == {}
+        assert parse_path_metadata('other/a.pdf') == {}
+
+    def test_folder_prefix_cached(self):
+        """Test files under the same folder reuse one parse"""
+        before = cache_info()
+        for i in range(50):
+            parse_path_metadata(f'documents/road/ts-server3/CACHE_TEST/f{i}.pdf')
+        after = cache_info()
+
+        assert after.misses - before.misses == 1
+        assert after.hits - before.hits == 49
+
+    def test_bulk_matches_single(self):
+        """Test the bulk API returns per-path results in order"""
+        paths = ['documents/road/ts-server3/A/x.pdf', '', 'documents/structure/ts-server6/B/y.pdf']
+        originals = [None, None, '\\\\ts-server6\\share\\B\\y.pdf']
+
+        assert parse_path_metadata_bulk(paths) == [parse_path_metadata(p) for p in paths]
+        assert parse_path_metadata_bulk(paths, originals)[2]['nas_path'] == originals[2]
+
+
+class TestNasPathConversion:
+    """Test nas_path helpers"""
+
+    def test_original_to_nas_path(self):
+        """Test mount paths, share prefix and UNC passthrough"""
+        assert original_to_nas_path('/mnt/nas/ts-server3/R06/a.pdf') == '\\\\ts-server3\\share\\R06\\a.pdf'
+        assert original_to_nas_path('/mnt/ts-server3/share/R06/a.pdf') == '\\\\ts-server3\\share\\R06\\a.pdf'
+        assert original_to_nas_path('\\\\ts-server3\\share\\a.pdf') == '\\\\ts-server3\\share\\a.pdf'
+        assert original_to_nas_path('/mnt/other/a.pdf') is None
+
+    def test_s3_key_to_nas_path(self):
+        """Test S3 keys with and without bucket"""
+        assert s3_key_to_nas_path('s3://b/documents/road/ts-server3/R06/a.pdf') == '\\\\ts-server3\\share\\R06\\a.pdf'
+        assert s3_key_to_nas_path('documents/road/ts-server3/') is None
+        assert s3_key_to_nas_path('documents/a.pdf') is None
@@ -0,0 +1,178 @@
+"""
+Unit Tests for Page-Parallel PDF OCR
+Tests native-text page skipping and in-order assembly
+"""
+
+import os
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from processors.pdf_page_ocr import PageParallelOCR
+
+
+@pytest.fixture
+def ocr_config():
+    """Minimal config for PageParallelOCR"""
+    config = Mock()
+    config.ocr.page_workers = 4
+    config.ocr.min_native_chars_per_page = 10
+    config.ocr.max_pdf_pages = 1000
+    config.ocr.pdf_dpi = 300
+    config.ocr.default_language = 'jpn+eng'
+    config.processing.ocr_timeout = 5
+    return config
+
+
+class TestPageParallelOCR:
+    """Test PageParallelOCR"""
+
+    def test_pages_needing_ocr_skips_native_pages(self, ocr_config):
+        """Test only pages below the native text threshold are OCR'd"""
+        ocr = PageParallelOCR(ocr_config)
+        native = ['x' * 50, '', 'short', 'y' * 10]
+
+        assert ocr.pages_needing_ocr(native, page_count=5) == [2, 3, 5]
+
+    def test_results_assembled_in_page_order(self, ocr_config):
+        """Test OCR results are merged in page order regardless of completion order"""
+        ocr = PageParallelOCR(ocr_config)
+        native = ['', 'native page two text', '', '']
+
+        def fake_ocr(file_path, page_number, deadline):
+            # Later pages finish first
+            time.sleep(0.05 * (5 - page_number))
+            return f"ocr page {page_number}"
+
+        with patch.object(ocr, '_ocr_page', side_effect=fake_ocr) as mock_ocr:
+            text, stats = ocr.extract('/tmp/doc.pdf', native_pages=native)
+
+        assert text == "ocr page 1\n\nnative page two text\n\nocr page 3\n\nocr page 4"
+        assert sorted(call.args[1] for call in mock_ocr.call_args_list) == [1, 3, 4]
+        assert stats['native_pages'] == 1
+        assert stats['ocr_pages'] == 3
+
+    def test_pages_run_concurrently(self, ocr_config):
+        """Test multiple pages are OCR'd at the same time"""
+        ocr = PageParallelOCR(ocr_config)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_ocr(file_path, page_number, deadline):
+            with lock:
+                active.append(page_number)
+                peak.append(len(active))
+            time.sleep(0.1)
+            with lock:
+                active.remove(page_number)
+            return 'text'
+
+        with patch.object(ocr, '_ocr_page', side_effect=fake_ocr):
+            ocr.extract('/tmp/doc.pdf', native_pages=['', '', '', ''])
+
+        assert max(peak) > 1
+
+    def test_fully_native_pdf_skips_ocr(self, ocr_config):
+        """Test no OCR happens when every page has native text"""
+        ocr = PageParallelOCR(ocr_config)
+
+        with patch.object(ocr, '_ocr_page') as mock_ocr:
+            text, stats = ocr.extract('/tmp/doc.pdf', native_pages=['a' * 20, 'b' * 20])
+
+        mock_ocr.assert_not_called()
+        assert text == 'a' * 20 + '\n\n' + 'b' * 20
+        assert stats['ocr_pages'] == 0
+
+    def test_failed_page_falls_back_to_native_text(self, ocr_config):
+        """Test a page whose OCR fails keeps its (short) native text"""
+        ocr = PageParallelOCR(ocr_config)
+
+        def fake_ocr(file_path, page_number, deadline):
+            if page_number == 1:
+                raise RuntimeError("tesseract crashed")
+            return "ocr page 2"
+
+        with patch.object(ocr, '_ocr_page', side_effect=fake_ocr):
+            text, stats = ocr.extract('/tmp/doc.pdf', native_pages=['abc', ''])
+
+        assert text == "abc\n\nocr page 2"
+        assert stats['ocr_pages_completed'] == 1
+
+    def test_ocr_timeout_returns_partial_text(self, ocr_config):
+        """Test pages still running at the OCR deadline are dropped"""
+        ocr_config.processing.ocr_timeout = 0.2
+        ocr = PageParallelOCR(ocr_config)
+        release = threading.Event()
+
+        def fake_ocr(file_path, page_number, deadline):
+            if page_number == 2:
+                release.wait(2)
+            return f"ocr page {page_number}"
+
+        with patch.object(ocr, '_ocr_page', side_effect=fake_ocr):
+            text, stats = ocr.extract('/tmp/doc.pdf', native_pages=['', ''])
+        release.set()
+
+        assert text == "ocr page 1"
+        assert stats['ocr_pages_completed'] == 1
+
+    def test_page_subprocesses_bounded_by_deadline(self, ocr_config):
+        """Test poppler and tesseract get the time left until the OCR deadline"""
+        ocr = PageParallelOCR(ocr_config)
+        image = Mock()
+
+        with patch('processors.pdf_page_ocr.convert_from_path', return_value=[image]) as render, \
+                patch('processors.pdf_page_ocr.subprocess.run',
+                      return_value=Mock(returncode=0, stdout=b' text ', stderr=b'')) as tesseract:
+            text = ocr._ocr_page('/tmp/doc.pdf', 1, deadline=time.time() + 30)
+
+        assert text == 'text'
+        assert 1 <= render.call_args.kwargs['timeout'] <= 30
+        assert 1 <= tesseract.call_args.kwargs['timeout'] <= 30
+        image.close.assert_called_once()
+
+    def test_thread_limit_only_in_tesseract_environment(self, ocr_config, monkeypatch):
+        """Test OMP_THREAD_LIMIT is passed to tesseract without changing os.environ"""
+        monkeypatch.delenv('OMP_THREAD_LIMIT', raising=False)
+        ocr = PageParallelOCR(ocr_config)
+
+        with patch('processors.pdf_page_ocr.convert_from_path', return_value=[Mock()]), \
+                patch('processors.pdf_page_ocr.subprocess.run',
+                      return_value=Mock(returncode=0, stdout=b'text', stderr=b'')) as tesseract:
+            ocr._ocr_page('/tmp/doc.pdf', 1, deadline=time.time() + 30)
+
+        assert tesseract.call_args.kwargs['env']['OMP_THREAD_LIMIT'] == '1'
+        assert 'OMP_THREAD_LIMIT' not in os.environ
+
+    def test_tesseract_error_is_raised(self, ocr_config):
+        """Test a failing tesseract run fails the page"""
+        ocr = PageParallelOCR(ocr_config)
+
+        with patch('processors.pdf_page_ocr.convert_from_path', return_value=[Mock()]), \
+                patch('processors.pdf_page_ocr.subprocess.run',
+                      return_value=Mock(returncode=1, stdout=b'', stderr=b'bad language')), \
+                pytest.raises(RuntimeError, match='bad language'):
+            ocr._ocr_page('/tmp/doc.pdf', 1, deadline=time.time() + 30)
+
+    def test_page_not_started_after_deadline(self, ocr_config):
+        """Test a page picked up after the deadline does not start tesseract"""
+        ocr = PageParallelOCR(ocr_config)
+
+        with patch('processors.pdf_page_ocr.convert_from_path') as render, \
+                pytest.raises(TimeoutError):
+            ocr._ocr_page('/tmp/doc.pdf', 1, deadline=time.time() - 1)
+
+        render.assert_not_called()
+
+    def test_page_count_beyond_native_pages(self, ocr_config):
+        """Test pages missing from the native list are OCR'd"""
+        ocr = PageParallelOCR(ocr_config)
+
+        with patch.object(ocr, '_ocr_page', return_value='scanned') as mock_ocr:
+            text, stats = ocr.extract('/tmp/doc.pdf', native_pages=[], page_count=2)
+
+        assert mock_ocr.call_count == 2
+        assert text == "scanned\n\nscanned"
@@ -0,0 +1,238 @@
+"""
+Unit Tests for Streaming Pipeline
+Tests stage chaining, failure routing, backpressure and stage resizing
+"""
+
+import threading
+import time
+
+import pytest
+
+from services.pipeline import StreamingPipeline, Stage, PipelineItem
+
+
+def _collect():
+    """Return a completion callback and the list it appends to"""
+    results = []
+    lock = threading.Lock()
+
+    def on_complete(item: PipelineItem, success: bool):
+        with lock:
+            results.append((item, success))
+
+    return on_complete, results
+
+
+class TestStreamingPipeline:
+    """Test StreamingPipeline"""
+
+    def test_items_flow_through_all_stages(self):
+        """Test each item passes every stage in order"""
+        on_complete, results = _collect()
+
+        def stage_a(item):
+            item.context.setdefault('trace', []).append('a')
+            return True
+
+        def stage_b(item):
+            item.context['trace'].append('b')
+            return True
+
+        pipeline = StreamingPipeline(
+            [Stage('a', stage_a, workers=2), Stage('b', stage_b, workers=2)],
+            on_complete
+        )
+        pipeline.start()
+        for i in range(5):
+            pipeline.submit(i)
+
+        assert pipeline.stop(drain_timeout=5)
+        assert len(results) == 5
+        assert all(success for _, success in results)
+        assert all(item.context['trace'] == ['a', 'b'] for item, _ in results)
+
+    def test_failure_short_circuits_remaining_stages(self):
+        """Test a failing stage completes the item without running later stages"""
+        on_complete, results = _collect()
+        later_calls = []
+
+        def failing(item):
+            item.error = "boom"
+            return False
+
+        pipeline = StreamingPipeline(
+            [Stage('first', failing), Stage('second', lambda item: later_calls.append(item) or True)],
+            on_complete
+        )
+        pipeline.start()
+        pipeline.submit('msg')
+        pipeline.stop(drain_timeout=5)
+
+        item, success = results[0]
+        assert not success
+        assert item.error == "boom"
+        assert item.failed_stage == 'first'
+        assert later_calls == []
+
+    def test_exception_in_stage_is_reported_as_failure(self):
+        """Test exceptions raised by handlers are converted to failures"""
+        on_complete, results = _collect()
+
+        def raising(item):
+            raise RuntimeError("unexpected")
+
+        pipeline = StreamingPipeline([Stage('only', raising)], on_complete)
+        pipeline.start()
+        pipeline.submit('msg')
+        pipeline.stop(drain_timeout=5)
+
+        item, success = results[0]
+        assert not success
+        assert "unexpected" in item.error
+
+    def test_finished_item_skips_later_stages(self):
+        """Test item.finished marks success without running later stages"""
+        on_complete, results = _collect()
+        later_calls = []
+
+        def skip(item):
+            item.finished = True
+            return True
+
+        pipeline = StreamingPipeline(
+            [Stage('first', skip), Stage('second', lambda item: later_calls.append(item) or True)],
+            on_complete
+        )
+        pipeline.start()
+        pipeline.submit('msg')
+        pipeline.stop(drain_timeout=5)
+
+        assert results[0][1] is True
+        assert later_calls == []
+
+    def test_slow_item_does_not_block_others(self):
+        """Test a slow item only occupies one worker while others complete"""
+        on_complete, results = _collect()
+        release = threading.Event()
+
+        def work(item):
+            if item.payload == 'slow':
+                release.wait(5)
+            return True
+
+        pipeline = StreamingPipeline([Stage('extract', work, workers=2)], on_complete)
+        pipeline.start()
+        pipeline.submit('slow')
+        for i in range(3):
+            pipeline.submit(i)
+
+        deadline = time.time() + 5
+        while len(results) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert sorted(item.payload for item, _ in results) == [0, 1, 2]
+        release.set()
+        pipeline.stop(drain_timeout=5)
+        assert len(results) == 4
+
+    def test_wait_for_capacity_respects_max_in_flight(self):
+        """Test capacity is bounded by max_in_flight"""
+        on_complete, _ = _collect()
+        release = threading.Event()
+
+        pipeline = StreamingPipeline(
+            [Stage('hold', lambda item: release.wait(5))],
+            on_complete,
+            max_in_flight=2
+        )
+        pipeline.start()
+
+        assert pipeline.wait_for_capacity(10, timeout=0.1) == 2
+        pipeline.submit('a')
+        pipeline.submit('b')
+        assert pipeline.wait_for_capacity(10, timeout=0.1) == 0
+
+        release.set()
+        assert pipeline.wait_for_capacity(10, timeout=5) > 0
+        pipeline.stop(drain_timeout=5)
+
+    def test_resize_stage_adds_and_removes_workers(self):
+        """Test a stage can grow and shrink while running without losing items"""
+        on_complete, results = _collect()
+        concurrent = []
+        active = [0]
+        lock = threading.Lock()
+        release = threading.Event()
+
+        def work(item):
+            with lock:
+                active[0] += 1
+                concurrent.append(active[0])
+            release.wait(5)
+            with lock:
+                active[0] -= 1
+            return True
+
+        pipeline = StreamingPipeline([Stage('extract', work, workers=1)], on_complete)
+        pipeline.start()
+        pipeline.resize_stage('extract', 3)
+        for i in range(3):
+            pipeline.submit(i)
+
+        deadline = time.time() + 5
+        while max(concurrent, default=0) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        assert max(concurrent) == 3
+
+        pipeline.resize_stage('extract', 1)
+        release.set()
+        for i in range(3, 6):
+            pipeline.submit(i)
+
+        assert pipeline.stop(drain_timeout=5)
+        assert len(results) == 6
+        assert pipeline.get_stats()['stage_workers'] == {'extract': 1}
+
+    def test_resize_unknown_stage(self):
+        """Test resizing a missing stage is rejected"""
+        pipeline = StreamingPipeline([Stage('a', lambda item: True)], lambda item, success: None)
+        with pytest.raises(ValueError):
+            pipeline.resize_stage('missing', 2)
+
+    def test_requires_stages(self):
+        """Test empty stage list is rejected"""
+        with pytest.raises(ValueError):
+            StreamingPipeline([], lambda item, success: None)
+
+
+class TestDeferredCompletion:
+    """Test asynchronous completion of deferred items"""
+
+    def test_deferred_item_completes_via_complete(self):
+        """Test deferred items stay in flight until complete() is called"""
+        on_complete, results = _collect()
+        deferred = []
+
+        def defer(item):
+            item.deferred = True
+            deferred.append(item)
+            return True
+
+        pipeline = StreamingPipeline([Stage('index', defer)], on_complete)
+        pipeline.start()
+        pipeline.submit('msg')
+
+        deadline = time.time() + 5
+        while not deferred and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert results == []
+        assert pipeline.in_flight() == 1
+
+        pipeline.complete(deferred[0], False, "bulk item rejected")
+        assert pipeline.stop(drain_timeout=5)
+
+        item, success = results[0]
+        assert not success
+        assert item.error == "bulk item rejected"
+        assert item.failed_stage == 'index'
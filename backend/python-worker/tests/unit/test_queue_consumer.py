@@ -0,0 +1,201 @@
+"""
+Unit Tests for Async Queue Consumer
+Tests handler/dispatch modes, in-flight limits, deletes through the acknowledger and heartbeats
+"""
+
+import threading
+import time
+from collections import deque
+
+import pytest
+
+from services.message_acknowledger import MessageAcknowledger
+from services.queue_consumer import AsyncQueueConsumer
+
+
+class FakeSQS:
+    """Thread-safe in-memory stand-in for the boto3 SQS client"""
+
+    def __init__(self, count=0):
+        self.queue = deque(
+            {'MessageId': f'm{i}', 'ReceiptHandle': f'h{i}', 'Body': '{}'} for i in range(count)
+        )
+        self.lock = threading.Lock()
+        self.deleted = []
+        self.delete_calls = 0
+        self.visibility = []
+        self.fail_next_delete = set()
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages, **kwargs):
+        with self.lock:
+            messages = [self.queue.popleft() for _ in range(min(MaxNumberOfMessages, len(self.queue)))]
+        if not messages:
+            time.sleep(0.02)
+        return {'Messages': messages}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        with self.lock:
+            self.delete_calls += 1
+            failed = [e for e in Entries if e['ReceiptHandle'] in self.fail_next_delete]
+            self.fail_next_delete -= {e['ReceiptHandle'] for e in failed}
+            self.deleted.extend(e['ReceiptHandle'] for e in Entries if e not in failed)
+        return {
+            'Successful': [{'Id': e['Id']} for e in Entries if e not in failed],
+            'Failed': [{'Id': e['Id'], 'SenderFault': False, 'Code': 'InternalError'} for e in failed],
+        }
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        with self.lock:
+            self.visibility.extend((e['ReceiptHandle'], e['VisibilityTimeout']) for e in Entries)
+        return {'Successful': [{'Id': e['Id']} for e in Entries], 'Failed': []}
+
+
+def _consumer(sqs, **kwargs):
+    acknowledger = MessageAcknowledger(
+        sqs, 'url', visibility_timeout=kwargs.get('visibility_timeout', 300), max_delay=0.05, backoff_seconds=0
+    )
+    return AsyncQueueConsumer(sqs, 'url', acknowledger, **kwargs)
+
+
+def _run(consumer):
+    thread = threading.Thread(target=consumer.run, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestHandlerMode:
+    """Test AsyncQueueConsumer with a per-message handler"""
+
+    def test_processes_and_batches_deletes(self):
+        """Test successes are deleted in batches and failures are left for redelivery"""
+        sqs = FakeSQS(25)
+        consumer = _consumer(
+            sqs, handler=lambda m: m['MessageId'] != 'm3',
+            max_in_flight=10, idle_timeout=0.3, batch_max_delay=0.05
+        )
+
+        _run(consumer).join(timeout=10)
+
+        assert sorted(sqs.deleted) == sorted(f'h{i}' for i in range(25) if i != 3)
+        assert sqs.delete_calls < 24
+        stats = consumer.get_stats()
+        assert stats['succeeded'] == 24
+        assert stats['failed'] == 1
+        assert stats['in_flight'] == 0
+
+    def test_in_flight_limit(self):
+        """Test no more than max_in_flight messages are processed at once"""
+        sqs = FakeSQS(20)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def handler(message):
+            with lock:
+                active.append(message)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(message)
+            return True
+
+        consumer = _consumer(sqs, handler=handler, max_in_flight=3, idle_timeout=0.3)
+        _run(consumer).join(timeout=10)
+
+        assert len(sqs.deleted) == 20
+        assert max(peak) <= 3
+
+    def test_retries_failed_delete_entries(self):
+        """Test a transiently failed delete entry is sent again"""
+        sqs = FakeSQS(2)
+        sqs.fail_next_delete = {'h1'}
+        consumer = _consumer(sqs, handler=lambda m: True, idle_timeout=0.3, batch_max_delay=0.05)
+
+        _run(consumer).join(timeout=10)
+
+        assert sorted(sqs.deleted) == ['h0', 'h1']
+        assert consumer.acknowledger.get_stats()['retried'] == 1
+
+    def test_heartbeat_extends_long_running(self):
+        """Test visibility is extended while a message is still being processed"""
+        sqs = FakeSQS(1)
+        consumer = _consumer(
+            sqs, handler=lambda m: time.sleep(1.0) or True,
+            visibility_timeout=1, visibility_extension=30, heartbeat_interval=0.2,
+            idle_timeout=0.3, batch_max_delay=0.05
+        )
+
+        _run(consumer).join(timeout=10)
+
+        assert ('h0', 30) in sqs.visibility
+        assert consumer.get_stats()['extended'] >= 1
+        assert sqs.deleted == ['h0']
+
+
+    def test_heartbeat_stops_after_max_processing_time(self):
+        """Test visibility is no longer extended once a message exceeds max_processing_time"""
+        sqs = FakeSQS(1)
+        consumer = _consumer(
+            sqs, handler=lambda m: time.sleep(1.0) or True,
+            visibility_timeout=1, visibility_extension=30, heartbeat_interval=0.2,
+            max_processing_time=0.1, idle_timeout=0.3, batch_max_delay=0.05
+        )
+
+        _run(consumer).join(timeout=10)
+
+        assert not any(handle == 'h0' for handle, _ in sqs.visibility)
+        assert consumer.get_stats()['abandoned'] == 1
+
+
+class TestDispatchMode:
+    """Test AsyncQueueConsumer handing batches to an external pipeline"""
+
+    def test_complete_and_defer(self):
+        """Test complete() deletes and defer() changes visibility"""
+        sqs = FakeSQS(4)
+        received = []
+        consumer = _consumer(sqs, dispatch=received.extend, batch_max_delay=0.05)
+        thread = _run(consumer)
+
+        assert _wait(lambda: len(received) == 4)
+        assert consumer.in_flight() == 4
+        for message in received[:3]:
+            consumer.complete(message, True)
+        consumer.defer(received[3], 120)
+
+        assert _wait(lambda: consumer.in_flight() == 0)
+        consumer.stop()
+        thread.join(timeout=10)
+
+        assert sorted(sqs.deleted) == ['h0', 'h1', 'h2']
+        assert ('h3', 120) in sqs.visibility
+        assert consumer.get_stats()['deferred'] == 1
+
+    def test_dispatch_failure_releases(self):
+        """Test messages are made visible again when dispatch raises"""
+        sqs = FakeSQS(2)
+
+        def dispatch(messages):
+            raise RuntimeError("pipeline stopped")
+
+        consumer = _consumer(sqs, dispatch=dispatch, idle_timeout=0.3, batch_max_delay=0.05)
+        _run(consumer).join(timeout=10)
+
+        assert sorted(sqs.visibility) == [('h0', 0), ('h1', 0)]
+        assert sqs.deleted == []
+
+    def test_requires_one_of_handler_or_dispatch(self):
+        """Test handler and dispatch are mutually exclusive"""
+        with pytest.raises(ValueError):
+            _consumer(FakeSQS())
+        with pytest.raises(ValueError):
+            _consumer(FakeSQS(), handler=bool, dispatch=list)
@@ -0,0 +1,155 @@
+"""
+Unit Tests for Result Cache
+Tests local/shared tiers, eviction and ETag aliasing
+"""
+
+import time
+
+from services.result_cache import (
+    ResultCache,
+    InMemoryCacheTier,
+    LocalDiskCacheTier,
+    compute_content_hash,
+    make_object_key,
+)
+
+
+class TestHelpers:
+    """Test key helpers"""
+
+    def test_content_hash_is_stable(self, tmp_path):
+        """Test identical content yields identical hashes"""
+        a = tmp_path / "a.bin"
+        b = tmp_path / "b.bin"
+        a.write_bytes(b"x" * 3_000_000)
+        b.write_bytes(b"x" * 3_000_000)
+
+        assert compute_content_hash(str(a), chunk_size=4096) == compute_content_hash(str(b))
+
+    def test_object_key_strips_quotes(self):
+        """Test quoted and unquoted ETags map to the same key"""
+        assert make_object_key('"abc"', 10) == make_object_key('abc', 10)
+
+    def test_object_key_requires_etag_and_size(self):
+        """Test missing identity information yields no key"""
+        assert make_object_key(None, 10) is None
+        assert make_object_key('abc', None) is None
+
+
+class TestInMemoryCacheTier:
+    """Test InMemoryCacheTier"""
+
+    def test_lru_eviction(self):
+        """Test least recently used entries are evicted first"""
+        tier = InMemoryCacheTier(max_entries=2)
+        tier.put('a', {'v': 1})
+        tier.put('b', {'v': 2})
+        tier.get('a')
+        tier.put('c', {'v': 3})
+
+        assert tier.get('a') == {'v': 1}
+        assert tier.get('b') is None
+        assert tier.get('c') == {'v': 3}
+
+    def test_ttl_expiry(self):
+        """Test expired entries are not returned"""
+        tier = InMemoryCacheTier(ttl_seconds=0.01)
+        tier.put('a', {'v': 1})
+        time.sleep(0.02)
+
+        assert tier.get('a') is None
+
+
+class TestLocalDiskCacheTier:
+    """Test LocalDiskCacheTier"""
+
+    def test_round_trip(self, tmp_path):
+        """Test stored values are read back"""
+        tier = LocalDiskCacheTier(str(tmp_path))
+        tier.put('sha256:abc', {'text': 'テキスト'})
+
+        assert tier.get('sha256:abc') == {'text': 'テキスト'}
+        assert tier.get('sha256:missing') is None
+
+    def test_size_bound_evicts_oldest(self, tmp_path):
+        """Test total size stays within max_bytes"""
+        tier = LocalDiskCacheTier(str(tmp_path))
+        tier.put('first', {'v': 1})
+        tier.max_bytes = int(tier.size_bytes() * 1.5)
+        tier.put('second', {'v': 2})
+
+        assert tier.get('first') is None
+        assert tier.get('second') == {'v': 2}
+        assert tier.size_bytes() <= tier.max_bytes
+
+    def test_ttl_expiry(self, tmp_path):
+        """Test entries older than the TTL are removed"""
+        tier = LocalDiskCacheTier(str(tmp_path), ttl_seconds=0.01)
+        tier.put('a', {'v': 1})
+        time.sleep(0.02)
+
+        assert tier.get('a') is None
+        assert tier.size_bytes() == 0
+
+    def test_index_survives_restart(self, tmp_path):
+        """Test a new instance picks up existing entries"""
+        LocalDiskCacheTier(str(tmp_path)).put('a', {'v': 1})
+        tier = LocalDiskCacheTier(str(tmp_path))
+
+        assert tier.size_bytes() > 0
+        assert tier.get('a') == {'v': 1}
+
+
+class TestResultCache:
+    """Test ResultCache"""
+
+    def test_store_and_lookup_by_etag(self, tmp_path):
+        """Test stored results can be found before download via ETag/size"""
+        cache = ResultCache(local_tier=LocalDiskCacheTier(str(tmp_path)))
+        cache.store('hash1', {'result': {'success': True}}, etag='"e1"', size=100)
+
+        entry = cache.lookup_object('e1', 100)
+
+        assert entry['result'] == {'success': True}
+        assert entry['content_hash'] == 'hash1'
+        assert cache.get_stats()['object_hits'] == 1
+
+    def test_content_hit_registers_alias(self):
+        """Test a content hit for a new ETag makes the next lookup download-free"""
+        cache = ResultCache(local_tier=InMemoryCacheTier())
+        cache.store('hash1', {'result': {'success': True}}, etag='e1', size=100)
+
+        assert cache.lookup_object('e2', 100) is None
+        assert cache.lookup_content('hash1', etag='e2', size=100) is not None
+        assert cache.lookup_object('e2', 100) is not None
+
+    def test_miss_is_counted(self):
+        """Test misses are recorded"""
+        cache = ResultCache(local_tier=InMemoryCacheTier())
+
+        assert cache.lookup_content('unknown') is None
+        assert cache.get_stats()['misses'] == 1
+
+    def test_shared_hit_is_promoted_to_local(self, tmp_path):
+        """Test entries found only in the shared tier are copied to the local tier"""
+        shared = InMemoryCacheTier()
+        ResultCache(shared_tier=shared).store('hash1', {'result': {'success': True}})
+
+        local = LocalDiskCacheTier(str(tmp_path))
+        cache = ResultCache(local_tier=local, shared_tier=shared)
+
+        assert cache.lookup_content('hash1') is not None
+        assert local.get(cache._content_key('hash1')) is not None
+
+    def test_version_change_misses(self):
+        """Test entries stored under another processing version are not returned"""
+        tier = InMemoryCacheTier()
+        ResultCache(local_tier=tier, version='1.0.0').store(
+            'hash1', {'result': {'success': True}}, etag='e1', size=100
+        )
+
+        cache = ResultCache(local_tier=tier, version='1.1.0')
+
+        assert cache.lookup_object('e1', 100) is None
+        assert cache.lookup_content('hash1') is None
+        assert ResultCache(local_tier=tier, version='1.0.0').lookup_content('hash1') is not None
@@ -0,0 +1,157 @@
+"""
+Unit Tests for S3 Upload Pool
+Tests ordered results, retry/backoff classification and bounded in-flight uploads
+"""
+
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+from botocore.exceptions import (
+    ClientError, EndpointConnectionError, NoCredentialsError, ParamValidationError, ReadTimeoutError
+)
+
+from services.upload_pool import S3UploadPool, UploadRequest
+
+
+def _client_error(code, status):
+    return ClientError(
+        {'Error': {'Code': code, 'Message': code}, 'ResponseMetadata': {'HTTPStatusCode': status}},
+        'PutObject'
+    )
+
+
+def _pool(put_object, **kwargs):
+    s3 = Mock()
+    s3.put_object.side_effect = put_object
+    kwargs.setdefault('backoff_base_seconds', 0)
+    return S3UploadPool(s3_client=s3, **kwargs), s3
+
+
+def _request(i, size=1):
+    return UploadRequest('bkt', f"previews/f/page_{i}.jpg", b'x' * size, 'image/jpeg', context={'page': i})
+
+
+class TestS3UploadPool:
+    """Test S3UploadPool"""
+
+    def test_results_in_input_order(self):
+        """Test results follow request order even when later pages finish first"""
+        def put_object(**kwargs):
+            # Earlier pages are slower
+            page = int(kwargs['Key'].split('_')[-1].split('.')[0])
+            time.sleep(0.01 * (5 - page))
+            return {}
+
+        pool, s3 = _pool(put_object, max_workers=5)
+        results = pool.upload_all(_request(i) for i in range(5))
+        pool.close()
+
+        assert [r.context['page'] for r in results] == [0, 1, 2, 3, 4]
+        assert all(r.success for r in results)
+        assert results[0].url == 's3://bkt/previews/f/page_0.jpg'
+        assert s3.put_object.call_args.kwargs['ContentType'] == 'image/jpeg'
+        assert pool.stats['uploaded'] == 5
+
+    def test_retries_transient_errors(self):
+        """Test throttling and connection errors are retried"""
+        errors = [_client_error('SlowDown', 503), EndpointConnectionError(endpoint_url='https://s3')]
+
+        def put_object(**kwargs):
+            if errors:
+                raise errors.pop(0)
+            return {}
+
+        pool, _ = _pool(put_object, max_attempts=4)
+        result = pool.upload(_request(1))
+
+        assert result.success
+        assert result.attempts == 3
+        assert pool.stats['retries'] == 2
+
+    def test_read_timeout_is_retried(self):
+        """Test a read timeout is treated as transient"""
+        errors = [ReadTimeoutError(endpoint_url='https://s3')]
+
+        def put_object(**kwargs):
+            if errors:
+                raise errors.pop(0)
+            return {}
+
+        pool, _ = _pool(put_object, max_attempts=3)
+        result = pool.upload(_request(1))
+
+        assert result.success
+        assert result.attempts == 2
+
+    @pytest.mark.parametrize('error', [
+        NoCredentialsError(),
+        ParamValidationError(report='Invalid bucket name'),
+    ])
+    def test_client_side_errors_not_retried(self, error):
+        """Test botocore errors other than connection/timeout fail immediately"""
+        pool, s3 = _pool(error, max_attempts=4)
+        result = pool.upload(_request(1))
+
+        assert not result.success
+        assert result.attempts == 1
+        assert s3.put_object.call_count == 1
+        assert pool.stats['retries'] == 0
+
+    def test_permanent_error_not_retried(self):
+        """Test access denied fails immediately without affecting other pages"""
+        def put_object(**kwargs):
+            if kwargs['Key'].endswith('page_1.jpg'):
+                raise _client_error('AccessDenied', 403)
+            return {}
+
+        pool, _ = _pool(put_object, max_attempts=4)
+        results = pool.upload_all([_request(0), _request(1), _request(2)])
+
+        assert [r.success for r in results] == [True, False, True]
+        assert results[1].attempts == 1
+        assert 'AccessDenied' in results[1].error
+        assert pool.stats['failed'] == 1
+
+    def test_gives_up_after_max_attempts(self):
+        """Test persistent throttling fails after max_attempts"""
+        pool, s3 = _pool(_client_error('SlowDown', 503), max_attempts=3)
+        result = pool.upload(_request(1))
+
+        assert not result.success
+        assert s3.put_object.call_count == 3
+
+    def test_bounded_in_flight(self):
+        """Test a generator is consumed no further ahead than max_in_flight"""
+        release = threading.Event()
+        produced = []
+
+        def put_object(**kwargs):
+            release.wait(2)
+            return {}
+
+        def requests():
+            for i in range(6):
+                produced.append(i)
+                yield _request(i)
+
+        pool, _ = _pool(put_object, max_workers=2)
+        worker = threading.Thread(target=lambda: pool.upload_all(requests(), max_in_flight=2))
+        worker.start()
+        time.sleep(0.1)
+
+        assert len(produced) == 2
+
+        release.set()
+        worker.join(2)
+        pool.close()
+        assert len(produced) == 6
+
+    def test_metadata_passed_through(self):
+        """Test user metadata is sent with the object"""
+        pool, s3 = _pool(lambda **kwargs: {})
+        request = UploadRequest('bkt', 'thumbnails/a.jpg', b'x', 'image/jpeg', metadata={'original-key': 'a.pdf'})
+
+        assert pool.upload(request).success
+        assert s3.put_object.call_args.kwargs['Metadata'] == {'original-key': 'a.pdf'}
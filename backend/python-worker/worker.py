@@ -13,15 +13,17 @@ CHANGES FROM ORIGINAL:
 import os
 import sys
 import json
+import base64
 import time
 import logging
 import tempfile
 import argparse
 import signal
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Callable, Dict, Any, Optional, List, Tuple
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import unquote_plus  # CRITICAL: For URL decoding S3 keys
 
 import boto3
@@ -30,7 +32,21 @@ from botocore.exceptions import ClientError
 from config import get_config
 from file_router import FileRouter
 from opensearch_client import OpenSearchClient
-from processors import ImageEmbeddingGenerator
+from processors import ImageEmbeddingGenerator, ProcessingResult
+from services.pipeline import StreamingPipeline, Stage, PipelineItem
+from services.batch_processor import StreamingBulkIndexer
+from services.extraction_pool import ExtractionPoolBroken, ProcessPoolExtractor
+from services.result_cache import create_result_cache, compute_content_hash
+from services.embedding_queue import EmbeddingBatchQueue
+from services.upload_pool import S3UploadPool, UploadRequest
+from services.path_metadata import parse_path_metadata
+from services.admission_controller import AdmissionController
+from services.concurrency_controller import ConcurrencyController
+from services.queue_consumer import AsyncQueueConsumer
+from services.message_acknowledger import MessageAcknowledger
+from services.change_detector import (
+    ChangeDetector, ChangeDecision, UNCHANGED, METADATA_ONLY, normalize_etag
+)
 
 
 # Configure logging
@@ -102,9 +118,45 @@ class FileProcessingWorker:
         # Initialize file router
         self.file_router = FileRouter(config)
 
+        # Optional process-pool extraction backend (processors run outside the GIL)
+        self.extraction_pool = None
+        if config.processing.extraction_backend == 'process':
+            self.extraction_pool = ProcessPoolExtractor(
+                config,
+                processes=config.processing.extraction_processes or None,
+                max_tasks_per_child=config.processing.extraction_max_tasks_per_child,
+                max_child_memory_mb=config.processing.extraction_max_child_memory_mb
+            )
+
+        # Content-addressed result cache (skips extraction for re-uploaded/duplicate files)
+        self.result_cache = create_result_cache(config)
+
         # Initialize OpenSearch client
         self.opensearch = OpenSearchClient(config)
 
+        # Shared bulk indexer: documents are acknowledged per item, so SQS
+        # deletion (and DLQ routing) happens only after the bulk response
+        self.bulk_indexer = None
+        if config.aws.opensearch_bulk_enabled:
+            self.bulk_indexer = StreamingBulkIndexer(
+                self.opensearch,
+                max_docs=config.aws.opensearch_bulk_max_docs,
+                max_bytes=config.aws.opensearch_bulk_max_bytes,
+                max_latency_seconds=config.aws.opensearch_bulk_max_latency_seconds
+            )
+            self.bulk_indexer.start()
+        self._pipeline: Optional[StreamingPipeline] = None
+        self._queue_consumer: Optional[AsyncQueueConsumer] = None
+
+        # Change detection: skip re-synced objects whose content is already indexed
+        self.change_detector = None
+        if config.processing.change_detection:
+            self.change_detector = ChangeDetector(
+                self.s3_client,
+                self.opensearch,
+                head_workers=config.processing.change_detection_head_workers
+            )
+
         # Initialize image embedding generator
         embedding_enabled = os.environ.get('ENABLE_IMAGE_EMBEDDING', 'true').lower() == 'true'
         self.image_embedding = ImageEmbeddingGenerator(
@@ -113,6 +165,46 @@ class FileProcessingWorker:
             enabled=embedding_enabled
         )
 
+        # Batched embedding queue: concurrent images share one Lambda invocation
+        self.embedding_queue = None
+        if embedding_enabled and config.processing.embedding_batch_enabled:
+            self.embedding_queue = EmbeddingBatchQueue(
+                self.image_embedding,
+                max_batch_size=config.processing.embedding_batch_size,
+                max_wait_seconds=config.processing.embedding_batch_max_wait_seconds
+            )
+            self.embedding_queue.start()
+
+        # Shared pooled uploader for thumbnails (bounded concurrency, retries)
+        self.upload_pool = S3UploadPool(
+            region=config.aws.region,
+            max_workers=config.processing.upload_max_workers,
+            max_attempts=config.processing.upload_max_attempts
+        )
+
+        # Memory admission control: extraction starts only while the estimated
+        # footprint of in-flight messages fits the memory budget
+        self.admission = None
+        self._max_receive_count: Optional[int] = None
+        if config.processing.admission_control:
+            self.admission = AdmissionController(config)
+            self._max_receive_count = self._load_max_receive_count()
+
+        # Adaptive concurrency: extract worker count is tuned at runtime from
+        # measured throughput, resource pressure and the SQS backlog
+        self.concurrency = None
+        if config.processing.adaptive_concurrency:
+            processing = config.processing
+            self.concurrency = ConcurrencyController(
+                initial=processing.max_workers,
+                min_workers=processing.concurrency_min_workers,
+                max_workers=processing.concurrency_max_workers,
+                interval_seconds=processing.concurrency_interval_seconds,
+                cpu_ceiling=processing.concurrency_cpu_ceiling,
+                memory_ceiling=processing.concurrency_memory_ceiling,
+                queue_depth_fn=self._get_queue_depth
+            )
+
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGTERM, self._handle_shutdown_signal)
         signal.signal(signal.SIGINT, self._handle_shutdown_signal)
@@ -123,8 +215,26 @@ class FileProcessingWorker:
             'succeeded': 0,
             'failed': 0,
             'sent_to_dlq': 0,
+            'unchanged_skipped': 0,
+            'metadata_updated': 0,
+            'reprocessed': 0,
+            'deferred': 0,
+            'retried': 0,
             'start_time': time.time(),
         }
+        self._stats_lock = threading.Lock()
+
+        # Completed messages are deleted in coalesced DeleteMessageBatch calls;
+        # deletes close to the visibility deadline are sent first
+        self.acknowledger = MessageAcknowledger(
+            self.sqs_client,
+            config.aws.sqs_queue_url,
+            visibility_timeout=config.aws.sqs_visibility_timeout,
+            max_delay=config.aws.sqs_ack_max_delay,
+            urgent_seconds=config.aws.sqs_ack_urgent_seconds,
+            on_failure=lambda count: self._send_metric('MessageDeleteFailed', count)
+        )
+        self.acknowledger.start()
 
         # DLQ URL (取得)
         self.dlq_url = self._get_dlq_url()
@@ -139,6 +249,11 @@ class FileProcessingWorker:
         self.logger.info(f"  SQS queue: {config.aws.sqs_queue_url[:50] if config.aws.sqs_queue_url else 'NOT SET'}")
         self.logger.info(f"  DLQ URL: {self.dlq_url[:50] if self.dlq_url else 'NOT SET'}")
         self.logger.info(f"  Image embedding enabled: {embedding_enabled}")
+        self.logger.info(f"  Bulk indexing enabled: {self.bulk_indexer is not None}")
+        self.logger.info(f"  Extraction backend: {config.processing.extraction_backend}")
+        self.logger.info(f"  Change detection enabled: {self.change_detector is not None}")
+        self.logger.info(f"  Embedding batching enabled: {self.embedding_queue is not None}")
+        self.logger.info(f"  Admission control enabled: {self.admission is not None}")
         self.logger.info(f"  Thumbnail for images: {config.thumbnail.generate_for_images}")
         self.logger.info(f"  Thumbnail for PDFs: {config.thumbnail.generate_for_pdfs}")
         self.logger.info("=" * 60)
@@ -225,7 +340,8 @@ class FileProcessingWorker:
             )
 
             self.logger.info(f"Message sent to DLQ: {message.get('MessageId')}")
-            self.stats['sent_to_dlq'] += 1
+            with self._stats_lock:
+                self.stats['sent_to_dlq'] += 1
             return True
 
         except Exception as e:
@@ -288,151 +404,27 @@ class FileProcessingWorker:
         Extract category, nas_server, and root_folder from S3 key path.
         Also generates nas_path for display using original_path if available.
 
-        S3 key format examples:
-        - documents/road/ts-server3/R06_JOB/.../file.xdw
-        - documents/structure/ts-server6/H22_JOB/.../file.pdf
-        - processed/road/ts-server5/trashbox/.../file.doc
-
-        Original path format (from file-scanner):
-        - /mnt/nas/ts-server3/R06_JOB/.../file.xdw
-        - \\ts-server3\share\R06_JOB\...\file.xdw
-
-        Mapping:
-        - road: ts-server3, ts-server5 (道路)
-        - structure: ts-server6, ts-server7 (構造)
+        Parsing rules (key formats, server → category mapping) live in
+        services.path_metadata, shared with the maintenance scripts.
 
         Args:
             document: Document dictionary to update
             s3_key: S3 object key
             original_path: Original NAS path from file-scanner (optional)
         """
-        import re
-
-        # Helper function to convert original_path to UNC path
-        def convert_original_to_nas_path(orig_path: str) -> Optional[str]:
-            """
-            Convert original path to Windows UNC path.
-
-            Examples:
-            - /mnt/nas/ts-server3/R06_JOB/file.pdf → \\ts-server3\share\R06_JOB\file.pdf
-            - /mnt/ts-server3/share/R06_JOB/file.pdf → \\ts-server3\share\R06_JOB\file.pdf
-            - \\ts-server3\share\R06_JOB\file.pdf → \\ts-server3\share\R06_JOB\file.pdf (already UNC)
-            """
-            if not orig_path:
-                return None
-
-            # Already UNC path
-            if orig_path.startswith('\\\\'):
-                return orig_path
-
-            # Normalize path separators
-            normalized = orig_path.replace('\\', '/')
-
-            # Extract server name
-            server_match = re.search(r'(ts-server\d+)', normalized)
-            if not server_match:
-                return None
+        metadata = parse_path_metadata(s3_key, original_path)
+        document.update(metadata)
 
-            nas_server = server_match.group(1)
-
-            # Get the path after server name
-            parts = normalized.split(f'{nas_server}/')
-            if len(parts) < 2:
-                return None
-
-            remaining = parts[1]
-
-            # Remove 'share/' prefix if present (some paths have it, some don't)
-            if remaining.startswith('share/'):
-                remaining = remaining[6:]
-
-            # Convert to Windows path
-            windows_path = remaining.replace('/', '\\')
-
-            return f"\\\\{nas_server}\\share\\{windows_path}"
-
-        # Category display mapping
-        category_display_map = {
-            'road': '道路',
-            'structure': '構造'
-        }
-
-        # Pattern to match: {prefix}/{category}/{server}/{root_folder}/...
-        # Prefixes: documents, processed, docuworks-converted
-        pattern = r'^(?:documents|processed|docuworks-converted)/(road|structure)/(ts-server\d+)/([^/]+)/'
-        match = re.match(pattern, s3_key)
-
-        if match:
-            category = match.group(1)
-            nas_server = match.group(2)
-            root_folder = match.group(3)
-
-            document['category'] = category
-            document['category_display'] = category_display_map.get(category, category)
-            document['nas_server'] = nas_server
-            document['root_folder'] = root_folder
-
-            # Generate NAS path: prefer original_path if available
-            if original_path:
-                nas_path = convert_original_to_nas_path(original_path)
-                if nas_path:
-                    document['nas_path'] = nas_path
-                    self.logger.debug(f"NAS path from original_path: {nas_path}")
-                else:
-                    # Fallback to s3_key based generation
-                    remaining_path = s3_key.split(f'{nas_server}/', 1)[-1] if nas_server in s3_key else ''
-                    windows_path = remaining_path.replace('/', '\\')
-                    document['nas_path'] = f"\\\\{nas_server}\\share\\{windows_path}"
-            else:
-                # Generate from s3_key
-                remaining_path = s3_key.split(f'{nas_server}/', 1)[-1] if nas_server in s3_key else ''
-                windows_path = remaining_path.replace('/', '\\')
-                document['nas_path'] = f"\\\\{nas_server}\\share\\{windows_path}"
-
-            self.logger.debug(
-                f"Extracted metadata: category={category}, server={nas_server}, "
-                f"folder={root_folder}, nas_path={document.get('nas_path', 'N/A')}"
+        if 'nas_path' not in metadata:
+            self.logger.warning(
+                f"Could not generate nas_path from key: {s3_key[:100]}..."
             )
         else:
-            # Fallback: try to extract server from path
-            server_match = re.search(r'(ts-server\d+)', s3_key)
-            nas_server = None
-
-            if server_match:
-                nas_server = server_match.group(1)
-                document['nas_server'] = nas_server
-
-                # Infer category from server number
-                server_num = int(re.search(r'\d+', nas_server).group())
-                if server_num in [3, 5]:
-                    document['category'] = 'road'
-                    document['category_display'] = '道路'
-                elif server_num in [6, 7]:
-                    document['category'] = 'structure'
-                    document['category_display'] = '構造'
-
-            # Generate nas_path even in fallback case
-            if original_path:
-                nas_path = convert_original_to_nas_path(original_path)
-                if nas_path:
-                    document['nas_path'] = nas_path
-                    self.logger.info(f"NAS path generated from original_path (fallback): {nas_path}")
-            elif nas_server:
-                # Generate from s3_key as last resort
-                remaining_path = s3_key.split(f'{nas_server}/', 1)[-1] if nas_server in s3_key else ''
-                if remaining_path:
-                    windows_path = remaining_path.replace('/', '\\')
-                    document['nas_path'] = f"\\\\{nas_server}\\share\\{windows_path}"
-                    self.logger.info(f"NAS path generated from s3_key (fallback): {document['nas_path']}")
-
-            if 'nas_path' not in document:
-                self.logger.warning(
-                    f"Could not generate nas_path from key: {s3_key[:100]}..."
-                )
-            else:
-                self.logger.debug(
-                    f"Fallback metadata extracted: server={nas_server}, nas_path={document.get('nas_path', 'N/A')}"
-                )
+            self.logger.debug(
+                f"Extracted metadata: category={metadata.get('category')}, "
+                f"server={metadata.get('nas_server')}, folder={metadata.get('root_folder')}, "
+                f"nas_path={metadata['nas_path']}"
+            )
 
     def upload_thumbnail_to_s3(
         self,
@@ -464,182 +456,620 @@ class FileProcessingWorker:
             thumbnail_key = f"thumbnails/{file_name}_{path_hash}_thumb.jpg"
 
             # Upload thumbnail to dedicated bucket
-            self.s3_client.put_object(
-                Bucket=thumbnail_bucket,
-                Key=thumbnail_key,
-                Body=thumbnail_data,
-                ContentType='image/jpeg',
-                Metadata={
+            result = self.upload_pool.upload(UploadRequest(
+                bucket=thumbnail_bucket,
+                key=thumbnail_key,
+                data=thumbnail_data,
+                content_type='image/jpeg',
+                metadata={
                     'original-key': key,
                     'original-bucket': bucket
                 }
-            )
+            ))
+            if not result.success:
+                self.logger.warning(f"Failed to upload thumbnail after {result.attempts} attempt(s): {result.error}")
+                return None
 
-            thumbnail_url = f"s3://{thumbnail_bucket}/{thumbnail_key}"
-            self.logger.debug(f"Uploaded thumbnail: {thumbnail_url}")
+            self.logger.debug(f"Uploaded thumbnail: {result.url}")
 
-            return thumbnail_url
+            return result.url
 
         except Exception as e:
             self.logger.warning(f"Failed to upload thumbnail: {e}")
             return None
 
-    def process_sqs_message(self, message: Dict[str, Any]) -> tuple[bool, str]:
+    def _stage_parse(self, ctx: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
         """
-        Process a single SQS message
+        Pipeline stage: parse the SQS message body into bucket/key/original_path
 
-        MODIFIED: Now returns (success, error_message) tuple
+        Sets ctx['skipped'] when the object must not be processed (thumbnails).
 
         Args:
-            message: SQS message
+            ctx: Per-message processing context (must contain 'message')
 
         Returns:
-            (success, error_message): Processing result and error description
+            (success, error_message)
         """
-        temp_file_path = None
+        if 'parse_result' in ctx:
+            # Already parsed when the received batch was prepared
+            return ctx.pop('parse_result')
+
+        message = ctx['message']
 
         try:
-            # Parse message body
             body = json.loads(message['Body'])
+        except json.JSONDecodeError as e:
+            error_msg = f"Invalid message format: {e}"
+            self.logger.error(error_msg)
+            return (False, error_msg)
+
+        # Extract file information
+        original_path = None  # Original NAS path from file-scanner
+        if 'Records' in body:
+            # S3 event notification format
+            record = body['Records'][0]
+            bucket = record['s3']['bucket']['name']
+            # CRITICAL FIX: S3 event notifications URL-encode the object key
+            # Must decode to handle Japanese characters, spaces, and special chars
+            raw_key = record['s3']['object']['key']
+            key = unquote_plus(raw_key)  # unquote_plus handles + as space too
+            self.logger.debug(f"Decoded S3 key: {raw_key[:50]}... -> {key[:50]}...")
+            # Object identity for the result cache (avoids a HEAD request)
+            ctx['etag'] = record['s3']['object'].get('eTag')
+            ctx['size'] = record['s3']['object'].get('size')
+        else:
+            # Custom message format (from file-scanner)
+            bucket = body.get('bucket', self.config.aws.s3_bucket)
+            key = body.get('key') or body.get('s3Key')  # Support both formats
+            # Also decode in case custom messages are URL-encoded
+            if key:
+                key = unquote_plus(key)
+            # Extract original NAS path if available
+            original_path = body.get('originalPath') or body.get('original_path')
+
+        ctx['bucket'] = bucket
+        ctx['key'] = key
+        ctx['original_path'] = original_path
+
+        self.logger.info(f"Processing: s3://{bucket}/{key}")
+        if original_path:
+            self.logger.debug(f"Original NAS path: {original_path}")
+
+        # Skip files from thumbnails directory (prevent recursive processing)
+        if key.startswith('thumbnails/') or '/thumbnails/' in key:
+            self.logger.info(f"Skipping thumbnail file: {key}")
+            ctx['skipped'] = True
+            return (True, "Skipped - thumbnail file")
+
+        # Check if file type is supported
+        if not self.file_router.is_supported(key):
+            ext = Path(key).suffix.lower()
+            error_msg = f"Unsupported file type: {ext}"
+            self.logger.warning(error_msg)
+            return (False, error_msg)
+
+        return (True, None)
+
+    def _stage_detect_change(self, ctx: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        """
+        Pipeline stage: compare the S3 object with the indexed document
+
+        Unchanged objects are skipped and objects whose content is unchanged but
+        whose path metadata/LastModified differ get a partial update; both set
+        ctx['skipped']. Uses the decision prepared for the whole received batch
+        when available.
+
+        Args:
+            ctx: Per-message processing context
+
+        Returns:
+            (success, error_message)
+        """
+        if self.change_detector is None:
+            return (True, None)
+
+        decision: Optional[ChangeDecision] = ctx.get('change')
+        if decision is None:
+            decision = self.change_detector.classify([self._change_candidate(ctx)])[0]
+            ctx['change'] = decision
+
+        state = decision.object_state
+        if state is not None:
+            ctx['etag'] = state.etag
+            ctx['size'] = state.size
+            ctx['last_modified'] = state.last_modified
+
+        key = ctx['key']
+
+        if decision.action == UNCHANGED:
+            self.logger.info(f"Unchanged since last index, skipping: {key}")
+            with self._stats_lock:
+                self.stats['unchanged_skipped'] += 1
+            ctx['skipped'] = True
+            return (True, "Skipped - unchanged")
+
+        if decision.action == METADATA_ONLY:
+            if not self.opensearch.update_document(key, decision.updates):
+                return (False, "Failed to update document metadata in OpenSearch")
+            self.logger.info(f"Content unchanged, metadata updated: {key} ({', '.join(decision.updates)})")
+            with self._stats_lock:
+                self.stats['metadata_updated'] += 1
+            ctx['skipped'] = True
+            return (True, "Metadata updated - content unchanged")
+
+        self.logger.debug(f"Reprocessing {key}: {decision.reason}")
+        with self._stats_lock:
+            self.stats['reprocessed'] += 1
+        return (True, None)
+
+    def _change_candidate(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a ChangeDetector input item from a parsed message context"""
+        expected: Dict[str, Any] = {}
+        self._extract_path_metadata(expected, ctx['key'], ctx.get('original_path'))
+        return {'bucket': ctx['bucket'], 'key': ctx['key'], 'expected': expected}
+
+    def _prepare_contexts(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Create processing contexts for a received batch
+
+        With change detection enabled the messages are parsed up front so the
+        whole batch is classified with parallel HEADs and a single mget.
 
-            # Extract file information
-            original_path = None  # Original NAS path from file-scanner
-            if 'Records' in body:
-                # S3 event notification format
-                record = body['Records'][0]
-                bucket = record['s3']['bucket']['name']
-                # CRITICAL FIX: S3 event notifications URL-encode the object key
-                # Must decode to handle Japanese characters, spaces, and special chars
-                raw_key = record['s3']['object']['key']
-                key = unquote_plus(raw_key)  # unquote_plus handles + as space too
-                self.logger.debug(f"Decoded S3 key: {raw_key[:50]}... -> {key[:50]}...")
+        Args:
+            messages: SQS messages
+
+        Returns:
+            One context per message, in the same order
+        """
+        contexts = [{'message': message} for message in messages]
+        if self.change_detector is None:
+            return contexts
+
+        candidates = []
+        for ctx in contexts:
+            try:
+                ctx['parse_result'] = self._stage_parse(ctx)
+            except Exception as e:
+                ctx['parse_result'] = (False, f"Error processing message: {e}")
+                continue
+            if ctx['parse_result'][0] and not ctx.get('skipped'):
+                candidates.append(ctx)
+
+        if candidates:
+            try:
+                decisions = self.change_detector.classify(
+                    [self._change_candidate(ctx) for ctx in candidates]
+                )
+                for ctx, decision in zip(candidates, decisions):
+                    ctx['change'] = decision
+            except Exception as e:
+                # Each message falls back to its own classification in the stage
+                self.logger.warning(f"Batch change detection failed: {e}")
+
+        return contexts
+
+    def _stage_download(self, ctx: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        """
+        Pipeline stage: download the S3 object into the worker temp directory
+
+        On a result cache hit by ETag/size the download is skipped entirely;
+        otherwise the downloaded content is hashed and looked up by content.
+
+        Args:
+            ctx: Per-message processing context
+
+        Returns:
+            (success, error_message)
+        """
+        if self.result_cache is not None:
+            self._resolve_object_identity(ctx)
+            entry = self.result_cache.lookup_object(ctx.get('etag'), ctx.get('size'))
+            if entry is not None:
+                self.logger.info(f"Result cache hit (etag): {ctx['key']} - skipping download")
+                ctx['cache_entry'] = entry
+                self._release_admission(ctx)
+                return (True, None)
+
+        # Create temporary file
+        file_ext = Path(ctx['key']).suffix
+        with tempfile.NamedTemporaryFile(
+            suffix=file_ext,
+            delete=False,
+            dir=self.config.processing.temp_dir
+        ) as tmp_file:
+            ctx['temp_file_path'] = tmp_file.name
+
+        # Download file from S3
+        if not self.download_file_from_s3(ctx['bucket'], ctx['key'], ctx['temp_file_path']):
+            return (False, "S3 download failed")
+
+        if self.result_cache is not None:
+            try:
+                ctx['content_hash'] = compute_content_hash(ctx['temp_file_path'])
+            except OSError as e:
+                self.logger.warning(f"Failed to hash downloaded file: {e}")
             else:
-                # Custom message format (from file-scanner)
-                bucket = body.get('bucket', self.config.aws.s3_bucket)
-                key = body.get('key') or body.get('s3Key')  # Support both formats
-                # Also decode in case custom messages are URL-encoded
-                if key:
-                    key = unquote_plus(key)
-                # Extract original NAS path if available
-                original_path = body.get('originalPath') or body.get('original_path')
-
-            self.logger.info(f"Processing: s3://{bucket}/{key}")
-            if original_path:
-                self.logger.debug(f"Original NAS path: {original_path}")
-
-            # Skip files from thumbnails directory (prevent recursive processing)
-            if key.startswith('thumbnails/') or '/thumbnails/' in key:
-                self.logger.info(f"Skipping thumbnail file: {key}")
-                return (True, "Skipped - thumbnail file")
-
-            # Check if file type is supported
-            if not self.file_router.is_supported(key):
-                ext = Path(key).suffix.lower()
-                error_msg = f"Unsupported file type: {ext}"
-                self.logger.warning(error_msg)
-                return (False, error_msg)
+                entry = self.result_cache.lookup_content(
+                    ctx['content_hash'], ctx.get('etag'), ctx.get('size')
+                )
+                if entry is not None:
+                    self.logger.info(f"Result cache hit (content): {ctx['key']}")
+                    ctx['cache_entry'] = entry
+                    self._release_admission(ctx)
 
-            # Create temporary file
-            file_ext = Path(key).suffix
-            with tempfile.NamedTemporaryFile(
-                suffix=file_ext,
-                delete=False,
-                dir=self.config.processing.temp_dir
-            ) as tmp_file:
-                temp_file_path = tmp_file.name
-
-            # Download file from S3
-            if not self.download_file_from_s3(bucket, key, temp_file_path):
-                error_msg = "S3 download failed"
-                return (False, error_msg)
+        return (True, None)
+
+    def _resolve_object_identity(self, ctx: Dict[str, Any]):
+        """
+        Fill ctx['etag'] / ctx['size'] with a HEAD request if the message did not carry them
+
+        Failures are ignored; the content hash lookup after download still applies.
+        """
+        if ctx.get('etag') and ctx.get('size') is not None:
+            return
+
+        try:
+            response = self.s3_client.head_object(Bucket=ctx['bucket'], Key=ctx['key'])
+            ctx['etag'] = response.get('ETag')
+            ctx['size'] = response.get('ContentLength')
+        except ClientError as e:
+            self.logger.debug(f"HEAD failed for {ctx['key']}: {e}")
+
+    def _stage_admit(self, ctx: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        """
+        Pipeline stage: reserve the estimated extraction memory for this message
+
+        Runs before the download, estimating from the size in the S3 event
+        (HEAD only for messages without one). Waits up to ADMISSION_WAIT_SECONDS
+        for in-flight work to release memory. If the message still does not fit
+        it is marked deferred (and skipped) so the caller returns it to SQS
+        instead of deleting it, unless another receive could move it to the
+        DLQ, in which case it is admitted anyway.
+
+        Args:
+            ctx: Per-message processing context
+
+        Returns:
+            (success, error_message)
+        """
+        if self.admission is None:
+            return (True, None)
+
+        if ctx.get('size') is None:
+            self._resolve_object_identity(ctx)
+
+        cost_mb = self.admission.estimate_mb(ctx['key'], ctx.get('size'))
+        if self.admission.acquire(
+            cost_mb,
+            timeout=self.config.processing.admission_wait_seconds,
+            force=self._near_receive_limit(ctx['message'])
+        ):
+            ctx['admitted_mb'] = cost_mb
+            return (True, None)
+
+        self.logger.warning(
+            f"Deferring {ctx['key']}: estimated {cost_mb:.0f}MB does not fit the memory budget"
+        )
+        ctx['deferred'] = True
+        ctx['skipped'] = True
+        return (True, "Deferred - memory budget")
 
-            # Process file
+    def _stage_extract(self, ctx: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        """
+        Pipeline stage: extract text/thumbnail via FileRouter and build the document
+
+        Args:
+            ctx: Per-message processing context
+
+        Returns:
+            (success, error_message)
+        """
+        bucket = ctx['bucket']
+        key = ctx['key']
+
+        cache_entry = ctx.get('cache_entry')
+        if cache_entry is not None:
+            # Reuse the cached extraction result instead of running the processors
+            result = ProcessingResult(**cache_entry['result'])
+            if cache_entry.get('thumbnail_data'):
+                result.thumbnail_data = base64.b64decode(cache_entry['thumbnail_data'])
+        else:
             self.logger.info("Starting file processing...")
-            result = self.file_router.process_file(temp_file_path)
+            if self.extraction_pool is not None:
+                try:
+                    result = self.extraction_pool.process_file(
+                        ctx['temp_file_path'],
+                        metadata={'bucket': bucket, 'key': key}
+                    )
+                except ExtractionPoolBroken as e:
+                    # A pool child died (possibly while running another file):
+                    # leave the message on the queue instead of the DLQ
+                    ctx['retry'] = True
+                    error_msg = f"Processing interrupted: {e}"
+                    self.logger.warning(error_msg)
+                    return (False, error_msg)
+            else:
+                result = self.file_router.process_file(ctx['temp_file_path'])
 
-            if not result.success:
-                error_msg = f"Processing failed: {result.error_message}"
-                self.logger.error(error_msg)
-                return (False, error_msg)
+        if not result.success:
+            error_msg = f"Processing failed: {result.error_message}"
+            self.logger.error(error_msg)
+            return (False, error_msg)
+
+        # Prepare document for indexing
+        document = result.to_dict()
+        document['file_key'] = key
+        document['bucket'] = bucket
+        document['s3_url'] = f"s3://{bucket}/{key}"
+
+        # Extract category, nas_server, root_folder from S3 key
+        # Key format: documents/{category}/{server}/{root_folder}/...
+        # or: processed/{category}/{server}/{root_folder}/...
+        # Also generates nas_path using original_path if available
+        self._extract_path_metadata(document, key, ctx.get('original_path'))
+
+        # IMPORTANT: Override file_name and file_extension with correct values from S3 key
+        # The file_router extracts these from the temp file path, which is incorrect
+        document['file_name'] = Path(key).name
+        document['file_extension'] = Path(key).suffix.lower()
+        document['file_path'] = f"s3://{bucket}/{key}"
+
+        # Source object identity, compared by change detection on re-sync
+        if ctx.get('etag'):
+            document['source_etag'] = normalize_etag(ctx['etag'])
+        if ctx.get('last_modified'):
+            document['source_last_modified'] = ctx['last_modified']
+
+        ctx['result'] = result
+        ctx['document'] = document
 
-            # Prepare document for indexing
-            document = result.to_dict()
-            document['file_key'] = key
-            document['bucket'] = bucket
-            document['s3_url'] = f"s3://{bucket}/{key}"
-
-            # Extract category, nas_server, root_folder from S3 key
-            # Key format: documents/{category}/{server}/{root_folder}/...
-            # or: processed/{category}/{server}/{root_folder}/...
-            # Also generates nas_path using original_path if available
-            self._extract_path_metadata(document, key, original_path)
-
-            # IMPORTANT: Override file_name and file_extension with correct values from S3 key
-            # The file_router extracts these from the temp file path, which is incorrect
-            document['file_name'] = Path(key).name
-            document['file_extension'] = Path(key).suffix.lower()
-            document['file_path'] = f"s3://{bucket}/{key}"
-
-            # Upload thumbnail if available
-            if result.thumbnail_data:
-                self.logger.info(f"Thumbnail generated ({len(result.thumbnail_data)} bytes), uploading to S3...")
-                thumbnail_url = self.upload_thumbnail_to_s3(
-                    result.thumbnail_data,
-                    bucket,
-                    key
+        # The local copy is no longer needed once extraction is done
+        self._cleanup_message_context(ctx)
+
+        return (True, None)
+
+    def _stage_enrich(self, ctx: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        """
+        Pipeline stage: upload thumbnail and generate image embedding
+
+        Both are best-effort; failures are logged and the document is still indexed.
+
+        Args:
+            ctx: Per-message processing context
+
+        Returns:
+            (success, error_message)
+        """
+        bucket = ctx['bucket']
+        key = ctx['key']
+        result = ctx['result']
+        document = ctx['document']
+        file_ext = Path(key).suffix.lower()
+        cache_entry = ctx.get('cache_entry') or {}
+
+        # Upload thumbnail if available
+        if cache_entry.get('thumbnail_url'):
+            document['thumbnail_url'] = cache_entry['thumbnail_url']
+            self.logger.info(f"Thumbnail reused from cache: {document['thumbnail_url']}")
+        elif result.thumbnail_data:
+            self.logger.info(f"Thumbnail generated ({len(result.thumbnail_data)} bytes), uploading to S3...")
+            thumbnail_url = self.upload_thumbnail_to_s3(
+                result.thumbnail_data,
+                bucket,
+                key
+            )
+            if thumbnail_url:
+                document['thumbnail_url'] = thumbnail_url
+                self.logger.info(f"Thumbnail uploaded: {thumbnail_url}")
+            else:
+                self.logger.warning("Thumbnail upload failed")
+        else:
+            self.logger.info(f"No thumbnail generated for {file_ext} file (processor: {result.processor_name})")
+
+        # Generate image embedding for similarity search
+        if cache_entry.get('image_embedding'):
+            document['image_embedding'] = cache_entry['image_embedding']
+            document['image_embedding_dimension'] = cache_entry.get('image_embedding_dimension')
+        elif self.image_embedding.is_supported(file_ext):
+            self.logger.info("Generating image embedding...")
+            if self.embedding_queue is not None:
+                # Blocks this worker thread until the shared batch returns
+                batched = self.embedding_queue.embed_and_wait(
+                    document['s3_url'],
+                    timeout=self.config.processing.processing_timeout
+                )
+                embedding, dimension = (
+                    (batched['embedding'], batched['dimension']) if batched else (None, None)
                 )
-                if thumbnail_url:
-                    document['thumbnail_url'] = thumbnail_url
-                    self.logger.info(f"Thumbnail uploaded: {thumbnail_url}")
-                else:
-                    self.logger.warning("Thumbnail upload failed")
             else:
-                file_ext = Path(key).suffix.lower()
-                self.logger.info(f"No thumbnail generated for {file_ext} file (processor: {result.processor_name})")
-
-            # Generate image embedding for similarity search
-            file_ext = Path(key).suffix.lower()
-            if self.image_embedding.is_supported(file_ext):
-                self.logger.info("Generating image embedding...")
                 embedding, dimension = self.image_embedding.generate_embedding_safe(
                     s3_url=document['s3_url'],
                     file_extension=file_ext,
                     use_cache=True
                 )
-                if embedding:
-                    document['image_embedding'] = embedding
-                    document['image_embedding_dimension'] = dimension
-                    self.logger.info(f"Image embedding generated ({dimension}D)")
-                else:
-                    self.logger.warning("Failed to generate image embedding - continuing without it")
-
-            # Index to OpenSearch
-            # CRITICAL FIX: OpenSearch indexing is REQUIRED, not optional
-            # If OpenSearch is not connected, this is a FAILURE that must go to DLQ
-            if not self.opensearch.is_connected():
-                error_msg = "OpenSearch not connected - CANNOT index document (check OPENSEARCH_ENDPOINT env var and connectivity)"
-                self.logger.error(error_msg)
-                return (False, error_msg)
+            if embedding:
+                document['image_embedding'] = embedding
+                document['image_embedding_dimension'] = dimension
+                self.logger.info(f"Image embedding generated ({dimension}D)")
+            else:
+                self.logger.warning("Failed to generate image embedding - continuing without it")
+
+        return (True, None)
+
+    def _stage_index(self, ctx: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        """
+        Pipeline stage: index the prepared document to OpenSearch
+
+        Args:
+            ctx: Per-message processing context
 
-            self.logger.info("Indexing to OpenSearch...")
-            if not self.opensearch.index_document(document, document_id=key):
-                error_msg = "Failed to index document to OpenSearch"
+        Returns:
+            (success, error_message)
+        """
+        key = ctx['key']
+        result = ctx['result']
+
+        # Index to OpenSearch
+        # CRITICAL FIX: OpenSearch indexing is REQUIRED, not optional
+        # If OpenSearch is not connected, this is a FAILURE that must go to DLQ
+        if not self.opensearch.is_connected():
+            error_msg = "OpenSearch not connected - CANNOT index document (check OPENSEARCH_ENDPOINT env var and connectivity)"
+            self.logger.error(error_msg)
+            return (False, error_msg)
+
+        self.logger.info("Indexing to OpenSearch...")
+        if self.bulk_indexer is not None:
+            # Blocks this worker thread until the bulk item is acknowledged;
+            # concurrent workers share the same bulk request
+            success, error = self.bulk_indexer.index_and_wait(
+                ctx['document'],
+                document_id=key,
+                timeout=self.config.processing.processing_timeout
+            )
+            if success is None:
+                # The bulk request may still succeed: leave the message on the
+                # queue (no DLQ, no delete) so it is redelivered after its
+                # visibility timeout instead of being reported as failed
+                ctx['retry'] = True
+                error_msg = f"OpenSearch indexing not acknowledged: {error}"
+                self.logger.warning(error_msg)
+                return (False, error_msg)
+            if not success:
+                error_msg = f"Failed to index document to OpenSearch: {error}"
                 self.logger.error(error_msg)
                 return (False, error_msg)
+        elif not self.opensearch.index_document(ctx['document'], document_id=key):
+            error_msg = "Failed to index document to OpenSearch"
+            self.logger.error(error_msg)
+            return (False, error_msg)
 
-            self.logger.info("Successfully indexed document")
+        self.logger.info("Successfully indexed document")
+        self._remember_result(ctx)
 
-            self.logger.info(
-                f"Successfully processed: {Path(key).name} "
-                f"({result.char_count:,} chars, {result.processing_time_seconds:.2f}s)"
+        self.logger.info(
+            f"Successfully processed: {Path(key).name} "
+            f"({result.char_count:,} chars, {result.processing_time_seconds:.2f}s)"
+        )
+
+        return (True, None)
+
+    def _remember_result(self, ctx: Dict[str, Any]):
+        """
+        Store a freshly indexed result in the result cache
+
+        Only results produced by the processors in this run are stored; cache
+        hits are already present under the same content hash.
+        """
+        if self.result_cache is None or ctx.get('cache_entry') is not None:
+            return
+
+        content_hash = ctx.get('content_hash')
+        if not content_hash:
+            return
+
+        result = ctx['result']
+        document = ctx['document']
+        entry = {
+            'result': result.to_dict(),
+            'thumbnail_url': document.get('thumbnail_url'),
+            'image_embedding': document.get('image_embedding'),
+            'image_embedding_dimension': document.get('image_embedding_dimension'),
+        }
+        if result.thumbnail_data and not entry['thumbnail_url']:
+            entry['thumbnail_data'] = base64.b64encode(result.thumbnail_data).decode('ascii')
+
+        try:
+            self.result_cache.store(content_hash, entry, ctx.get('etag'), ctx.get('size'))
+        except Exception as e:
+            self.logger.warning(f"Failed to store result cache entry: {e}")
+
+    def _load_max_receive_count(self) -> Optional[int]:
+        """
+        Read maxReceiveCount from the queue's redrive policy
+
+        Returns:
+            maxReceiveCount, or None if the queue has no DLQ or the lookup failed
+        """
+        try:
+            response = self.sqs_client.get_queue_attributes(
+                QueueUrl=self.config.aws.sqs_queue_url,
+                AttributeNames=['RedrivePolicy']
             )
+            policy = response.get('Attributes', {}).get('RedrivePolicy')
+            return int(json.loads(policy)['maxReceiveCount']) if policy else None
+        except Exception as e:
+            self.logger.warning(f"Could not read the queue redrive policy: {e}")
+            return None
 
-            return (True, None)
+    def _near_receive_limit(self, message: Dict[str, Any]) -> bool:
+        """
+        Whether deferring this message again could send it to the DLQ
 
-        except json.JSONDecodeError as e:
-            error_msg = f"Invalid message format: {e}"
-            self.logger.error(error_msg)
-            return (False, error_msg)
+        Deferrals count as receives, so the last receive before maxReceiveCount
+        (and the one before it, kept for a real processing retry) is not deferred.
+        """
+        if self._max_receive_count is None:
+            return False
+        try:
+            receive_count = int(message.get('Attributes', {}).get('ApproximateReceiveCount', 1))
+        except (TypeError, ValueError):
+            return False
+        return receive_count >= self._max_receive_count - 1
+
+    def _release_admission(self, ctx: Dict[str, Any]):
+        """Release the memory reserved by _stage_admit (no-op if nothing is reserved)"""
+        admitted_mb = ctx.pop('admitted_mb', None)
+        if admitted_mb is not None:
+            self.admission.release(admitted_mb)
+
+    def _cleanup_message_context(self, ctx: Dict[str, Any]):
+        """Remove the temporary file associated with a message context and release its memory reservation"""
+        self._release_admission(ctx)
+
+        temp_file_path = ctx.pop('temp_file_path', None)
+        if temp_file_path and os.path.exists(temp_file_path):
+            try:
+                os.remove(temp_file_path)
+                self.logger.debug(f"Removed temporary file: {temp_file_path}")
+            except Exception as e:
+                self.logger.warning(f"Failed to remove temporary file: {e}")
+
+    def process_sqs_message(
+        self,
+        message: Dict[str, Any],
+        ctx: Optional[Dict[str, Any]] = None
+    ) -> tuple[bool, str]:
+        """
+        Process a single SQS message
+
+        MODIFIED: Now returns (success, error_message) tuple.
+        Runs the same stages as the streaming pipeline, sequentially.
+
+        Args:
+            message: SQS message
+            ctx: Context prepared by _prepare_contexts (created if None)
+
+        Returns:
+            (success, error_message): Processing result and error description
+        """
+        if ctx is None:
+            ctx = {'message': message}
+
+        try:
+            for stage in (
+                self._stage_parse,
+                self._stage_detect_change,
+                self._stage_admit,
+                self._stage_download,
+                self._stage_extract,
+                self._stage_enrich,
+                self._stage_index,
+            ):
+                success, error_msg = stage(ctx)
+                if not success or ctx.get('skipped'):
+                    return (success, error_msg)
+
+            return (True, None)
 
         except Exception as e:
             error_msg = f"Error processing message: {e}"
@@ -648,174 +1078,428 @@ class FileProcessingWorker:
 
         finally:
             # Cleanup temporary file
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.remove(temp_file_path)
-                    self.logger.debug(f"Removed temporary file: {temp_file_path}")
-                except Exception as e:
-                    self.logger.warning(f"Failed to remove temporary file: {e}")
+            self._cleanup_message_context(ctx)
 
-    def _process_message_wrapper(self, message: Dict[str, Any]) -> Tuple[Dict[str, Any], bool, Optional[str]]:
+    def _process_message_wrapper(
+        self,
+        message: Dict[str, Any],
+        ctx: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], bool, Optional[str]]:
         """
         Wrapper for processing a single message in a thread-safe manner
 
         Args:
             message: SQS message to process
+            ctx: Prepared processing context (optional)
 
         Returns:
             (message, success, error_message): Tuple containing the original message and result
         """
+        started = time.time()
         try:
-            success, error_msg = self.process_sqs_message(message)
+            success, error_msg = self.process_sqs_message(message, ctx)
             return (message, success, error_msg)
         except Exception as e:
             return (message, False, str(e))
+        finally:
+            if self.concurrency is not None and not (ctx or {}).get('deferred'):
+                self.concurrency.record(time.time() - started)
+
+    def _current_max_workers(self) -> int:
+        """Extract worker count (adaptive when enabled, otherwise MAX_WORKERS)"""
+        if self.concurrency is not None:
+            return self.concurrency.current
+        return self.config.processing.max_workers
+
+    def _get_queue_depth(self) -> Optional[int]:
+        """
+        Approximate number of visible messages waiting in the main queue
+
+        Returns:
+            Message count, or None if the attribute could not be read
+        """
+        try:
+            response = self.sqs_client.get_queue_attributes(
+                QueueUrl=self.config.aws.sqs_queue_url,
+                AttributeNames=['ApproximateNumberOfMessages']
+            )
+            return int(response.get('Attributes', {}).get('ApproximateNumberOfMessages', 0))
+        except Exception as e:
+            self.logger.warning(f"Failed to get queue depth: {e}")
+            return None
+
+    def poll_and_process(self):
+        """
+        Main worker loop with parallel processing
+
+        Messages are received by the shared asyncio queue consumer, which keeps
+        up to the current worker count in flight and refills as each message
+        completes instead of waiting for the slowest message of a batch. Each
+        received batch is classified for change detection together, then its
+        messages are processed on the worker thread pool.
+        """
+        if self.concurrency is not None:
+            # One worker thread per message: the adaptive ceiling never exceeds
+            # a receive batch (CONCURRENCY_MAX_WORKERS defaults above SQS_MAX_MESSAGES)
+            self.concurrency.set_max_workers(
+                min(self.concurrency.max_workers, self.config.aws.sqs_max_messages)
+            )
+
+        max_workers = self._current_max_workers()
+        self.logger.info("Starting to poll SQS queue with parallel processing...")
+        self.logger.info(f"Queue URL: {self.config.aws.sqs_queue_url[:50]}...")
+        self.logger.info(f"Max workers: {max_workers}"
+                         f"{' (adaptive)' if self.concurrency is not None else ''}")
+
+        # Create OpenSearch index if it doesn't exist
+        if self.opensearch.is_connected():
+            self.opensearch.create_index()
+
+        # Sized for the adaptive ceiling; the consumer's in-flight limit is
+        # what bounds the number of messages processed at once
+        pool_size = max_workers
+        if self.concurrency is not None:
+            pool_size = max(max_workers, self.concurrency.max_workers)
+        executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='worker')
+
+        def dispatch(messages: List[Dict[str, Any]]):
+            self.logger.info(f"Received {len(messages)} message(s) - processing in parallel")
+            for ctx in self._prepare_contexts(messages):
+                executor.submit(self._process_consumed_message, ctx)
+
+        consumer = self._create_queue_consumer(dispatch, max_in_flight=max_workers)
+        self._wire_concurrency(consumer.set_max_in_flight)
+
+        self._run_queue_consumer(consumer, lambda: f"Worker stats: {self.stats}")
+        executor.shutdown(wait=True)
+
+        self._shutdown_backends()
+
+        self.logger.info("Worker stopped")
+        self._print_statistics()
 
-    def _delete_messages_batch(self, messages_to_delete: List[Dict[str, Any]]):
+    def _process_consumed_message(self, ctx: Dict[str, Any]):
         """
-        Delete multiple messages from SQS using batch delete
+        Process one message received by the queue consumer (poll mode)
+
+        Failures go to the DLQ and, like successes, are deleted from the main
+        queue. Deferred messages are returned to the queue for a later retry and
+        messages marked for retry are left to reappear after their visibility timeout.
 
         Args:
-            messages_to_delete: List of messages with ReceiptHandle to delete
+            ctx: Context prepared by _prepare_contexts
         """
-        if not messages_to_delete:
+        consumer = self._queue_consumer
+        message, success, error_msg = self._process_message_wrapper(ctx['message'], ctx)
+        message_id = message.get('MessageId', 'unknown')
+
+        if ctx.get('deferred'):
+            # Returned to the queue, not processed
+            with self._stats_lock:
+                self.stats['deferred'] += 1
+            consumer.defer(message, self.config.processing.admission_defer_seconds)
             return
 
-        # SQS batch delete supports up to 10 messages at a time
-        for i in range(0, len(messages_to_delete), 10):
-            batch = messages_to_delete[i:i+10]
-            entries = [
-                {
-                    'Id': str(idx),
-                    'ReceiptHandle': msg['ReceiptHandle']
-                }
-                for idx, msg in enumerate(batch)
-            ]
+        if ctx.get('retry'):
+            # Not the file's fault: redelivered after the visibility timeout
+            self.logger.warning(f"Message {message_id} left on the queue: {error_msg}")
+            with self._stats_lock:
+                self.stats['retried'] += 1
+            consumer.complete(message, False)
+            return
 
-            try:
-                response = self.sqs_client.delete_message_batch(
-                    QueueUrl=self.config.aws.sqs_queue_url,
-                    Entries=entries
+        with self._stats_lock:
+            self.stats['processed'] += 1
+            if success:
+                self.stats['succeeded'] += 1
+            else:
+                self.stats['failed'] += 1
+
+        if success:
+            self.logger.info(f"Message {message_id} processed successfully")
+        else:
+            self.logger.error(f"Message {message_id} processing failed: {error_msg}")
+            self._send_to_dlq(message, error_msg)
+
+        # Always delete; the consumer coalesces the delete with other completions
+        consumer.complete(message, True)
+
+    def _make_pipeline_handler(self, *steps):
+        """
+        Build a StreamingPipeline stage handler from one or more stage methods
+
+        Args:
+            steps: Stage methods taking the message context
+
+        Returns:
+            Callable suitable for services.pipeline.Stage
+        """
+        def handler(item: PipelineItem) -> bool:
+            for step in steps:
+                success, error_msg = step(item.context)
+                if not success:
+                    item.error = error_msg
+                    return False
+                if item.context.get('skipped'):
+                    item.finished = True
+                    return True
+            return True
+
+        return handler
+
+    def _pipeline_index_handler(self, item: PipelineItem) -> bool:
+        """
+        Index stage handler for the streaming pipeline
+
+        With bulk indexing enabled the item is handed to the shared bulk indexer
+        and completed asynchronously when its bulk item is acknowledged, so the
+        index workers never block on OpenSearch round trips.
+        """
+        if self.bulk_indexer is None:
+            return self._make_pipeline_handler(self._stage_index)(item)
+
+        ctx = item.context
+        if not self.opensearch.is_connected():
+            item.error = "OpenSearch not connected - CANNOT index document (check OPENSEARCH_ENDPOINT env var and connectivity)"
+            self.logger.error(item.error)
+            return False
+
+        key = ctx['key']
+        pipeline = self._pipeline
+
+        def on_ack(success: bool, error: Optional[str]):
+            if success:
+                result = ctx['result']
+                self.logger.info(
+                    f"Successfully processed: {Path(key).name} "
+                    f"({result.char_count:,} chars, {result.processing_time_seconds:.2f}s)"
                 )
+                self._remember_result(ctx)
+                pipeline.complete(item, True)
+            else:
+                pipeline.complete(item, False, f"Failed to index document to OpenSearch: {error}")
 
-                successful = len(response.get('Successful', []))
-                failed = response.get('Failed', [])
+        item.deferred = True
+        self.bulk_indexer.add(ctx['document'], document_id=key, callback=on_ack)
+        return True
 
-                if failed:
-                    for failure in failed:
-                        self.logger.error(f"Failed to delete message: {failure}")
-                        self._send_metric('MessageDeleteFailed', 1)
+    def _on_pipeline_complete(self, item: PipelineItem, success: bool):
+        """
+        Completion callback for the streaming pipeline
 
-                self.logger.info(f"Batch deleted {successful} messages")
+        Mirrors poll_and_process: failures go to the DLQ, every message is
+        deleted from the main queue (batched in groups of 10).
+        """
+        message = item.payload
+        message_id = message.get('MessageId', 'unknown')
 
-            except Exception as e:
-                self.logger.error(f"Batch delete failed: {e}", exc_info=True)
-                # Fallback to individual deletes
-                for msg in batch:
-                    try:
-                        self.sqs_client.delete_message(
-                            QueueUrl=self.config.aws.sqs_queue_url,
-                            ReceiptHandle=msg['ReceiptHandle']
-                        )
-                    except Exception as de:
-                        self.logger.error(f"Individual delete also failed: {de}")
-                        self._send_metric('MessageDeleteFailed', 1)
+        self._cleanup_message_context(item.context)
 
-    def poll_and_process(self):
+        consumer = self._queue_consumer
+
+        if item.context.get('deferred'):
+            # Returned to the queue, not processed
+            with self._stats_lock:
+                self.stats['deferred'] += 1
+            consumer.defer(message, self.config.processing.admission_defer_seconds)
+            return
+
+        if item.context.get('retry'):
+            # Not the file's fault: redelivered after the visibility timeout
+            self.logger.warning(f"Message {message_id} left on the queue: {item.error}")
+            with self._stats_lock:
+                self.stats['retried'] += 1
+            consumer.complete(message, False)
+            return
+
+        if self.concurrency is not None:
+            self.concurrency.record(sum(item.stage_timings.values()))
+
+        with self._stats_lock:
+            self.stats['processed'] += 1
+            if success:
+                self.stats['succeeded'] += 1
+            else:
+                self.stats['failed'] += 1
+
+        if success:
+            self.logger.info(f"Message {message_id} processed successfully")
+        else:
+            self.logger.error(
+                f"Message {message_id} processing failed at stage "
+                f"'{item.failed_stage}': {item.error}"
+            )
+            self._send_to_dlq(message, item.error)
+
+        # Frees the in-flight slot; the delete goes through the shared acknowledger
+        consumer.complete(message, True)
+
+    def build_pipeline(self) -> StreamingPipeline:
         """
-        Main worker loop with parallel processing
-        Polls SQS and processes messages using ThreadPoolExecutor
+        Build the streaming pipeline used by run_pipeline()
 
-        OPTIMIZED: Uses parallel processing for better throughput
+        Stages: download (parse + change detection + memory admission + S3 get) →
+        extract (FileRouter) →
+        enrich (thumbnail + embedding) → index (OpenSearch)
         """
-        self.logger.info("Starting to poll SQS queue with parallel processing...")
+        processing = self.config.processing
+        queue_size = processing.pipeline_queue_size
+
+        stages = [
+            Stage('download', self._make_pipeline_handler(
+                      self._stage_parse, self._stage_detect_change, self._stage_admit, self._stage_download),
+                  workers=processing.pipeline_download_workers, queue_size=queue_size),
+            Stage('extract', self._make_pipeline_handler(self._stage_extract),
+                  workers=self._current_max_workers(), queue_size=queue_size),
+            Stage('enrich', self._make_pipeline_handler(self._stage_enrich),
+                  workers=processing.pipeline_enrich_workers, queue_size=queue_size),
+            Stage('index', self._pipeline_index_handler,
+                  workers=processing.pipeline_index_workers, queue_size=queue_size),
+        ]
+
+        self._pipeline = StreamingPipeline(
+            stages=stages,
+            on_complete=self._on_pipeline_complete,
+            max_in_flight=processing.pipeline_max_in_flight
+        )
+        return self._pipeline
+
+    def run_pipeline(self):
+        """
+        Continuous streaming worker loop
+
+        Unlike poll_and_process(), received messages are not processed by one
+        worker thread each: the queue consumer keeps the pipeline topped up while
+        earlier messages are still downloading/extracting/indexing, so one slow
+        document only occupies a single extract worker.
+        """
+        self.logger.info("Starting to poll SQS queue in streaming pipeline mode...")
         self.logger.info(f"Queue URL: {self.config.aws.sqs_queue_url[:50]}...")
-        self.logger.info(f"Max workers: {self.config.processing.max_workers}")
-        self.logger.info(f"Batch size: {self.config.aws.sqs_max_messages}")
+        self.logger.info(f"Max in flight: {self.config.processing.pipeline_max_in_flight}")
 
         # Create OpenSearch index if it doesn't exist
         if self.opensearch.is_connected():
             self.opensearch.create_index()
 
-        while not self.shutdown_requested:
-            try:
-                # Receive messages from SQS
-                response = self.sqs_client.receive_message(
-                    QueueUrl=self.config.aws.sqs_queue_url,
-                    MaxNumberOfMessages=self.config.aws.sqs_max_messages,
-                    WaitTimeSeconds=self.config.aws.sqs_wait_time_seconds,
-                    VisibilityTimeout=self.config.aws.sqs_visibility_timeout,
-                )
+        pipeline = self.build_pipeline()
+        pipeline.start()
+        self._wire_concurrency(lambda workers: pipeline.resize_stage('extract', workers))
 
-                messages = response.get('Messages', [])
+        def dispatch(messages: List[Dict[str, Any]]):
+            self.logger.info(f"Received {len(messages)} message(s) - submitting to pipeline")
+            for ctx in self._prepare_contexts(messages):
+                pipeline.submit(ctx['message'], context=ctx)
 
-                if not messages:
-                    self.logger.debug("No messages received")
-                    continue
+        consumer = self._create_queue_consumer(
+            dispatch, max_in_flight=self.config.processing.pipeline_max_in_flight
+        )
+        self._run_queue_consumer(consumer, lambda: f"Pipeline stats: {pipeline.get_stats()}")
 
-                self.logger.info(f"Received {len(messages)} message(s) - processing in parallel")
-                batch_start = time.time()
+        self.logger.info("Draining pipeline before shutdown...")
+        pipeline.stop(drain_timeout=self.config.aws.sqs_visibility_timeout)
+        self._shutdown_backends()
 
-                # Process messages in parallel using ThreadPoolExecutor
-                messages_to_delete = []
+        self.logger.info("Worker stopped")
+        self._print_statistics()
 
-                with ThreadPoolExecutor(max_workers=self.config.processing.max_workers) as executor:
-                    # Submit all messages for processing
-                    future_to_message = {
-                        executor.submit(self._process_message_wrapper, msg): msg
-                        for msg in messages
-                    }
+    def _wire_concurrency(self, resize: Callable[[int], None]):
+        """
+        Apply adaptive concurrency changes to the running mode
 
-                    # Collect results as they complete
-                    for future in as_completed(future_to_message):
-                        if self.shutdown_requested:
-                            self.logger.info("Shutdown requested, stopping message processing")
-                            break
-
-                        try:
-                            message, success, error_msg = future.result()
-                            message_id = message.get('MessageId', 'unknown')
-                            self.stats['processed'] += 1
-
-                            if success:
-                                self.logger.info(f"Message {message_id} processed successfully")
-                                self.stats['succeeded'] += 1
-                            else:
-                                self.logger.error(f"Message {message_id} processing failed: {error_msg}")
-                                self._send_to_dlq(message, error_msg)
-                                self.stats['failed'] += 1
-
-                            # Always mark for deletion
-                            messages_to_delete.append(message)
-
-                        except Exception as e:
-                            message = future_to_message[future]
-                            message_id = message.get('MessageId', 'unknown')
-                            self.logger.error(f"Unexpected error processing {message_id}: {e}", exc_info=True)
-                            self._send_to_dlq(message, str(e))
-                            self.stats['failed'] += 1
-                            messages_to_delete.append(message)
-
-                # Batch delete all processed messages
-                self._delete_messages_batch(messages_to_delete)
-
-                batch_time = time.time() - batch_start
-                self.logger.info(
-                    f"Batch completed: {len(messages_to_delete)} messages in {batch_time:.2f}s "
-                    f"({len(messages_to_delete)/batch_time:.1f} msg/s)"
-                )
+        With EXTRACTION_BACKEND=process the extraction pool follows the worker
+        count too; otherwise resizing the threads would leave the number of
+        extraction processes fixed.
 
-            except KeyboardInterrupt:
-                self.logger.info("Received keyboard interrupt")
-                break
+        Args:
+            resize: Resizes the mode's extract workers
+        """
+        if self.concurrency is None:
+            return
 
-            except Exception as e:
-                self.logger.error(f"Error in polling loop: {e}", exc_info=True)
-                # Don't exit, continue processing
-                time.sleep(5)
+        def on_resize(workers: int):
+            resize(workers)
+            if self.extraction_pool is not None:
+                self.extraction_pool.resize(workers)
 
-        self.logger.info("Worker stopped")
-        self._print_statistics()
+        self.concurrency.on_resize = on_resize
+        if self.extraction_pool is not None:
+            # Children are spawned on first use, so this only sets the initial size
+            self.extraction_pool.resize(self.concurrency.current)
+
+    def _create_queue_consumer(
+        self,
+        dispatch: Callable[[List[Dict[str, Any]]], None],
+        max_in_flight: int
+    ) -> AsyncQueueConsumer:
+        """
+        Create the shared asyncio queue consumer for this worker
+
+        Long polls and visibility heartbeats run on the consumer's event loop and
+        deletes go through self.acknowledger. Messages are only received while
+        fewer than max_in_flight are being processed.
+
+        Args:
+            dispatch: Receives each batch; completion is reported with complete()/defer()
+            max_in_flight: Maximum messages being processed at once
+
+        Returns:
+            AsyncQueueConsumer (also kept as self._queue_consumer)
+        """
+        aws = self.config.aws
+        self._queue_consumer = AsyncQueueConsumer(
+            self.sqs_client,
+            aws.sqs_queue_url,
+            self.acknowledger,
+            dispatch=dispatch,
+            max_in_flight=max_in_flight,
+            pollers=self.config.processing.async_queue_pollers,
+            wait_time_seconds=aws.sqs_wait_time_seconds,
+            visibility_timeout=aws.sqs_visibility_timeout,
+            heartbeat_interval=aws.sqs_heartbeat_interval,
+            max_processing_time=aws.sqs_max_processing_time
+        )
+        return self._queue_consumer
+
+    def _run_queue_consumer(self, consumer: AsyncQueueConsumer, describe: Callable[[], str]):
+        """
+        Run the queue consumer until shutdown
+
+        This thread only watches for shutdown, adjusts concurrency and logs
+        statistics. On shutdown the consumer waits for in-flight messages.
+
+        Args:
+            consumer: Consumer from _create_queue_consumer
+            describe: Returns the mode-specific statistics line
+        """
+        consumer_thread = threading.Thread(target=consumer.run, name='queue-consumer', daemon=True)
+        consumer_thread.start()
+        last_stats_log = time.time()
+
+        while not self.shutdown_requested and consumer_thread.is_alive():
+            time.sleep(1.0)
+            if self.concurrency is not None:
+                self.concurrency.maybe_adjust()
+            if time.time() - last_stats_log >= 60:
+                self.logger.info(f"{describe()}, consumer: {consumer.get_stats()}")
+                last_stats_log = time.time()
+
+        consumer.stop()
+        consumer_thread.join()
+
+    def _shutdown_backends(self):
+        """
+        Flush the embedding queue, bulk indexer and upload pool, stop the
+        extraction pool, then send the remaining SQS deletes
+        """
+        if self.embedding_queue is not None:
+            self.embedding_queue.close()
+        self.upload_pool.close()
+        if self.bulk_indexer is not None:
+            self.bulk_indexer.close()
+        if self.extraction_pool is not None:
+            self.extraction_pool.shutdown()
+        # Last, so acks from the final bulk flush are included
+        self.acknowledger.close()
 
     def _send_metric(self, metric_name: str, value: float):
         """
@@ -854,6 +1538,28 @@ class FileProcessingWorker:
         self.logger.info(f"Succeeded: {self.stats['succeeded']}")
         self.logger.info(f"Failed: {self.stats['failed']}")
         self.logger.info(f"Sent to DLQ: {self.stats['sent_to_dlq']}")
+        self.logger.info(f"Left on queue for retry: {self.stats['retried']}")
+        if self.change_detector is not None:
+            self.logger.info(
+                f"Change Detection: {self.stats['unchanged_skipped']} unchanged, "
+                f"{self.stats['metadata_updated']} metadata-only, "
+                f"{self.stats['reprocessed']} reprocessed"
+            )
+        if self.embedding_queue is not None:
+            self.logger.info(f"Embedding Batching: {self.embedding_queue.stats}")
+        if self.bulk_indexer is not None:
+            self.logger.info(f"Bulk Indexing: {self.bulk_indexer.stats}")
+        if self.extraction_pool is not None:
+            self.logger.info(f"Extraction Pool: {self.extraction_pool.get_stats()}")
+        if self.result_cache is not None:
+            self.logger.info(f"Result Cache: {self.result_cache.get_stats()}")
+        if self.concurrency is not None:
+            self.logger.info(f"Adaptive Concurrency: {self.concurrency.get_stats()}")
+        if self.admission is not None:
+            self.logger.info(
+                f"Admission Control: {self.stats['deferred']} deferred, {self.admission.get_stats()}"
+            )
+        self.logger.info(f"SQS Deletes: {self.acknowledger.get_stats()}")
 
         if self.stats['processed'] > 0:
             success_rate = (self.stats['succeeded'] / self.stats['processed']) * 100
@@ -880,6 +1586,10 @@ Environment Variables:
   OPENSEARCH_ENDPOINT    OpenSearch endpoint URL
   OPENSEARCH_INDEX       OpenSearch index name (default: file-index)
   LOG_LEVEL              Logging level (DEBUG, INFO, WARNING, ERROR)
+  PIPELINE_MODE          Run the streaming pipeline instead of batch polling (true/false)
+  EXTRACTION_BACKEND     'thread' (default) or 'process' for a persistent process pool
+  CHANGE_DETECTION       Skip objects unchanged since they were last indexed (true/false)
+  EMBEDDING_BATCH_ENABLED Send queued images to the embedding Lambda in batches (true/false)
 
 Example:
   python worker_fixed.py
@@ -899,10 +1609,24 @@ Example:
         help='Create OpenSearch index and exit'
     )
 
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='Run in streaming pipeline mode (also enabled by PIPELINE_MODE=true)'
+    )
+
+    parser.add_argument(
+        '--change-detection',
+        action='store_true',
+        help='Skip re-synced objects that are unchanged (also enabled by CHANGE_DETECTION=true)'
+    )
+
     args = parser.parse_args()
 
     # Load configuration
     config = get_config()
+    if args.change_detection:
+        config.processing.change_detection = True
 
     # Setup logging
     logger = setup_logging(config)
@@ -937,7 +1661,10 @@ Example:
     # Create and start worker
     try:
         worker = FileProcessingWorker(config)
-        worker.poll_and_process()
+        if args.pipeline or config.processing.pipeline_mode:
+            worker.run_pipeline()
+        else:
+            worker.poll_and_process()
 
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
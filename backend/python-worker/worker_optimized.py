@@ -13,6 +13,7 @@ import tempfile
 import argparse
 import signal
 import gc
+import threading
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 from datetime import datetime
@@ -27,7 +28,8 @@ from config import get_config
 from file_router import FileRouter
 from opensearch_client import OpenSearchClient
 from services.resource_manager import ResourceManager
-from services.batch_processor import MessageBatcher
+from services.message_acknowledger import MessageAcknowledger
+from services.queue_consumer import AsyncQueueConsumer
 
 
 # Configure logging
@@ -85,6 +87,40 @@ class ProcessingStats:
         self.failed += 1
 
 
+# Per-process state created once by the pool initializer
+_process_state: Dict[str, Any] = {}
+
+
+def _init_process_worker(config_dict: Dict[str, Any]):
+    """
+    Pool initializer: create config, file router and AWS clients once per child
+
+    Args:
+        config_dict: Serializable config values from the parent process
+    """
+    from config import Config
+
+    config = Config()
+    config.aws.region = config_dict['region']
+    config.aws.s3_bucket = config_dict['s3_bucket']
+    config.aws.opensearch_endpoint = config_dict['opensearch_endpoint']
+    config.aws.opensearch_index = config_dict['opensearch_index']
+
+    boto_config = BotoConfig(
+        region_name=config_dict['region'],
+        retries={'max_attempts': 3, 'mode': 'adaptive'},
+        max_pool_connections=10
+    )
+
+    _process_state['config_dict'] = dict(config_dict)
+    _process_state['config'] = config
+    _process_state['s3_client'] = boto3.client('s3', config=boto_config)
+    _process_state['file_router'] = FileRouter(config)
+    _process_state['opensearch'] = OpenSearchClient(config)
+
+    logging.getLogger(f"Worker-{os.getpid()}").info("Worker process initialized")
+
+
 def process_single_message(args: tuple) -> Dict[str, Any]:
     """
     Process a single SQS message (worker function for multiprocessing)
@@ -127,24 +163,14 @@ def process_single_message(args: tuple) -> Dict[str, Any]:
 
         logger.info(f"Processing: s3://{bucket}/{key}")
 
-        # Initialize AWS clients (per-process)
-        boto_config = BotoConfig(
-            region_name=config_dict['region'],
-            retries={'max_attempts': 3, 'mode': 'adaptive'},
-            max_pool_connections=10
-        )
-        s3_client = boto3.client('s3', config=boto_config)
-
-        # Initialize file router and OpenSearch client
-        from config import Config
-        config = Config()
-        config.aws.region = config_dict['region']
-        config.aws.s3_bucket = config_dict['s3_bucket']
-        config.aws.opensearch_endpoint = config_dict['opensearch_endpoint']
-        config.aws.opensearch_index = config_dict['opensearch_index']
+        # Reuse per-process clients (created by the pool initializer, or lazily
+        # when called outside the pool / with a changed config)
+        if _process_state.get('config_dict') != config_dict:
+            _init_process_worker(config_dict)
 
-        file_router = FileRouter(config)
-        opensearch = OpenSearchClient(config)
+        s3_client = _process_state['s3_client']
+        file_router = _process_state['file_router']
+        opensearch = _process_state['opensearch']
 
         # Check file type support
         if not file_router.is_supported(key):
@@ -264,12 +290,15 @@ class OptimizedFileProcessingWorker:
 
         self.sqs_client = boto3.client('sqs', config=boto_config)
 
-        # Initialize message batcher
-        self.message_batcher = MessageBatcher(
+        # Deletes are coalesced into DeleteMessageBatch calls
+        self.acknowledger = MessageAcknowledger(
             self.sqs_client,
             config.aws.sqs_queue_url,
-            config
+            visibility_timeout=config.aws.sqs_visibility_timeout,
+            max_delay=config.aws.sqs_ack_max_delay,
+            urgent_seconds=config.aws.sqs_ack_urgent_seconds
         )
+        self._consumer: Optional[AsyncQueueConsumer] = None
 
         # Initialize resource manager
         self.resource_manager = ResourceManager(config)
@@ -291,6 +320,8 @@ class OptimizedFileProcessingWorker:
             'total_index_time': 0.0,
         })
 
+        self._stats_lock = threading.Lock()
+
         # Files processed counter for GC
         self.files_since_gc = 0
         self.gc_interval = 50  # Force GC every 50 files
@@ -301,6 +332,8 @@ class OptimizedFileProcessingWorker:
         """Handle shutdown signals"""
         self.logger.info(f"Received signal {signum}, initiating graceful shutdown...")
         self.shutdown_requested = True
+        if self._consumer is not None:
+            self._consumer.stop()
 
     def _create_config_dict(self) -> Dict[str, Any]:
         """Create serializable config dict for worker processes"""
@@ -313,87 +346,57 @@ class OptimizedFileProcessingWorker:
         }
 
     def poll_and_process(self):
-        """Main worker loop with multiprocessing"""
+        """
+        Main worker loop with multiprocessing
+
+        Messages are received by the shared asyncio queue consumer, which keeps
+        one message in flight per worker process and refills as each completes,
+        so a slow file no longer holds back the rest of a pool.map() batch.
+        """
         self.logger.info("Starting optimized worker loop...")
         self.logger.info(f"Queue URL: {self.config.aws.sqs_queue_url[:50]}...")
 
-        # Create worker pool (reusable)
-        with Pool(processes=self.worker_count) as pool:
-            while not self.shutdown_requested:
-                try:
-                    # Check resource health before processing
-                    if not self._check_resource_health():
-                        self.logger.warning("Unhealthy resources, waiting...")
-                        time.sleep(30)
-                        continue
-
-                    # Receive messages in batch
-                    messages = self.message_batcher.receive_message_batch()
+        # Create worker pool (reusable); children initialize clients once and
+        # are replaced after a fixed number of tasks to bound memory growth
+        config_dict = self._create_config_dict()
+        with Pool(
+            processes=self.worker_count,
+            initializer=_init_process_worker,
+            initargs=(config_dict,),
+            maxtasksperchild=self.config.processing.extraction_max_tasks_per_child or None
+        ) as pool:
+            aws = self.config.aws
+            self._consumer = AsyncQueueConsumer(
+                self.sqs_client,
+                aws.sqs_queue_url,
+                self.acknowledger,
+                handler=lambda message: self._handle_message(pool, message, config_dict),
+                max_in_flight=self.worker_count,
+                pollers=self.config.processing.async_queue_pollers,
+                wait_time_seconds=aws.sqs_wait_time_seconds,
+                visibility_timeout=aws.sqs_visibility_timeout,
+                heartbeat_interval=aws.sqs_heartbeat_interval,
+                max_processing_time=aws.sqs_max_processing_time
+            )
+            if self.shutdown_requested:
+                self._consumer.stop()
 
-                    if not messages:
-                        self.logger.debug("No messages received")
+            consumer_thread = threading.Thread(target=self._consumer.run, name='queue-consumer', daemon=True)
+            consumer_thread.start()
 
+            try:
+                while consumer_thread.is_alive():
+                    consumer_thread.join(timeout=10.0)
+                    if self._consumer.in_flight() == 0:
                         # Periodic maintenance during idle time
                         self._perform_maintenance()
-                        continue
-
-                    self.logger.info(f"Received {len(messages)} message(s)")
-
-                    # Prepare arguments for worker processes
-                    config_dict = self._create_config_dict()
-                    worker_args = [(msg, config_dict) for msg in messages]
-
-                    # Process messages in parallel
-                    batch_start = time.time()
-                    results = pool.map(process_single_message, worker_args)
-                    batch_time = time.time() - batch_start
-
-                    # Collect results and delete successful messages
-                    successful_handles = []
-
-                    for result in results:
-                        self.stats['processed'] = self.stats['processed'] + 1
-
-                        if result['success']:
-                            self.stats['succeeded'] = self.stats['succeeded'] + 1
-                            self.stats['total_download_time'] = self.stats['total_download_time'] + result['download_time']
-                            self.stats['total_ocr_time'] = self.stats['total_ocr_time'] + result['ocr_time']
-                            self.stats['total_index_time'] = self.stats['total_index_time'] + result['index_time']
-
-                            successful_handles.append(result['receipt_handle'])
-                        else:
-                            self.stats['failed'] = self.stats['failed'] + 1
-                            self.logger.error(f"Processing failed: {result['error']}")
-
-                    # Batch delete successful messages
-                    if successful_handles:
-                        delete_result = self.message_batcher.delete_message_batch(successful_handles)
-                        self.logger.info(
-                            f"Batch delete: {delete_result['successful']}/{len(successful_handles)} succeeded"
-                        )
-
-                    # Log batch statistics
-                    throughput = len(messages) / batch_time if batch_time > 0 else 0
-                    self.logger.info(
-                        f"Batch completed: {len(results)} messages in {batch_time:.2f}s "
-                        f"({throughput:.2f} msg/s)"
-                    )
-
-                    # Increment file counter for GC
-                    self.files_since_gc += len(messages)
-
-                    # Force garbage collection periodically
-                    if self.files_since_gc >= self.gc_interval:
-                        self._force_garbage_collection()
-                        self.files_since_gc = 0
-
-                except KeyboardInterrupt:
-                    self.logger.info("Received keyboard interrupt")
-                    break
-
-                except Exception as e:
-                    self.logger.error(f"Error in polling loop: {e}", exc_info=True)
-                    time.sleep(5)  # Back off on errors
+            except KeyboardInterrupt:
+                self.logger.info("Received keyboard interrupt")
+                self._consumer.stop()
+                consumer_thread.join()
+
+        # Send any pending deletes
+        self.acknowledger.close()
 
         self.logger.info("Worker stopped")
         self._print_statistics()
@@ -401,6 +404,50 @@ class OptimizedFileProcessingWorker:
         # Final cleanup
         self.resource_manager.cleanup_all()
 
+    def _handle_message(self, pool: Pool, message: Dict[str, Any], config_dict: Dict[str, Any]) -> bool:
+        """
+        Process one message received by the queue consumer in a worker process
+
+        Args:
+            pool: Worker process pool
+            message: SQS message
+            config_dict: Serializable config values for the worker processes
+
+        Returns:
+            True to delete the message; failed messages are redelivered
+        """
+        # Check resource health before processing
+        if not self._check_resource_health():
+            self.logger.warning("Unhealthy resources, returning message to the queue")
+            self._consumer.defer(message, 30)
+            return False
+
+        result = pool.apply(process_single_message, ((message, config_dict),))
+
+        with self._stats_lock:
+            self.stats['processed'] = self.stats['processed'] + 1
+
+            if result['success']:
+                self.stats['succeeded'] = self.stats['succeeded'] + 1
+                self.stats['total_download_time'] = self.stats['total_download_time'] + result['download_time']
+                self.stats['total_ocr_time'] = self.stats['total_ocr_time'] + result['ocr_time']
+                self.stats['total_index_time'] = self.stats['total_index_time'] + result['index_time']
+            else:
+                self.stats['failed'] = self.stats['failed'] + 1
+                self.logger.error(f"Processing failed: {result['error']}")
+
+            # Increment file counter for GC
+            self.files_since_gc += 1
+            collect = self.files_since_gc >= self.gc_interval
+            if collect:
+                self.files_since_gc = 0
+
+        # Force garbage collection periodically
+        if collect:
+            self._force_garbage_collection()
+
+        return result['success']
+
     def _check_resource_health(self) -> bool:
         """Check if system resources are healthy"""
         try:
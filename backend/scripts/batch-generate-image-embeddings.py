@@ -16,7 +16,8 @@ import time
 import argparse
 import logging
 import tempfile
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import Iterator, List, Dict, Optional
 from pathlib import Path
 from datetime import datetime
 
@@ -25,6 +26,9 @@ from botocore.exceptions import ClientError
 from opensearchpy import OpenSearch, RequestsHttpConnection, helpers
 from requests_aws4auth import AWS4Auth
 
+from bulk_update_writer import BulkUpdateWriter
+from document_scanner import DocumentScanner
+
 # ロギング設定
 logging.basicConfig(
     level=logging.INFO,
@@ -53,7 +57,8 @@ class BatchEmbeddingGenerator:
         aws_region: str = 'ap-northeast-1',
         batch_size: int = 10,
         tps_limit: int = 8,
-        state_file: str = 'batch-progress.json'
+        state_file: str = 'batch-progress.json',
+        bulk_size: int = 200
     ):
         """
         初期化
@@ -68,6 +73,7 @@ class BatchEmbeddingGenerator:
             batch_size: バッチサイズ
             tps_limit: スロットリング制限 (TPS)
             state_file: 進捗状況ファイル
+            bulk_size: 1回の_bulkリクエストにまとめるベクトル更新数
         """
         self.opensearch_index = opensearch_index
         self.s3_bucket = s3_bucket
@@ -100,6 +106,16 @@ class BatchEmbeddingGenerator:
             timeout=60
         )
 
+        # ベクトル更新は_bulkでまとめて送信（結果は_on_update_resultで集計）
+        self.update_writer = BulkUpdateWriter(
+            self.opensearch,
+            opensearch_index,
+            max_docs=bulk_size,
+            retry_on_conflict=3
+        )
+        # 更新が確定した（バルク応答で成功した）ドキュメントID
+        self.processed_file_ids: List[str] = []
+
         # 統計情報
         self.stats = {
             'total_files': 0,
@@ -116,69 +132,79 @@ class BatchEmbeddingGenerator:
         logger.info(f"  Bedrock Model: {bedrock_model}")
         logger.info(f"  Batch Size: {batch_size}, TPS Limit: {tps_limit}")
 
-    def get_image_files_without_vector(self, max_files: Optional[int] = None) -> List[Dict]:
+    def _without_vector_query(self) -> Dict:
+        """クエリ: 画像拡張子 AND image_vectorフィールドなし"""
+        return {
+            "bool": {
+                "must": [
+                    {
+                        "terms": {
+                            "file_extension": list(self.IMAGE_EXTENSIONS)
+                        }
+                    }
+                ],
+                "must_not": [
+                    {
+                        "exists": {
+                            "field": "image_vector"
+                        }
+                    }
+                ]
+            }
+        }
+
+    def count_image_files_without_vector(self) -> int:
+        """ベクトルがない画像ファイルの件数を取得"""
+        try:
+            response = self.opensearch.count(
+                index=self.opensearch_index,
+                body={"query": self._without_vector_query()}
+            )
+            return response['count']
+        except Exception as e:
+            logger.error(f"Failed to count files in OpenSearch: {e}")
+            return 0
+
+    def get_image_files_without_vector(self, max_files: Optional[int] = None) -> Iterator[Dict]:
         """
-        ベクトルがない画像ファイルを取得
+        ベクトルがない画像ファイルを順に取得（PIT + search_after）
+
+        ページ単位で遅延取得するため、10,000件の上限なく全件を走査でき、
+        最初のページから処理を開始できる。
 
         Args:
             max_files: 最大取得件数
 
-        Returns:
-            ファイル情報のリスト
+        Yields:
+            ファイル情報
         """
         logger.info("Fetching image files without vectors from OpenSearch...")
 
-        try:
-            # クエリ: 画像拡張子 AND image_vectorフィールドなし
-            query = {
-                "query": {
-                    "bool": {
-                        "must": [
-                            {
-                                "terms": {
-                                    "file_extension": list(self.IMAGE_EXTENSIONS)
-                                }
-                            }
-                        ],
-                        "must_not": [
-                            {
-                                "exists": {
-                                    "field": "image_vector"
-                                }
-                            }
-                        ]
-                    }
-                },
-                "size": max_files or 10000,
-                "_source": ["file_name", "file_path", "file_key", "bucket", "s3_url", "file_extension"],
-                "sort": [{"indexed_at": "desc"}]  # 新しいファイルから処理
-            }
-
-            response = self.opensearch.search(
-                index=self.opensearch_index,
-                body=query
-            )
+        scanner = DocumentScanner(
+            self.opensearch,
+            self.opensearch_index,
+            query=self._without_vector_query(),
+            source=["file_name", "file_path", "file_key", "bucket", "s3_url", "file_extension"],
+            sort=[{"indexed_at": "desc"}],  # 新しいファイルから処理
+            page_size=min(1000, max_files or 1000),
+            limit=max_files
+        )
 
-            files = []
-            for hit in response['hits']['hits']:
+        try:
+            for hit in scanner:
                 source = hit['_source']
-                files.append({
+                yield {
                     'doc_id': hit['_id'],
                     'file_name': source.get('file_name'),
                     'file_path': source.get('file_path') or source.get('s3_url'),
                     'file_key': source.get('file_key'),
                     'bucket': source.get('bucket') or self.s3_bucket,
                     'extension': source.get('file_extension')
-                })
-
-            logger.info(f"Found {len(files)} image files without vectors")
-            self.stats['total_files'] = len(files)
-
-            return files
-
+                }
         except Exception as e:
             logger.error(f"Failed to fetch files from OpenSearch: {e}")
-            return []
+
+        logger.info(f"Fetched {scanner.stats['documents']} image files without vectors")
 
     def download_image_from_s3(self, bucket: str, key: str) -> Optional[str]:
         """
@@ -283,34 +309,34 @@ class BatchEmbeddingGenerator:
 
     def update_document_vector(self, doc_id: str, embedding: List[float]) -> bool:
         """
-        OpenSearchドキュメントにベクトルを追加
+        OpenSearchドキュメントへのベクトル追加をバルク更新キューに追加
 
         Args:
             doc_id: ドキュメントID
             embedding: ベクトル
 
         Returns:
-            成功の場合True
+            キューに追加できた場合True（更新結果は_on_update_resultで集計）
         """
-        try:
-            self.opensearch.update(
-                index=self.opensearch_index,
-                id=doc_id,
-                body={
-                    "doc": {
-                        "image_vector": embedding,
-                        "vector_updated_at": datetime.utcnow().isoformat()
-                    }
-                },
-                refresh=False  # パフォーマンス向上のため、refreshは後でまとめて実行
-            )
-
-            logger.debug(f"Updated document: {doc_id}")
-            return True
-
-        except Exception as e:
-            logger.error(f"Failed to update document {doc_id}: {e}")
-            return False
+        self.update_writer.add(
+            doc_id,
+            {
+                "image_vector": embedding,
+                "vector_updated_at": datetime.utcnow().isoformat()
+            },
+            callback=lambda success, error: self._on_update_result(doc_id, success, error)
+        )
+        logger.debug(f"Queued update: {doc_id}")
+        return True
+
+    def _on_update_result(self, doc_id: str, success: bool, error: Optional[str]):
+        """バルク更新の結果を集計（成功したIDのみ進捗に記録）"""
+        if success:
+            self.stats['succeeded'] += 1
+            self.processed_file_ids.append(doc_id)
+        else:
+            self.stats['failed'] += 1
+            logger.error(f"Failed to update document {doc_id}: {error}")
 
     def process_file(self, file_info: Dict) -> bool:
         """
@@ -441,55 +467,57 @@ class BatchEmbeddingGenerator:
         logger.info("=" * 60)
 
         # 進捗状況読み込み（リジューム時）
-        processed_file_ids = []
         if resume:
-            processed_file_ids = self.load_progress()
+            self.processed_file_ids = self.load_progress()
+        processed_file_ids = set(self.processed_file_ids)
 
-        # ベクトルがないファイルを取得
-        files = self.get_image_files_without_vector(max_files)
+        # ベクトルがないファイル数を取得（ファイル自体はページ単位で遅延取得）
+        total = self.count_image_files_without_vector()
+        if max_files:
+            total = min(total, max_files)
+        logger.info(f"Found {total} image files without vectors")
+        self.stats['total_files'] = total
 
-        if not files:
+        if not total:
             logger.info("No files to process")
             return
 
-        # リジューム時は処理済みファイルをスキップ
+        files = self.get_image_files_without_vector(max_files)
+
+        # リジューム時は処理済みファイルをスキップ（ベクトル更新済みのものは件数に含まれない）
         if resume:
-            files = [f for f in files if f['doc_id'] not in processed_file_ids]
-            logger.info(f"Remaining files after resume: {len(files)}")
+            files = (f for f in files if f['doc_id'] not in processed_file_ids)
 
         if dry_run:
-            logger.info(f"DRY RUN: Would process {len(files)} files")
-            for i, file_info in enumerate(files[:10], 1):
+            logger.info(f"DRY RUN: Would process {total} files")
+            for i, file_info in enumerate(islice(files, 10), 1):
                 logger.info(f"  {i}. {file_info['file_name']} (ID: {file_info['doc_id'][:8]}...)")
-            if len(files) > 10:
-                logger.info(f"  ... and {len(files) - 10} more files")
+            if total > 10:
+                logger.info(f"  ... and {total - 10} more files")
             return
 
         # バッチ処理
         delay = 1.0 / self.tps_limit
 
         for i, file_info in enumerate(files, 1):
-            logger.info(f"Progress: {i}/{len(files)} ({i/len(files)*100:.1f}%)")
+            logger.info(f"Progress: {i}/{total} ({i/max(total, 1)*100:.1f}%)")
 
             self.stats['processed'] += 1
 
-            success = self.process_file(file_info)
-
-            if success:
-                self.stats['succeeded'] += 1
-                processed_file_ids.append(file_info['doc_id'])
-            else:
+            # 成功はバルク応答時に_on_update_resultで集計
+            if not self.process_file(file_info):
                 self.stats['failed'] += 1
 
             # 進捗保存（10ファイルごと）
             if i % 10 == 0:
-                self.save_progress(processed_file_ids)
+                self.save_progress(self.processed_file_ids)
                 self.send_metrics()
 
             # スロットリング対策
             time.sleep(delay)
 
-        # 最終的にrefresh
+        # 残りのベクトル更新を送信してからrefresh
+        self.update_writer.close()
         logger.info("Refreshing OpenSearch index...")
         self.opensearch.indices.refresh(index=self.opensearch_index)
 
@@ -508,7 +536,7 @@ class BatchEmbeddingGenerator:
         logger.info("=" * 60)
 
         # 最終進捗保存
-        self.save_progress(processed_file_ids)
+        self.save_progress(self.processed_file_ids)
         self.send_metrics()
 
 
@@ -559,6 +587,8 @@ Examples:
                         help='Resume from last checkpoint')
     parser.add_argument('--state-file', default='batch-progress.json',
                         help='Progress state file')
+    parser.add_argument('--bulk-size', type=int, default=200,
+                        help='Vector updates per OpenSearch _bulk request')
 
     args = parser.parse_args()
 
@@ -582,7 +612,8 @@ Examples:
             aws_region=args.aws_region,
             batch_size=args.batch_size,
             tps_limit=args.tps_limit,
-            state_file=args.state_file
+            state_file=args.state_file,
+            bulk_size=args.bulk_size
         )
 
         generator.run(
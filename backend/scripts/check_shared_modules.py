@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Shared Module Checker
+デプロイ単位ごとに複製している共有モジュールが同一実装のままかを確認する（CIで実行）
+
+python-worker / ec2-worker / backend/scripts はそれぞれ別々にパッケージングされるため、
+共通のモジュールはコピーして配置している。モジュールdocstring（コピー元の説明）以外の
+差分があれば終了コード1で失敗する。
+
+Usage:
+    python3 backend/scripts/check_shared_modules.py
+"""
+
+import ast
+import difflib
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# 同一実装でなければならないモジュールの組（backendからの相対パス）
+SHARED_MODULES: List[Tuple[str, str]] = [
+    ('python-worker/services/upload_pool.py', 'ec2-worker/src/upload_pool.py'),
+    ('python-worker/services/office_pool.py', 'ec2-worker/src/office_pool.py'),
+    ('python-worker/services/queue_consumer.py', 'ec2-worker/src/queue_consumer.py'),
+    ('python-worker/services/message_acknowledger.py', 'ec2-worker/src/message_acknowledger.py'),
+    ('scripts/bulk_update_writer.py', 'ec2-worker/src/bulk_update_writer.py'),
+    ('scripts/document_scanner.py', 'ec2-worker/src/document_scanner.py'),
+]
+
+
+def strip_module_docstring(source: str) -> List[str]:
+    """
+    モジュールdocstringを除いたソース行を返す
+
+    Args:
+        source: Pythonソース
+
+    Returns:
+        docstringより後の行
+    """
+    lines = source.splitlines(keepends=True)
+    tree = ast.parse(source)
+    if ast.get_docstring(tree, clean=False) is None:
+        return lines
+    return lines[tree.body[0].end_lineno:]
+
+
+def compare(original: str, copy: str) -> List[str]:
+    """
+    2つのモジュールを比較
+
+    Args:
+        original: コピー元（backendからの相対パス）
+        copy: コピー先（backendからの相対パス）
+
+    Returns:
+        unified diffの行（同一なら空）
+    """
+    original_lines = strip_module_docstring((BACKEND_DIR / original).read_text(encoding='utf-8'))
+    copy_lines = strip_module_docstring((BACKEND_DIR / copy).read_text(encoding='utf-8'))
+    return list(difflib.unified_diff(original_lines, copy_lines, fromfile=original, tofile=copy))
+
+
+def main() -> int:
+    mismatched = 0
+    for original, copy in SHARED_MODULES:
+        diff = compare(original, copy)
+        if diff:
+            mismatched += 1
+            print(f"MISMATCH: {original} != {copy}")
+            sys.stdout.writelines(diff)
+            print()
+        else:
+            print(f"OK: {original} == {copy}")
+
+    if mismatched:
+        print(f"{mismatched} shared module pair(s) differ - apply the change to both copies")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())